@@ -0,0 +1,53 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LruCache:
+    """
+    Cache which evicts least recently used entries when total size of the
+    entries exceeds `max_size`. Size of an entry is given when it is put,
+    so the cache may be bounded by the number of entries or by bytes.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        # Every entry is (value, size)
+        self._entries = OrderedDict()
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int = 1):
+        self.remove(key)
+        # Entries larger than the whole cache are not stored
+        if size > self.max_size:
+            return
+        self._entries[key] = (value, size)
+        self._size += size
+        while self._size > self.max_size:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+
+    def remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
@@ -1,13 +1,47 @@
+import sys
 from collections import OrderedDict
-from typing import Dict, List
+from typing import Dict, List, Mapping
 
 import msgpack
 from common.serializers.mapping_serializer import MappingSerializer
 from common.serializers.stream_serializer import StreamSerializer
 
+# Plain dicts keep insertion order only since Python 3.6, on older versions
+# decoded dicts are OrderedDicts to keep the serialized (sorted) order
+OBJECT_PAIRS_HOOK = None if sys.version_info >= (3, 6) else OrderedDict
 
-def decode_to_sorted(obj):
-    return OrderedDict(obj)
+
+class LedgerTxn(Mapping):
+    """
+    Read-only view of a msgpack serialized txn which is decoded on first
+    access. Serializing it with `MsgPackSerializer` gives back the original
+    bytes without decoding them.
+    """
+
+    __slots__ = ('serialized', '_txn')
+
+    def __init__(self, serialized: bytes):
+        self.serialized = bytes(serialized)
+        self._txn = None
+
+    @property
+    def txn(self) -> dict:
+        if self._txn is None:
+            self._txn = msgpack.unpackb(self.serialized, encoding='utf-8',
+                                        object_pairs_hook=OBJECT_PAIRS_HOOK)
+        return self._txn
+
+    def __getitem__(self, key):
+        return self.txn[key]
+
+    def __iter__(self):
+        return iter(self.txn)
+
+    def __len__(self):
+        return len(self.txn)
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.txn)
 
 
 class MsgPackSerializer(MappingSerializer, StreamSerializer):
@@ -17,29 +51,71 @@ class MsgPackSerializer(MappingSerializer, StreamSerializer):
     The serializer preserves the order (in sorted order)
     '"""
 
+    def __init__(self):
+        self._packer = msgpack.Packer(use_bin_type=True)
+
+    # Packer can't be pickled, serializers are passed to worker processes
+    def __getstate__(self):
+        return {}
+
+    def __setstate__(self, state):
+        self.__init__()
+
     def serialize(self, data: Dict, fields=None, toBytes=True):
         """
         Serializes a dict to bytes preserving the order (in sorted order)
         :param data: the data to be serialized
         :return: serialized data as bytes
         """
-        if isinstance(data, Dict):
-            data = self._sort_dict(data)
+        if isinstance(data, LedgerTxn):
+            return data.serialized
+        if isinstance(data, dict):
+            return self._pack_sorted_dict(data)
         return msgpack.packb(data, use_bin_type=True)
 
     def deserialize(self, data, fields=None):
         """
-        Deserializes msgpack bytes to OrderedDict (in the same sorted order as for serialize)
+        Deserializes msgpack bytes to dict (in the same sorted order as for serialize),
+        an OrderedDict before Python 3.6
         :param data: the data in bytes
-        :return: sorted OrderedDict
+        :return: dict
         """
         # TODO: it can be that we returned data by `get_lines`, that is already deserialized
         if not isinstance(data, (bytes, bytearray)):
             return data
-        return msgpack.unpackb(data, encoding='utf-8', object_pairs_hook=decode_to_sorted)
+        return msgpack.unpackb(data, encoding='utf-8', object_pairs_hook=OBJECT_PAIRS_HOOK)
+
+    def deserialize_lazy(self, data):
+        """
+        Wraps msgpack bytes into a `LedgerTxn` view which is decoded on first
+        access
+        """
+        if not isinstance(data, (bytes, bytearray)):
+            return data
+        return LedgerTxn(data)
 
     def get_lines(self, stream):
-        return msgpack.Unpacker(stream, encoding='utf-8', object_pairs_hook=decode_to_sorted)
+        return msgpack.Unpacker(stream, encoding='utf-8', object_pairs_hook=OBJECT_PAIRS_HOOK)
+
+    def _pack_sorted_dict(self, d: dict) -> bytes:
+        """
+        Packs a dict with keys in sorted order without building sorted
+        copies of it, gives the same bytes as packing of `_sort_dict(d)`
+        """
+        packer = self._packer
+        parts = [packer.pack_map_header(len(d))]
+        for k, v in sorted(d.items()):
+            parts.append(packer.pack(k))
+            if isinstance(v, dict):
+                parts.append(self._pack_sorted_dict(v))
+            elif isinstance(v, list):
+                parts.append(packer.pack_array_header(len(v)))
+                for sub_v in v:
+                    parts.append(self._pack_sorted_dict(sub_v)
+                                 if isinstance(sub_v, dict) else packer.pack(sub_v))
+            else:
+                parts.append(packer.pack(v))
+        return b''.join(parts)
 
     def _sort_dict(self, d) -> OrderedDict:
         if not isinstance(d, Dict):
@@ -0,0 +1,37 @@
+from common.lru_cache import LruCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LruCache(10)
+    cache.put('a', 1, size=4)
+    cache.put('b', 2, size=4)
+    assert cache.get('a') == 1
+    cache.put('c', 3, size=4)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.size == 8
+
+    # Entries larger than the cache are not stored
+    cache.put('d', 4, size=11)
+    assert cache.get('d') is None
+    assert len(cache) == 2
+
+
+def test_lru_cache_replaces_and_removes_entries():
+    cache = LruCache(10)
+    cache.put('a', 1, size=4)
+    cache.put('b', 2, size=4)
+    cache.put('a', 3, size=2)
+    assert cache.get('a') == 3
+    assert cache.size == 6
+
+    # Replaced entry is not kept if the new one is too large
+    cache.put('b', 4, size=11)
+    assert 'b' not in cache
+    assert cache.size == 2
+
+    cache.remove('a')
+    cache.remove('c')
+    assert cache.size == 0
+    assert len(cache) == 0
@@ -1,6 +1,9 @@
+import sys
 from collections import OrderedDict
 
-from common.serializers.msgpack_serializer import MsgPackSerializer
+import msgpack
+
+from common.serializers.msgpack_serializer import MsgPackSerializer, LedgerTxn
 
 serializer = MsgPackSerializer()
 
@@ -132,3 +135,49 @@ def test_sorted():
     ])
     sorted_input = serializer._sort_dict(value)
     assert expected == sorted_input
+
+
+def test_serialized_as_sorted_dict():
+    values = [
+        {'b': 1, 'a': {'d': [1, {'f': 2, 'e': None}], 'c': b'bytes'}},
+        OrderedDict([('b', 1), ('a', 2)]),
+        # Only dicts which are values or items of lists of dicts are sorted
+        {'b': [[{'d': 1, 'c': 2}]], 'a': ({'d': 1, 'c': 2},)},
+        [{'b': 1, 'a': 2}],
+        {2: 'a', 1: 'b'},
+        {},
+        'a', 1, None, 1.5,
+    ]
+    for value in values:
+        assert serializer.serialize(value) == \
+            msgpack.packb(serializer._sort_dict(value), use_bin_type=True)
+
+
+def test_deserialized_in_sorted_order():
+    # Plain dicts keep order since Python 3.6 only
+    dict_type = dict if sys.version_info >= (3, 6) else OrderedDict
+    serialized = serializer.serialize({'b': {'d': 1, 'c': 2}, 'a': [{'f': 1, 'e': 2}]})
+    for value in (serializer.deserialize(serialized),
+                  serializer.deserialize_lazy(serialized).txn):
+        assert type(value) is dict_type
+        assert list(value) == ['a', 'b']
+        assert type(value['b']) is dict_type and list(value['b']) == ['c', 'd']
+        assert type(value['a'][0]) is dict_type and list(value['a'][0]) == ['e', 'f']
+
+
+def test_ledger_txn():
+    value = {'b': {'d': 1, 'c': 2}, 'a': [1, 'x']}
+    serialized = serializer.serialize(value)
+    txn = serializer.deserialize_lazy(serialized)
+    assert isinstance(txn, LedgerTxn)
+    assert txn._txn is None
+    assert serializer.serialize(txn) == serialized
+    assert txn._txn is None
+
+    assert txn['b'] == {'c': 2, 'd': 1}
+    assert txn == value
+    assert len(txn) == 2
+    assert set(txn) == {'a', 'b'}
+    assert txn.get('c') is None
+    assert serializer.serialize(txn) == serialized
+    assert serializer.deserialize_lazy(value) is value
@@ -42,6 +42,16 @@ class BlsCryptoVerifier(metaclass=ABCMeta):
     def verify_multi_sig(self, signature: str, message: bytes, pks: Sequence[object]) -> bool:
         pass
 
+    def verify_sigs(self, signatures: Sequence[str], message: bytes, pks: Sequence[object]) -> bool:
+        '''
+        Verifies signatures of the same message by different keys with a
+        single check of their aggregate. It must be used only for keys with
+        verified proofs of possession, otherwise a rogue key can be chosen
+        so that the aggregate passes for signatures which are not valid.
+        :return: True if the aggregate of signatures is valid
+        '''
+        return self.verify_multi_sig(self.create_multi_sig(signatures), message, pks)
+
     @abstractmethod
     def verify_key_proof_of_possession(self, key_proof: object, pk: object) -> bool:
         pass
@@ -14,6 +14,15 @@ class BlsKeyRegister(metaclass=ABCMeta):
         '''
         pass
 
+    def get_key_proof_by_name(self, node_name, pool_state_root_hash=None) -> object:
+        '''
+        Gets proof of possession of Public BLS key for a node with the specified name.
+        :param node_name: node name
+        :param pool_state_root_hash: pool state root hash get the proof for, or None to use the current committed one
+        :return: proof of possession of BLS key, or None if it is unknown
+        '''
+        return None
+
     @abstractmethod
     def get_pool_root_hash_committed(self):
         pass
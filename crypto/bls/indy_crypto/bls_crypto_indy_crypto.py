@@ -96,6 +96,15 @@ class BlsCryptoVerifierIndyCrypto(BlsCryptoVerifier):
                                     ver_keys=pks,
                                     gen=self._generator)
 
+    def verify_sigs(self, signatures: Sequence[str], message: bytes, pks: Sequence[Optional[VerKey]]) -> bool:
+        sigs = [IndyCryptoBlsUtils.bls_from_str(s, Signature) for s in signatures]
+        if None in sigs or None in pks:
+            return False
+        return Bls.verify_multi_sig(multi_sig=MultiSignature.new(sigs),
+                                    message=message,
+                                    ver_keys=pks,
+                                    gen=self._generator)
+
     def create_multi_sig(self, signatures: Sequence[str]) -> str:
         sigs = [IndyCryptoBlsUtils.bls_from_str(s, Signature) for s in signatures]
         bts = MultiSignature.new(sigs)
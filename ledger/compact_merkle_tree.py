@@ -32,6 +32,10 @@ class CompactMerkleTree(merkle_tree.MerkleTree):
     def hashStore(self):
         return self.__hashStore
 
+    @property
+    def hasher(self):
+        return self.__hasher
+
     def _update(self, tree_size: int, hashes: Sequence[bytes]):
         bits_set = count_bits_set(tree_size)
         num_hashes = len(hashes)
@@ -113,7 +117,11 @@ class CompactMerkleTree(merkle_tree.MerkleTree):
         additional partition to conform with the structure of a merkle tree,
         which is a more complex operation, performed by extend().
         """
-        size = len(leaves)
+        self._push_subtree_hashes(self.__hasher.hash_leaves(leaves))
+
+    def _push_subtree_hashes(self, leaf_hashes: List[bytes]):
+        """Same as _push_subtree(), but takes hashes of the leaves."""
+        size = len(leaf_hashes)
         if count_bits_set(size) != 1:
             raise ValueError("invalid subtree with size != 2^k: %s" % size)
         # in general we want the highest bit, but here it's also the lowest bit
@@ -122,18 +130,16 @@ class CompactMerkleTree(merkle_tree.MerkleTree):
         if mintree_h > 0 and subtree_h > mintree_h:
             raise ValueError("subtree %s > current smallest subtree %s" % (
                 subtree_h, mintree_h))
-        root_hash, hashes = self.__hasher._hash_full(leaves, 0, size)
+        root_hash, hashes = self.__hasher._hash_full_hashed(leaf_hashes)
 
         if self.hashStore:
-            for h in hashes:
-                self.hashStore.writeLeaf(h)
+            self.hashStore.writeLeaves(hashes)
 
         new_node_hashes = self.__push_subtree_hash(subtree_h, root_hash)
 
         nodes = [(self.tree_size, height, h) for h, height in new_node_hashes]
         if self.hashStore:
-            for node in nodes:
-                self.hashStore.writeNode(node)
+            self.hashStore.writeNodes(nodes)
 
     def __push_subtree_hash(self, subtree_h: int, sub_hash: bytes):
         size, mintree_h = 1 << (subtree_h - 1), self.__mintree_height
@@ -159,14 +165,49 @@ class CompactMerkleTree(merkle_tree.MerkleTree):
         self._push_subtree([new_leaf])
         return auditPath
 
+    def append_many(self, new_leaves: List[bytes], with_proofs=False):
+        """Append new leaves onto the end of this tree, same as appending
+        them one by one, but leaves are hashed in one batch and their hashes
+        and new nodes are written to the hash store at once.
+
+        Returns a list of (audit path, root hash) of the tree after every
+        appended leaf if `with_proofs` is set, otherwise None.
+        """
+        leaf_hashes = self.__hasher.hash_leaves(new_leaves)
+        tree_size = self.__tree_size
+        hashes = list(self.__hashes)
+        nodes = []
+        proofs = [] if with_proofs else None
+        for leaf_hash in leaf_hashes:
+            if with_proofs:
+                audit_path = hashes[::-1]
+            tree_size += 1
+            # addition carry, as in __push_subtree_hash()
+            node_hash = leaf_hash
+            height = 1
+            while not tree_size & ((1 << height) - 1):
+                node_hash = self.__hasher.hash_children(hashes.pop(), node_hash)
+                nodes.append((tree_size, height, node_hash))
+                height += 1
+            hashes.append(node_hash)
+            if with_proofs:
+                proofs.append((audit_path, self.__hasher._hash_fold(hashes)))
+        if self.hashStore:
+            self.hashStore.writeLeaves(leaf_hashes)
+            self.hashStore.writeNodes(nodes)
+        self._update(tree_size, hashes)
+        return proofs
+
     def extend(self, new_leaves: List[bytes]):
         """Extend this tree with new_leaves on the end.
 
         The algorithm works by using _push_subtree() as a primitive, calling
         it with the maximum number of allowed leaves until we can add the
         remaining leaves as a valid entire (non-full) subtree in one go.
+        All leaves are hashed in one batch beforehand.
         """
-        size = len(new_leaves)
+        leaf_hashes = self.__hasher.hash_leaves(new_leaves)
+        size = len(leaf_hashes)
         final_size = self.tree_size + size
         idx = 0
         while True:
@@ -174,13 +215,14 @@ class CompactMerkleTree(merkle_tree.MerkleTree):
             max_h = self.__mintree_height
             max_size = 1 << (max_h - 1) if max_h > 0 else 0
             if max_h > 0 and size - idx >= max_size:
-                self._push_subtree(new_leaves[idx:idx + max_size])
+                self._push_subtree_hashes(leaf_hashes[idx:idx + max_size])
                 idx += max_size
             else:
                 break
         # fill in rest of tree in one go, now that we can
         if idx < size:
-            root_hash, hashes = self.__hasher._hash_full(new_leaves, idx, size)
+            root_hash, hashes = self.__hasher._hash_full_hashed(
+                leaf_hashes[idx:])
             self._update(final_size, self.hashes + hashes)
         assert self.tree_size == final_size
 
@@ -44,6 +44,23 @@ class FileHashStore(HashStore):
                     size, dataSize))
         store.put(key=None, value=data)
 
+    @staticmethod
+    def write_many(data_items, store, size):
+        chunks = []
+        for data in data_items:
+            if not isinstance(data, bytes):
+                data = data.encode()
+            if len(data) != size:
+                raise ValueError(
+                    "Data size not allowed. Size of the data should be "
+                    "{} but instead was {}".format(
+                        size, len(data)))
+            chunks.append(data)
+        if chunks:
+            # Entries have fixed size and no separators, so a single write
+            # produces exactly the same file as writing them one by one
+            store.put(key=None, value=b''.join(chunks))
+
     @staticmethod
     def read(store: KeyValueStorageFile, entryNo, size):
         store.db_file.seek((entryNo - 1) * size)
@@ -72,6 +89,13 @@ class FileHashStore(HashStore):
     def writeLeaf(self, leafHash):
         self.write(leafHash, self.leavesFile, self.leafSize)
 
+    def writeLeaves(self, leafHashes):
+        self.write_many(leafHashes, self.leavesFile, self.leafSize)
+
+    def writeNodes(self, nodes):
+        self.write_many((node[2] for node in nodes),
+                        self.nodesFile, self.nodeSize)
+
     def readNode(self, pos):
         data = self.read(self.nodesFile, pos, self.nodeSize)
         if len(data) < self.nodeSize:
@@ -29,6 +29,33 @@ class HashStore:
         :param node: tuple of start, height and nodeHash
         """
 
+    def writeLeaves(self, leafHashes):
+        """
+        append several leaf hashes to the leaf hash store at once. Stores
+        which can write in bulk should override this.
+
+        :param leafHashes: iterable of leaf hashes in the order of leaves
+        """
+        for leafHash in leafHashes:
+            self.writeLeaf(leafHash)
+
+    def writeNodes(self, nodes):
+        """
+        append several nodes to the node hash store at once. Stores
+        which can write in bulk should override this.
+
+        :param nodes: iterable of tuples of start, height and nodeHash in the
+        order the nodes were created
+        """
+        for node in nodes:
+            self.writeNode(node)
+
+    def flush(self):
+        """
+        Make sure all written hashes reached the underlying storage. Stores
+        which buffer writes should override this.
+        """
+
     @abstractmethod
     def readLeaf(self, pos):
         """
@@ -0,0 +1,219 @@
+import mmap
+import os
+
+from ledger.hash_stores.hash_store import HashStore
+
+
+class MmapHashFile:
+    """
+    Append-only file of fixed size entries which is read through memory maps.
+
+    The file is mapped in extents of `extent` bytes, every completed extent
+    is mapped once and never remapped, only the last (partial) one is remapped
+    after the file grows. Appended entries are kept in memory until `flush`
+    and are served from there in the meantime. A read-only file sees only
+    entries persisted before it was opened.
+    """
+
+    def __init__(self, path, entry_size, extent, ensure_durability=True,
+                 read_only=False):
+        if extent % mmap.ALLOCATIONGRANULARITY or extent % entry_size:
+            raise ValueError(
+                "Extent size should be a multiple of {} and of {}, "
+                "got {}".format(mmap.ALLOCATIONGRANULARITY, entry_size, extent))
+        self.path = path
+        self.entry_size = entry_size
+        self.extent = extent
+        self.ensure_durability = ensure_durability
+        self.read_only = read_only
+        self._file = None
+        self._maps = []
+        self._pending = bytearray()
+        self._persisted_size = 0
+
+    @property
+    def closed(self):
+        return self._file is None
+
+    def open(self):
+        self._file = open(self.path, mode="rb" if self.read_only else "a+b",
+                          buffering=0)
+        size = os.fstat(self._file.fileno()).st_size
+        # Ignore a partially written entry, the same way FileHashStore does
+        self._persisted_size = size - size % self.entry_size
+        self._maps = []
+        self._pending = bytearray()
+
+    def close(self):
+        self.flush()
+        self._close_maps()
+        self._file.close()
+        self._file = None
+
+    def reset(self):
+        self._check_writable()
+        self._close_maps()
+        self._pending = bytearray()
+        self._file.truncate(0)
+        self._persisted_size = 0
+
+    @property
+    def count(self) -> int:
+        return (self._persisted_size + len(self._pending)) // self.entry_size
+
+    @property
+    def pending_size(self) -> int:
+        return len(self._pending)
+
+    def append(self, data: bytes):
+        self._check_writable()
+        self._pending += data
+
+    def flush(self):
+        if not self._pending:
+            return
+        self._file.seek(self._persisted_size)
+        self._file.truncate()
+        self._file.write(self._pending)
+        if self.ensure_durability:
+            os.fsync(self._file.fileno())
+        last_extent = self._persisted_size // self.extent
+        self._persisted_size += len(self._pending)
+        self._pending = bytearray()
+        # Only the extent which was partial before the write is stale
+        for m in self._maps[last_extent:]:
+            m.close()
+        del self._maps[last_extent:]
+
+    def read(self, pos):
+        offset = (pos - 1) * self.entry_size
+        if offset >= self._persisted_size:
+            offset -= self._persisted_size
+            return bytes(self._pending[offset:offset + self.entry_size])
+        extent_no, extent_offset = divmod(offset, self.extent)
+        return self._map(extent_no)[extent_offset:extent_offset + self.entry_size]
+
+    def _map(self, extent_no):
+        if extent_no >= len(self._maps):
+            for no in range(len(self._maps), extent_no + 1):
+                offset = no * self.extent
+                length = min(self.extent, self._persisted_size - offset)
+                self._maps.append(mmap.mmap(self._file.fileno(), length,
+                                            access=mmap.ACCESS_READ,
+                                            offset=offset))
+        return self._maps[extent_no]
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("Not supported operation in read only mode.")
+
+    def _close_maps(self):
+        for m in self._maps:
+            m.close()
+        self._maps = []
+
+
+class MmapHashStore(HashStore):
+    """
+    Hash store with the same on-disk format as FileHashStore which reads
+    hashes from memory maps instead of issuing a seek and a read for every
+    hash. Appended hashes are written to the files in one go when `flush`
+    is called (once per committed batch) or when more than `flushThreshold`
+    bytes are pending.
+    """
+
+    def __init__(self, dataDir, fileNamePrefix="", leafSize=32, nodeSize=32,
+                 extent=16 * 1024 * 1024, flushThreshold=1024 * 1024,
+                 ensureDurability=True, read_only=False):
+        self.dataDir = dataDir
+        self.fileNamePrefix = fileNamePrefix
+        self.leafSize = leafSize
+        self.nodeSize = nodeSize
+        self.flushThreshold = flushThreshold
+        if not read_only and not os.path.exists(dataDir):
+            os.makedirs(dataDir)
+        self.nodesFile = MmapHashFile(
+            os.path.join(dataDir, "{}_merkleNodes.bin".format(fileNamePrefix)),
+            nodeSize, extent, ensureDurability, read_only)
+        self.leavesFile = MmapHashFile(
+            os.path.join(dataDir, "{}_merkleLeaves.bin".format(fileNamePrefix)),
+            leafSize, extent, ensureDurability, read_only)
+        self.open()
+
+    @property
+    def is_persistent(self) -> bool:
+        return True
+
+    def _write(self, data_items, store: MmapHashFile, size):
+        for data in data_items:
+            if not isinstance(data, bytes):
+                data = data.encode()
+            if len(data) != size:
+                raise ValueError(
+                    "Data size not allowed. Size of the data should be "
+                    "{} but instead was {}".format(size, len(data)))
+            store.append(data)
+        if store.pending_size >= self.flushThreshold:
+            store.flush()
+
+    def writeLeaf(self, leafHash):
+        self._write((leafHash,), self.leavesFile, self.leafSize)
+
+    def writeNode(self, node):
+        self._write((node[2],), self.nodesFile, self.nodeSize)
+
+    def writeLeaves(self, leafHashes):
+        self._write(leafHashes, self.leavesFile, self.leafSize)
+
+    def writeNodes(self, nodes):
+        self._write((node[2] for node in nodes), self.nodesFile, self.nodeSize)
+
+    def flush(self):
+        self.leavesFile.flush()
+        self.nodesFile.flush()
+
+    def _read(self, pos, store: MmapHashFile, name):
+        if pos < 1 or pos > store.count:
+            raise IndexError("No {} at given position".format(name))
+        return store.read(pos)
+
+    def readLeaf(self, pos):
+        return self._read(pos, self.leavesFile, "leaf")
+
+    def readNode(self, pos):
+        return self._read(pos, self.nodesFile, "node")
+
+    def readLeafs(self, startpos, endpos):
+        return [self.readLeaf(pos) for pos in range(startpos, endpos + 1)]
+
+    def readNodes(self, startpos, endpos):
+        return [self.readNode(pos) for pos in range(startpos, endpos + 1)]
+
+    @property
+    def leafCount(self) -> int:
+        return self.leavesFile.count
+
+    @property
+    def nodeCount(self) -> int:
+        return self.nodesFile.count
+
+    @property
+    def closed(self):
+        return self.nodesFile.closed and self.leavesFile.closed
+
+    def open(self):
+        if self.nodesFile.closed:
+            self.nodesFile.open()
+        if self.leavesFile.closed:
+            self.leavesFile.open()
+
+    def close(self):
+        if not self.nodesFile.closed:
+            self.nodesFile.close()
+        if not self.leavesFile.closed:
+            self.leavesFile.close()
+
+    def reset(self):
+        self.nodesFile.reset()
+        self.leavesFile.reset()
+        return True
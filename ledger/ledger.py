@@ -5,9 +5,12 @@ from common.exceptions import PlenumValueError
 from common.serializers.mapping_serializer import MappingSerializer
 from common.serializers.serialization import ledger_txn_serializer, ledger_hash_serializer, txn_root_serializer
 from ledger.genesis_txn.genesis_txn_initiator import GenesisTxnInitiator
+from ledger.compact_merkle_tree import CompactMerkleTree
 from ledger.immutable_store import ImmutableStore
 from ledger.merkle_tree import MerkleTree
 from ledger.tree_hasher import TreeHasher
+from ledger.tree_recovery import ParallelTreeRecovery, serialize_entry_for_tree
+from ledger.txn_index import TxnIndex
 from ledger.util import F, ConsistencyVerificationFailed
 from storage.kv_store import KeyValueStorage
 from storage.helper import initKeyValueStorageIntKeys
@@ -26,7 +29,8 @@ class Ledger(ImmutableStore):
         return initKeyValueStorageIntKeys(config.transactionLogDefaultStorage,
                                           dataDir, logName, open, read_only=read_only,
                                           db_config=config.db_transactions_config,
-                                          txn_serializer=ledger_txn_serializer)
+                                          txn_serializer=ledger_txn_serializer,
+                                          fixed_width_keys=config.transactionLogFixedWidthIntKeys)
 
     def __init__(self,
                  tree: MerkleTree,
@@ -38,7 +42,8 @@ class Ledger(ImmutableStore):
                  transactionLogStore: KeyValueStorage = None,
                  genesis_txn_initiator: GenesisTxnInitiator = None,
                  config=None,
-                 read_only=False):
+                 read_only=False,
+                 txn_index: TxnIndex = None):
         """
         :param tree: an implementation of MerkleTree
         :param dataDir: the directory where the transaction log is stored
@@ -46,6 +51,8 @@ class Ledger(ImmutableStore):
         it and storing it in the MerkleTree
         :param fileName: the name of the transaction log file
         :param genesis_txn_initiator: file or dir to use for initialization of transaction log store
+        :param txn_index: secondary index of txns by some of their fields
+        used by `get`
         """
         self.genesis_txn_initiator = genesis_txn_initiator
 
@@ -61,9 +68,11 @@ class Ledger(ImmutableStore):
         self._transactionLogName = fileName or "transactions"
         self.ensureDurability = ensureDurability
         self._customTransactionLogStore = transactionLogStore
+        self.txn_index = txn_index
         self.seqNo = 0
         self.start()
         self.recoverTree()
+        self._catchup_txn_index()
         if self.genesis_txn_initiator and self.size == 0:
             self.genesis_txn_initiator.init_ledger_from_genesis_txn(self)
 
@@ -96,13 +105,26 @@ class Ledger(ImmutableStore):
         if not self._read_only:
             self.tree.reset()
         self.seqNo = 0
+        if self._can_recover_tree_in_parallel():
+            ParallelTreeRecovery(
+                self,
+                chunk_size=self.config.PARALLEL_TREE_RECOVERY_CHUNK_SIZE,
+                workers=self.config.PARALLEL_TREE_RECOVERY_WORKERS,
+                progress_interval=self.config.PARALLEL_TREE_RECOVERY_PROGRESS_INTERVAL).recover()
+            return
         for key, entry in self._transactionLog.iterator():
             if self.txn_serializer != self.hash_serializer:
-                entry = self.serialize_for_tree(
-                    self.txn_serializer.deserialize(entry))
+                entry = serialize_entry_for_tree(entry, self.txn_serializer,
+                                                 self.hash_serializer)
             if isinstance(entry, str):
                 entry = entry.encode()
             self._addToTreeSerialized(entry)
+        self.tree.hashStore.flush()
+
+    def _can_recover_tree_in_parallel(self):
+        return self.config.PARALLEL_TREE_RECOVERY_ENABLED \
+            and not self._read_only \
+            and isinstance(self.tree, CompactMerkleTree)
 
     def recoverTreeFromHashStore(self):
         treeSize = self.tree.leafCount
@@ -128,9 +150,40 @@ class Ledger(ImmutableStore):
 
         serz_leaf_for_tree = self.serialize_for_tree(leaf)
         merkle_info = self._addToTree(serz_leaf_for_tree, serialized=True)
+        self.tree.hashStore.flush()
+
+        if self.txn_index is not None:
+            self.txn_index.add(self.seqNo, leaf)
 
         return merkle_info
 
+    def append_txns(self, txns, build_proofs=False):
+        """
+        Add txns to the log and the merkle tree in bulk, the result is the
+        same as adding them one by one with `add`. Txns are written to the
+        log in one batch and the tree is extended once.
+
+        :param build_proofs: whether merkle proofs of txns are needed
+        :return: merkle proofs of txns as `add` returns them if
+        `build_proofs` is set, otherwise None
+        """
+        start = self.seqNo + 1
+        self._transactionLog.setBatch(
+            [(str(seq_no), self.serialize_for_txn_log(txn))
+             for seq_no, txn in enumerate(txns, start)])
+        proofs = self.tree.append_many(
+            [self.serialize_for_tree(txn) for txn in txns],
+            with_proofs=build_proofs)
+        # Hash stores buffering writes persist all txns at once
+        self.tree.hashStore.flush()
+        self.seqNo += len(txns)
+        if self.txn_index is not None:
+            self.txn_index.add_txns(enumerate(txns, start))
+        if not build_proofs:
+            return None
+        return [self._merkle_proof(seq_no, root_hash, audit_path)
+                for seq_no, (audit_path, root_hash) in enumerate(proofs, start)]
+
     def _addToTree(self, leafData, serialized=False):
         serializedLeafData = self.serialize_for_tree(leafData) if \
             not serialized else leafData
@@ -147,22 +200,64 @@ class Ledger(ImmutableStore):
         return self._build_merkle_proof(audit_path)
 
     def _build_merkle_proof(self, audit_path):
+        return self._merkle_proof(self.seqNo, self.tree.root_hash, audit_path)
+
+    def _merkle_proof(self, seq_no, root_hash, audit_path):
         return {
-            F.seqNo.name: self.seqNo,
-            F.rootHash.name: self.hashToStr(self.tree.root_hash),
+            F.seqNo.name: seq_no,
+            F.rootHash.name: self.hashToStr(root_hash),
             F.auditPath.name: [self.hashToStr(h) for h in audit_path]
         }
 
     def append(self, txn):
         return self.add(txn)
 
-    # TODO: add tests for this
     def get(self, **kwargs):
-        for seqNo, value in self._transactionLog.iterator():
-            data = self.txn_serializer.deserialize(value)
-            # If `kwargs` is a subset of `data`
-            if set(kwargs.values()) == {data.get(k) for k in kwargs.keys()}:
+        """
+        Return the first txn having the given values of fields. Fields
+        indexed by `txn_index` are looked up by their paths in txns, other
+        ones are top level fields of txns.
+        """
+        indexed = [k for k in kwargs
+                   if self.txn_index is not None and self.txn_index.is_indexed(k)]
+        if not indexed:
+            for seqNo, value in self._transactionLog.iterator():
+                data = self.txn_serializer.deserialize(value)
+                if self._txn_matches(data, kwargs):
+                    return data
+            return None
+        for seqNo in self.txn_index.seq_nos(indexed[0], kwargs[indexed[0]]):
+            data = self.getBySeqNo(seqNo)
+            if data is not None and self._txn_matches(data, kwargs):
                 return data
+        return None
+
+    def _txn_matches(self, txn, fields) -> bool:
+        for name, value in fields.items():
+            if self.txn_index is not None and self.txn_index.is_indexed(name):
+                if self.txn_index.field_value(txn, name) != value:
+                    return False
+            elif txn.get(name) != value:
+                return False
+        return True
+
+    def rebuild_txn_index(self):
+        self.txn_index.rebuild(self.getAllTxn())
+
+    def _catchup_txn_index(self):
+        """
+        Index txns which were added to the ledger but not to the index, e.g.
+        because of a crash, or rebuild the index if it is ahead of the ledger
+        """
+        if self.txn_index is None or self._read_only:
+            return
+        last_indexed = self.txn_index.last_seq_no
+        if last_indexed > self.size:
+            logging.warning("Txn index is ahead of the ledger ({} > {}), "
+                            "rebuilding it".format(last_indexed, self.size))
+            self.rebuild_txn_index()
+        elif last_indexed < self.size:
+            self.txn_index.add_txns_in_batches(self.getAllTxn(frm=last_indexed + 1))
 
     def getBySeqNo(self, seqNo):
         key = str(seqNo)
@@ -233,15 +328,21 @@ class Ledger(ImmutableStore):
                 self._transactionLog.open()
             if self.tree.hashStore.closed:
                 self.tree.hashStore.open()
+            if self.txn_index is not None and self.txn_index.closed:
+                self.txn_index.open()
 
     def stop(self):
         self._transactionLog.close()
         self.tree.hashStore.close()
+        if self.txn_index is not None:
+            self.txn_index.close()
 
     def reset(self):
         # THIS IS A DESTRUCTIVE ACTION
         self._transactionLog.reset()
         self.tree.hashStore.reset()
+        if self.txn_index is not None:
+            self.txn_index.reset()
 
     # TODO: rename getAllTxn to get_txn_slice with required parameters frm to
     # add get_txn_all without args.
@@ -7,7 +7,8 @@ from common.serializers.msgpack_serializer import MsgPackSerializer
 from common.serializers.signing_serializer import SigningSerializer
 from ledger.genesis_txn.genesis_txn_file_util import create_genesis_txn_init_ledger
 from ledger.test.helper import create_ledger, create_ledger_text_file_storage, \
-    create_ledger_chunked_file_storage, create_ledger_leveldb_storage, create_ledger_rocksdb_storage
+    create_ledger_chunked_file_storage, create_ledger_leveldb_storage, create_ledger_rocksdb_storage, \
+    create_ledger_leveldb_fixed_int_keys_storage, create_ledger_rocksdb_fixed_int_keys_storage
 
 
 @pytest.fixture(scope='module')
@@ -76,7 +77,8 @@ def hash_serializer(request):
 
 
 @pytest.yield_fixture(scope="function", params=['TextFileStorage', 'ChunkedFileStorage',
-                                                'LeveldbStorage', 'RocksdbStorage'])
+                                                'LeveldbStorage', 'RocksdbStorage',
+                                                'LeveldbFixedIntKeysStorage', 'RocksdbFixedIntKeysStorage'])
 def ledger(request, genesis_txn_file, tempdir, txn_serializer, hash_serializer):
     ledger = create_ledger(request, txn_serializer,
                            hash_serializer, tempdir, genesis_txn_file)
@@ -85,7 +87,8 @@ def ledger(request, genesis_txn_file, tempdir, txn_serializer, hash_serializer):
 
 
 @pytest.yield_fixture(scope="function", params=['TextFileStorage', 'ChunkedFileStorage',
-                                                'LeveldbStorage', 'RocksdbStorage'])
+                                                'LeveldbStorage', 'RocksdbStorage',
+                                                'LeveldbFixedIntKeysStorage', 'RocksdbFixedIntKeysStorage'])
 def create_ledger_callable(request):
     if request.param == 'TextFileStorage':
         return create_ledger_text_file_storage
@@ -95,10 +98,15 @@ def create_ledger_callable(request):
         return create_ledger_leveldb_storage
     elif request.param == 'RocksdbStorage':
         return create_ledger_rocksdb_storage
+    elif request.param == 'LeveldbFixedIntKeysStorage':
+        return create_ledger_leveldb_fixed_int_keys_storage
+    elif request.param == 'RocksdbFixedIntKeysStorage':
+        return create_ledger_rocksdb_fixed_int_keys_storage
 
 
 @pytest.yield_fixture(scope="function", params=['TextFileStorage', 'ChunkedFileStorage',
-                                                'LeveldbStorage', 'RocksdbStorage'])
+                                                'LeveldbStorage', 'RocksdbStorage',
+                                                'LeveldbFixedIntKeysStorage', 'RocksdbFixedIntKeysStorage'])
 def ledger_no_genesis(request, tempdir, txn_serializer, hash_serializer):
     ledger = create_ledger(request, txn_serializer, hash_serializer, tempdir)
     yield ledger
@@ -106,7 +114,8 @@ def ledger_no_genesis(request, tempdir, txn_serializer, hash_serializer):
 
 
 @pytest.yield_fixture(scope="function", params=['TextFileStorage', 'ChunkedFileStorage',
-                                                'LeveldbStorage', 'RocksdbStorage'])
+                                                'LeveldbStorage', 'RocksdbStorage',
+                                                'LeveldbFixedIntKeysStorage', 'RocksdbFixedIntKeysStorage'])
 def ledger_with_genesis(request, init_genesis_txn_file, tempdir, txn_serializer, hash_serializer):
     ledger = create_ledger(request, txn_serializer,
                            hash_serializer, tempdir, init_genesis_txn_file)
@@ -11,7 +11,9 @@ from ledger.ledger import Ledger
 from ledger.util import STH
 from storage.binary_serializer_based_file_store import BinarySerializerBasedFileStore
 from storage.chunked_file_store import ChunkedFileStore
+from storage.kv_store_leveldb_fixed_int_keys import KeyValueStorageLeveldbFixedIntKeys
 from storage.kv_store_leveldb_int_keys import KeyValueStorageLeveldbIntKeys
+from storage.kv_store_rocksdb_fixed_int_keys import KeyValueStorageRocksdbFixedIntKeys
 from storage.kv_store_rocksdb_int_keys import KeyValueStorageRocksdbIntKeys
 from storage.text_file_store import TextFileStore
 
@@ -74,6 +76,12 @@ def create_ledger(request, txn_serializer, hash_serializer, tempdir, init_genesi
         return create_ledger_leveldb_storage(txn_serializer, hash_serializer, tempdir, init_genesis_txn_file)
     elif request.param == 'RocksdbStorage':
         return create_ledger_rocksdb_storage(txn_serializer, hash_serializer, tempdir, init_genesis_txn_file)
+    elif request.param == 'LeveldbFixedIntKeysStorage':
+        return create_ledger_leveldb_fixed_int_keys_storage(txn_serializer, hash_serializer, tempdir,
+                                                            init_genesis_txn_file)
+    elif request.param == 'RocksdbFixedIntKeysStorage':
+        return create_ledger_rocksdb_fixed_int_keys_storage(txn_serializer, hash_serializer, tempdir,
+                                                            init_genesis_txn_file)
 
 
 def create_ledger_text_file_storage(txn_serializer, hash_serializer, tempdir, init_genesis_txn_file=None):
@@ -107,6 +115,20 @@ def create_ledger_rocksdb_storage(txn_serializer, hash_serializer, tempdir, init
     return _create_ledger(store, txn_serializer, hash_serializer, tempdir, init_genesis_txn_file)
 
 
+def create_ledger_leveldb_fixed_int_keys_storage(txn_serializer, hash_serializer, tempdir,
+                                                 init_genesis_txn_file=None):
+    store = KeyValueStorageLeveldbFixedIntKeys(tempdir,
+                                               'transactions')
+    return _create_ledger(store, txn_serializer, hash_serializer, tempdir, init_genesis_txn_file)
+
+
+def create_ledger_rocksdb_fixed_int_keys_storage(txn_serializer, hash_serializer, tempdir,
+                                                 init_genesis_txn_file=None):
+    store = KeyValueStorageRocksdbFixedIntKeys(tempdir,
+                                               'transactions')
+    return _create_ledger(store, txn_serializer, hash_serializer, tempdir, init_genesis_txn_file)
+
+
 def create_ledger_chunked_file_storage(txn_serializer, hash_serializer, tempdir, init_genesis_txn_file=None):
     chunk_creator = None
     db_name = 'transactions'
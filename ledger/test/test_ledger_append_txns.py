@@ -0,0 +1,76 @@
+import os
+import time
+
+import pytest
+
+from common.serializers.msgpack_serializer import MsgPackSerializer
+from ledger.test.helper import random_txn, create_ledger_leveldb_storage
+
+# The perf test compares timings, which may be noisy on a busy machine, so it
+# is run only with `SkipTests` set to False
+SkipTests = True
+skipper = pytest.mark.skipif(SkipTests, reason='Perf test')
+
+
+def create_ledger_pair(create_ledger_callable, txn_serializer, hash_serializer, tempdir):
+    ledgers = []
+    for name in ('added', 'appended'):
+        data_dir = os.path.join(tempdir, name)
+        os.makedirs(data_dir)
+        ledgers.append(create_ledger_callable(txn_serializer, hash_serializer, data_dir))
+    return ledgers
+
+
+def check_same_ledgers(added, appended):
+    assert appended.size == added.size
+    assert appended.seqNo == added.seqNo
+    assert appended.root_hash == added.root_hash
+    assert appended.tree.hashes == added.tree.hashes
+    assert list(appended.getAllTxn()) == list(added.getAllTxn())
+    hash_store, expected_hash_store = appended.tree.hashStore, added.tree.hashStore
+    assert hash_store.leafCount == expected_hash_store.leafCount
+    assert hash_store.nodeCount == expected_hash_store.nodeCount
+    for pos in range(1, hash_store.leafCount + 1):
+        assert hash_store.readLeaf(pos) == expected_hash_store.readLeaf(pos)
+    for pos in range(1, hash_store.nodeCount + 1):
+        assert hash_store.readNode(pos) == expected_hash_store.readNode(pos)
+
+
+def test_append_txns_is_same_as_add(create_ledger_callable, txn_serializer, hash_serializer, tempdir):
+    added, appended = create_ledger_pair(create_ledger_callable, txn_serializer, hash_serializer, tempdir)
+    txns = [random_txn(i) for i in range(70)]
+    for batch_start, batch_end in [(0, 1), (1, 3), (3, 16), (16, 16), (16, 53), (53, 70)]:
+        batch = txns[batch_start:batch_end]
+        proofs = [added.add(txn) for txn in batch]
+        assert appended.append_txns(batch, build_proofs=True) == proofs
+        check_same_ledgers(added, appended)
+
+    assert appended.append_txns([txns[0], txns[1]]) is None
+    added.add(txns[0])
+    added.add(txns[1])
+    check_same_ledgers(added, appended)
+    added.stop()
+    appended.stop()
+
+
+@skipper
+def test_append_txns_perf(tempdir):
+    serializer = MsgPackSerializer()
+    added, appended = create_ledger_pair(create_ledger_leveldb_storage, serializer, serializer, tempdir)
+    txns = [random_txn(i % 100) for i in range(20000)]
+
+    start = time.perf_counter()
+    for txn in txns:
+        added.add(txn)
+    add_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(0, len(txns), 1000):
+        appended.append_txns(txns[i:i + 1000])
+    append_time = time.perf_counter() - start
+
+    print("Adding {} txns one by one took {:.2f} seconds, appending them in batches of 1000 took {:.2f} seconds"
+          .format(len(txns), add_time, append_time))
+    assert appended.root_hash == added.root_hash
+    added.stop()
+    appended.stop()
@@ -0,0 +1,151 @@
+import mmap
+
+import pytest
+
+from ledger.compact_merkle_tree import CompactMerkleTree
+from ledger.hash_stores.file_hash_store import FileHashStore
+from ledger.hash_stores.mmap_hash_store import MmapHashStore
+from ledger.ledger import Ledger
+from ledger.test.test_file_hash_store import generateHashes
+from storage.kv_store_leveldb_int_keys import KeyValueStorageLeveldbIntKeys
+
+SMALL_EXTENT = mmap.ALLOCATIONGRANULARITY
+
+
+def read_files(hash_store):
+    with open(hash_store.leavesFile.path, 'rb') as leaves, \
+            open(hash_store.nodesFile.path, 'rb') as nodes:
+        return leaves.read(), nodes.read()
+
+
+@pytest.fixture(scope="function")
+def mmap_hash_store(tempdir):
+    hs = MmapHashStore(tempdir, extent=SMALL_EXTENT, flushThreshold=1000)
+    yield hs
+    hs.close()
+
+
+def test_read_pending_and_flushed(mmap_hash_store):
+    leaves = generateHashes(500)
+    nodes = [(i + 1, 1, h) for i, h in enumerate(generateHashes(300))]
+    mmap_hash_store.writeLeaves(leaves[:10])
+    for leaf in leaves[10:]:
+        mmap_hash_store.writeLeaf(leaf)
+    mmap_hash_store.writeNodes(nodes)
+
+    # Some of the hashes are flushed because of the threshold, some are not
+    assert mmap_hash_store.leavesFile.pending_size > 0
+    assert mmap_hash_store.leafCount == 500
+    assert mmap_hash_store.nodeCount == 300
+    assert [mmap_hash_store.readLeaf(i + 1) for i in range(500)] == leaves
+    assert mmap_hash_store.readNodes(1, 300) == [n[2] for n in nodes]
+
+    mmap_hash_store.flush()
+    assert mmap_hash_store.leavesFile.pending_size == 0
+    # Leaves span several extents now
+    assert 500 * 32 > 3 * SMALL_EXTENT
+    assert mmap_hash_store.readLeafs(1, 500) == leaves
+    assert mmap_hash_store.readNodes(1, 300) == [n[2] for n in nodes]
+
+
+def test_out_of_range(mmap_hash_store):
+    mmap_hash_store.writeLeaf(generateHashes(1)[0])
+    for pos in (0, 2):
+        with pytest.raises(IndexError):
+            mmap_hash_store.readLeaf(pos)
+        with pytest.raises(IndexError):
+            mmap_hash_store.readNode(pos)
+    with pytest.raises(ValueError):
+        mmap_hash_store.writeLeaf(b'short')
+
+
+def test_same_files_as_file_hash_store(tempdir):
+    file_hs = FileHashStore(tempdir, fileNamePrefix='file')
+    mmap_hs = MmapHashStore(tempdir, fileNamePrefix='mmap', extent=SMALL_EXTENT)
+    leaves = generateHashes(200)
+    nodes = [(i + 1, 1, h) for i, h in enumerate(generateHashes(100))]
+    for hs in (file_hs, mmap_hs):
+        hs.writeLeaves(leaves)
+        hs.writeNodes(nodes)
+    mmap_hs.close()
+    file_hs.close()
+
+    assert read_files(mmap_hs) == (
+        open(file_hs.leavesFile.db_path, 'rb').read(),
+        open(file_hs.nodesFile.db_path, 'rb').read())
+
+    # A store written by FileHashStore can be read by MmapHashStore
+    reopened = MmapHashStore(tempdir, fileNamePrefix='file', extent=SMALL_EXTENT)
+    assert reopened.leafCount == 200
+    assert reopened.nodeCount == 100
+    assert reopened.readLeafs(1, 200) == leaves
+    reopened.reset()
+    assert reopened.leafCount == 0
+    assert reopened.nodeCount == 0
+    reopened.close()
+
+
+def test_ledger_with_mmap_hash_store(tempdir):
+    hs = MmapHashStore(tempdir, extent=SMALL_EXTENT)
+    ledger = Ledger(CompactMerkleTree(hashStore=hs), dataDir=tempdir,
+                    transactionLogStore=KeyValueStorageLeveldbIntKeys(tempdir, 'transactions'))
+    for d in range(300):
+        ledger.add(str(d).encode())
+    proofs = [ledger.tree.consistency_proof(i, 300) for i in range(1, 300)]
+    root_hash = ledger.root_hash
+    hashes = ledger.tree.hashes
+    ledger.stop()
+
+    restarted = Ledger(CompactMerkleTree(
+        hashStore=MmapHashStore(tempdir, extent=SMALL_EXTENT)), dataDir=tempdir,
+        transactionLogStore=KeyValueStorageLeveldbIntKeys(tempdir, 'transactions'))
+    assert restarted.size == 300
+    assert restarted.root_hash == root_hash
+    assert restarted.tree.hashes == hashes
+    assert [restarted.tree.consistency_proof(i, 300)
+            for i in range(1, 300)] == proofs
+    restarted.stop()
+
+
+def test_read_only_mmap_hash_store(tempdir):
+    hs = MmapHashStore(tempdir, extent=SMALL_EXTENT)
+    leaves = generateHashes(300)
+    hs.writeLeaves(leaves)
+    hs.flush()
+    files = read_files(hs)
+
+    read_only = MmapHashStore(tempdir, extent=SMALL_EXTENT, read_only=True)
+    assert read_only.readLeafs(1, 300) == leaves
+    with pytest.raises(RuntimeError):
+        read_only.writeLeaf(leaves[0])
+    with pytest.raises(RuntimeError):
+        read_only.reset()
+    read_only.close()
+    assert read_files(hs) == files
+    hs.close()
+
+
+def test_flush_closes_remapped_extent(mmap_hash_store):
+    leaves = generateHashes(200)
+    mmap_hash_store.writeLeaves(leaves[:100])
+    mmap_hash_store.flush()
+    assert mmap_hash_store.readLeaf(100) == leaves[99]
+    partial_map = mmap_hash_store.leavesFile._maps[-1]
+
+    mmap_hash_store.writeLeaves(leaves[100:])
+    mmap_hash_store.flush()
+    assert partial_map.closed
+    assert mmap_hash_store.readLeafs(1, 200) == leaves
+
+
+def test_ledger_add_flushes_hashes(tempdir):
+    hs = MmapHashStore(tempdir, extent=SMALL_EXTENT)
+    ledger = Ledger(CompactMerkleTree(hashStore=hs), dataDir=tempdir,
+                    transactionLogStore=KeyValueStorageLeveldbIntKeys(tempdir, 'transactions'))
+    ledger.add(b'1')
+    assert hs.leavesFile.pending_size == 0
+    ledger.append_txns([str(d).encode() for d in range(2, 10)])
+    assert hs.leavesFile.pending_size == 0
+    assert hs.nodesFile.pending_size == 0
+    assert len(read_files(hs)[0]) == 9 * 32
+    ledger.stop()
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from ledger.compact_merkle_tree import CompactMerkleTree
+from ledger.hash_stores.file_hash_store import FileHashStore
+from ledger.hash_stores.mmap_hash_store import MmapHashStore
+from ledger.test.test_file_hash_store import generateHashes
+
+TREE_SIZE = 4096
+
+# Depends on the disk and page cache of the machine, setting `SkipTests` to
+# False runs the benchmark
+SkipTests = True
+skipper = pytest.mark.skipif(SkipTests, reason='Perf test')
+
+
+def measure_proofs_time(hash_store, leaves):
+    tree = CompactMerkleTree(hashStore=hash_store)
+    start = time.perf_counter()
+    for leaf in leaves:
+        tree.append(leaf)
+    hash_store.flush()
+    append_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(1, TREE_SIZE):
+        tree.inclusion_proof(i - 1, TREE_SIZE)
+        tree.consistency_proof(i, TREE_SIZE)
+    proofs_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(1, TREE_SIZE + 1):
+        hash_store.readLeaf(i)
+    for i in range(1, hash_store.nodeCount + 1):
+        hash_store.readNode(i)
+    reads_time = time.perf_counter() - start
+    return append_time, proofs_time, reads_time, tree.root_hash
+
+
+@skipper
+def testMeasureMmapHashStoreTime(tempdir):
+    leaves = generateHashes(TREE_SIZE)
+    file_hs = FileHashStore(tempdir, fileNamePrefix='file')
+    mmap_hs = MmapHashStore(tempdir, fileNamePrefix='mmap')
+
+    file_append, file_proofs, file_reads, file_root = \
+        measure_proofs_time(file_hs, leaves)
+    mmap_append, mmap_proofs, mmap_reads, mmap_root = \
+        measure_proofs_time(mmap_hs, leaves)
+    file_hs.close()
+    mmap_hs.close()
+
+    print("Appending {} leaves takes {} seconds with FileHashStore and {} "
+          "seconds with MmapHashStore".format(TREE_SIZE, file_append, mmap_append))
+    print("Building {} inclusion and consistency proofs takes {} seconds "
+          "with FileHashStore and {} seconds with MmapHashStore"
+          .format(2 * (TREE_SIZE - 1), file_proofs, mmap_proofs))
+    print("Reading every leaf and node hash takes {} seconds with "
+          "FileHashStore and {} seconds with MmapHashStore"
+          .format(file_reads, mmap_reads))
+    assert file_root == mmap_root
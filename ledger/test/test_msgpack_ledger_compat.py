@@ -0,0 +1,86 @@
+import json
+import os
+
+import msgpack
+import pytest
+
+from common.serializers.msgpack_serializer import MsgPackSerializer
+from ledger.test.helper import create_ledger_leveldb_storage, random_txn
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+GENESIS_FILES = sorted(name for name in os.listdir(DATA_DIR)
+                       if name.endswith('_genesis'))
+
+NEW_FORMAT_TXN = {
+    'reqSignature': {'type': 'ED25519', 'values': [
+        {'value': '4X3skpoEK2DRgZxQ9PwuEvCJpL8JHdQ8X4HDDFyztgqE15DM2ZnkvrAh9bQY16egVinZXzwPu1CBVZsRtMLDeQdd',
+         'from': 'V4SGRU86Z58d6TV7PBUe6f'}]},
+    'txn': {'type': '0', 'protocolVersion': 2,
+            'metadata': {'reqId': 1513945121191691, 'from': 'V4SGRU86Z58d6TV7PBUe6f',
+                         'digest': 'abc', 'payloadDigest': 'def', 'taaAcceptance': None},
+            'data': {'dest': 'Gw6pDLhcBcoQesN72qfotTgFa7cbuqZpkX3Xo6pLhPhv',
+                     'data': {'services': ['VALIDATOR'], 'node_port': 9701, 'alias': 'Node1',
+                              'node_ip': '127.0.0.1', 'client_port': 9702, 'client_ip': '127.0.0.1'}}},
+    'txnMetadata': {'txnTime': 1513945121, 'seqNo': 1, 'txnId': 'fea82e10e894'},
+    'ver': '1',
+}
+
+
+def read_txns(name):
+    txns = []
+    with open(os.path.join(DATA_DIR, name)) as f:
+        for line in f:
+            try:
+                txns.append(json.loads(line))
+            except ValueError:
+                # Some of sample genesis files have malformed lines
+                continue
+    return txns
+
+
+def old_serialize(serializer, txn):
+    return msgpack.packb(serializer._sort_dict(txn), use_bin_type=True)
+
+
+def existing_txns():
+    txns = [NEW_FORMAT_TXN] + [random_txn(i) for i in range(10)]
+    for name in GENESIS_FILES:
+        txns.extend(read_txns(name))
+    return txns
+
+
+def test_genesis_files_are_found():
+    assert GENESIS_FILES
+
+
+@pytest.mark.parametrize('txn', existing_txns())
+def test_txn_round_trip(txn):
+    serializer = MsgPackSerializer()
+    serialized = serializer.serialize(txn)
+    assert serialized == old_serialize(serializer, txn)
+    assert serializer.deserialize(serialized) == txn
+    assert serializer.serialize(serializer.deserialize(serialized)) == serialized
+    assert serializer.serialize(serializer.deserialize_lazy(serialized)) == serialized
+
+
+def test_ledger_is_same_after_tree_recovery(tempdir):
+    # Different instances, so txn log entries go to the tree through
+    # `serialize_entry_for_tree`
+    txn_serializer = MsgPackSerializer()
+    hash_serializer = MsgPackSerializer()
+    ledger = create_ledger_leveldb_storage(txn_serializer, hash_serializer,
+                                           tempdir)
+    txns = existing_txns()
+    for txn in txns:
+        ledger.add(txn)
+    root_hash = ledger.root_hash
+    hashes = ledger.tree.hashes
+
+    for (seq_no, entry), txn in zip(ledger._transactionLog.iterator(), txns):
+        assert bytes(entry) == old_serialize(txn_serializer, txn)
+    assert [txn for _, txn in ledger.getAllTxn()] == txns
+
+    ledger.recoverTreeFromTxnLog()
+    assert ledger.root_hash == root_hash
+    assert ledger.tree.hashes == hashes
+    assert ledger.size == len(txns)
@@ -0,0 +1,123 @@
+import os
+import random
+import time
+from copy import copy
+
+import pytest
+
+from ledger.compact_merkle_tree import CompactMerkleTree
+from ledger.tree_hasher import TreeHasher, HASHLIB_GIL_MINSIZE
+from ledger.test.merkle_test import HexTreeHasher
+
+# Set `SkipTests` to False to run the perf test, its timings depend on the
+# machine
+SkipTests = True
+skipper = pytest.mark.skipif(SkipTests, reason='Perf test')
+
+
+def hash_full_sequentially(hasher, leaves):
+    """Reference implementation as TreeHasher had it before batching"""
+    width = len(leaves)
+    if width == 0:
+        return hasher.hash_empty(), ()
+    if width == 1:
+        leaf_hash = hasher.hash_leaf(leaves[0])
+        return leaf_hash, (leaf_hash,)
+    split_width = 2 ** ((width - 1).bit_length() - 1)
+    l_root, l_hashes = hash_full_sequentially(hasher, leaves[:split_width])
+    r_root, r_hashes = hash_full_sequentially(hasher, leaves[split_width:])
+    root_hash = hasher.hash_children(l_root, r_root)
+    return (root_hash, (root_hash,) if split_width * 2 == width else
+            l_hashes + r_hashes)
+
+
+@pytest.fixture(scope='module')
+def leaves():
+    rnd = random.Random(1)
+    return [bytes(rnd.getrandbits(8) for _ in range(rnd.randint(0, 100)))
+            for _ in range(300)]
+
+
+def test_hash_leaves_is_same_as_hash_leaf(leaves):
+    hasher = TreeHasher()
+    assert hasher.hash_leaves(leaves) == [hasher.hash_leaf(l) for l in leaves]
+    assert hasher.hash_leaves([]) == []
+
+
+def test_hash_leaves_of_big_leaves_in_threads(monkeypatch):
+    monkeypatch.setattr(os, 'cpu_count', lambda: 4)
+    hasher = TreeHasher()
+    big_leaves = [os.urandom(HASHLIB_GIL_MINSIZE) for _ in range(hasher.PARALLEL_MIN_LEAVES + 3)]
+    assert hasher.hash_leaves(big_leaves) == [hasher.hash_leaf(l) for l in big_leaves]
+
+
+def test_hash_level_is_same_as_hash_children(leaves):
+    hasher = TreeHasher()
+    hashes = hasher.hash_leaves(leaves)
+    assert hasher.hash_level(hashes) == [hasher.hash_children(hashes[i], hashes[i + 1])
+                                         for i in range(0, len(hashes) - 1, 2)]
+    # The last node of an odd sized level is ignored
+    assert hasher.hash_level(hashes[:-1]) == hasher.hash_level(hashes)[:-1]
+
+
+@pytest.mark.parametrize('hasher', [TreeHasher(), HexTreeHasher()],
+                         ids=['default', 'overridden'])
+def test_hash_full_is_same_as_sequential(hasher, leaves):
+    if isinstance(hasher, HexTreeHasher):
+        leaves = [l.hex().encode() for l in leaves]
+    for width in list(range(0, 70)) + [127, 128, 129, 300]:
+        assert hasher._hash_full(leaves, 0, width) == \
+            hash_full_sequentially(hasher, leaves[:width])
+    assert hasher._hash_full(leaves, 5, 22) == \
+        hash_full_sequentially(hasher, leaves[5:22])
+    with pytest.raises(IndexError):
+        hasher._hash_full(leaves, 5, 301)
+
+
+def test_extend_is_same_as_append(leaves):
+    rnd = random.Random(2)
+    for start in (0, 1, 3, 8, 13):
+        appended = CompactMerkleTree()
+        for leaf in leaves[:start]:
+            appended.append(leaf)
+        extended = copy(appended)
+        idx = start
+        while idx < len(leaves):
+            batch = leaves[idx:idx + rnd.randint(1, 40)]
+            for leaf in batch:
+                appended.append(leaf)
+            extended.extend(batch)
+            idx += len(batch)
+            assert extended.tree_size == appended.tree_size
+            assert extended.hashes == appended.hashes
+            assert extended.root_hash == appended.root_hash
+
+
+@skipper
+def test_batch_hashing_perf():
+    hasher = TreeHasher()
+    leaves = [os.urandom(256) for _ in range(2 ** 16)]
+
+    start = time.perf_counter()
+    root, hashes = hash_full_sequentially(hasher, leaves)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assert hasher._hash_full(leaves, 0, len(leaves)) == (root, hashes)
+    batched = time.perf_counter() - start
+
+    tree = CompactMerkleTree()
+    start = time.perf_counter()
+    for leaf in leaves:
+        tree.append(leaf)
+    appended = time.perf_counter() - start
+
+    tree = CompactMerkleTree()
+    start = time.perf_counter()
+    tree.extend(leaves)
+    extended = time.perf_counter() - start
+    assert tree.root_hash == root
+
+    print("Hashing a tree of {} leaves: sequentially {:.3f}s, batched {:.3f}s; "
+          "appending {:.3f}s, extending {:.3f}s"
+          .format(len(leaves), sequential, batched, appended, extended))
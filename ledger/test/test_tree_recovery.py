@@ -0,0 +1,55 @@
+import pytest
+
+from common.serializers.json_serializer import JsonSerializer
+from common.serializers.msgpack_serializer import MsgPackSerializer
+from ledger.test.helper import create_ledger_leveldb_storage, random_txn
+from ledger.tree_recovery import ParallelTreeRecovery
+
+
+def read_hash_store_files(ledger):
+    hash_store = ledger.tree.hashStore
+    with open(hash_store.leavesFile.db_path, 'rb') as leaves, \
+            open(hash_store.nodesFile.db_path, 'rb') as nodes:
+        return leaves.read(), nodes.read()
+
+
+@pytest.fixture(params=['same_serializer', 'different_serializers'])
+def serializers(request):
+    txn_serializer = MsgPackSerializer()
+    if request.param == 'same_serializer':
+        return txn_serializer, txn_serializer
+    return txn_serializer, JsonSerializer()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 4, 16])
+@pytest.mark.parametrize('txn_count', [0, 1, 5, 16, 37])
+def test_parallel_recovery_is_same_as_sequential(tempdir, serializers,
+                                                 chunk_size, txn_count):
+    ledger = create_ledger_leveldb_storage(*serializers, tempdir)
+    for i in range(txn_count):
+        ledger.add(random_txn(i))
+    leaves, nodes = read_hash_store_files(ledger)
+    hashes = ledger.tree.hashes
+    root_hash = ledger.root_hash
+
+    ledger.tree.reset()
+    ledger.seqNo = 0
+    recovered = ParallelTreeRecovery(ledger, chunk_size, workers=2).recover()
+
+    assert recovered == txn_count
+    assert ledger.seqNo == txn_count
+    assert ledger.size == txn_count
+    assert ledger.tree.hashes == hashes
+    assert ledger.root_hash == root_hash
+    assert read_hash_store_files(ledger) == (leaves, nodes)
+    assert ledger.tree.verify_consistency(txn_count)
+
+    # The recovered ledger can be extended as usual
+    ledger.add(random_txn(txn_count))
+    assert ledger.size == txn_count + 1
+
+
+def test_parallel_recovery_chunk_size_is_power_of_2(tempdir, serializers):
+    ledger = create_ledger_leveldb_storage(*serializers, tempdir)
+    with pytest.raises(ValueError):
+        ParallelTreeRecovery(ledger, 6)
@@ -0,0 +1,128 @@
+import pytest
+
+from common.serializers.msgpack_serializer import MsgPackSerializer
+from ledger.compact_merkle_tree import CompactMerkleTree
+from ledger.hash_stores.file_hash_store import FileHashStore
+from ledger.ledger import Ledger
+from ledger.txn_index import TxnIndex, get_txn_field
+from storage.kv_store_leveldb import KeyValueStorageLeveldb
+from storage.kv_store_leveldb_int_keys import KeyValueStorageLeveldbIntKeys
+
+FIELDS = {'type': 'txn.type', 'from': 'txn.metadata.from'}
+
+
+def make_txn(i):
+    return {'txn': {'type': str(i % 3),
+                    'data': {'value': i},
+                    'metadata': {'from': 'client{}'.format(i % 5)}},
+            'reqId': i}
+
+
+def create_ledger(tempdir, fields=FIELDS):
+    serializer = MsgPackSerializer()
+    txn_index = TxnIndex(KeyValueStorageLeveldb(tempdir, 'txn_index'), fields) \
+        if fields is not None else None
+    return Ledger(CompactMerkleTree(hashStore=FileHashStore(dataDir=tempdir)),
+                  dataDir=tempdir,
+                  txn_serializer=serializer,
+                  hash_serializer=serializer,
+                  transactionLogStore=KeyValueStorageLeveldbIntKeys(tempdir, 'transactions'),
+                  txn_index=txn_index)
+
+
+@pytest.fixture(scope='function')
+def ledger(tempdir):
+    ledger = create_ledger(tempdir)
+    for i in range(50):
+        ledger.add(make_txn(i))
+    yield ledger
+    ledger.stop()
+
+
+def test_get_txn_field():
+    txn = make_txn(7)
+    assert get_txn_field(txn, 'txn.metadata.from') == 'client2'
+    assert get_txn_field(txn, 'txn.data') == {'value': 7}
+    assert get_txn_field(txn, 'txn.metadata.from.name') is None
+    assert get_txn_field(txn, 'txnMetadata.seqNo') is None
+
+
+def test_index_seq_nos(ledger):
+    index = ledger.txn_index
+    assert index.last_seq_no == 50
+    assert list(index.seq_nos('type', '1')) == list(range(2, 51, 3))
+    assert list(index.seq_nos('from', 'client0')) == list(range(1, 51, 5))
+    assert list(index.seq_nos('from', 'client')) == []
+    # Values are compared with their types
+    assert list(index.seq_nos('type', 1)) == []
+    with pytest.raises(KeyError):
+        list(index.seq_nos('reqId', 1))
+
+
+def test_get_by_indexed_fields(ledger):
+    assert ledger.get(type='2') == make_txn(2)
+    assert ledger.get(type='2', **{'from': 'client3'}) == make_txn(8)
+    assert ledger.get(type='2', reqId=44) == make_txn(44)
+    assert ledger.get(type='2', reqId=45) is None
+    assert ledger.get(type='3') is None
+
+
+def test_get_without_index(tempdir):
+    ledger = create_ledger(tempdir, fields=None)
+    for i in range(10):
+        ledger.add(make_txn(i))
+    assert ledger.get(reqId=4) == make_txn(4)
+    assert ledger.get(reqId=4, txn=make_txn(4)['txn']) == make_txn(4)
+    assert ledger.get(reqId=4, txn=make_txn(5)['txn']) is None
+    assert ledger.get(type='2') is None
+    ledger.stop()
+
+
+def test_index_is_caught_up_on_start(tempdir):
+    ledger = create_ledger(tempdir, fields=None)
+    for i in range(20):
+        ledger.add(make_txn(i))
+    ledger.stop()
+
+    # The index is built for existing txns
+    ledger = create_ledger(tempdir)
+    assert ledger.txn_index.last_seq_no == 20
+    assert ledger.get(**{'from': 'client4'}) == make_txn(4)
+    ledger.stop()
+
+    # Txns added while the index was not used are indexed
+    ledger = create_ledger(tempdir, fields=None)
+    for i in range(20, 30):
+        ledger.add(make_txn(i))
+    ledger.stop()
+    ledger = create_ledger(tempdir)
+    assert ledger.txn_index.last_seq_no == 30
+    assert list(ledger.txn_index.seq_nos('type', '0')) == list(range(1, 31, 3))
+    ledger.stop()
+
+
+def test_index_txns_in_batches(tempdir):
+    txn_index = TxnIndex(KeyValueStorageLeveldb(tempdir, 'txn_index'), FIELDS)
+    batch_sizes = []
+    add_txns = txn_index.add_txns
+
+    def add_txns_spy(txns):
+        batch_sizes.append(len(txns))
+        add_txns(txns)
+
+    txn_index.add_txns = add_txns_spy
+    txn_index.add_txns_in_batches(((i + 1, make_txn(i)) for i in range(25)),
+                                  batch_size=10)
+    assert batch_sizes == [10, 10, 5]
+    assert txn_index.last_seq_no == 25
+    assert list(txn_index.seq_nos('from', 'client4')) == [5, 10, 15, 20, 25]
+    txn_index.close()
+
+
+def test_rebuild_index_with_other_fields(ledger, tempdir):
+    ledger.stop()
+    ledger = create_ledger(tempdir, fields={'value': 'txn.data.value'})
+    ledger.rebuild_txn_index()
+    assert ledger.txn_index.last_seq_no == 50
+    assert list(ledger.txn_index.seq_nos('value', 17)) == [18]
+    assert ledger.get(value=17) == make_txn(17)
@@ -1,9 +1,29 @@
 import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence
+
+# hashlib releases the GIL only while hashing inputs of at least this size,
+# hashing smaller ones in threads just adds overhead
+HASHLIB_GIL_MINSIZE = 2048
+
+_leaf_hashing_executor = None
+
+
+def _get_leaf_hashing_executor():
+    global _leaf_hashing_executor
+    if _leaf_hashing_executor is None:
+        _leaf_hashing_executor = ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 1)
+    return _leaf_hashing_executor
 
 
 class TreeHasher(object):
     """Merkle hasher with domain separation for leaves and nodes."""
 
+    # Minimal number of leaves in a batch to hash them in a thread pool
+    PARALLEL_MIN_LEAVES = 256
+
     def __init__(self, hashfunc=hashlib.sha256):
         self.hashfunc = hashfunc
 
@@ -27,6 +47,74 @@ class TreeHasher(object):
         hasher.update(b"\x01" + left + right)
         return hasher.digest()
 
+    def hash_leaves(self, leaves: Sequence[bytes]) -> List[bytes]:
+        """
+        Hash a batch of leaves, the result is the same as calling `hash_leaf`
+        for every leaf.
+
+        Big batches of big leaves are split between threads since hashlib
+        releases the GIL for them.
+        """
+        if type(self).hash_leaf is not TreeHasher.hash_leaf:
+            return [self.hash_leaf(leaf) for leaf in leaves]
+        workers = os.cpu_count() or 1
+        if workers > 1 and len(leaves) >= self.PARALLEL_MIN_LEAVES and \
+                sum(map(len, leaves)) >= len(leaves) * HASHLIB_GIL_MINSIZE:
+            step = -(-len(leaves) // workers)
+            parts = _get_leaf_hashing_executor().map(
+                self._hash_leaves,
+                [leaves[i:i + step] for i in range(0, len(leaves), step)])
+            return [leaf_hash for part in parts for leaf_hash in part]
+        return self._hash_leaves(leaves)
+
+    def _hash_leaves(self, leaves):
+        # Copying a hash object which has already consumed the prefix
+        # avoids concatenating the prefix with every leaf
+        new_hasher = self.hashfunc(b"\x00").copy
+        result = []
+        append = result.append
+        for leaf in leaves:
+            hasher = new_hasher()
+            hasher.update(leaf)
+            append(hasher.digest())
+        return result
+
+    def hash_level(self, hashes: Sequence[bytes]) -> List[bytes]:
+        """
+        Hash every pair of adjacent nodes of a tree level, the result is the
+        level above it. The last node is ignored if there is an odd number of
+        nodes.
+        """
+        pairs = iter(hashes)
+        if type(self).hash_children is not TreeHasher.hash_children:
+            return [self.hash_children(left, right)
+                    for left, right in zip(pairs, pairs)]
+        hashfunc = self.hashfunc
+        return [hashfunc(b"\x01" + left + right).digest()
+                for left, right in zip(pairs, pairs)]
+
+    def hash_levels(self, leaf_hashes: Sequence[bytes]) -> List[List[bytes]]:
+        """
+        Return all levels of full subtrees of a tree with the given leaf
+        hashes, starting from the leaves: the node `i` of the level `h`
+        is the root of the full subtree over leaves [i * 2^h, (i + 1) * 2^h).
+        """
+        levels = [list(leaf_hashes)]
+        while len(levels[-1]) > 1:
+            levels.append(self.hash_level(levels[-1]))
+        return levels
+
+    def _hash_full_hashed(self, leaf_hashes: Sequence[bytes]):
+        """Same as `_hash_full` over all leaves, but takes leaf hashes."""
+        if not leaf_hashes:
+            return self.hash_empty(), ()
+        # Every odd sized level ends with a full subtree which is not a part
+        # of a bigger one
+        hashes = tuple(level[-1]
+                       for level in reversed(self.hash_levels(leaf_hashes))
+                       if len(level) % 2)
+        return self._hash_fold(hashes), hashes
+
     def _hash_full(self, leaves, l_idx, r_idx):
         """Hash the leaves between (l_idx, r_idx) as a valid entire tree.
 
@@ -41,25 +129,7 @@ class TreeHasher(object):
         if l_idx < 0 or r_idx < l_idx or r_idx > len(leaves):
             raise IndexError("{},{} not a valid range over [0,{}]".format(
                 l_idx, r_idx, len(leaves)))
-
-        width = r_idx - l_idx
-        if width == 0:
-            return self.hash_empty(), ()
-        elif width == 1:
-            leaf_hash = self.hash_leaf(leaves[l_idx])
-            return leaf_hash, (leaf_hash,)
-        else:
-            # next smallest power of 2
-            split_width = 2**((width - 1).bit_length() - 1)
-            assert split_width < width <= 2 * split_width
-            l_root, l_hashes = self._hash_full(
-                leaves, l_idx, l_idx + split_width)
-            assert len(l_hashes) == 1  # left tree always full
-            r_root, r_hashes = self._hash_full(
-                leaves, l_idx + split_width, r_idx)
-            root_hash = self.hash_children(l_root, r_root)
-            return (root_hash, (root_hash,) if split_width * 2 == width else
-                    l_hashes + r_hashes)
+        return self._hash_full_hashed(self.hash_leaves(leaves[l_idx:r_idx]))
 
     def _hash_fold(self, hashes):
         rev_hashes = iter(hashes[::-1])
@@ -0,0 +1,196 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from common.serializers.msgpack_serializer import MsgPackSerializer
+from ledger.tree_hasher import TreeHasher
+
+
+def serialize_entry_for_tree(entry, txn_serializer, hash_serializer) -> bytes:
+    """
+    Serialize a transaction log entry the way the tree expects it. A msgpack
+    entry is not decoded when the tree uses msgpack too.
+    """
+    if isinstance(txn_serializer, MsgPackSerializer) and \
+            isinstance(hash_serializer, MsgPackSerializer):
+        txn = txn_serializer.deserialize_lazy(entry)
+    else:
+        txn = txn_serializer.deserialize(entry)
+    return hash_serializer.serialize(txn, toBytes=True)
+
+
+def hash_txn_chunk(entries, hasher: TreeHasher,
+                   txn_serializer=None, hash_serializer=None):
+    """
+    Hash a chunk of transaction log entries which starts at a leaf index
+    aligned to the chunk size.
+
+    This is run in worker processes, so everything it gets and returns must
+    be picklable.
+
+    :param entries: raw transaction log entries of the chunk
+    :param hasher: the tree hasher
+    :param txn_serializer: if given (together with `hash_serializer`) entries
+    are deserialized with it and serialized with `hash_serializer` before
+    hashing, the same way `Ledger.recoverTreeFromTxnLog` does it
+    :return: tuple of leaf hashes, nodes created inside the chunk as tuples of
+    (leaf number in chunk, height, nodeHash) in the order a sequential append
+    creates them, and the hashes of the full subtrees that form the chunk,
+    sorted in descending order of size
+    """
+    leaves = []
+    for entry in entries:
+        if txn_serializer is not None:
+            entry = serialize_entry_for_tree(entry, txn_serializer,
+                                             hash_serializer)
+        if isinstance(entry, str):
+            entry = entry.encode()
+        leaves.append(bytes(entry))
+    leaf_hashes = hasher.hash_leaves(leaves)
+    levels = hasher.hash_levels(leaf_hashes)
+    nodes = []
+    for leaf_no in range(2, len(leaf_hashes) + 1, 2):
+        # Every trailing zero bit of the leaf number means one more full
+        # subtree completed by this leaf, exactly as the carry chain in
+        # `CompactMerkleTree.__push_subtree_hash`
+        height = 1
+        while not leaf_no & ((1 << height) - 1):
+            nodes.append((leaf_no, height,
+                          levels[height][(leaf_no >> height) - 1]))
+            height += 1
+    # Every odd sized level ends with a full subtree which is not a part of
+    # a bigger one
+    subtrees = tuple(level[-1] for level in reversed(levels) if len(level) % 2)
+    return leaf_hashes, nodes, subtrees
+
+
+class ParallelTreeRecovery:
+    """
+    Rebuilds the merkle tree of a ledger from its transaction log.
+
+    Leaves are hashed in chunks of `chunk_size` (a power of 2) across a
+    process pool, each chunk is folded into its subtree root in the worker and
+    chunk roots are combined in the main process. Leaf and node hashes are
+    written to the hash store in bulk, in exactly the order and format a
+    sequential `CompactMerkleTree.append` of every transaction would produce.
+    """
+
+    def __init__(self, ledger, chunk_size, workers=None,
+                 progress_interval=None):
+        if chunk_size < 1 or chunk_size & (chunk_size - 1):
+            raise ValueError("chunk_size should be a power of 2, "
+                             "got {}".format(chunk_size))
+        self.ledger = ledger
+        self.tree = ledger.tree
+        self.chunk_size = chunk_size
+        self.chunk_height = chunk_size.bit_length() - 1
+        self.workers = workers or os.cpu_count() or 1
+        self.progress_interval = progress_interval
+        self._hasher = self.tree.hasher
+        # Full subtrees bigger than a chunk as (height, hash), sorted in
+        # descending order of height
+        self._carry = []
+        # Full subtrees of the last chunk if it is not complete
+        self._partial = ()
+        self._leaf_count = 0
+        self._started_at = None
+        self._last_report_at = None
+
+    def recover(self) -> int:
+        """
+        Recover the tree, the tree and its hash store are expected to be
+        empty.
+
+        :return: the number of recovered leaves
+        """
+        self._started_at = self._last_report_at = time.perf_counter()
+        serializers = (None, None)
+        if self.ledger.txn_serializer != self.ledger.hash_serializer:
+            serializers = (self.ledger.txn_serializer,
+                           self.ledger.hash_serializer)
+
+        chunks = self._chunks()
+        first = next(chunks, None)
+        if first is None:
+            return 0
+        if len(first) < self.chunk_size:
+            # Small ledger, not worth starting a process pool
+            self._apply_chunk(hash_txn_chunk(first, self._hasher,
+                                             *serializers))
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                pending = [executor.submit(hash_txn_chunk, first,
+                                           self._hasher, *serializers)]
+                for chunk in chunks:
+                    # Keep a bounded number of chunks in flight so that the
+                    # transaction log is never fully loaded into memory
+                    if len(pending) >= 2 * self.workers:
+                        self._apply_chunk(pending.pop(0).result())
+                    pending.append(executor.submit(hash_txn_chunk, chunk,
+                                                   self._hasher,
+                                                   *serializers))
+                for future in pending:
+                    self._apply_chunk(future.result())
+
+        self.tree.hashStore.flush()
+        self.tree._update(self._leaf_count, self._frontier)
+        self.ledger.seqNo = self._leaf_count
+        logging.info("Recovered {} txns into merkle tree in {:.2f} seconds"
+                     .format(self._leaf_count,
+                             time.perf_counter() - self._started_at))
+        return self._leaf_count
+
+    def _chunks(self):
+        entries = (entry for _, entry
+                   in self.ledger._transactionLog.iterator())
+        while True:
+            chunk = list(islice(entries, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < self.chunk_size:
+                return
+
+    def _apply_chunk(self, result):
+        leaf_hashes, nodes, subtrees = result
+        offset = self._leaf_count
+        self.tree.hashStore.writeLeaves(leaf_hashes)
+        chunk_nodes = [(offset + leaf_no, height, node_hash)
+                       for leaf_no, height, node_hash in nodes]
+        self._leaf_count += len(leaf_hashes)
+        if len(leaf_hashes) == self.chunk_size:
+            chunk_nodes.extend(self._push_chunk_root(subtrees[0]))
+        else:
+            self._partial = subtrees
+        self.tree.hashStore.writeNodes(chunk_nodes)
+        self._report_progress()
+
+    def _push_chunk_root(self, root_hash):
+        height = self.chunk_height
+        nodes = []
+        while self._carry and self._carry[-1][0] == height:
+            _, left = self._carry.pop()
+            root_hash = self._hasher.hash_children(left, root_hash)
+            height += 1
+            nodes.append((self._leaf_count, height, root_hash))
+        self._carry.append((height, root_hash))
+        return nodes
+
+    @property
+    def _frontier(self):
+        return tuple(h for _, h in self._carry) + self._partial
+
+    def _report_progress(self):
+        if not self.progress_interval:
+            return
+        now = time.perf_counter()
+        if now - self._last_report_at < self.progress_interval:
+            return
+        self._last_report_at = now
+        elapsed = now - self._started_at
+        logging.info("Merkle tree recovery: {} txns hashed in {:.0f} seconds "
+                     "({:.0f} txns/sec)"
+                     .format(self._leaf_count, elapsed,
+                             self._leaf_count / elapsed if elapsed else 0))
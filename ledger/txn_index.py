@@ -0,0 +1,135 @@
+import json
+from typing import Dict, Iterable, Iterator, Tuple
+
+from storage.kv_store import KeyValueStorage
+
+SEQ_NO_SIZE = 8
+
+
+def get_txn_field(txn, path: str):
+    """
+    Return the value of a (nested) txn field given as a dotted path like
+    `txn.metadata.from`, or None if the txn has no such field
+    """
+    value = txn
+    for name in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(name)
+    return value
+
+
+class TxnIndex:
+    """
+    Persistent secondary index of ledger txns by values of some of their
+    fields.
+
+    Every indexed field is declared with a name and a dotted path to the
+    field in a txn. For every txn having a field there is a key
+    `<name>\\x00<JSON of value>\\x00<seq_no>`, so all seq_nos of txns with a
+    given value are found by a single seek and come in ascending order.
+    Txns are supposed to be added in order of their seq_nos, the last
+    indexed seq_no is stored so that the index can be caught up with the
+    ledger after a crash.
+    """
+
+    LAST_SEQ_NO_KEY = b'\x00last_seq_no'
+
+    def __init__(self, storage: KeyValueStorage, fields: Dict[str, str]):
+        for name in fields:
+            if not name or '\x00' in name:
+                raise ValueError("Invalid name of an indexed field: {!r}"
+                                 .format(name))
+        self._storage = storage
+        self.fields = dict(fields)
+
+    @property
+    def closed(self):
+        return self._storage.closed
+
+    def open(self):
+        self._storage.open()
+
+    def close(self):
+        self._storage.close()
+
+    def reset(self):
+        self._storage.reset()
+
+    def is_indexed(self, name) -> bool:
+        return name in self.fields
+
+    @property
+    def last_seq_no(self) -> int:
+        try:
+            value = self._storage.get(self.LAST_SEQ_NO_KEY)
+        except KeyError:
+            return 0
+        return int.from_bytes(value, 'big') if value else 0
+
+    def field_value(self, txn, name):
+        return get_txn_field(txn, self.fields[name])
+
+    def add(self, seq_no: int, txn):
+        self.add_txns([(seq_no, txn)])
+
+    def add_txns(self, txns: Iterable[Tuple[int, dict]]):
+        """
+        Index txns given as (seq_no, txn) pairs in ascending order of
+        seq_nos, all of them are written in one batch
+        """
+        batch = []
+        seq_no = None
+        for seq_no, txn in txns:
+            encoded_seq_no = int(seq_no).to_bytes(SEQ_NO_SIZE, 'big')
+            for name in self.fields:
+                value = self.field_value(txn, name)
+                if value is not None:
+                    batch.append((self._value_prefix(name, value) +
+                                  encoded_seq_no, b''))
+        if seq_no is None:
+            return
+        batch.append((self.LAST_SEQ_NO_KEY,
+                      int(seq_no).to_bytes(SEQ_NO_SIZE, 'big')))
+        self._storage.setBatch(batch)
+
+    def seq_nos(self, name, value) -> Iterator[int]:
+        """
+        Iterate over seq_nos of txns having the given value of the indexed
+        field in ascending order
+        """
+        prefix = self._value_prefix(name, value)
+        for key in self._storage.iterator(start=prefix, include_value=False):
+            key = bytes(key)
+            if not key.startswith(prefix):
+                return
+            yield int.from_bytes(key[len(prefix):], 'big')
+
+    def add_txns_in_batches(self, txns: Iterable[Tuple[int, dict]], batch_size=1000):
+        """
+        Index txns like `add_txns`, but write them in batches of
+        `batch_size` txns, so that a whole ledger can be indexed without
+        keeping all its index keys in memory
+        """
+        batch = []
+        for seq_no, txn in txns:
+            batch.append((seq_no, txn))
+            if len(batch) >= batch_size:
+                self.add_txns(batch)
+                batch = []
+        self.add_txns(batch)
+
+    def rebuild(self, txns: Iterable[Tuple[int, dict]], batch_size=1000):
+        """
+        Drop the index and index all given txns again
+        """
+        self.reset()
+        self.add_txns_in_batches(txns, batch_size)
+
+    def _value_prefix(self, name, value) -> bytes:
+        if name not in self.fields:
+            raise KeyError("Field {} is not indexed".format(name))
+        # JSON escapes control characters, so the encoded value never
+        # contains the separator
+        return b'\x00'.join((name.encode(),
+                             json.dumps(value, sort_keys=True).encode(), b''))
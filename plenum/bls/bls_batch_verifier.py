@@ -0,0 +1,110 @@
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, Executor
+from typing import List, Sequence, Tuple, Any, Callable, Optional
+
+from crypto.bls.bls_crypto import BlsCryptoVerifier
+
+_executor = None
+
+
+def bls_verification_executor(workers: int) -> Executor:
+    """
+    Returns the executor shared by all BLS batch verifiers of the process.
+    Pairing checks are done by the native crypto library, which releases
+    the GIL, so they run in parallel in threads.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=workers)
+    return _executor
+
+
+def verify_sigs_batch(verifier: BlsCryptoVerifier,
+                      sigs: Sequence[str],
+                      message: bytes,
+                      pks: Sequence[object],
+                      proven: Sequence[bool]) -> List[bool]:
+    """
+    Verifies signatures of the same message by different keys. Signatures
+    by keys with verified proofs of possession (`proven`) are checked with
+    one aggregate check, the rest and all of them if the aggregate check
+    fails are checked one by one.
+    """
+    results = [None] * len(sigs)
+    aggregated = [i for i in range(len(sigs)) if proven[i]]
+    if len(aggregated) > 1 and verifier.verify_sigs([sigs[i] for i in aggregated], message,
+                                                    [pks[i] for i in aggregated]):
+        for i in aggregated:
+            results[i] = True
+    return [verifier.verify_sig(sig, message, pk) if result is None else result
+            for sig, pk, result in zip(sigs, pks, results)]
+
+
+class BlsBatchVerifier:
+    """
+    Verifies BLS signatures in an executor, off the event loop.
+
+    Signatures are added with ids of the caller's choice and queued until
+    `flush`, which submits one job for all queued signatures of the same
+    message. Results of finished jobs are returned by `get_results` in the
+    order the signatures were submitted in.
+    """
+
+    def __init__(self, verifier: BlsCryptoVerifier, executor: Executor,
+                 on_done: Optional[Callable] = None):
+        """
+        :param on_done: called with the future of a job when it is done,
+        from the thread which finished it
+        """
+        self._verifier = verifier
+        self._executor = executor
+        self._on_done = on_done
+        # message -> (ids, signatures, keys, whether keys have verified proofs of possession)
+        self._queued = OrderedDict()
+        # (ids, future of verification results)
+        self._in_progress = deque()
+
+    @property
+    def pending_count(self) -> int:
+        return sum(len(ids) for ids, _, _, _ in self._queued.values()) + \
+            sum(len(ids) for ids, _ in self._in_progress)
+
+    def add(self, id: Any, sig: str, message: bytes, pk: object, proven=False):
+        """
+        :param proven: whether the proof of possession of the key is verified,
+        only signatures by such keys are verified in aggregate
+        """
+        ids, sigs, pks, proofs = self._queued.setdefault(message, ([], [], [], []))
+        ids.append(id)
+        sigs.append(sig)
+        pks.append(pk)
+        proofs.append(proven)
+
+    def flush(self) -> int:
+        """
+        Submit all queued signatures for verification, returns the number of
+        submitted jobs
+        """
+        count = len(self._queued)
+        for message, (ids, sigs, pks, proven) in self._queued.items():
+            future = self._executor.submit(verify_sigs_batch, self._verifier,
+                                           sigs, message, pks, proven)
+            if self._on_done is not None:
+                future.add_done_callback(self._on_done)
+            self._in_progress.append((ids, future))
+        self._queued.clear()
+        return count
+
+    def get_results(self, wait=False) -> List[Tuple[Any, bool]]:
+        """
+        Return (id, whether the signature is valid) for signatures of
+        finished jobs, or of all submitted jobs if `wait` is set.
+        """
+        results = []
+        while self._in_progress:
+            ids, future = self._in_progress[0]
+            if not wait and not future.done():
+                break
+            self._in_progress.popleft()
+            results.extend(zip(ids, future.result()))
+        return results
@@ -2,6 +2,7 @@ import os
 from crypto.bls.bls_bft_replica import BlsBftReplica
 from crypto.bls.bls_factory import BlsFactoryBft, BlsFactoryCrypto
 from crypto.bls.bls_key_register import BlsKeyRegister
+from plenum.bls.bls_batch_verifier import BlsBatchVerifier, bls_verification_executor
 from plenum.bls.bls_bft_replica_plenum import BlsBftReplicaPlenum
 from plenum.bls.bls_crypto_factory import create_default_bls_crypto_factory
 from plenum.bls.bls_key_register_pool_manager import BlsKeyRegisterPoolManager
@@ -27,7 +28,16 @@ class BlsFactoryBftPlenum(BlsFactoryBft):
                                    self._node.bls_bft,
                                    is_master,
                                    self._node.db_manager,
-                                   self._node.metrics)
+                                   self._node.metrics,
+                                   self.create_bls_batch_verifier())
+
+    def create_bls_batch_verifier(self):
+        workers = self._node.config.BLS_COMMIT_VERIFICATION_WORKERS
+        if not workers:
+            return None
+        return BlsBatchVerifier(self._node.bls_bft.bls_crypto_verifier,
+                                bls_verification_executor(workers),
+                                on_done=self._node.wake_up)
 
 
 def create_default_bls_bft_factory(node):
@@ -1,10 +1,12 @@
-from typing import Optional
+from collections import OrderedDict
+from typing import Optional, List, Tuple
 
 from common.serializers.serialization import state_roots_serializer
 from crypto.bls.bls_bft import BlsBft
 from crypto.bls.bls_bft_replica import BlsBftReplica
 from crypto.bls.bls_multi_signature import MultiSignature, MultiSignatureValue
 from crypto.bls.indy_crypto.bls_crypto_indy_crypto import IndyCryptoBlsUtils
+from plenum.bls.bls_batch_verifier import BlsBatchVerifier
 from plenum.common.constants import BLS_PREFIX, AUDIT_LEDGER_ID, TXN_PAYLOAD, \
     TXN_PAYLOAD_DATA, AUDIT_TXN_LEDGER_ROOT, AUDIT_TXN_STATE_ROOT, AUDIT_TXN_PP_SEQ_NO
 from plenum.common.messages.node_messages import PrePrepare, Prepare, Commit
@@ -24,7 +26,8 @@ class BlsBftReplicaPlenum(BlsBftReplica):
                  bls_bft: BlsBft,
                  is_master,
                  database_manager: DatabaseManager,
-                 metrics: MetricsCollector = NullMetricsCollector()):
+                 metrics: MetricsCollector = NullMetricsCollector(),
+                 batch_verifier: Optional[BlsBatchVerifier] = None):
         super().__init__(bls_bft, is_master)
         self._all_bls_latest_multi_sigs = None
         self.node_id = node_id
@@ -32,6 +35,15 @@ class BlsBftReplicaPlenum(BlsBftReplica):
         self._all_signatures = {}
         self.state_root_serializer = state_roots_serializer
         self.metrics = metrics
+        self._batch_verifier = batch_verifier
+        # id -> [commit, sender, number of signatures being verified, why_not]
+        # in order COMMITs were enqueued for validation
+        self._commits_in_validation = OrderedDict()
+        self._next_validation_id = 0
+        # node name -> whether proof of possession of its BLS key is verified,
+        # for the pool state root hash `_key_proofs_root`
+        self._verified_key_proofs = {}
+        self._key_proofs_root = None
 
     def _can_process_ledger(self, ledger_id):
         # enable BLS for all ledgers
@@ -74,6 +86,97 @@ class BlsBftReplicaPlenum(BlsBftReplica):
                                             )):
                 return BlsBftReplicaPlenum.CM_BLS_SIG_WRONG
 
+    def enqueue_commit_validation(self, commit: Commit, sender, pre_prepare: PrePrepare):
+        '''
+        Queues BLS signatures of the COMMIT for verification by the batch
+        verifier, all signatures of the same message are verified at once
+        off the event loop. Results are returned by `get_validated_commits`
+        in order COMMITs were enqueued in. COMMITs are validated
+        synchronously if there is no batch verifier.
+        '''
+        validation_id = self._next_validation_id
+        self._next_validation_id += 1
+        if self._batch_verifier is None:
+            why_not = self.validate_commit(commit, sender, pre_prepare)
+            self._commits_in_validation[validation_id] = [commit, sender, 0, why_not]
+            return
+
+        why_not, sigs = self._get_commit_sigs(commit, sender, pre_prepare)
+        self._commits_in_validation[validation_id] = [commit, sender, len(sigs), why_not]
+        for sig, message, pk, proven in sigs:
+            self._batch_verifier.add(validation_id, sig, message, pk, proven)
+
+    def flush_commit_validation(self):
+        if self._batch_verifier is not None:
+            self._batch_verifier.flush()
+
+    def get_validated_commits(self, wait=False) -> List[Tuple[Commit, str, Optional[int]]]:
+        '''
+        Returns (COMMIT, sender, None or an error code as `validate_commit`)
+        of enqueued COMMITs with all BLS signatures verified
+        '''
+        if self._batch_verifier is not None:
+            for validation_id, valid in self._batch_verifier.get_results(wait):
+                entry = self._commits_in_validation[validation_id]
+                entry[2] -= 1
+                if not valid:
+                    logger.info("Incorrect bls signature in commit {} from {}".format(entry[0], entry[1]))
+                    entry[3] = BlsBftReplicaPlenum.CM_BLS_SIG_WRONG
+
+        validated = []
+        while self._commits_in_validation:
+            validation_id, (commit, sender, verifying, why_not) = next(iter(self._commits_in_validation.items()))
+            if verifying > 0:
+                break
+            del self._commits_in_validation[validation_id]
+            validated.append((commit, sender, why_not))
+        return validated
+
+    def _get_commit_sigs(self, commit: Commit, sender, pre_prepare: PrePrepare):
+        '''
+        Returns an error code if the COMMIT is wrong without checking its BLS
+        signatures, and (signature, message, public key, whether proof of
+        possession of the key is verified) to check otherwise
+        '''
+        if f.BLS_SIGS.nm not in commit:
+            return None, []
+
+        audit_txn = self._get_correct_audit_transaction(pre_prepare)
+        if not audit_txn:
+            return None, []
+
+        audit_payload = audit_txn[TXN_PAYLOAD][TXN_PAYLOAD_DATA]
+        sigs = []
+        for lid, sig in commit.blsSigs.items():
+            lid = int(lid)
+            if lid not in audit_payload[AUDIT_TXN_STATE_ROOT] or lid not in audit_payload[AUDIT_TXN_LEDGER_ROOT]:
+                return BlsBftReplicaPlenum.CM_BLS_SIG_WRONG, []
+            fake_pp = BlsBftReplicaPlenum._create_fake_pre_prepare_for_multi_sig(
+                lid,
+                audit_payload[AUDIT_TXN_STATE_ROOT][lid],
+                audit_payload[AUDIT_TXN_LEDGER_ROOT][lid],
+                pre_prepare
+            )
+            node_name = self.get_node_name(sender)
+            pool_root_hash = self._get_pool_root_hash(fake_pp, serialize=False)
+            pk = self._bls_bft.bls_key_register.get_key_by_name(node_name, pool_root_hash)
+            if not pk:
+                return BlsBftReplicaPlenum.CM_BLS_SIG_WRONG, []
+            message = self._create_multi_sig_value_for_pre_prepare(fake_pp, self._get_pool_root_hash(fake_pp))
+            sigs.append((sig, message.as_single_value(), pk,
+                         self._is_key_proof_verified(node_name, pool_root_hash, pk)))
+        return None, sigs
+
+    def _is_key_proof_verified(self, node_name, pool_root_hash, pk) -> bool:
+        if self._key_proofs_root != pool_root_hash:
+            self._key_proofs_root = pool_root_hash
+            self._verified_key_proofs = {}
+        if node_name not in self._verified_key_proofs:
+            key_proof = self._bls_bft.bls_key_register.get_key_proof_by_name(node_name, pool_root_hash)
+            self._verified_key_proofs[node_name] = key_proof is not None and \
+                self._bls_bft.bls_crypto_verifier.verify_key_proof_of_possession(key_proof, pk)
+        return self._verified_key_proofs[node_name]
+
     # ----CREATE/UPDATE----
 
     @measure_time(MetricsName.BLS_UPDATE_PREPREPARE_TIME)
@@ -180,6 +283,10 @@ class BlsBftReplicaPlenum(BlsBftReplica):
                 keys_to_remove.append(key)
         for key in keys_to_remove:
             self._all_signatures.pop(key, None)
+        # Audit txns are created for master batches only
+        audit_txn_cache = self._database_manager.audit_txn_cache
+        if self._is_master and audit_txn_cache is not None:
+            audit_txn_cache.gc(key_3PC[1])
 
     # ----MULT_SIG----
 
@@ -320,11 +427,18 @@ class BlsBftReplicaPlenum(BlsBftReplica):
         if ledger is None:
             return None
         seqNo = ledger.uncommitted_size
+        audit_txn_cache = self._database_manager.audit_txn_cache
+        if audit_txn_cache is not None:
+            txn = audit_txn_cache.get(pp.ppSeqNo, seqNo)
+            if txn is not None:
+                return txn
         for curSeqNo in reversed(range(1, seqNo + 1)):
             txn = ledger.get_by_seq_no_uncommitted(curSeqNo)
             if txn:
                 payload = txn[TXN_PAYLOAD][TXN_PAYLOAD_DATA]
                 if pp.ppSeqNo == payload[AUDIT_TXN_PP_SEQ_NO]:
+                    if audit_txn_cache is not None:
+                        audit_txn_cache.add(curSeqNo, txn)
                     return txn
         return None
 
@@ -1,6 +1,6 @@
 from logging import getLogger
 
-from ursa.bls import VerKey
+from ursa.bls import VerKey, ProofOfPossession
 
 from crypto.bls.bls_key_register import BlsKeyRegister
 from crypto.bls.indy_crypto.bls_crypto_indy_crypto import IndyCryptoBlsUtils
@@ -15,6 +15,7 @@ class BlsKeyRegisterPoolManager(BlsKeyRegister):
         # since pool state isn't changed very often, we cache keys corresponded
         # to the pool_state to not get them from the state trie each time
         self._current_bls_keys = {}  # {node_name : BLS key}
+        self._current_bls_key_proofs = {}  # {node_name : proof of possession of BLS key}
         self._current_pool_state_root_hash = None
 
     def get_pool_root_hash_committed(self):
@@ -30,8 +31,19 @@ class BlsKeyRegisterPoolManager(BlsKeyRegister):
 
         return self._current_bls_keys.get(node_name, None)
 
+    def get_key_proof_by_name(self, node_name, pool_state_root_hash=None) -> ProofOfPossession:
+        if not pool_state_root_hash:
+            pool_state_root_hash = self.get_pool_root_hash_committed()
+
+        if self._current_pool_state_root_hash != pool_state_root_hash:
+            self._current_pool_state_root_hash = pool_state_root_hash
+            self._load_keys_for_root(pool_state_root_hash)
+
+        return self._current_bls_key_proofs.get(node_name, None)
+
     def _load_keys_for_root(self, pool_state_root_hash):
         self._current_bls_keys = {}
+        self._current_bls_key_proofs = {}
         for data in self._node.write_manager.get_all_node_data_for_root_hash(
                 pool_state_root_hash):
             node_name = data[ALIAS]
@@ -51,3 +63,8 @@ class BlsKeyRegisterPoolManager(BlsKeyRegister):
 
             key_bls = IndyCryptoBlsUtils.bls_from_str(key_str, cls=VerKey)
             self._current_bls_keys[node_name] = key_bls
+
+            key_proof_str = data.get(BLS_KEY_PROOF, None)
+            if key_proof_str is not None:
+                self._current_bls_key_proofs[node_name] = \
+                    IndyCryptoBlsUtils.bls_from_str(key_proof_str, cls=ProofOfPossession)
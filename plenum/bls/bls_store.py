@@ -12,10 +12,12 @@ class BlsStore:
                  data_location,
                  key_value_storage_name,
                  serializer=None,
-                 db_config=None):
+                 db_config=None,
+                 read_only=False):
         self._kvs = initKeyValueStorage(key_value_type,
                                         data_location,
                                         key_value_storage_name,
+                                        read_only=read_only,
                                         db_config=db_config)
         self._serializer = serializer or multi_sig_store_serializer
 
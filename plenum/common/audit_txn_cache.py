@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from typing import Optional
+
+from plenum.common.constants import TXN_PAYLOAD, TXN_PAYLOAD_DATA, AUDIT_TXN_PP_SEQ_NO
+
+
+class AuditTxnCache:
+    """
+    In-memory index of recent audit txns by ppSeqNo of their 3PC batches,
+    so that the audit txn of a batch is found without walking the audit
+    ledger.
+
+    Txns are added when audit txns are appended to the ledger or read from
+    it, removed when their batches are rejected and garbage collected with
+    stable checkpoints. At most `max_size` txns are kept, the oldest ones are
+    evicted first, so a miss does not mean there is no such audit txn.
+    """
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        # ppSeqNo -> (seq_no, audit txn), in order of addition
+        self._txns = OrderedDict()
+
+    def __len__(self):
+        return len(self._txns)
+
+    def add(self, seq_no: int, txn):
+        pp_seq_no = txn[TXN_PAYLOAD][TXN_PAYLOAD_DATA][AUDIT_TXN_PP_SEQ_NO]
+        # The latest audit txn of a batch wins
+        self._txns.pop(pp_seq_no, None)
+        self._txns[pp_seq_no] = (seq_no, txn)
+        while len(self._txns) > self._max_size:
+            self._txns.popitem(last=False)
+
+    def get(self, pp_seq_no, ledger_size: int) -> Optional[dict]:
+        """
+        Return the cached audit txn of a batch if it is still in the audit
+        ledger of the given (uncommitted) size
+        """
+        seq_no, txn = self._txns.get(pp_seq_no, (None, None))
+        if txn is None or seq_no > ledger_size:
+            return None
+        return txn
+
+    def discard(self, ledger_size: int):
+        """
+        Remove txns discarded from the audit ledger, i.e. with seq_nos
+        greater than its new (uncommitted) size
+        """
+        for pp_seq_no in [k for k, (seq_no, _) in self._txns.items()
+                          if seq_no > ledger_size]:
+            del self._txns[pp_seq_no]
+
+    def gc(self, till_pp_seq_no):
+        for pp_seq_no in [k for k in self._txns if k <= till_pp_seq_no]:
+            del self._txns[pp_seq_no]
+
+    def reset(self):
+        self._txns.clear()
+
+    def close(self):
+        self.reset()
@@ -0,0 +1,56 @@
+from typing import Optional
+
+from plenum.common.constants import TXN_PAYLOAD, TXN_PAYLOAD_DATA, AUDIT_TXN_STATE_ROOT
+
+
+class AuditedStateRoots:
+    """
+    In-memory index of the latest committed state root of every ledger
+    mentioned in the audit ledger, so that read requests find it without
+    walking the audit ledger back.
+
+    Roots are taken from audit txns as they are committed. Roots of ledgers
+    not changed since the index was (re)started are found by reading the
+    audit ledger backwards on demand, each audit txn is read at most once.
+    """
+
+    def __init__(self, audit_ledger):
+        self._audit_ledger = audit_ledger
+        # ledger_id -> state root
+        self._roots = {}
+        # seq_no of the next audit txn to read backwards
+        self._next_seq_no = audit_ledger.size
+
+    def get(self, ledger_id: int) -> Optional[str]:
+        while ledger_id not in self._roots and self._next_seq_no > 0:
+            self._add_older(self._audit_ledger.getBySeqNo(self._next_seq_no))
+            self._next_seq_no -= 1
+        return self._roots.get(ledger_id)
+
+    def add(self, txn):
+        """
+        Take roots from a newly committed audit txn
+        """
+        for ledger_id, state_root in self._state_roots(txn).items():
+            if state_root:
+                self._roots[ledger_id] = state_root
+
+    def reset(self):
+        """
+        Forget known roots, they will be found in the audit ledger starting
+        from its current size
+        """
+        self._roots.clear()
+        self._next_seq_no = self._audit_ledger.size
+
+    def close(self):
+        self._roots.clear()
+
+    def _add_older(self, txn):
+        for ledger_id, state_root in self._state_roots(txn).items():
+            if state_root:
+                self._roots.setdefault(ledger_id, state_root)
+
+    @staticmethod
+    def _state_roots(txn):
+        return txn[TXN_PAYLOAD][TXN_PAYLOAD_DATA][AUDIT_TXN_STATE_ROOT]
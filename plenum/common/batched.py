@@ -1,18 +1,20 @@
 from collections import deque
-from typing import Any, Iterable, Dict
+from typing import Any, Iterable, Dict, Optional
 
 from plenum.common.util import z85_to_friendly
 from plenum.common.constants import BATCH, OP_FIELD_NAME
 from plenum.common.metrics_collector import NullMetricsCollector, MetricsName
-from plenum.common.prepare_batch import split_messages_on_batches
+from plenum.common.outbox import Outbox, MessageClass, message_class
+from plenum.common.prepare_batch import pack_messages_into_batches
 from stp_core.common.constants import CONNECTION_PREFIX
+from stp_core.network.bulk_transfer import BandwidthLimiter
 from stp_core.crypto.signer import Signer
 from stp_core.common.log import getlogger
 from plenum.common.types import f
-from plenum.common.messages.node_messages import Batch
 from plenum.common.message_processor import MessageProcessor
 from stp_core.validators.message_length_validator import MessageLenValidator
 from stp_core.common.config.util import getConfig
+from stp_core.loop.looper import IDLE_SLEEP
 
 logger = getlogger()
 
@@ -28,31 +30,37 @@ class Batched(MessageProcessor):
         :param self: 'NodeStacked'
         :param config: 'stp config'
         """
-        self.outBoxes = {}  # type: Dict[int, deque]
+        self.outBoxes = {}  # type: Dict[int, Outbox]
+        # Serialized bulk frames, sent after messages of outBoxes
+        self.bulkOutBoxes = {}  # type: Dict[int, deque]
+        self._bulk_limiters = {}  # type: Dict[int, BandwidthLimiter]
         self.stp_config = config or getConfig()
         self.msg_len_val = MessageLenValidator(self.stp_config.MSG_LEN_LIMIT)
         self.metrics = metrics
         self.enabled = self.stp_config.TRANSPORT_BATCH_ENABLED
 
-    def _enqueue(self, msg: Any, rid: int, signer: Signer) -> None:
+    def _enqueue(self, msg: Any, rid: int, signer: Signer,
+                 msg_class: MessageClass = MessageClass.OTHER) -> None:
         """
         Enqueue the message into the remote's queue.
 
         :param msg: the message to enqueue
         :param rid: the id of the remote node
+        :param msg_class: class of the message which defines its priority
         """
         if rid not in self.outBoxes:
-            self.outBoxes[rid] = deque()
-        self.outBoxes[rid].append(msg)
+            self.outBoxes[rid] = Outbox()
+        self.outBoxes[rid].append(msg, msg_class)
 
-    def _enqueueIntoAllRemotes(self, msg: Any, signer: Signer) -> None:
+    def _enqueueIntoAllRemotes(self, msg: Any, signer: Signer,
+                               msg_class: MessageClass = MessageClass.OTHER) -> None:
         """
         Enqueue the specified message into all the remotes in the nodestack.
 
         :param msg: the message to enqueue
         """
         for rid in self.remotes.keys():
-            self._enqueue(msg, rid, signer)
+            self._enqueue(msg, rid, signer, msg_class)
 
     def send(self,
              msg: Any, *
@@ -79,52 +87,69 @@ class Batched(MessageProcessor):
         if err_msg is not None:
             return False, err_msg
 
+        msg_class = message_class(msg)
         if rids:
             for r in rids:
                 for part in message_parts:
-                    self._enqueue(part, r, signer)
+                    self._enqueue(part, r, signer, msg_class)
         else:
             for part in message_parts:
-                self._enqueueIntoAllRemotes(part, signer)
+                self._enqueueIntoAllRemotes(part, signer, msg_class)
         return True, None
 
+    def send_bulk(self, frame: bytes, rid: int) -> bool:
+        """
+        Enqueue a serialized bulk frame (see `serialize_bulk_frame`) into the
+        bulk outBox of the remote. Bulk frames are not batched and are sent
+        only after all other messages, with the bandwidth to each remote
+        limited by BULK_PEER_BANDWIDTH.
+
+        :return: False if the frame is too large
+        """
+        if not self.bulkFrameLenVal.is_len_less_than_limit(len(frame)):
+            return False
+        if rid not in self.bulkOutBoxes:
+            self.bulkOutBoxes[rid] = deque()
+        self.bulkOutBoxes[rid].append(frame)
+        return True
+
     def flushOutBoxes(self) -> None:
         """
-        Clear the outBoxes and transmit batched messages to remotes.
+        Transmit batched messages of the outBoxes to remotes within
+        byte budgets of message classes.
         """
         removedRemotes = []
-        for rid, msgs in self.outBoxes.items():
+        for rid, outbox in self.outBoxes.items():
             try:
                 dest = self.remotes[rid].name
             except KeyError:
                 removedRemotes.append(rid)
                 continue
-            if msgs:
+            if outbox:
+                # Messages out of budgets of their classes stay for next
+                # flushes
+                msgs = deque(outbox.pop(self.stp_config.MSG_LEN_LIMIT,
+                                        self.metrics))
                 if self._should_batch(msgs):
                     logger.trace(
                         "{} batching {} msgs to {} into fewer transmissions".
                         format(self, len(msgs), dest))
                     logger.trace("    messages: {}".format(msgs))
-                    batches = split_messages_on_batches(list(msgs),
-                                                        self._make_batch,
-                                                        self._test_batch_len,
-                                                        )
+                    batches = pack_messages_into_batches(msgs,
+                                                         self._test_batch_len)
                     msgs.clear()
-                    if batches:
-                        for batch, size in batches:
-                            logger.trace("{} sending payload to {}: {}".format(
-                                self, dest, batch))
-                            self.metrics.add_event(MetricsName.TRANSPORT_BATCH_SIZE, size)
-                            # Setting timeout to never expire
-                            self.transmit(
-                                batch,
-                                rid,
-                                timeout=self.messageTimeout,
-                                serialized=True,
-                                is_batch=True
-                            )
-                    else:
-                        logger.error("{} cannot create batch(es) for {}".format(self, dest))
+                    for batch, size in batches:
+                        logger.trace("{} sending payload to {}: {}".format(
+                            self, dest, batch))
+                        self.metrics.add_event(MetricsName.TRANSPORT_BATCH_SIZE, size)
+                        # Setting timeout to never expire
+                        self.transmit(
+                            batch,
+                            rid,
+                            timeout=self.messageTimeout,
+                            serialized=True,
+                            is_batch=True
+                        )
                 else:
                     while msgs:
                         msg = msgs.popleft()
@@ -138,22 +163,59 @@ class Batched(MessageProcessor):
         for rid in removedRemotes:
             logger.info("{}{} has removed rid {}".
                         format(CONNECTION_PREFIX, self, z85_to_friendly(rid)), extra={"cli": False})
-            msgs = self.outBoxes[rid]
-            if msgs:
-                self.discard(msgs,
+            outbox = self.outBoxes[rid]
+            if outbox:
+                self.discard(outbox,
                              "{}rid {} no longer available"
                              .format(CONNECTION_PREFIX,
                                      z85_to_friendly(rid)),
                              logMethod=logger.debug)
             del self.outBoxes[rid]
 
-    def _make_batch(self, msgs):
-        if len(msgs) > 1:
-            batch = Batch(msgs, None)
-            serialized_batch = self.sign_and_serialize(batch)
-        else:
-            serialized_batch = msgs[0]
-        return serialized_batch
+        self._flush_bulk_outboxes()
+
+    def wakeup_timeout(self) -> Optional[float]:
+        """
+        Outboxes are flushed right away, bulk frames once bandwidth limits
+        allow, but not more often than an idle looper polls
+        """
+        timeout = super().wakeup_timeout()
+        if any(self.outBoxes.values()):
+            return 0
+        for rid in self.bulkOutBoxes:
+            limiter = self._bulk_limiters.get(rid)
+            bulk_timeout = max(limiter.time_to_send() if limiter else 0, IDLE_SLEEP)
+            timeout = bulk_timeout if timeout is None else min(timeout, bulk_timeout)
+        return timeout
+
+    def _flush_bulk_outboxes(self):
+        """
+        Transmit bulk frames while bandwidth limits allow, a frame which
+        does not fit into the socket queue of the remote is retried on the
+        next flush.
+        """
+        for rid in list(self.bulkOutBoxes):
+            frames = self.bulkOutBoxes[rid]
+            if rid not in self.remotes:
+                self.discard("{} bulk frame(s)".format(len(frames)),
+                             "{}rid {} no longer available"
+                             .format(CONNECTION_PREFIX, z85_to_friendly(rid)),
+                             logMethod=logger.debug)
+                del self.bulkOutBoxes[rid]
+                self._bulk_limiters.pop(rid, None)
+                continue
+            limiter = self._bulk_limiters.get(rid)
+            if limiter is None:
+                limiter = BandwidthLimiter(self.stp_config.BULK_PEER_BANDWIDTH)
+                self._bulk_limiters[rid] = limiter
+            while frames and limiter.can_send():
+                if not self.transmit_bulk(frames[0], rid):
+                    break
+                limiter.sent(len(frames.popleft()))
+            if not frames:
+                del self.bulkOutBoxes[rid]
+            else:
+                self.metrics.add_event(MetricsName.OUTBOX_BULK_DEPTH, len(frames))
 
     def _test_batch_len(self, batch_len):
         return self.msg_len_val.is_len_less_than_limit(batch_len)
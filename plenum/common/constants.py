@@ -256,6 +256,7 @@ HS_FILE = "file"
 HS_MEMORY = "memory"
 HS_LEVELDB = 'leveldb'
 HS_ROCKSDB = 'rocksdb'
+HS_MMAP = 'mmap'
 
 LAST_SENT_PRE_PREPARE = 'lastSentPrePrepare'
 
@@ -273,6 +274,8 @@ ATTRIB_LABEL = 'attrib'
 SEQ_NO_DB_LABEL = 'seq_no_db'
 NODE_STATUS_DB_LABEL = 'node_status_db'
 LAST_SENT_PP_STORE_LABEL = 'last_sent_pp_store'
+AUDIT_TXN_CACHE_LABEL = 'audit_txn_cache'
+AUDITED_STATE_ROOTS_LABEL = 'audited_state_roots'
 
 VALID_LEDGER_IDS = (POOL_LEDGER_ID, DOMAIN_LEDGER_ID, CONFIG_LEDGER_ID, AUDIT_LEDGER_ID)
 
@@ -323,6 +323,10 @@ class InvalidMessageExceedingSizeException(InvalidMessageException):
         super().__init__(ex_txt, *args, **kwargs)
 
 
+class InvalidBulkFrameException(InvalidMessageException):
+    pass
+
+
 class RequestNackedException(Exception):
     pass
 
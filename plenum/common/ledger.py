@@ -64,6 +64,17 @@ class Ledger(_Ledger):
         merkle_info.pop(F.seqNo.name, None)
         return merkle_info
 
+    def append_txns(self, txns: List, build_proofs=False):
+        for seq_no, txn in enumerate(txns, self.seqNo + 1):
+            if get_seq_no(txn) is None:
+                append_txn_metadata(txn, seq_no=seq_no)
+        proofs = super().append_txns(txns, build_proofs=build_proofs)
+        if proofs is not None:
+            # seqNo is part of the transaction itself, so no need to duplicate it here
+            for proof in proofs:
+                proof.pop(F.seqNo.name, None)
+        return proofs
+
     def _append_seq_no(self, txns, start_seq_no):
         # TODO: Fix name `start_seq_no`, it is misleading. The seq no start from `start_seq_no`+1
         seq_no = start_seq_no
@@ -80,10 +91,10 @@ class Ledger(_Ledger):
         numbers of the committed txns
         """
         committedSize = self.size
-        committedTxns = []
-        for txn in self.uncommittedTxns[:count]:
-            txn.update(self.append(txn))
-            committedTxns.append(txn)
+        committedTxns = self.uncommittedTxns[:count]
+        proofs = self.append_txns(committedTxns, build_proofs=True)
+        for txn, proof in zip(committedTxns, proofs):
+            txn.update(proof)
         self.uncommittedTxns = self.uncommittedTxns[count:]
         logger.debug('Committed {} txns, {} are uncommitted'.
                      format(len(committedTxns), len(self.uncommittedTxns)))
@@ -137,9 +148,7 @@ class Ledger(_Ledger):
         # so the size of the tree would be 32*(lg n) bytes where n is the
         # number of leaves (no. of txns)
         tempTree = copy(currentTree)
-        for txn in txns:
-            s = self.serialize_for_tree(txn)
-            tempTree.append(s)
+        tempTree.extend([self.serialize_for_tree(txn) for txn in txns])
         return tempTree
 
     def reset_uncommitted(self):
@@ -42,10 +42,10 @@ class LedgerManager:
         provider = CatchupNodeDataProvider(owner)
 
         self._client_seeder_inbox, rx = create_direct_channel()
-        self._client_seeder = ClientSeederService(rx, provider)
+        self._client_seeder = ClientSeederService(rx, provider, config)
 
         self._node_seeder_inbox, rx = create_direct_channel()
-        self._node_seeder = NodeSeederService(rx, provider)
+        self._node_seeder = NodeSeederService(rx, provider, config)
 
         leecher_outbox_tx, leecher_outbox_rx = create_direct_channel()
         router = Router(leecher_outbox_rx)
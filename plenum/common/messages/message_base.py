@@ -1,4 +1,5 @@
 from collections import OrderedDict
+from itertools import islice
 from operator import itemgetter
 from typing import Mapping, Dict
 
@@ -6,7 +7,52 @@ from plenum.common.types import f
 
 from plenum.common.constants import OP_FIELD_NAME, SCHEMA_IS_STRICT
 from plenum.common.exceptions import MissingProtocolVersionError
-from plenum.common.messages.fields import FieldValidator
+from plenum.common.messages.fields import FieldValidator, FieldBase
+
+
+def compile_field_validator(validator: FieldValidator):
+    """
+    Return a function doing the same as `validator.validate`.
+
+    For validators relying on `FieldBase.validate` the nullable and type
+    checks are inlined, so that validation of a field costs one call of
+    `_specific_validation` instead of a chain of method calls.
+    """
+    if type(validator).validate is not FieldBase.validate:
+        return validator.validate
+
+    nullable = validator.nullable
+    base_types = validator._base_types
+    if base_types is not None:
+        base_types = tuple(base_types)
+    wrong_type_msg = validator._wrong_type_msg
+    specific_validation = validator._specific_validation
+
+    def validate(val):
+        if nullable and val is None:
+            return None
+        if base_types is not None and not isinstance(val, base_types):
+            return wrong_type_msg(val)
+        return specific_validation(val) or None
+
+    return validate
+
+
+class CompiledSchema:
+    """
+    Precomputed form of a message schema: field validators by name, names
+    of required fields and the order of fields.
+    """
+
+    __slots__ = ('schema', 'names', 'validators', 'required_names')
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.names = tuple(name for name, _ in schema)
+        self.validators = {name: compile_field_validator(validator)
+                           for name, validator in schema}
+        self.required_names = tuple(name for name, validator in schema
+                                    if not validator.optional)
 
 
 class MessageValidator(FieldValidator):
@@ -25,7 +71,49 @@ class MessageValidator(FieldValidator):
         self._validate_fields_with_schema(dct, self.schema)
         self._validate_message(dct)
 
+    @classmethod
+    def _compiled_schema(cls, schema):
+        """
+        Return the compiled form of `schema` if it is the schema of the
+        class, it is compiled on first use. Schemas set on instances (see
+        ClientMessageValidator) are not compiled.
+        """
+        compiled = cls.__dict__.get('_compiled')
+        if compiled is not None and compiled.schema is schema:
+            return compiled
+        if schema is not cls.schema:
+            return None
+        compiled = CompiledSchema(schema)
+        cls._compiled = compiled
+        return compiled
+
     def _validate_fields_with_schema(self, dct, schema):
+        compiled = self._compiled_schema(schema)
+        if compiled is None:
+            self._validate_fields_with_generic_schema(dct, schema)
+        else:
+            self._validate_fields_with_compiled_schema(dct, compiled)
+
+    def _validate_fields_with_compiled_schema(self, dct, compiled: CompiledSchema):
+        if not isinstance(dct, dict):
+            self._raise_invalid_type(dct)
+        for name in compiled.required_names:
+            if name not in dct:
+                missed_required_fields = \
+                    set(compiled.required_names) - set(dct)
+                self._raise_missed_fields(*missed_required_fields)
+        validators = compiled.validators
+        for k, v in dct.items():
+            validate = validators.get(k)
+            if validate is None:
+                if self.schema_is_strict:
+                    self._raise_unknown_fields(k, v)
+            else:
+                validation_error = validate(v)
+                if validation_error:
+                    self._raise_invalid_fields(k, v, validation_error)
+
+    def _validate_fields_with_generic_schema(self, dct, schema):
         if not isinstance(dct, dict):
             self._raise_invalid_type(dct)
         schema_dct = dict(schema)
@@ -103,10 +191,12 @@ class MessageBase(Mapping, MessageValidator):
 
         input_as_dict = self._post_process(input_as_dict)
 
-        self._fields = OrderedDict(
-            (name, input_as_dict[name])
-            for name, _ in self.schema
-            if name in input_as_dict)
+        compiled = self._compiled_schema(self.schema)
+        names = compiled.names if compiled is not None \
+            else map(itemgetter(0), self.schema)
+        self._fields = OrderedDict([(name, input_as_dict[name])
+                                    for name in names
+                                    if name in input_as_dict])
 
     def _join_with_schema(self, args):
         return dict(zip(map(itemgetter(0), self.schema), args))
@@ -123,11 +213,14 @@ class MessageBase(Mapping, MessageValidator):
         )
 
     def __getitem__(self, key):
-        values = list(self._fields.values())
-        if isinstance(key, slice):
-            return values[key]
         if isinstance(key, int):
-            return values[key]
+            size = len(self._fields)
+            index = key + size if key < 0 else key
+            if not 0 <= index < size:
+                raise IndexError("message field index out of range")
+            return next(islice(self._fields.values(), index, None))
+        if isinstance(key, slice):
+            return list(self._fields.values())[key]
         raise TypeError("Invalid argument type.")
 
     def _asdict(self):
@@ -96,6 +96,29 @@ class MetricsName(IntEnum):
     PROPAGATES_PHASE_REQ_TIMEOUTS = 75
     ORDERING_PHASE_REQ_TIMEOUTS = 76
     AUTH_RULES_FROM_STATE_COUNT = 77
+    # Trie node cache statistics, summed over all states
+    STATE_NODE_CACHE_HITS = 78
+    STATE_NODE_CACHE_MISSES = 79
+    STATE_NODE_CACHE_SIZE = 80
+    # State trie garbage collection, summed over all states
+    STATE_GC_COLLECTED_NODES = 81
+    STATE_GC_RECLAIMED_BYTES = 82
+    # Number of messages of a class in an outbox of a remote when it is
+    # flushed, and seconds the oldest of them waited there
+    OUTBOX_THREE_PC_DEPTH = 83
+    OUTBOX_VIEW_CHANGE_DEPTH = 84
+    OUTBOX_PROPAGATE_DEPTH = 85
+    OUTBOX_CLIENT_REPLY_DEPTH = 86
+    OUTBOX_OTHER_DEPTH = 87
+    OUTBOX_CATCHUP_DEPTH = 88
+    OUTBOX_THREE_PC_WAIT_TIME = 89
+    OUTBOX_VIEW_CHANGE_WAIT_TIME = 90
+    OUTBOX_PROPAGATE_WAIT_TIME = 91
+    OUTBOX_CLIENT_REPLY_WAIT_TIME = 92
+    OUTBOX_OTHER_WAIT_TIME = 93
+    OUTBOX_CATCHUP_WAIT_TIME = 94
+    # Number of bulk frames left in an outbox of a remote after flush
+    OUTBOX_BULK_DEPTH = 95
 
     # Node service statistics
     NODE_PROD_TIME = 100
@@ -111,6 +134,7 @@ class MetricsName(IntEnum):
     SERVICE_CLIENT_STACK_TIME = 111
     SERVICE_MONITOR_ACTIONS_TIME = 112
     SERVICE_TIMERS_TIME = 113
+    SERVICE_QUERY_WORKERS_TIME = 114
 
     # Node specific metrics
     SERVICE_NODE_STACK_TIME = 200
@@ -0,0 +1,185 @@
+import time
+from collections import deque
+from enum import IntEnum, unique
+from typing import Any, List, Mapping
+
+from plenum.common.constants import PREPREPARE, PREPARE, COMMIT, CHECKPOINT, \
+    VIEW_CHANGE, VIEW_CHANGE_ACK, NEW_VIEW, INSTANCE_CHANGE, \
+    BACKUP_INSTANCE_FAULTY, OLD_VIEW_PREPREPARE_REQ, OLD_VIEW_PREPREPARE_REP, \
+    VIEW_CHANGE_DONE, CURRENT_STATE, PROPAGATE, MESSAGE_REQUEST, \
+    MESSAGE_RESPONSE, LEDGER_STATUS, CONSISTENCY_PROOF, CATCHUP_REQ, \
+    CATCHUP_REP, OBSERVED_DATA, BATCH_COMMITTED, REPLY, REQACK, REQNACK, \
+    REJECT, OP_FIELD_NAME
+from plenum.common.metrics_collector import MetricsName, MetricsCollector
+
+
+@unique
+class MessageClass(IntEnum):
+    """
+    Classes of outgoing messages in order of priority
+    """
+    THREE_PC = 0
+    VIEW_CHANGE = 1
+    PROPAGATE = 2
+    CLIENT_REPLY = 3
+    OTHER = 4
+    CATCHUP = 5
+
+
+MESSAGE_CLASSES = {
+    PREPREPARE: MessageClass.THREE_PC,
+    PREPARE: MessageClass.THREE_PC,
+    COMMIT: MessageClass.THREE_PC,
+    CHECKPOINT: MessageClass.THREE_PC,
+    VIEW_CHANGE: MessageClass.VIEW_CHANGE,
+    VIEW_CHANGE_ACK: MessageClass.VIEW_CHANGE,
+    NEW_VIEW: MessageClass.VIEW_CHANGE,
+    INSTANCE_CHANGE: MessageClass.VIEW_CHANGE,
+    BACKUP_INSTANCE_FAULTY: MessageClass.VIEW_CHANGE,
+    OLD_VIEW_PREPREPARE_REQ: MessageClass.VIEW_CHANGE,
+    OLD_VIEW_PREPREPARE_REP: MessageClass.VIEW_CHANGE,
+    VIEW_CHANGE_DONE: MessageClass.VIEW_CHANGE,
+    CURRENT_STATE: MessageClass.VIEW_CHANGE,
+    PROPAGATE: MessageClass.PROPAGATE,
+    MESSAGE_REQUEST: MessageClass.PROPAGATE,
+    MESSAGE_RESPONSE: MessageClass.PROPAGATE,
+    REPLY: MessageClass.CLIENT_REPLY,
+    REQACK: MessageClass.CLIENT_REPLY,
+    REQNACK: MessageClass.CLIENT_REPLY,
+    REJECT: MessageClass.CLIENT_REPLY,
+    LEDGER_STATUS: MessageClass.CATCHUP,
+    CONSISTENCY_PROOF: MessageClass.CATCHUP,
+    CATCHUP_REQ: MessageClass.CATCHUP,
+    CATCHUP_REP: MessageClass.CATCHUP,
+    OBSERVED_DATA: MessageClass.CATCHUP,
+    BATCH_COMMITTED: MessageClass.CATCHUP,
+}
+
+# Number of transport batches of MSG_LEN_LIMIT bytes of a class taken out
+# of an outbox in one flush, the rest waits for next flushes
+MESSAGE_CLASS_WEIGHTS = {
+    MessageClass.THREE_PC: 16,
+    MessageClass.VIEW_CHANGE: 8,
+    MessageClass.PROPAGATE: 4,
+    MessageClass.CLIENT_REPLY: 2,
+    MessageClass.OTHER: 2,
+    MessageClass.CATCHUP: 1,
+}
+
+# Classes of messages which may depend on each other (3PC messages on
+# PROPAGATEs and MESSAGE_RESPONSEs of requests and batches, view change
+# messages on 3PC ones), they are sent in order of enqueueing
+DEPENDENT_CLASSES = (
+    MessageClass.THREE_PC,
+    MessageClass.VIEW_CHANGE,
+    MessageClass.PROPAGATE,
+)
+
+DEPTH_METRICS = {
+    MessageClass.THREE_PC: MetricsName.OUTBOX_THREE_PC_DEPTH,
+    MessageClass.VIEW_CHANGE: MetricsName.OUTBOX_VIEW_CHANGE_DEPTH,
+    MessageClass.PROPAGATE: MetricsName.OUTBOX_PROPAGATE_DEPTH,
+    MessageClass.CLIENT_REPLY: MetricsName.OUTBOX_CLIENT_REPLY_DEPTH,
+    MessageClass.OTHER: MetricsName.OUTBOX_OTHER_DEPTH,
+    MessageClass.CATCHUP: MetricsName.OUTBOX_CATCHUP_DEPTH,
+}
+
+WAIT_TIME_METRICS = {
+    MessageClass.THREE_PC: MetricsName.OUTBOX_THREE_PC_WAIT_TIME,
+    MessageClass.VIEW_CHANGE: MetricsName.OUTBOX_VIEW_CHANGE_WAIT_TIME,
+    MessageClass.PROPAGATE: MetricsName.OUTBOX_PROPAGATE_WAIT_TIME,
+    MessageClass.CLIENT_REPLY: MetricsName.OUTBOX_CLIENT_REPLY_WAIT_TIME,
+    MessageClass.OTHER: MetricsName.OUTBOX_OTHER_WAIT_TIME,
+    MessageClass.CATCHUP: MetricsName.OUTBOX_CATCHUP_WAIT_TIME,
+}
+
+
+def message_class(msg: Any) -> MessageClass:
+    typename = getattr(msg, 'typename', None)
+    if typename is None and isinstance(msg, Mapping):
+        typename = msg.get(OP_FIELD_NAME)
+    return MESSAGE_CLASSES.get(typename, MessageClass.OTHER)
+
+
+class Outbox:
+    """
+    Queue of serialized messages to a remote with a FIFO queue per message
+    class. Every flush takes out at most the byte budget of every class, so
+    that 3PC messages are not stuck behind bulky catchup traffic and lower
+    classes still make progress. Messages of dependent classes are taken
+    out in order they were enqueued.
+    """
+
+    def __init__(self, get_current_time=time.perf_counter):
+        # Every queue item is (number of enqueueing, time of enqueueing, msg)
+        self._queues = [deque() for _ in MessageClass]
+        self._enqueued = 0
+        self._size = 0
+        self.get_current_time = get_current_time
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return repr([msg for queue in self._queues for _, _, msg in queue])
+
+    def append(self, msg: Any, msg_class: MessageClass = MessageClass.OTHER):
+        self._enqueued += 1
+        self._queues[msg_class].append(
+            (self._enqueued, self.get_current_time(), msg))
+        self._size += 1
+
+    def depth(self, msg_class: MessageClass) -> int:
+        return len(self._queues[msg_class])
+
+    def pop(self, batch_len: int, metrics: MetricsCollector = None) -> List[Any]:
+        """
+        Take messages out in order they should be sent, every class gives
+        at most its weight of `batch_len` bytes but at least one message
+
+        :param batch_len: max length of a transport batch
+        """
+        if metrics is not None:
+            self._add_metrics(metrics)
+        budgets = [MESSAGE_CLASS_WEIGHTS[msg_class] * batch_len
+                   for msg_class in MessageClass]
+        msgs = []
+        while True:
+            # Dependent messages stop at the first one out of budget
+            classes = [msg_class for msg_class in DEPENDENT_CLASSES
+                       if self._queues[msg_class]]
+            if not classes:
+                break
+            msg_class = min(classes, key=lambda c: self._queues[c][0][0])
+            if not self._take(msg_class, budgets, msgs):
+                break
+        for msg_class in MessageClass:
+            if msg_class in DEPENDENT_CLASSES:
+                continue
+            while self._queues[msg_class] and \
+                    self._take(msg_class, budgets, msgs):
+                pass
+        return msgs
+
+    def clear(self):
+        for queue in self._queues:
+            queue.clear()
+        self._size = 0
+
+    def _take(self, msg_class: MessageClass, budgets: List[int],
+              msgs: List[Any]) -> bool:
+        if budgets[msg_class] <= 0:
+            return False
+        _, _, msg = self._queues[msg_class].popleft()
+        budgets[msg_class] -= len(msg)
+        msgs.append(msg)
+        self._size -= 1
+        return True
+
+    def _add_metrics(self, metrics: MetricsCollector):
+        now = self.get_current_time()
+        for msg_class, queue in zip(MessageClass, self._queues):
+            if not queue:
+                continue
+            metrics.add_event(DEPTH_METRICS[msg_class], len(queue))
+            metrics.add_event(WAIT_TIME_METRICS[msg_class], now - queue[0][1])
@@ -1,31 +1,73 @@
+from typing import List, Tuple, Callable, Iterable
+
+from plenum.common.constants import BATCH, OP_FIELD_NAME
+from plenum.common.types import f
 from stp_core.common.log import getlogger
 
-SPLIT_STEPS_LIMIT = 8
+try:
+    import ujson as json
+except ImportError:
+    import json
 
 logger = getlogger()
 
+# Serialized `Batch` is built by concatenation of already serialized
+# messages, so messages are never encoded again when they are batched.
+# Batches are not signed, the transport authenticates them.
+BATCH_PREFIX = '{{"{}":"{}","{}":['.format(OP_FIELD_NAME, BATCH, f.MSGS.nm).encode()
+BATCH_SUFFIX = '],"{}":null}}'.format(f.SIG.nm).encode()
+BATCH_SEPARATOR = b','
+
+
+def serialize_batch_part(msg: bytes) -> bytes:
+    """
+    Return a serialized message as a JSON string, the way it is put into
+    the messages of a batch
+    """
+    return json.dumps(msg.decode()).encode()
+
+
+def make_batch(parts: List[bytes]) -> bytes:
+    return BATCH_PREFIX + BATCH_SEPARATOR.join(parts) + BATCH_SUFFIX
 
-def split_messages_on_batches(msgs, make_batch_func, is_batch_len_under_limit):
 
+def pack_messages_into_batches(msgs: Iterable[bytes],
+                               is_batch_len_under_limit: Callable[[int], bool]) \
+        -> List[Tuple[bytes, int]]:
+    """
+    Pack serialized messages into batches in one pass, greedily filling
+    every batch up to the length limit. A message which does not fit into
+    a batch together with others is sent as is.
+
+    :param msgs: serialized messages in order they should be sent
+    :param is_batch_len_under_limit: check of the length of a batch
+    :return: list of serialized batches with the number of messages in them
+    """
     batches = []
-    while msgs:
-        batch = ''
-        msgs_for_batch = []
-        while msgs and is_batch_len_under_limit(len(batch)):
-            msg = msgs.pop(0)
-            serialized_msg = make_batch_func([msg])
-            if not is_batch_len_under_limit(len(serialized_msg)):
-                logger.display('The message {}... is too long ({}). '
-                               'Batches were not created'.format(serialized_msg[:256], len(serialized_msg)))
-                return
-            msgs_for_batch.append(msg)
-            batch = make_batch_func(msgs_for_batch)
-        """Need for limitation one batch size"""
-        if not is_batch_len_under_limit(len(batch)):
-            overload_msg = msgs_for_batch.pop()
-            batch = make_batch_func(msgs_for_batch)
-            msgs.insert(0, overload_msg)
-        batches.append((batch, len(msgs_for_batch)))
-    if len(batches) == 0:
-        batches = [(make_batch_func([]), 0)]
+    batch_msgs = []
+    batch_parts = []
+    empty_len = len(BATCH_PREFIX) + len(BATCH_SUFFIX)
+    batch_len = empty_len
+
+    def add_batch():
+        if len(batch_msgs) == 1:
+            batches.append((batch_msgs[0], 1))
+        else:
+            batches.append((make_batch(batch_parts), len(batch_parts)))
+
+    for msg in msgs:
+        part = serialize_batch_part(msg)
+        part_len = len(part) + len(BATCH_SEPARATOR) if batch_parts else len(part)
+        if batch_parts and not is_batch_len_under_limit(batch_len + part_len):
+            add_batch()
+            batch_msgs = []
+            batch_parts = []
+            batch_len = empty_len
+            part_len = len(part)
+        batch_msgs.append(msg)
+        batch_parts.append(part)
+        batch_len += part_len
+
+    if batch_parts:
+        add_batch()
     return batches
@@ -5,6 +5,7 @@ from random import randint
 from typing import Callable, Any, List, Dict
 
 from plenum.common.batched import Batched, logger
+from plenum.common.constants import CATCHUP_REP
 from plenum.common.config_util import getConfig, \
     get_global_config_else_read_config
 from plenum.common.message_processor import MessageProcessor
@@ -178,6 +179,8 @@ class NodeZStack(Batched, KITZStack):
         MessageProcessor.__init__(self, allowDictOnly=False)
         self.listenerQuota = config.NODE_TO_NODE_STACK_QUOTA
         self.listenerSize = config.NODE_TO_NODE_STACK_SIZE
+        # Seeders send only catchup replies in bulk frames
+        self.bulk_frame_ops = frozenset([CATCHUP_REP])
 
     # TODO: Reconsider defaulting `reSetupAuth` to True.
     def start(self, restricted=None, reSetupAuth=True):
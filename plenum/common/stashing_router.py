@@ -157,6 +157,14 @@ class StashingRouter(Router):
             if not self._resolve_and_process(*msg_tuple):
                 break
 
+    def process_with(self, handler: Handler, message: Any, *args) -> bool:
+        """
+        Process message using given handler instead of the subscribed one,
+        stashing or discarding it according to the returned result. Stashed
+        message goes to the subscribed handler when unstashed.
+        """
+        return self._process(handler, message, *args)
+
     def stash_size(self, code: Optional[int] = None):
         if code is None:
             return sum(len(q) for q in self._queues.values())
@@ -1,12 +1,12 @@
+import math
 from abc import ABC, abstractmethod
 from functools import wraps
+from heapq import heappush, heappop
 from logging import getLogger
-from typing import Callable, NamedTuple
+from typing import Callable, Dict, List, Optional
 
 import time
 
-from sortedcontainers import SortedListWithKey
-
 logger = getLogger()
 
 
@@ -24,37 +24,233 @@ class TimerService(ABC):
         pass
 
 
+class TimerEvent:
+    """
+    Callback scheduled by QueueTimer, which is returned by `schedule` as a
+    handle to cancel just this event in O(1)
+    """
+    __slots__ = ('timestamp', 'callback', 'tick', '_seq', '_timer', '_slot')
+
+    def __init__(self, timer: 'QueueTimer', timestamp: float, tick: int, seq: int, callback: Callable):
+        self.timestamp = timestamp
+        self.callback = callback
+        self.tick = tick
+        self._seq = seq
+        # None when the event was fired or cancelled
+        self._timer = timer
+        # Wheel slot holding the event, None when it is in a heap
+        self._slot = None
+
+    def __lt__(self, other: 'TimerEvent'):
+        return (self.timestamp, self._seq) < (other.timestamp, other._seq)
+
+    @property
+    def active(self) -> bool:
+        return self._timer is not None
+
+    def cancel(self):
+        if self._timer is not None:
+            self._timer._cancel_event(self)
+
+
 class QueueTimer(TimerService):
-    TimerEvent = NamedTuple('TimerEvent', [('timestamp', float), ('callback', Callable)])
+    """
+    Runs scheduled callbacks in order of their time when serviced.
+
+    Events due within `resolution * 64 ** 3` seconds (about 45 minutes by
+    default) are kept in a hashed hierarchical timer wheel and later ones in
+    a heap. Wheel slots are moved to a heap ordered by time only when their
+    time comes, so scheduling and cancelling don't depend on the number of
+    scheduled events while callbacks are still called at their exact time.
+    With `coalesce` deadlines are rounded up to `resolution`, so events due
+    within one tick fire together, and scheduling a callback for a deadline
+    it is already scheduled for returns the existing event.
+    """
+    SLOT_BITS = 6
+    LEVELS = 3
 
-    def __init__(self, get_current_time=time.perf_counter):
+    def __init__(self, get_current_time=time.perf_counter, resolution: float = 0.01, coalesce: bool = False):
         self._get_current_time = get_current_time
-        self._events = SortedListWithKey(key=lambda v: v.timestamp)
+        self._resolution = resolution
+        self._coalesce = coalesce
+        self._slot_mask = (1 << self.SLOT_BITS) - 1
+        self._wheel = [[{} for _ in range(1 << self.SLOT_BITS)]
+                       for _ in range(self.LEVELS)]  # type: List[List[Dict[TimerEvent, None]]]
+        # Events due not later than `_ready_tick`, the wheel holds later ones
+        # up to its span and `_overflow` the rest. Cancelled events are
+        # removed from the wheel right away and skipped in heaps.
+        self._ready = []  # type: List[TimerEvent]
+        self._overflow = []  # type: List[TimerEvent]
+        self._tick = None
+        self._ready_tick = None
+        self._by_callback = {}  # type: Dict[Callable, Dict[TimerEvent, None]]
+        self._coalesced = {}  # type: Dict[tuple, TimerEvent]
+        self._size = 0
+        self._seq = 0
 
     def queue_size(self):
-        return len(self._events)
+        return self._size
 
     def service(self):
-        while len(self._events) and self._next_timestamp() <= self._get_current_time():
-            self._pop_event().callback()
+        if self._tick is None:
+            return
+        while True:
+            now = self._get_current_time()
+            self._advance(now)
+            self._skip_cancelled(self._ready)
+            if not self._ready or self._ready[0].timestamp > now:
+                return
+            event = heappop(self._ready)
+            self._forget(event)
+            event.callback()
 
     def get_current_time(self) -> float:
         return self._get_current_time()
 
-    def schedule(self, delay: float, callback: Callable):
-        timestamp = self._get_current_time() + delay
-        self._events.add(self.TimerEvent(timestamp=timestamp, callback=callback))
+    def next_event_delay(self) -> Optional[float]:
+        """
+        Seconds until the earliest scheduled event, None if there are none
+        """
+        event = self._next_event()
+        if event is None:
+            return None
+        return max(0, event.timestamp - self._get_current_time())
+
+    def schedule(self, delay: float, callback: Callable) -> TimerEvent:
+        now = self._get_current_time()
+        if self._tick is None:
+            self._tick = self._ready_tick = self._tick_of(now)
+        timestamp = now + delay
+        if self._coalesce:
+            timestamp = math.ceil(timestamp / self._resolution) * self._resolution
+            event = self._coalesced.get((callback, timestamp))
+            if event is not None:
+                return event
+
+        self._seq += 1
+        event = TimerEvent(self, timestamp, self._tick_of(timestamp), self._seq, callback)
+        self._by_callback.setdefault(callback, {})[event] = None
+        if self._coalesce:
+            self._coalesced[(callback, timestamp)] = event
+        self._size += 1
+        self._place(event)
+        return event
 
     def cancel(self, callback: Callable):
-        indexes = [i for i, ev in enumerate(self._events) if ev.callback == callback]
-        for i in reversed(indexes):
-            del self._events[i]
+        for event in list(self._by_callback.get(callback, ())):
+            self._cancel_event(event)
 
     def _next_timestamp(self):
-        return self._events[0].timestamp
+        return self._next_event().timestamp
 
     def _pop_event(self) -> TimerEvent:
-        return self._events.pop(0)
+        self._next_event()
+        event = heappop(self._ready)
+        self._forget(event)
+        return event
+
+    def _tick_of(self, timestamp: float) -> int:
+        return math.floor(timestamp / self._resolution)
+
+    def _place(self, event: TimerEvent):
+        if event.tick <= self._ready_tick:
+            heappush(self._ready, event)
+            return
+        # Level is the highest group of slot bits differing from current tick
+        level = ((event.tick ^ self._tick).bit_length() - 1) // self.SLOT_BITS
+        if level >= self.LEVELS:
+            heappush(self._overflow, event)
+            return
+        slot = self._wheel[level][(event.tick >> level * self.SLOT_BITS) & self._slot_mask]
+        slot[event] = None
+        event._slot = slot
+
+    def _advance(self, now: float):
+        tick = self._tick_of(now)
+        if tick <= self._tick:
+            return
+        due = []
+        for level in range(self.LEVELS):
+            shift = level * self.SLOT_BITS
+            old, new = self._tick >> shift, tick >> shift
+            if old == new:
+                break
+            for pos in range(old + 1, old + 1 + min(new - old, 1 << self.SLOT_BITS)):
+                slot = self._wheel[level][pos & self._slot_mask]
+                if slot:
+                    due.extend(slot)
+                    slot.clear()
+        self._tick = tick
+        self._ready_tick = max(self._ready_tick, tick)
+        for event in due:
+            event._slot = None
+            self._place(event)
+
+        span_shift = self.LEVELS * self.SLOT_BITS
+        while self._overflow:
+            event = self._overflow[0]
+            if event.active and event.tick >> span_shift > tick >> span_shift:
+                break
+            heappop(self._overflow)
+            if event.active:
+                self._place(event)
+
+    def _next_event(self) -> Optional[TimerEvent]:
+        if self._tick is None:
+            # Nothing was ever scheduled
+            return None
+        while True:
+            self._skip_cancelled(self._ready)
+            if self._ready:
+                return self._ready[0]
+            if not self._pull_next_events():
+                return None
+
+    def _pull_next_events(self) -> bool:
+        # Moves the earliest wheel slot or events from overflow to ready heap
+        for level in range(self.LEVELS):
+            shift = level * self.SLOT_BITS
+            current = self._tick >> shift
+            for pos in range(current + 1, (current | self._slot_mask) + 1):
+                slot = self._wheel[level][pos & self._slot_mask]
+                if slot:
+                    self._ready_tick = ((pos + 1) << shift) - 1
+                    for event in slot:
+                        event._slot = None
+                        heappush(self._ready, event)
+                    slot.clear()
+                    return True
+
+        self._skip_cancelled(self._overflow)
+        if not self._overflow:
+            return False
+        self._ready_tick = self._overflow[0].tick
+        while self._overflow and self._overflow[0].tick <= self._ready_tick:
+            event = heappop(self._overflow)
+            if event.active:
+                heappush(self._ready, event)
+        return True
+
+    @staticmethod
+    def _skip_cancelled(heap: List[TimerEvent]):
+        while heap and not heap[0].active:
+            heappop(heap)
+
+    def _cancel_event(self, event: TimerEvent):
+        if event._slot is not None:
+            del event._slot[event]
+            event._slot = None
+        self._forget(event)
+
+    def _forget(self, event: TimerEvent):
+        event._timer = None
+        self._size -= 1
+        events = self._by_callback[event.callback]
+        del events[event]
+        if not events:
+            del self._by_callback[event.callback]
+        if self._coalesce:
+            self._coalesced.pop((event.callback, event.timestamp), None)
 
 
 class RepeatingTimer:
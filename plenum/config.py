@@ -35,6 +35,26 @@ auditTransactionsFile = audit_transactions_file_base
 
 stateTsStorage = KeyValueStorageType.Rocksdb
 
+# Maximum size in bytes of encoded trie nodes cached in memory for each
+# persistent state (0 to disable)
+STATE_NODE_CACHE_SIZE = 32 * 1024 * 1024
+
+# Garbage collection of state trie nodes. When enabled only nodes reachable
+# from the last STATE_GC_KEEP_ROOTS committed roots are kept, so state
+# (and state proofs) for older roots, including the ones referenced by
+# stateTsStorage, is not available anymore. Existing databases have to be
+# migrated with scripts/migrate_state_to_gc while the node is stopped,
+# garbage collection stays disabled for states which are not migrated
+STATE_GC_ENABLED = False
+STATE_GC_KEEP_ROOTS = 1000
+# Number of commits after which an unreferenced node can be deleted, should
+# be much more than the number of batches which can be in 3PC at once
+STATE_GC_DEATH_ROW_DELAY = 100
+# Interval in seconds between garbage collection steps and maximum number of
+# nodes looked at during a step
+STATE_GC_INTERVAL = 10
+STATE_GC_STEP = 10000
+
 poolStateDbName = 'pool_state'
 domainStateDbName = 'domain_state'
 configStateDbName = 'config_state'
@@ -55,6 +75,12 @@ hashStore = {
     "type": HS_ROCKSDB
 }
 
+# Only used by the "mmap" hash store: size of a single memory map and the
+# amount of appended hashes buffered in memory before they are written even
+# if the batch is not committed yet (in bytes)
+MMAP_HASH_STORE_EXTENT = 16 * 1024 * 1024
+MMAP_HASH_STORE_FLUSH_THRESHOLD = 1024 * 1024
+
 primaryStorage = None
 
 domainStateStorage = KeyValueStorageType.Rocksdb
@@ -66,6 +92,22 @@ nodeStatusStorage = KeyValueStorageType.Rocksdb
 stateSignatureStorage = KeyValueStorageType.Rocksdb
 
 transactionLogDefaultStorage = KeyValueStorageType.Rocksdb
+# Store seq_nos in transaction logs as fixed width big-endian keys ordered by
+# the native comparator of the DB instead of decimal keys ordered by the
+# Python IntegerComparator, which is much faster to write, seek and iterate.
+# The formats are not compatible, existing ledgers of a stopped node are
+# converted with scripts/migrate_int_keys_ledgers
+transactionLogFixedWidthIntKeys = False
+
+# Persistent secondary indexes of ledger txns used by `Ledger.get` as
+# {ledger name: {field name: dotted path of the field in a txn}}, e.g.
+# {'domain': {'type': 'txn.type', 'from': 'txn.metadata.from',
+#             'digest': 'txn.metadata.payloadDigest'}}.
+# A missing index is built when the node starts, it can also be rebuilt
+# offline with scripts/rebuild_txn_index
+LEDGER_TXN_INDEXES = {}
+txnIndexStorage = KeyValueStorageType.Rocksdb
+txnIndexDbNameSuffix = '_txn_index'
 
 rocksdb_default_config = {
     'max_open_files': None,
@@ -246,6 +288,34 @@ EnsureLedgerDurability = False
 
 log_override_tags = dict(cli={}, demo={})
 
+# Recover merkle tree from transaction log by hashing chunks of txns in a
+# process pool (used when hash store is missing or inconsistent), disabled
+# by default. Chunk size must be a power of 2, number of workers defaults to
+# CPU count.
+PARALLEL_TREE_RECOVERY_ENABLED = False
+PARALLEL_TREE_RECOVERY_CHUNK_SIZE = 2 ** 14
+PARALLEL_TREE_RECOVERY_WORKERS = None
+PARALLEL_TREE_RECOVERY_PROGRESS_INTERVAL = 10  # seconds
+
+# Rebuild state from ledger in bulk (used when state DB is empty or an earlier
+# rebuild was interrupted). Trie nodes are kept in memory and written together
+# with a checkpoint to resume from once they take STATE_REBUILD_FLUSH_SIZE
+# bytes. Txns are read in chunks and deserialized by STATE_REBUILD_WORKERS
+# processes while previous chunks are applied, 0 deserializes them in-process.
+# Disabled by default, an interrupted bulk rebuild is resumed anyway.
+STATE_REBUILD_BULK_ENABLED = False
+STATE_REBUILD_CHUNK_SIZE = 1000
+STATE_REBUILD_FLUSH_SIZE = 64 * 1024 * 1024  # bytes
+STATE_REBUILD_WORKERS = 0
+STATE_REBUILD_PROGRESS_INTERVAL = 10  # seconds
+
+# Read requests (GET_TXN, GET_TXN_AUTHOR_AGREEMENT etc.) are served by
+# QUERY_WORKERS processes which open RocksDB stores read-only, 0 serves them
+# on the node's looper. A request not served in QUERY_WORKER_REPLY_TIMEOUT
+# is processed by the node itself.
+QUERY_WORKERS = 0
+QUERY_WORKER_REPLY_TIMEOUT = 5  # seconds
+
 # Number of messages zstack accepts at once
 LISTENER_MESSAGE_QUOTA = 100
 REMOTES_MESSAGE_QUOTA = 100
@@ -275,6 +345,10 @@ CHK_FREQ = 100
 # Difference between low water mark and high water mark
 LOG_SIZE = 3 * CHK_FREQ
 
+# Max number of recent audit txns kept in memory by ppSeqNo for BLS
+# signing and validation of COMMITs, older ones are read from the ledger
+AUDIT_TXN_CACHE_SIZE = 2 * LOG_SIZE
+
 CLIENT_REQACK_TIMEOUT = 5
 CLIENT_REPLY_TIMEOUT = 15
 CLIENT_MAX_RETRY_ACK = 5
@@ -296,6 +370,21 @@ NEW_VIEW_TIMEOUT = 30  # in secs
 
 CATCHUP_BATCH_SIZE = 5  # Minimum number of txns in single catchup request
 
+# Seeder packs txns into CATCHUP_REPs of up to this size (estimated size of
+# the serialized message), some room is left for the transport envelope
+CATCHUP_REP_MAX_SIZE = MSG_LEN_LIMIT - 1024
+# Built CATCHUP_REPs are cached by requested range so that several nodes
+# catching up at once share the work, this is the limit of their estimated
+# size in bytes (0 to disable)
+CATCHUP_REP_CACHE_SIZE = 32 * 1024 * 1024
+# Maximum number of consistency proofs cached by seeder
+CATCHUP_CONS_PROOF_CACHE_SIZE = 1000
+# Seeder sends txns to catching up nodes in bulk frames of up to
+# BULK_FRAME_LIMIT bytes which bypass transport batching and go after
+# consensus messages (see BULK_PEER_BANDWIDTH). Older nodes do not accept
+# bulk frames, so this should be enabled only when all nodes support them.
+CATCHUP_BULK_TRANSFER_ENABLED = False
+
 # permissions for keyring dirs/files
 WALLET_DIR_MODE = 0o700  # drwx------
 WALLET_FILE_MODE = 0o600  # -rw-------
@@ -335,6 +424,15 @@ ENABLED_PLUGINS = []
 # 2 during replay
 STACK_COMPANION = 0
 
+# Recorder appends messages to segment files of RECORDER_SEGMENT_SIZE bytes,
+# buffered writes happen when the buffer is full or with the next message
+# after RECORDER_FLUSH_INTERVAL. Recordings made into RocksDB by earlier
+# versions can still be replayed but are not appended to, a node recording
+# into such directory starts a new recording in the log format
+RECORDER_SEGMENT_SIZE = 64 * 1024 * 1024
+RECORDER_BUFFER_SIZE = 1024 * 1024
+RECORDER_FLUSH_INTERVAL = 1  # seconds
+
 ENABLE_INCONSISTENCY_WATCHER_NETWORK = True
 
 METRICS_COLLECTOR_TYPE = None  # None or 'kv'
@@ -359,6 +457,13 @@ ACC_MONITOR_INPUT_RATE_REACTION_HALF_TIME = 300
 
 VALIDATE_BLS_SIGNATURE_WITHOUT_KEY_PROOF = True
 
+# Number of threads verifying BLS signatures of COMMITs off the event loop.
+# Signatures of the same batch received together by keys with verified proofs
+# of possession are verified with a single aggregate check, and one by one if
+# it fails. Other signatures are always verified one by one. COMMITs are
+# verified synchronously if 0
+BLS_COMMIT_VERIFICATION_WORKERS = 0
+
 VALIDATOR_INFO_USE_DB = False
 VALIDATOR_INFO_UPGRADE_LOG_SIZE = 10
 
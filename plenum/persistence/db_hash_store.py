@@ -44,6 +44,20 @@ class DbHashStore(HashStore):
         seqNo = self.getNodePosition(start, height)
         self.nodesDb.put(str(seqNo), nodeHash)
 
+    def writeLeaves(self, leafHashes):
+        batch = []
+        for leafHash in leafHashes:
+            batch.append((str(self.leafCount + len(batch) + 1), leafHash))
+        if batch:
+            self.leavesDb.setBatch(batch)
+            self.leafCount += len(batch)
+
+    def writeNodes(self, nodes):
+        batch = [(str(self.getNodePosition(start, height)), nodeHash)
+                 for start, height, nodeHash in nodes]
+        if batch:
+            self.nodesDb.setBatch(batch)
+
     def readLeaf(self, seqNo):
         return self._readOne(seqNo, self.leavesDb)
 
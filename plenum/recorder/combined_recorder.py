@@ -1,17 +1,18 @@
-import time
+from heapq import merge
+from itertools import groupby
+from typing import Iterator, List, Optional, Tuple
 
 from plenum.recorder.recorder import Recorder
-from storage.kv_store_rocksdb_int_keys import KeyValueStorageRocksdbIntKeys
 
 
 class CombinedRecorder(Recorder):
-    n_prefix = b'\xe2\x82'
-    c_prefix = b'\xa0\xa1'
-    separator = b'\xc3\x28'
+    """
+    Plays recorders of node and client stacks together, every played item
+    is a pair of lists of node and client entries recorded at the same time
+    """
 
-    def __init__(self, kv_store: KeyValueStorageRocksdbIntKeys,
-                 skip_metadata_write=True):
-        Recorder.__init__(self, kv_store, skip_metadata_write=skip_metadata_write)
+    def __init__(self, skip_metadata_write=True):
+        Recorder.__init__(self, None, skip_metadata_write=skip_metadata_write)
         self.recorders = []
         self.start_times = []
 
@@ -19,33 +20,21 @@ class CombinedRecorder(Recorder):
         # Only 2 recorders
         self.recorders = [n_recorder, c_recorder]
 
-    def combine_recorders(self):
-        for k, v in self.recorders[0].store.iterator(include_value=True):
-            self.store.put(k, self.n_prefix + v + self.separator)
+    def iterator(self, start: Optional[int] = None) -> Iterator[Tuple[int, List]]:
+        # Node entries go before client ones recorded at the same time
+        merged = merge(*[self._numbered(i, recorder.iterator(start))
+                         for i, recorder in enumerate(self.recorders)])
+        for tm, group in groupby(merged, key=lambda item: item[0]):
+            combined = [[], []]
+            for _, i, _, vals in group:
+                combined[i].extend(vals)
+            yield tm, combined
 
-        for k, v in self.recorders[1].store.iterator(include_value=True):
-            try:
-                existing = self.store.get(k)
-            except KeyError:
-                existing = self.n_prefix + self.separator
-
-            self.store.put(k, existing + self.c_prefix + v)
-
-    def start_playing(self):
-        assert not self.is_playing
-        self.is_playing = True
-        self.play_started_at = time.perf_counter()
-        self.store_iterator = self.store.iterator(include_value=True)
+    def stop(self):
+        pass
 
     @staticmethod
-    def get_parsed(msg, only_incoming=None, only_outgoing=None):
-        # To conform to the Recorder interface
-        assert only_incoming is None
-        assert only_outgoing is None
-
-        n_msgs, c_msgs = msg.split(CombinedRecorder.separator)
-        n_msgs = n_msgs.lstrip(CombinedRecorder.n_prefix)
-        c_msgs = c_msgs.lstrip(CombinedRecorder.c_prefix)
-
-        return [Recorder.get_parsed(n_msgs) if n_msgs else [],
-                Recorder.get_parsed(c_msgs) if c_msgs else []]
+    def _numbered(recorder_no, items):
+        # Item numbers make merged tuples unique, so entries are not compared
+        for n, (tm, vals) in enumerate(items):
+            yield tm, recorder_no, n, vals
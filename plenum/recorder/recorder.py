@@ -1,8 +1,9 @@
 import os
 import time
-from typing import Callable
+from itertools import groupby
+from typing import Callable, Iterator, List, Optional, Tuple
 
-from storage.kv_store_rocksdb_int_keys import KeyValueStorageRocksdbIntKeys
+from plenum.recorder.recorder_log import RecorderLog
 
 try:
     import ujson as json
@@ -17,40 +18,36 @@ class Recorder:
     TIME_FACTOR = 100000000
     RECORDER_METADATA_FILENAME = 'recorder_metadata.json'
 
-    def __init__(self, kv_store: KeyValueStorageRocksdbIntKeys,
+    def __init__(self, log: Optional[RecorderLog],
                  skip_metadata_write=False):
-        self.store = kv_store
+        self.log = log
         self.replay_targets = {}
         self.is_playing = False
+        self.as_fast_as_possible = False
         self.play_started_at = None
         self.store_iterator = None
         self.item_for_next_get = None
+        self.first_returned_at = None
         self.last_returned_at = None
 
-    def get_now_key(self):
-        return str(int(time.perf_counter() * self.TIME_FACTOR))
+    def get_now_key(self) -> int:
+        return int(time.perf_counter() * self.TIME_FACTOR)
 
     def add_incoming(self, msg, frm):
-        key, val = self.get_now_key(), self.create_db_val_for_incoming(msg, frm)
-        self.add_to_store(key, val)
+        self.log.append(self.get_now_key(), self.create_db_val_for_incoming(msg, frm))
 
     def add_outgoing(self, msg, *to):
-        key, val = self.get_now_key(), self.create_db_val_for_outgoing(msg, *to)
-        self.add_to_store(key, val)
+        self.log.append(self.get_now_key(), self.create_db_val_for_outgoing(msg, *to))
 
     def add_disconnecteds(self, *names):
-        key, val = self.get_now_key(), self.create_db_val_for_disconnecteds(*names)
-        self.add_to_store(key, val)
-
-    def add_to_store(self, key, val):
-        try:
-            existing = self.store.get(key)
-            if isinstance(existing, (bytes, bytearray)):
-                existing = existing.decode()
-            existing = json.loads(existing)
-        except KeyError:
-            existing = []
-        self.store.put(key, json.dumps([*existing, val]))
+        self.log.append(self.get_now_key(), self.create_db_val_for_disconnecteds(*names))
+
+    def iterator(self, start: Optional[int] = None) -> Iterator[Tuple[int, List]]:
+        """
+        Iterate over recorded entries grouped by the time they were added at
+        """
+        for tm, group in groupby(self.log.iterator(start), key=lambda item: item[0]):
+            yield tm, [entry for _, entry in group]
 
     def register_replay_target(self, id, target: Callable):
         assert id not in self.replay_targets
@@ -68,58 +65,48 @@ class Recorder:
     def create_db_val_for_disconnecteds(*nodes):
         return [Recorder.DISCONN_FLAG, *nodes]
 
-    def start_playing(self):
+    def start_playing(self, as_fast_as_possible=False):
+        """
+        :param as_fast_as_possible: return recorded entries by `get_next`
+        right away instead of with the delays they were recorded with
+        """
         assert not self.is_playing
         self.is_playing = True
+        self.as_fast_as_possible = as_fast_as_possible
         self.play_started_at = time.perf_counter()
-        self.store_iterator = self.store.iterator(include_value=True)
+        self.store_iterator = self.iterator()
 
     def get_next(self):
         if self.item_for_next_get is None:
             try:
-                tm, val = next(self.store_iterator)
-            except Exception as ex:
+                self.item_for_next_get = next(self.store_iterator)
+            except StopIteration:
                 self.is_playing = False
                 return None
-            tm = int(tm)
-            # print(1, tm)
-            now = time.perf_counter() * self.TIME_FACTOR
-            if self.last_returned_at is None:
-                # First item, so return immediately
-                self.last_returned_at = (now, tm)
-                return self.get_parsed(val)
-            else:
-                if (now - self.last_returned_at[0]) >= (tm - self.last_returned_at[1]):
-                    # Sufficient time has passed
-                    self.last_returned_at = (now, tm)
-                    return self.get_parsed(val)
-                else:
-                    # Keep item to return at next get
-                    self.item_for_next_get = (tm, val)
-        else:
-            tm, val = self.item_for_next_get
-            # print(2, tm)
-            now = time.perf_counter() * self.TIME_FACTOR
-            if (now - self.last_returned_at[0]) >= (tm - self.last_returned_at[1]):
-                # Sufficient time has passed
-                self.last_returned_at = (now, tm)
-                self.item_for_next_get = None
-                return self.get_parsed(val)
+        tm, vals = self.item_for_next_get
+        now = time.perf_counter() * self.TIME_FACTOR
+        # First item is returned immediately
+        if not self.as_fast_as_possible and self.last_returned_at is not None and \
+                (now - self.last_returned_at[0]) < (tm - self.last_returned_at[1]):
+            # Keep item to return at next get
+            return None
+        if self.first_returned_at is None:
+            self.first_returned_at = tm
+        self.last_returned_at = (now, tm)
+        self.item_for_next_get = None
+        return vals
 
-    def stop(self):
-        self.store.close()
+    def played_time(self) -> float:
+        """
+        Seconds of recorded time between the first and the last entries
+        returned by `get_next`
+        """
+        if self.last_returned_at is None:
+            return 0
+        return (self.last_returned_at[1] - self.first_returned_at) / self.TIME_FACTOR
 
-    @staticmethod
-    def get_parsed(msg, only_incoming=None, only_outgoing=None):
-        assert not (only_incoming and only_outgoing)
-        if isinstance(msg, (bytes, bytearray)):
-            msg = msg.decode()
-        msg = json.loads(msg)
-        if only_incoming:
-            return Recorder.filter_incoming(msg)
-        if only_outgoing:
-            return Recorder.filter_outgoing(msg)
-        return msg
+    def stop(self):
+        self.log.close()
 
     @staticmethod
     def filter_incoming(msgs):
@@ -0,0 +1,210 @@
+import os
+import struct
+import time
+from bisect import bisect_left
+from typing import Any, Iterator, List, Optional, Tuple
+
+import msgpack
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+
+class RecorderLog:
+    """
+    Append-only log of timestamped entries of a Recorder.
+
+    Every entry is a frame of 4-byte big-endian length followed by msgpack of
+    `[timestamp, entry]`. Frames are buffered and written in batches to
+    segment files `<number>.log` in the `<db_dir>/<db_name>` directory, a new
+    segment is started when the current one exceeds `segment_size` and on
+    every opening of the log, so a segment torn by a crash is never appended
+    to. Each segment has a sparse time index `<number>.idx` of
+    (timestamp, offset) pairs written every `index_interval` bytes, which is
+    used to start reading from a given time. Timestamps are expected to grow.
+    """
+
+    LOG_EXT = '.log'
+    INDEX_EXT = '.idx'
+    SEGMENT_NAME_LEN = 8
+    FRAME_HEADER = struct.Struct('>I')
+    INDEX_ENTRY = struct.Struct('>qQ')
+
+    def __init__(self, db_dir: str, db_name: str,
+                 segment_size: int = 64 * 1024 * 1024,
+                 buffer_size: int = 1024 * 1024,
+                 flush_interval: float = 1,
+                 index_interval: int = 64 * 1024):
+        self.db_path = os.path.join(db_dir, db_name)
+        self.segment_size = segment_size
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.index_interval = index_interval
+        os.makedirs(self.db_path, exist_ok=True)
+
+        # Segment for writing is created with the first appended entry
+        self._segment_no = None  # type: Optional[int]
+        self._log_file = None
+        self._index_file = None
+        # Size of the current segment including buffered frames
+        self._segment_len = 0
+        self._last_indexed_at = None  # type: Optional[int]
+        self._buffer = bytearray()
+        self._index_buffer = bytearray()
+        self._flushed_at = time.perf_counter()
+
+    @property
+    def closed(self) -> bool:
+        return self._buffer is None
+
+    def append(self, timestamp: int, entry: List[Any]):
+        if self._segment_no is None or self._segment_len >= self.segment_size:
+            self._start_segment()
+        frame = msgpack.packb([timestamp, entry], use_bin_type=True)
+        if self._last_indexed_at is None or \
+                self._segment_len - self._last_indexed_at >= self.index_interval:
+            self._index_buffer += self.INDEX_ENTRY.pack(timestamp, self._segment_len)
+            self._last_indexed_at = self._segment_len
+        self._buffer += self.FRAME_HEADER.pack(len(frame))
+        self._buffer += frame
+        self._segment_len += self.FRAME_HEADER.size + len(frame)
+
+        if len(self._buffer) >= self.buffer_size or \
+                time.perf_counter() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._flushed_at = time.perf_counter()
+        if not self._buffer:
+            return
+        # Index is written after frames so it never points past written data
+        self._log_file.write(self._buffer)
+        self._log_file.flush()
+        self._buffer.clear()
+        if self._index_buffer:
+            self._index_file.write(self._index_buffer)
+            self._index_file.flush()
+            self._index_buffer.clear()
+
+    def iterator(self, start: Optional[int] = None) -> Iterator[Tuple[int, List[Any]]]:
+        """
+        Iterate over (timestamp, entry) in order of appending, starting
+        with the first entry not earlier than `start` if it is given
+        """
+        if not self.closed:
+            self.flush()
+        segments = self.segments()
+        offset = 0
+        if start is not None and segments:
+            # Last segment and its indexed frame earlier than `start`
+            for i in reversed(range(len(segments))):
+                index = self._index(segments[i])
+                if index and index[0][0] < start:
+                    segments = segments[i:]
+                    pos = bisect_left([tm for tm, _ in index], start) - 1
+                    offset = index[pos][1]
+                    break
+
+        for no in segments:
+            for timestamp, entry in self._read_segment(no, offset):
+                if start is None or timestamp >= start:
+                    yield timestamp, entry
+            offset = 0
+
+    def segments(self) -> List[int]:
+        numbers = []
+        for file_name in os.listdir(self.db_path):
+            name, ext = os.path.splitext(file_name)
+            # Key-value stores of old recordings keep 6-digit *.log files
+            # in the same directory
+            if ext == self.LOG_EXT and name.isdigit() and len(name) == self.SEGMENT_NAME_LEN:
+                numbers.append(int(name))
+        return sorted(numbers)
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        for f in (self._log_file, self._index_file):
+            if f is not None:
+                f.close()
+        self._log_file = self._index_file = None
+        self._buffer = self._index_buffer = None
+
+    def _start_segment(self):
+        if self._segment_no is not None:
+            self.flush()
+            self._log_file.close()
+            self._index_file.close()
+            self._segment_no += 1
+        else:
+            segments = self.segments()
+            self._segment_no = segments[-1] + 1 if segments else 0
+        self._log_file = open(self._file_path(self._segment_no, self.LOG_EXT), 'ab')
+        self._index_file = open(self._file_path(self._segment_no, self.INDEX_EXT), 'ab')
+        self._segment_len = 0
+        self._last_indexed_at = None
+
+    def _file_path(self, segment_no: int, ext: str) -> str:
+        return os.path.join(self.db_path, '{:0{}d}{}'.format(segment_no, self.SEGMENT_NAME_LEN, ext))
+
+    def _index(self, segment_no: int) -> List[Tuple[int, int]]:
+        try:
+            with open(self._file_path(segment_no, self.INDEX_EXT), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        size = self.INDEX_ENTRY.size
+        return [self.INDEX_ENTRY.unpack_from(data, pos)
+                for pos in range(0, len(data) - size + 1, size)]
+
+    def _read_segment(self, segment_no: int, offset: int = 0) -> Iterator[Tuple[int, List[Any]]]:
+        with open(self._file_path(segment_no, self.LOG_EXT), 'rb') as f:
+            data = f.read()
+        view = memoryview(data)
+        header = self.FRAME_HEADER.size
+        while offset + header <= len(data):
+            length, = self.FRAME_HEADER.unpack_from(data, offset)
+            end = offset + header + length
+            if end > len(data):
+                # Frame torn by a crash
+                return
+            timestamp, entry = msgpack.unpackb(view[offset + header:end], encoding='utf-8')
+            yield timestamp, entry
+            offset = end
+
+
+class KvRecorderLog:
+    """
+    Read-only view of a recording made into a key-value store by earlier
+    versions of Recorder, every key is a timestamp and every value is a json
+    list of entries recorded at that time
+    """
+
+    def __init__(self, kv_store):
+        self.kv_store = kv_store
+
+    @property
+    def closed(self) -> bool:
+        return self.kv_store.closed
+
+    def append(self, timestamp: int, entry: List[Any]):
+        raise RuntimeError('Recording in the key-value store format is read-only')
+
+    def flush(self):
+        pass
+
+    def iterator(self, start: Optional[int] = None) -> Iterator[Tuple[int, List[Any]]]:
+        for key, val in self.kv_store.iterator(include_value=True):
+            timestamp = int(key)
+            if start is not None and timestamp < start:
+                continue
+            if isinstance(val, (bytes, bytearray)):
+                val = val.decode()
+            for entry in json.loads(val):
+                yield timestamp, entry
+
+    def close(self):
+        self.kv_store.close()
@@ -12,24 +12,35 @@ from plenum.common.types import f
 from plenum.common.util import get_utc_epoch
 from plenum.recorder.combined_recorder import CombinedRecorder
 from plenum.recorder.recorder import Recorder
+from plenum.recorder.recorder_log import KvRecorderLog, RecorderLog
 from storage.helper import initKeyValueStorageIntKeys
 
 
 def to_bytes(v):
     if not isinstance(v, bytes):
         return v.encode()
+    return v
+
+
+def open_recorder_log(rec_path, name):
+    log = RecorderLog(rec_path, name)
+    # Recordings made before the log format are RocksDB stores
+    if not log.segments() and \
+            os.path.isfile(os.path.join(log.db_path, 'CURRENT')):
+        kv_store = initKeyValueStorageIntKeys(KeyValueStorageType.Rocksdb,
+                                              rec_path, name, read_only=True)
+        return KvRecorderLog(kv_store)
+    return log
 
 
 def get_recorders_from_node_data_dir(node_data_dir, node_name) -> Tuple[Recorder, Recorder]:
     rec_path = os.path.join(node_data_dir, node_name, 'recorder')
     client_stack_name = node_name + CLIENT_STACK_SUFFIX
-    client_rec_kv_store = initKeyValueStorageIntKeys(KeyValueStorageType.Rocksdb,
-                                                     rec_path, client_stack_name)
-    node_rec_kv_store = initKeyValueStorageIntKeys(
-        KeyValueStorageType.Rocksdb, rec_path, node_name)
+    client_rec_log = open_recorder_log(rec_path, client_stack_name)
+    node_rec_log = open_recorder_log(rec_path, node_name)
 
-    return Recorder(node_rec_kv_store, skip_metadata_write=True), \
-        Recorder(client_rec_kv_store, skip_metadata_write=True)
+    return Recorder(node_rec_log, skip_metadata_write=True), \
+        Recorder(client_rec_log, skip_metadata_write=True)
 
 
 def patch_sent_prepreapres(replaying_node, node_recorder):
@@ -50,10 +61,9 @@ def patch_sent_prepreapres(replaying_node, node_recorder):
     min_msg_time = sys.maxsize
     max_msg_time = -1
 
-    for k, v in node_recorder.store.iterator(include_value=True):
-        max_msg_time = max(max_msg_time, int(k))
-        min_msg_time = min(min_msg_time, int(k))
-        parsed = Recorder.get_parsed(v.decode())
+    for k, parsed in node_recorder.iterator():
+        max_msg_time = max(max_msg_time, k)
+        min_msg_time = min(min_msg_time, k)
         msg_count += len(parsed)
 
         outgoings = Recorder.filter_outgoing(parsed)
@@ -91,23 +101,20 @@ def patch_sent_prepreapres(replaying_node, node_recorder):
 
 
 def get_combined_recorder(replaying_node, node_recorder, client_recorder):
-    kv_store = initKeyValueStorageIntKeys(KeyValueStorageType.Rocksdb,
-                                          replaying_node.dataLocation,
-                                          'combined_recorder')
-    cr = CombinedRecorder(kv_store)
+    cr = CombinedRecorder()
     # Always add node recorder first and then client recorder
     cr.add_recorders(node_recorder, client_recorder)
-    cr.combine_recorders()
     return cr
 
 
 def prepare_node_for_replay_and_replay(looper, replaying_node,
                                        node_recorder, client_recorder,
-                                       start_times):
+                                       start_times, as_fast_as_possible=False):
     cr = get_combined_recorder(replaying_node, node_recorder, client_recorder)
     cr.start_times = start_times
     patch_replaying_node(replaying_node, node_recorder, start_times)
-    return replay_patched_node(looper, replaying_node, node_recorder, cr)
+    return replay_patched_node(looper, replaying_node, node_recorder, cr,
+                               as_fast_as_possible=as_fast_as_possible)
 
 
 def patch_replaying_node(replaying_node, node_recorder, start_times):
@@ -120,12 +127,21 @@ def patch_replaying_node_for_time(replaying_node, start_times):
     replaying_node._time_diff = get_utc_epoch() - node_1st_start_time
 
 
-def replay_patched_node(looper, replaying_node, node_recorder, cr):
+def replay_patched_node(looper, replaying_node, node_recorder, cr,
+                        as_fast_as_possible=False):
+    """
+    :param as_fast_as_possible: feed recorded messages to the node without
+    the delays they were recorded with and time node stops by the recorded
+    time, so the replay can serve as a deterministic throughput benchmark
+    of the node
+    """
+    clock = cr.played_time if as_fast_as_possible else time.perf_counter
     node_run_no = 0
     looper.add(replaying_node)
-    cr.start_playing()
-    next_stop_at = time.perf_counter() + (cr.start_times[node_run_no][1] -
-                                          cr.start_times[node_run_no][0])
+    cr.start_playing(as_fast_as_possible=as_fast_as_possible)
+    replay_started_at = time.perf_counter()
+    next_stop_at = clock() + (cr.start_times[node_run_no][1] -
+                              cr.start_times[node_run_no][0])
 
     progress_data = _create_progress_data(replaying_node.replay_msg_count)
     #
@@ -136,7 +152,7 @@ def replay_patched_node(looper, replaying_node, node_recorder, cr):
         _print_progress(progress_data)
 
         vals = cr.get_next()
-        if next_stop_at is not None and time.perf_counter() >= next_stop_at:
+        if next_stop_at is not None and clock() >= next_stop_at:
             node_run_no += 1
             if node_run_no < len(cr.start_times):
                 # The node stopped here
@@ -149,13 +165,14 @@ def replay_patched_node(looper, replaying_node, node_recorder, cr):
                                                           ha=replaying_node.nodestack.ha,
                                                           cliha=replaying_node.clientstack.ha)
                 patch_replaying_node(replaying_node, node_recorder, cr.start_times)
-                print('Sleeping for {}s to simulate node stop'.format(sleep_for))
-                time.sleep(sleep_for)
+                if not as_fast_as_possible:
+                    print('Sleeping for {}s to simulate node stop'.format(sleep_for))
+                    time.sleep(sleep_for)
 
                 if after is None:
                     next_stop_at = None
                 else:
-                    next_stop_at = time.perf_counter() + after
+                    next_stop_at = clock() + after
                     print('Next stop after {}s'.format(after))
 
                 looper.add(replaying_node)
@@ -185,6 +202,8 @@ def replay_patched_node(looper, replaying_node, node_recorder, cr):
 
         looper.run(replaying_node.prod())
 
+    if as_fast_as_possible:
+        _print_replay_rate(progress_data, time.perf_counter() - replay_started_at)
     return replaying_node
 
 
@@ -225,6 +244,12 @@ def _print_progress(progress_data):
     return progress_data
 
 
+def _print_replay_rate(progress_data, duration):
+    print("Replayed {} node messages in {:.3f}s, {:.1f} messages per second"
+          .format(progress_data['n_msg_count'], duration,
+                  progress_data['n_msg_count'] / duration if duration else 0))
+
+
 def _update_progress_msg_count(progress_data, msg_count):
     progress_data['n_msg_count'] += msg_count
     return progress_data
@@ -1,11 +1,11 @@
 import os
 from typing import Set
 
-from storage.kv_store_rocksdb_int_keys import KeyValueStorageRocksdbIntKeys
-
 from stp_core.common.log import getlogger
 
+from plenum.common.config_util import getConfig
 from plenum.recorder.recorder import Recorder
+from plenum.recorder.recorder_log import RecorderLog
 from stp_zmq.simple_zstack import SimpleZStack
 
 logger = getlogger()
@@ -22,8 +22,12 @@ class SimpleZStackWithRecorder(SimpleZStack):
         else:
             db_path = os.path.join(parent_dir, 'data', name[:-1], 'recorder')
         os.makedirs(db_path, exist_ok=True)
-        db = KeyValueStorageRocksdbIntKeys(db_path, name)
-        self.recorder = Recorder(db)
+        config = getConfig()
+        log = RecorderLog(db_path, name,
+                          segment_size=config.RECORDER_SEGMENT_SIZE,
+                          buffer_size=config.RECORDER_BUFFER_SIZE,
+                          flush_interval=config.RECORDER_FLUSH_INTERVAL)
+        self.recorder = Recorder(log)
         super().__init__(*args, **kwargs)
 
     def _verifyAndAppend(self, msg, ident):
@@ -24,21 +24,36 @@ class AuditBatchHandler(BatchRequestHandler):
         # TODO: move it to BatchRequestHandler
         self.tracker = LedgerUncommittedTracker(None, self.ledger.uncommitted_root_hash, self.ledger.size)
 
+    @property
+    def audit_txn_cache(self):
+        return self.database_manager.audit_txn_cache
+
+    @property
+    def audited_state_roots(self):
+        return self.database_manager.audited_state_roots
+
     def post_batch_applied(self, three_pc_batch: ThreePcBatch, prev_handler_result=None):
         txn = self._add_to_ledger(three_pc_batch)
         self.tracker.apply_batch(None, self.ledger.uncommitted_root_hash, self.ledger.uncommitted_size)
+        if txn is not None and self.audit_txn_cache is not None:
+            self.audit_txn_cache.add(get_seq_no(txn), txn)
         logger.debug("applied audit txn {}; uncommitted root hash is {}; uncommitted size is {}".
                      format(str(txn), self.ledger.uncommitted_root_hash, self.ledger.uncommitted_size))
 
     def post_batch_rejected(self, ledger_id, prev_handler_result=None):
         _, _, txn_count = self.tracker.reject_batch()
         self.ledger.discardTxns(txn_count)
+        if self.audit_txn_cache is not None:
+            self.audit_txn_cache.discard(self.ledger.uncommitted_size)
         logger.debug("rejected {} audit txns; uncommitted root hash is {}; uncommitted size is {}".
                      format(txn_count, self.ledger.uncommitted_root_hash, self.ledger.uncommitted_size))
 
     def commit_batch(self, three_pc_batch, prev_handler_result=None):
         _, _, txns_count = self.tracker.commit_batch()
         _, committedTxns = self.ledger.commitTxns(txns_count)
+        if self.audited_state_roots is not None:
+            for txn in committedTxns:
+                self.audited_state_roots.add(txn)
         logger.debug("committed {} audit txns; uncommitted root hash is {}; uncommitted size is {}".
                      format(txns_count, self.ledger.uncommitted_root_hash, self.ledger.uncommitted_size))
         return committedTxns
@@ -47,6 +62,12 @@ class AuditBatchHandler(BatchRequestHandler):
         self.tracker.set_last_committed(state_root=None,
                                         txn_root=self.ledger.uncommitted_root_hash,
                                         ledger_size=self.ledger.size)
+        # Uncommitted audit txns could be dropped by catchup
+        if self.audit_txn_cache is not None:
+            self.audit_txn_cache.reset()
+        # Catchup appends audit txns without committing batches
+        if self.audited_state_roots is not None:
+            self.audited_state_roots.reset()
 
     @staticmethod
     def transform_txn_for_ledger(txn):
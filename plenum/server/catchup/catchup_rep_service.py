@@ -1,14 +1,18 @@
-from collections import defaultdict
-from heapq import merge
+from copy import copy
+from itertools import count
 from random import shuffle
 from typing import Optional, List, Tuple, Any, Dict
 
+from intervaltree import IntervalTree
+
+from ledger.compact_merkle_tree import CompactMerkleTree
 from plenum.common.channel import RxChannel, TxChannel, Router
 from plenum.common.constants import CATCH_UP_PREFIX
 from plenum.common.ledger import Ledger
 from plenum.common.messages.node_messages import CatchupRep, CatchupReq
 from plenum.common.metrics_collector import MetricsCollector, MetricsName
 from plenum.common.timer import TimerService
+from plenum.common.util import SortedDict
 from plenum.server.catchup.utils import CatchupDataProvider, LedgerCatchupComplete, CatchupTill, LedgerCatchupStart
 from stp_core.common.log import getlogger
 
@@ -41,8 +45,15 @@ class CatchupRepService:
         # for them and waits a CatchupRep message.
         self._wait_catchup_rep_from = set()
 
-        self._received_catchup_replies_from = defaultdict(list)  # type: Dict[int, List]
-        self._received_catchup_txns = []  # type: List[Tuple[int, Any]]
+        # Received replies indexed by intervals of sequence numbers they
+        # contain, data of an interval is (arrival number, node name, reply)
+        self._received_catchup_replies = IntervalTree()
+        self._catchup_reply_counter = count()
+        # Received transactions which are not in the ledger yet, by sequence number
+        self._received_catchup_txns = SortedDict()  # type: SortedDict[int, Any]
+        # Copy of ledger's compact merkle tree which is extended with
+        # transactions of every reply to verify its consistency proof
+        self._verification_tree = None  # type: Optional[CompactMerkleTree]
 
     def __repr__(self):
         return "{}:CatchupRepService:{}".format(self._provider.node_name(), self._ledger_id)
@@ -90,19 +101,19 @@ class CatchupRepService:
         logger.info("{} found {} interesting transactions in the catchup from {}".format(self, len(txns), frm))
         self.metrics.add_event(MetricsName.CATCHUP_TXNS_RECEIVED, len(txns))
 
-        self._received_catchup_replies_from[frm].append(rep)
-
-        txns_already_rcvd_in_catchup = self._merge_catchup_txns(self._received_catchup_txns, txns)
+        self._received_catchup_replies.addi(txns[0][0], txns[-1][0] + 1,
+                                            (next(self._catchup_reply_counter), frm, rep))
+        self._merge_catchup_txns(self._received_catchup_txns, txns, self._ledger.size)
         logger.info("{} merged catchups, there are {} of them now, from {} to {}".
-                    format(self, len(txns_already_rcvd_in_catchup), txns_already_rcvd_in_catchup[0][0],
-                           txns_already_rcvd_in_catchup[-1][0]))
-
-        num_processed = self._process_catchup_txns(txns_already_rcvd_in_catchup)
-        logger.info("{} processed {} catchup replies with sequence numbers {}".
-                    format(self, num_processed,
-                           [seq_no for seq_no, _ in txns_already_rcvd_in_catchup[:num_processed]]))
+                    format(self, len(self._received_catchup_txns),
+                           self._received_catchup_txns.peekitem(0)[0],
+                           self._received_catchup_txns.peekitem(-1)[0]))
 
-        self._received_catchup_txns = txns_already_rcvd_in_catchup[num_processed:]
+        size_before = self._ledger.size
+        self._process_catchup_txns()
+        if self._ledger.size > size_before:
+            logger.info("{} processed catchup replies with sequence numbers from {} to {}".
+                        format(self, size_before + 1, self._ledger.size))
 
         if self._ledger.size >= self._catchup_till.final_size:
             self._finish()
@@ -113,8 +124,7 @@ class CatchupRepService:
         self._wait_catchup_rep_from.clear()
 
         self._is_working = False
-        self._received_catchup_txns.clear()
-        self._received_catchup_replies_from.clear()
+        self._clear_received_catchup_replies()
         self._provider.notify_catchup_complete(self._ledger_id)
 
         logger.info("{}{} completed catching up ledger {}, caught up {} in total"
@@ -257,7 +267,7 @@ class CatchupRepService:
             reqs += self._send_catchup_reqs(eligible_nodes, frm, to)
 
         txns = self._received_catchup_txns
-        for seqNo, txn in txns:
+        for seqNo, txn in txns.items():
             if (seqNo - last_seen_seq_no) != 1:
                 send_reqs_for_missing(last_seen_seq_no + 1, seqNo - 1)
             last_seen_seq_no = seqNo
@@ -316,137 +326,119 @@ class CatchupRepService:
         return txns
 
     @staticmethod
-    def _merge_catchup_txns(existing_txns, new_txns):
+    def _merge_catchup_txns(existing_txns: SortedDict, new_txns: List[Tuple[int, Any]],
+                            ledger_size: int = 0) -> SortedDict:
         """
-        Merge any newly received txns during catchup with already received txns
-        :param existing_txns:
-        :param new_txns:
-        :return:
+        Merge any newly received txns during catchup with already received txns,
+        txns received earlier take precedence
+        :param existing_txns: already received txns by sequence number, updated in place
+        :param new_txns: txns sorted by sequence number
+        :param ledger_size: txns with sequence numbers up to it are ignored
+        :return: existing_txns
         """
-        # TODO: Can we replace this with SortedDict and before merging substract existing transactions from new?
-        idx_to_remove = []
-        start_seq_no = new_txns[0][0]
-        end_seq_no = new_txns[-1][0]
-        for seq_no, _ in existing_txns:
-            if seq_no < start_seq_no:
-                continue
-            if seq_no > end_seq_no:
-                break
-            idx_to_remove.append(seq_no - start_seq_no)
-        for idx in reversed(idx_to_remove):
-            new_txns.pop(idx)
-
-        return list(merge(existing_txns, new_txns, key=lambda v: v[0]))
-
-    def _process_catchup_txns(self, txns: List[Tuple[int, Any]]) -> int:
-        # Removing transactions for sequence numbers are already
-        # present in the ledger
-        # TODO: Inefficient, should check list in reverse and stop at first
-        # match since list is already sorted
-        num_processed = sum(1 for s, _ in txns if s <= self._ledger.size)
-        if num_processed:
-            logger.info("{} found {} already processed transactions in the catchup replies".
-                        format(self, num_processed))
-
-        # If `catchUpReplies` has any transaction that has not been applied
-        # to the ledger
-        txns = txns[num_processed:]
-        while txns and txns[0][0] - self._ledger.seqNo == 1:
-            seq_no = txns[0][0]
-            result, node_name, to_be_processed = self._has_valid_catchup_replies(seq_no, txns)
-            if result:
-                for _, txn in txns[:to_be_processed]:
-                    self._add_txn(txn)
-                self._remove_processed_catchup_reply(node_name, seq_no)
-                num_processed += to_be_processed
-                txns = txns[to_be_processed:]
-            else:
+        for seq_no, txn in new_txns:
+            if seq_no > ledger_size and seq_no not in existing_txns:
+                existing_txns[seq_no] = txn
+        return existing_txns
+
+    def _process_catchup_txns(self):
+        """
+        Apply received transactions to the ledger while they continue the
+        ledger, one catchup reply at a time
+        """
+        while self._ledger.size + 1 in self._received_catchup_txns:
+            seq_no = self._ledger.size + 1
+            reply = self._find_catchup_reply_for_seq_no(seq_no)
+            if reply is None:
+                return
+            _, node_name, catchup_rep = reply.data
+            end = reply.end - 1
+            txns = [self._received_catchup_txns.get(s) for s in range(seq_no, end + 1)]
+            if any(txn is None for txn in txns):
+                return
+
+            # Transactions of a reply are applied only after its consistency
+            # proof is verified
+            txns = [self._provider.transform_txn_for_ledger(txn) for txn in txns]
+            verified = self._verify_catchup_rep(catchup_rep, txns)
+            self._received_catchup_replies.remove(reply)
+            if not verified:
                 self._provider.blacklist_node(
                     node_name,
                     reason="Sent transactions that could not be verified")
-                self._remove_processed_catchup_reply(node_name, seq_no)
-                # Invalid transactions have to be discarded so letting
-                # the caller know how many txns have to removed from
-                # `self.receivedCatchUpReplies`
-                return num_processed + to_be_processed
+                # Invalid transactions have to be discarded
+                for s in range(seq_no, end + 1):
+                    self._received_catchup_txns.pop(s)
+                return
 
-        return num_processed
+            self._add_txns([self._received_catchup_txns.pop(s) for s in range(seq_no, end + 1)],
+                           txns)
+            # Replies which have nothing new are not needed anymore
+            self._received_catchup_replies.remove_envelop(0, self._ledger.size + 1)
 
-    def _has_valid_catchup_replies(self, seq_no: int, txns_to_process: List[Tuple[int, Any]]) -> Tuple[bool, str, int]:
+    def _verify_catchup_rep(self, catchup_rep: CatchupRep, txns: List[Any]) -> bool:
         """
-        Transforms transactions for ledger!
-
-        Returns:
-            Whether catchup reply corresponding to seq_no
-            Name of node from which txns came
-            Number of transactions ready to be processed
+        Extends verification tree with transactions (which have to be already
+        transformed for ledger) and verifies the consistency proof of the reply
+        against the final state of catchup. The tree is rolled back if the
+        proof does not match.
         """
-
-        # TODO: Remove after stop passing seqNo here
-        assert seq_no == txns_to_process[0][0]
-
-        # Here seqNo has to be the seqNo of first transaction of
-        # `catchupReplies`
-
-        # Get the transactions in the catchup reply which has sequence
-        # number `seqNo`
-        node_name, catchup_rep = self._find_catchup_reply_for_seq_no(seq_no)
-        txns = catchup_rep.txns
-
-        # Add only those transaction in the temporary tree from the above
-        # batch which are not present in the ledger
-        # Integer keys being converted to strings when marshaled to JSON
-        txns = [self._provider.transform_txn_for_ledger(txn)
-                for s, txn in txns_to_process[:len(txns)]
-                if str(s) in txns]
-
-        # Creating a temporary tree which will be used to verify consistency
-        # proof, by inserting transactions. Duplicating a merkle tree is not
-        # expensive since we are using a compact merkle tree.
-        temp_tree = self._ledger.treeWithAppliedTxns(txns)
+        tree = self._verification_tree
+        if tree is None or tree.tree_size != self._ledger.size:
+            # Duplicating a compact merkle tree is not expensive, its size
+            # is 32*(lg n) bytes where n is the number of leaves
+            tree = self._verification_tree = copy(self._ledger.tree)
+        tree_size, hashes = tree.tree_size, tree.hashes
+        tree.extend([self._ledger.serialize_for_tree(txn) for txn in txns])
+        # Only the frontier of the verification tree is needed
+        tree.hashStore.reset()
 
         proof = catchup_rep.consProof
         final_size = self._catchup_till.final_size
         final_hash = self._catchup_till.final_hash
         try:
             logger.info("{} verifying proof for {}, {}, {}, {}, {}".
-                        format(self, temp_tree.tree_size, final_size,
-                               temp_tree.root_hash, final_hash, proof))
+                        format(self, tree.tree_size, final_size,
+                               tree.root_hash, final_hash, proof))
             verified = self._provider.verifier(self._ledger_id).verify_tree_consistency(
-                temp_tree.tree_size,
+                tree.tree_size,
                 final_size,
-                temp_tree.root_hash,
+                tree.root_hash,
                 Ledger.strToHash(final_hash),
                 [Ledger.strToHash(p) for p in proof]
             )
-
         except Exception as ex:
             logger.info("{} could not verify catchup reply {} since {}".format(self, catchup_rep, ex))
             verified = False
-        return bool(verified), node_name, len(txns)
-
-    def _find_catchup_reply_for_seq_no(self, seq_no: int) -> Tuple[str, CatchupRep]:
-        # This is inefficient if we have large number of nodes but since
-        # number of node are always between 60-120, this is ok.
-        for frm, reps in self._received_catchup_replies_from.items():
-            for rep in reps:
-                if str(seq_no) in rep.txns:
-                    return frm, rep
-
-    def _add_txn(self, txn):
-        self._ledger.add(self._provider.transform_txn_for_ledger(txn))
-        self._provider.notify_transaction_added_to_ledger(self._ledger_id, txn)
-
-    def _remove_processed_catchup_reply(self, node: str, seq_no: str):
-        for i, rep in enumerate(self._received_catchup_replies_from[node]):
-            if str(seq_no) in rep.txns:
-                break
-        self._received_catchup_replies_from[node].pop(i)
+
+        if not verified:
+            tree._update(tree_size, hashes)
+        return bool(verified)
+
+    def _find_catchup_reply_for_seq_no(self, seq_no: int):
+        # Replies containing seq_no, the one received first is used
+        replies = self._received_catchup_replies[seq_no]
+        return min(replies, key=lambda r: r.data[0]) if replies else None
+
+    def _add_txn(self, txn, ledger_txn=None):
+        if ledger_txn is None:
+            ledger_txn = self._provider.transform_txn_for_ledger(txn)
+        self._add_txns([txn], [ledger_txn])
+
+    def _add_txns(self, txns: List[Any], ledger_txns: List[Any]):
+        # Txns are written to the ledger in bulk, without merkle proofs
+        self._ledger.append_txns(ledger_txns)
+        for txn in txns:
+            self._provider.notify_transaction_added_to_ledger(self._ledger_id, txn)
+
+    def _clear_received_catchup_replies(self):
+        self._received_catchup_replies = IntervalTree()
+        self._received_catchup_txns.clear()
+        self._verification_tree = None
 
     def _reset(self):
         self._is_working = False
         self._catchup_till = None
 
         self._wait_catchup_rep_from.clear()
-        self._received_catchup_replies_from.clear()
-        self._received_catchup_txns.clear()
+        self._clear_received_catchup_replies()
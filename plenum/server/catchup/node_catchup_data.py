@@ -68,6 +68,11 @@ class CatchupNodeDataProvider(CatchupDataProvider):
         else:
             self._node.transmitToClient(msg, to)
 
+    def send_bulk_to(self, frame: bytes, to: str) -> bool:
+        if not self._node.nodestack.hasRemote(to):
+            return False
+        return self._node.nodestack.send_bulk(frame, to)
+
     def send_to_nodes(self, msg: Any, nodes: Iterable[str] = None):
         self._node.sendToNodes(msg, nodes)
 
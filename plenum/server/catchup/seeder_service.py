@@ -1,22 +1,40 @@
 from abc import abstractmethod
-from typing import Any, Tuple, Optional
+from typing import Any, Tuple, Optional, List
 
+from common.lru_cache import LruCache
 from plenum.common.channel import RxChannel, Router
+from plenum.common.config_util import getConfig
 from plenum.common.ledger import Ledger
 from plenum.common.messages.node_messages import CatchupReq, CatchupRep, ConsistencyProof, LedgerStatus
+from plenum.common.types import f
 from plenum.common.util import SortedDict
 from plenum.server.catchup.utils import CatchupDataProvider, build_ledger_status
 from stp_core.common.log import getlogger
+from stp_core.network.bulk_transfer import serialize_bulk_frame, BULK_FRAME_PREFIX
+
+try:
+    import ujson as json
+except ImportError:
+    import json
 
 logger = getlogger()
 
+# Serialized CATCHUP_REP without txns is
+# {"op":"CATCHUP_REP","ledgerId":N,"txns":{},"consProof":[]}
+CATCHUP_REP_ENVELOPE_SIZE = 64
+# Base58 encoded hash with quotes and a comma
+CONS_PROOF_HASH_SIZE = 47
+
 
 class SeederService:
-    def __init__(self, input: RxChannel, provider: CatchupDataProvider):
+    def __init__(self, input: RxChannel, provider: CatchupDataProvider, config=None):
         router = Router(input)
         router.add(LedgerStatus, self.process_ledger_status)
         router.add(CatchupReq, self.process_catchup_req)
         self._provider = provider
+        self._config = config or getConfig()
+        self._reps_cache = LruCache(self._config.CATCHUP_REP_CACHE_SIZE)
+        self._cons_proofs_cache = LruCache(self._config.CATCHUP_CONS_PROOF_CACHE_SIZE)
 
     def __repr__(self):
         return self._provider.node_name()
@@ -82,26 +100,128 @@ class SeederService:
                                    .format(req.catchupTill, ledger.size), logMethod=logger.warning)
             return
 
-        cons_proof = ledger.tree.consistency_proof(end, req.catchupTill)
-        cons_proof = [Ledger.hashToStr(p) for p in cons_proof]
-
-        txns = {}
-        for seq_no, txn in ledger.getAllTxn(start, end):
-            txns[seq_no] = self._provider.update_txn_with_extra_data(txn)
+        if self._config.CATCHUP_BULK_TRANSFER_ENABLED and \
+                self._send_bulk_frames(ledger_id, ledger, start, end, req.catchupTill, frm):
+            return
 
-        txns = SortedDict(txns)  # TODO: Do we really need them sorted on the sending side?
-        rep = CatchupRep(ledger_id, txns, cons_proof)
+        reps = self._get_catchup_reps(ledger_id, ledger, start, end, req.catchupTill)
+        # Reps are sized to fit into a message already, splitter is a safety net
+        # for the case size estimation is wrong
         message_splitter = self._make_splitter_for_catchup_rep(ledger, req.catchupTill)
-        self._provider.send_to(rep, frm, message_splitter)
+        for rep in reps:
+            self._provider.send_to(rep, frm, message_splitter)
 
     def _get_ledger_and_id(self, req: Any) -> Tuple[int, Optional[Ledger]]:
         ledger_id = req.ledgerId
         return ledger_id, self._provider.ledger(ledger_id)
 
-    @staticmethod
-    def _make_consistency_proof(ledger: Ledger, seq_no_start: int, seq_no_end: int):
-        proof = ledger.tree.consistency_proof(seq_no_start, seq_no_end)
-        string_proof = [Ledger.hashToStr(p) for p in proof]
+    def _get_catchup_reps(self, ledger_id: int, ledger: Ledger,
+                          start: int, end: int, catchup_till: int) -> List[CatchupRep]:
+        # Committed txns and proofs up to catchup_till never change, so
+        # cached reps never need to be invalidated
+        key = (ledger_id, start, end, catchup_till)
+        reps = self._reps_cache.get(key)
+        if reps is None:
+            reps, size = self._build_catchup_reps(ledger_id, ledger, start, end, catchup_till)
+            self._reps_cache.put(key, reps, size)
+        return reps
+
+    def _send_bulk_frames(self, ledger_id: int, ledger: Ledger,
+                          start: int, end: int, catchup_till: int, frm: str) -> bool:
+        """
+        Send requested txns as CATCHUP_REPs serialized into bulk frames
+
+        :return: False if bulk frames cannot be used, so usual CATCHUP_REPs
+            need to be sent
+        """
+        key = (ledger_id, start, end, catchup_till, 'bulk')
+        frames = self._reps_cache.get(key)
+        if frames is None:
+            frames = self._build_bulk_frames(ledger_id, ledger, start, end, catchup_till)
+            if frames is None:
+                return False
+            self._reps_cache.put(key, frames, sum(len(frame) for frame in frames))
+
+        # Recipients are not asked whether they accept bulk frames, this is
+        # set by CATCHUP_BULK_TRANSFER_ENABLED for the whole pool. A frame is
+        # not enqueued only if the recipient is not a remote of the node
+        # stack, which is the same for all frames, so only the first one is
+        # checked
+        if not self._provider.send_bulk_to(frames[0], frm):
+            return False
+        for frame in frames[1:]:
+            self._provider.send_bulk_to(frame, frm)
+        logger.info("{} sent {} txns of ledger {} to {} in {} bulk frame(s)"
+                    .format(self, end - start + 1, ledger_id, frm, len(frames)))
+        return True
+
+    def _build_bulk_frames(self, ledger_id: int, ledger: Ledger,
+                           start: int, end: int, catchup_till: int) -> Optional[List[bytes]]:
+        reps, _ = self._build_catchup_reps(ledger_id, ledger, start, end, catchup_till,
+                                           max_size=self._config.BULK_FRAME_LIMIT - len(BULK_FRAME_PREFIX))
+        frames = []
+        for rep in reps:
+            msg = rep._asdict()
+            # Sequence numbers are strings as in JSON serialized CATCHUP_REPs
+            msg[f.TXNS.nm] = {str(seq_no): txn for seq_no, txn in rep.txns.items()}
+            frame = serialize_bulk_frame(msg)
+            if len(frame) > self._config.BULK_FRAME_LIMIT:
+                logger.warning("{} cannot send txns {}-{} of ledger {} in bulk frames: "
+                               "frame of {} bytes exceeds the limit"
+                               .format(self, start, end, ledger_id, len(frame)))
+                return None
+            frames.append(frame)
+        return frames or None
+
+    def _build_catchup_reps(self, ledger_id: int, ledger: Ledger,
+                            start: int, end: int, catchup_till: int,
+                            max_size: Optional[int] = None) -> Tuple[List[CatchupRep], int]:
+        """
+        Pack requested txns into CATCHUP_REPs in one pass over the ledger,
+        every CATCHUP_REP gets as many txns as fit into the size limit
+
+        :param max_size: size limit of a CATCHUP_REP, CATCHUP_REP_MAX_SIZE
+            by default
+        :return: CATCHUP_REPs and their total estimated size
+        """
+        if max_size is None:
+            max_size = self._config.CATCHUP_REP_MAX_SIZE
+        # Consistency proof has no more than a hash per level of the tree
+        max_txns_size = max_size - CATCHUP_REP_ENVELOPE_SIZE - \
+            CONS_PROOF_HASH_SIZE * (catchup_till.bit_length() + 1)
+        reps = []
+        total_size = 0
+        txns = []
+        txns_size = 0
+        for seq_no, txn in ledger.getAllTxn(start, end):
+            txn = self._provider.update_txn_with_extra_data(txn)
+            # Serialized as "seq_no":txn,
+            txn_size = len(json.dumps(txn)) + len(str(seq_no)) + 4
+            if txns and txns_size + txn_size > max_txns_size:
+                reps.append(self._make_catchup_rep(ledger_id, ledger, txns, catchup_till))
+                total_size += txns_size
+                txns = []
+                txns_size = 0
+            txns.append((seq_no, txn))
+            txns_size += txn_size
+        if txns:
+            reps.append(self._make_catchup_rep(ledger_id, ledger, txns, catchup_till))
+            total_size += txns_size
+        return reps, total_size
+
+    def _make_catchup_rep(self, ledger_id: int, ledger: Ledger, txns: List[Tuple[int, dict]],
+                          catchup_till: int) -> CatchupRep:
+        cons_proof = self._make_consistency_proof(ledger, txns[-1][0], catchup_till)
+        # TODO: Do we really need them sorted on the sending side?
+        return CatchupRep(ledger_id, SortedDict(txns), cons_proof)
+
+    def _make_consistency_proof(self, ledger: Ledger, seq_no_start: int, seq_no_end: int):
+        key = (ledger, seq_no_start, seq_no_end)
+        string_proof = self._cons_proofs_cache.get(key)
+        if string_proof is None:
+            proof = ledger.tree.consistency_proof(seq_no_start, seq_no_end)
+            string_proof = [Ledger.hashToStr(p) for p in proof]
+            self._cons_proofs_cache.put(key, string_proof)
         return string_proof
 
     def _build_consistency_proof(self, ledger_id: int,
@@ -182,8 +302,8 @@ class SeederService:
 
 
 class ClientSeederService(SeederService):
-    def __init__(self, input: RxChannel, provider: CatchupDataProvider):
-        SeederService.__init__(self, input, provider)
+    def __init__(self, input: RxChannel, provider: CatchupDataProvider, config=None):
+        SeederService.__init__(self, input, provider, config)
 
     def _on_ledger_status_up_to_date(self, ledger_id: int, frm: str):
         ledger_status = build_ledger_status(ledger_id, self._provider)
@@ -191,8 +311,8 @@ class ClientSeederService(SeederService):
 
 
 class NodeSeederService(SeederService):
-    def __init__(self, input: RxChannel, provider: CatchupDataProvider):
-        SeederService.__init__(self, input, provider)
+    def __init__(self, input: RxChannel, provider: CatchupDataProvider, config=None):
+        SeederService.__init__(self, input, provider, config)
 
     def _on_ledger_status_up_to_date(self, ledger_id: int, frm: str):
         pass
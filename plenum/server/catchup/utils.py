@@ -81,6 +81,14 @@ class CatchupDataProvider(ABC):
     def send_to(self, msg: Any, to: str, message_splitter: Optional[Callable] = None):
         pass
 
+    def send_bulk_to(self, frame: bytes, to: str) -> bool:
+        """
+        Send a serialized bulk frame to the node
+
+        :return: False if bulk frames cannot be sent to it
+        """
+        return False
+
     @abstractmethod
     def send_to_nodes(self, msg: Any, nodes: Iterable[str] = None):
         pass
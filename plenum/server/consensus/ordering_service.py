@@ -474,8 +474,48 @@ class OrderingService:
         why_not = None
         if not self._validator.has_already_ordered(commit.viewNo, commit.ppSeqNo):
             pre_prepare = self.get_preprepare(commit.viewNo, commit.ppSeqNo)
+            if self._config.BLS_COMMIT_VERIFICATION_WORKERS:
+                # The COMMIT is processed further when its BLS signatures
+                # are verified, see `process_validated_commits`
+                self.l_bls_bft_replica.enqueue_commit_validation(commit, sender, pre_prepare)
+                return False
             why_not = self.l_bls_bft_replica.validate_commit(commit, sender, pre_prepare)
 
+        return self._check_bls_commit_validation(commit, sender, why_not)
+
+    def process_validated_commits(self) -> int:
+        """
+        Process COMMITs with BLS signatures verified off the event loop.
+
+        :return: the number of processed COMMITs
+        """
+        if not self._config.BLS_COMMIT_VERIFICATION_WORKERS:
+            return 0
+        self.l_bls_bft_replica.flush_commit_validation()
+        validated = self.l_bls_bft_replica.get_validated_commits()
+        for commit, sender, why_not in validated:
+            # COMMITs which cannot be processed now are stashed or discarded
+            # the same way as by `process_commit`, which gets them when unstashed
+            self._stasher.process_with(partial(self._process_validated_commit, why_not=why_not),
+                                       commit, sender)
+        return len(validated)
+
+    def _process_validated_commit(self, commit: Commit, sender: str, why_not):
+        # Things could change while signatures were verified
+        result, reason = self._validate(commit)
+        if result != PROCESS:
+            return result, reason
+
+        if self.commits.hasCommitFrom(commit, sender):
+            self.report_suspicious_node(SuspiciousNode(sender, Suspicions.DUPLICATE_CM_SENT, commit))
+        elif self._check_bls_commit_validation(commit, sender, why_not):
+            self.stats.inc(TPCStat.CommitRcvd)
+            self._add_to_commits(commit, sender)
+            logger.debug("{} processed incoming COMMIT{}".format(
+                self, (commit.viewNo, commit.ppSeqNo)))
+        return result, reason
+
+    def _check_bls_commit_validation(self, commit: Commit, sender: str, why_not) -> bool:
         if why_not == BlsBftReplica.CM_BLS_SIG_WRONG:
             logger.warning("{} discard Commit message from {}:{}".format(self, sender, commit))
             self.report_suspicious_node(SuspiciousNode(sender,
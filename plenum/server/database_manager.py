@@ -2,7 +2,8 @@ from typing import Dict, Optional
 
 from common.exceptions import LogicError
 from common.serializers.serialization import state_roots_serializer
-from plenum.common.constants import BLS_LABEL, TS_LABEL, IDR_CACHE_LABEL, ATTRIB_LABEL, SEQ_NO_DB_LABEL
+from plenum.common.constants import BLS_LABEL, TS_LABEL, IDR_CACHE_LABEL, ATTRIB_LABEL, SEQ_NO_DB_LABEL, \
+    AUDIT_TXN_CACHE_LABEL, AUDITED_STATE_ROOTS_LABEL
 from plenum.common.ledger import Ledger
 from plenum.server.txn_version_controller import TxnVersionController
 from state.state import State
@@ -128,6 +129,14 @@ class DatabaseManager():
     def seq_no_db(self):
         return self.get_store(SEQ_NO_DB_LABEL)
 
+    @property
+    def audit_txn_cache(self):
+        return self.get_store(AUDIT_TXN_CACHE_LABEL)
+
+    @property
+    def audited_state_roots(self):
+        return self.get_store(AUDITED_STATE_ROOTS_LABEL)
+
     # ToDo: implement it and use on close all KV stores
     def close(self):
         # Close all states
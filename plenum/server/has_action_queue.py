@@ -1,7 +1,7 @@
 import time
 from collections import deque
 from functools import wraps
-from typing import Callable
+from typing import Callable, Optional
 
 from stp_core.common.log import getlogger
 from stp_core.common.util import get_func_name
@@ -71,6 +71,16 @@ class HasActionQueue:
                     logger.trace("{} cancelled action {} with id {}".format(self, action, aid))
                     break
 
+    def _next_action_delay(self) -> Optional[float]:
+        """
+        Seconds until the earliest action has to run, None if there are none
+        """
+        if self.actionQueue:
+            return 0
+        if not self.aqStash:
+            return None
+        return max(0, self.aqNextCheck - time.perf_counter())
+
     def _serviceActions(self) -> int:
         """
         Run all pending actions in the action queue.
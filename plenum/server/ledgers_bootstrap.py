@@ -7,8 +7,12 @@ from ledger.compact_merkle_tree import CompactMerkleTree
 from ledger.genesis_txn.genesis_txn_initiator import GenesisTxnInitiator
 from ledger.genesis_txn.genesis_txn_initiator_from_file import GenesisTxnInitiatorFromFile
 from ledger.genesis_txn.genesis_txn_initiator_from_mem import GenesisTxnInitiatorFromMem
+from ledger.txn_index import TxnIndex
 from plenum.common.constants import AUDIT_LEDGER_ID, POOL_LEDGER_ID, CONFIG_LEDGER_ID, DOMAIN_LEDGER_ID, \
-    NODE_PRIMARY_STORAGE_SUFFIX, BLS_LABEL, HS_MEMORY
+    NODE_PRIMARY_STORAGE_SUFFIX, BLS_LABEL, HS_MEMORY, AUDIT_TXN_CACHE_LABEL, \
+    AUDITED_STATE_ROOTS_LABEL
+from plenum.common.audit_txn_cache import AuditTxnCache
+from plenum.common.audited_state_roots import AuditedStateRoots
 from plenum.common.ledger import Ledger
 from plenum.persistence.storage import initStorage
 from plenum.server.batch_handlers.audit_batch_handler import AuditBatchHandler
@@ -30,6 +34,7 @@ from plenum.server.request_handlers.txn_author_agreement_handler import TxnAutho
 from plenum.server.request_managers.action_request_manager import ActionRequestManager
 from plenum.server.request_managers.read_request_manager import ReadRequestManager
 from plenum.server.request_managers.write_request_manager import WriteRequestManager
+from plenum.server.state_rebuilder import StateRebuilder
 from state.pruning_state import PruningState
 from storage.helper import initHashStore, initKeyValueStorage
 from storage.kv_in_memory import KeyValueStorageInMemory
@@ -116,6 +121,10 @@ class LedgersBootstrap:
         self.db_manager.register_new_database(AUDIT_LEDGER_ID,
                                               self._create_ledger('audit'),
                                               taa_acceptance_required=False)
+        self.db_manager.register_new_store(AUDIT_TXN_CACHE_LABEL,
+                                           AuditTxnCache(self.config.AUDIT_TXN_CACHE_SIZE))
+        self.db_manager.register_new_store(AUDITED_STATE_ROOTS_LABEL,
+                                           AuditedStateRoots(self.db_manager.get_ledger(AUDIT_LEDGER_ID)))
 
     def _init_bls_bft(self):
         self._bls_bft = self._create_bls_bft()
@@ -225,7 +234,18 @@ class LedgersBootstrap:
                       fileName=txn_file_name,
                       transactionLogStore=txn_log_storage,
                       ensureDurability=self.config.EnsureLedgerDurability,
-                      genesis_txn_initiator=genesis)
+                      genesis_txn_initiator=genesis,
+                      txn_index=self._create_txn_index(name))
+
+    def _create_txn_index(self, name: str) -> Optional[TxnIndex]:
+        fields = self.config.LEDGER_TXN_INDEXES.get(name)
+        if not fields or self.data_location is None:
+            return None
+        return TxnIndex(initKeyValueStorage(self.config.txnIndexStorage,
+                                            self.data_location,
+                                            name + self.config.txnIndexDbNameSuffix,
+                                            db_config=self.config.db_state_config),
+                        fields)
 
     def _create_domain_ledger(self) -> Ledger:
         if self.config.primaryStorage is None:
@@ -248,7 +268,11 @@ class LedgersBootstrap:
                     storage_name,
                     self.data_location,
                     db_name,
-                    db_config=self.config.db_state_config))
+                    db_config=self.config.db_state_config),
+                node_cache_size=self.config.STATE_NODE_CACHE_SIZE,
+                gc_keep_roots=self.config.STATE_GC_KEEP_ROOTS
+                if self.config.STATE_GC_ENABLED else 0,
+                gc_death_row_delay=self.config.STATE_GC_DEATH_ROW_DELAY)
         else:
             return PruningState(KeyValueStorageInMemory())
 
@@ -260,7 +284,13 @@ class LedgersBootstrap:
         state = self.db_manager.get_state(ledger_id)
         if not state or state.closed:
             return
-        if state.isEmpty:
+        rebuilder = self.create_state_rebuilder(ledger_id)
+        if rebuilder.is_needed and \
+                (self.config.STATE_REBUILD_BULK_ENABLED or not state.isEmpty):
+            # A bulk rebuild which was interrupted is always resumed
+            logger.info('{} rebuilding state from ledger {}'.format(self, ledger_id))
+            rebuilder.rebuild()
+        elif state.isEmpty:
             logger.info('{} found state to be empty, recreating from ledger {}'.format(self, ledger_id))
             ledger = self.db_manager.get_ledger(ledger_id)
             for seq_no, txn in ledger.getAllTxn():
@@ -271,3 +301,11 @@ class LedgersBootstrap:
             "{} initialized state for ledger {}: state root {}".format(
                 self, ledger_id,
                 state_roots_serializer.serialize(bytes(state.committedHeadHash))))
+
+    def create_state_rebuilder(self, ledger_id: int) -> StateRebuilder:
+        return StateRebuilder(self.write_manager, ledger_id,
+                              chunk_size=self.config.STATE_REBUILD_CHUNK_SIZE,
+                              flush_size=self.config.STATE_REBUILD_FLUSH_SIZE,
+                              workers=self.config.STATE_REBUILD_WORKERS,
+                              progress_interval=self.config.STATE_REBUILD_PROGRESS_INTERVAL,
+                              prepare_txn=self._update_txn_with_extra_data)
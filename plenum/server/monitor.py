@@ -1,4 +1,5 @@
 import time
+from collections import OrderedDict
 from datetime import datetime
 from statistics import mean
 from typing import Dict, Iterable, Optional
@@ -30,43 +31,31 @@ logger = getlogger()
 class RequestTimeTracker:
     """
     Request time tracking utility
-    """
-
-    class Request:
-        def __init__(self, timestamp, instances_ids):
-            self.ordered = dict()
-            self.timestamp = timestamp
-            for ins_id in instances_ids:
-                self.ordered[ins_id] = False
-
-            # True if request was unordered for too long and
-            # was handled by handlers on master replica
-            self.handled = False
-
-        def order(self, instId):
-            if instId in self.ordered:
-                self.ordered[instId] = True
-
-        def remove_instance(self, instId):
-            self.ordered.pop(instId, None)
 
-        @property
-        def is_ordered(self):
-            return self.ordered[0]
-
-        @property
-        def is_handled(self):
-            return self.handled
-
-        @property
-        def is_ordered_by_all(self):
-            return all(self.ordered.values())
+    Every tracked request keeps its start time and a bitmask of instances
+    which are yet to order it. Requests which are not ordered by master and
+    not handled yet are also kept in order of their start, so that requests
+    unordered for too long are found without looking at the others. Start
+    times are expected not to decrease, as given by a monotonic clock.
+    """
 
     def __init__(self, instances_ids):
         self.instances_ids = instances_ids
+        self._instances_mask = self._mask(instances_ids)
+        # key -> (start time, bitmask of instances yet to order the request)
         self._requests = {}
         self._unordered = set()
         self._handled_unordered = set()
+        # key -> start time of unordered requests which are not handled yet,
+        # in order of start
+        self._unhandled_unordered = OrderedDict()
+
+    @staticmethod
+    def _mask(instances_ids) -> int:
+        mask = 0
+        for inst_id in instances_ids:
+            mask |= 1 << inst_id
+        return mask
 
     def __len__(self):
         return len(self._requests)
@@ -76,34 +65,40 @@ class RequestTimeTracker:
 
     def started(self, key):
         req = self._requests.get(key)
-        return req.timestamp if req is not None else None
+        return req[0] if req is not None else None
 
     def start(self, key, timestamp):
-        self._requests[key] = RequestTimeTracker.Request(timestamp, self.instances_ids)
+        self._requests[key] = (timestamp, self._instances_mask)
         self._unordered.add(key)
+        self._unhandled_unordered.pop(key, None)
+        self._unhandled_unordered[key] = timestamp
 
     def order(self, instId, key, timestamp):
-        if key not in self._requests:
+        req = self._requests.get(key)
+        if req is None:
             return 0
-        req = self._requests[key]
-        tto = timestamp - req.timestamp
-        req.order(instId)
+        started, pending = req
+        pending &= ~(1 << instId)
         if instId == 0:
             self._handled_unordered.discard(key)
             self._unordered.discard(key)
-        if req.is_ordered_by_all:
+            self._unhandled_unordered.pop(key, None)
+        if pending:
+            self._requests[key] = (started, pending)
+        else:
             del self._requests[key]
-        return tto
+        return timestamp - started
 
     def handle(self, key):
         if key in self._requests:
-            self._requests[key].handled = True
+            self._unhandled_unordered.pop(key, None)
             self._handled_unordered.add(key)
 
     def reset(self):
         self._requests.clear()
         self._unordered.clear()
         self._handled_unordered.clear()
+        self._unhandled_unordered.clear()
 
     def unordered(self):
         return self._unordered
@@ -111,26 +106,41 @@ class RequestTimeTracker:
     def handled_unordered(self):
         return self._handled_unordered
 
-    def unhandled_unordered(self):
-        return ((key, req.timestamp) for key, req in self._requests.items()
-                if not req.is_ordered and not req.is_handled)
+    def unhandled_unordered(self, started_before=None):
+        """
+        Return (key, start time) of requests which are not ordered by master
+        and not handled yet, in order of start. If `started_before` is given
+        only requests started before that time are returned.
+        """
+        for key, started in self._unhandled_unordered.items():
+            if started_before is not None and started >= started_before:
+                return
+            yield key, started
 
     def add_instance(self, inst_id):
         self.instances_ids.add(inst_id)
+        self._instances_mask |= 1 << inst_id
 
     def remove_instance(self, instId):
-        for req in self._requests.values():
-            req.remove_instance(instId)
-        keys_to_del = [key for key, req in self._requests.items() if req.is_ordered_by_all]
+        bit = 1 << instId
+        keys_to_del = []
+        for key, (started, pending) in self._requests.items():
+            if pending & bit:
+                pending &= ~bit
+                if pending:
+                    self._requests[key] = (started, pending)
+                else:
+                    keys_to_del.append(key)
         for key in keys_to_del:
             self.force_req_drop(key)
         self.instances_ids.remove(instId)
+        self._instances_mask &= ~bit
 
     def force_req_drop(self, key):
-        if key in self._requests:
-            del self._requests[key]
+        self._requests.pop(key, None)
         self._unordered.discard(key)
         self._handled_unordered.discard(key)
+        self._unhandled_unordered.pop(key, None)
 
 
 class Monitor(HasActionQueue, PluginLoaderHelper):
@@ -411,8 +421,8 @@ class Monitor(HasActionQueue, PluginLoaderHelper):
 
     def check_unordered(self):
         now = time.perf_counter()
-        new_unordereds = [(req, now - started) for req, started in self.requestTracker.unhandled_unordered()
-                          if now - started > self.config.UnorderedCheckFreq]
+        new_unordereds = [(req, now - started) for req, started in self.requestTracker.unhandled_unordered(
+            started_before=now - self.config.UnorderedCheckFreq)]
         if len(new_unordereds) == 0:
             return
         for handler in self.unordered_requests_handlers:
@@ -31,6 +31,7 @@ from plenum.common.timer import QueueTimer
 from plenum.server.backup_instance_faulty_processor import BackupInstanceFaultyProcessor
 from plenum.server.batch_handlers.three_pc_batch import ThreePcBatch
 from plenum.server.inconsistency_watchers import NetworkInconsistencyWatcher
+from plenum.server.query_workers import QueryWorkerBootstrap, QueryWorkerPool
 from plenum.server.quota_control import StaticQuotaControl, RequestQueueQuotaControl
 from plenum.server.replica_helper import generateName
 from plenum.server.replica_validator_enums import STASH_WATERMARKS, STASH_CATCH_UP, STASH_VIEW_3PC
@@ -44,6 +45,7 @@ from stp_core.common.log import getlogger
 from stp_core.crypto.signer import Signer
 from stp_core.network.exceptions import RemoteNotFound
 from stp_core.network.network_interface import NetworkInterface
+from stp_core.loop.waker import Waker
 from stp_core.types import HA
 from stp_zmq.zstack import ZStack, Quota
 from ledger.hash_stores.hash_store import HashStore
@@ -166,6 +168,9 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
         self.cliname = cliname
         self.cliha = cliha
         self.timer = QueueTimer()
+        # Wakes up an event driven looper when work done off the looper
+        # (BLS verification, query workers) is finished, open while started
+        self._waker = None  # type: Optional[Waker]
         self.poolManager = None  # type: TxnPoolManager
         self.ledgerManager = None
         self.bls_bft = None
@@ -200,6 +205,8 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
 
         # Number of read requests the node has processed
         self.total_read_request_number = 0
+        # Worker processes serving read requests, started with the node
+        self.query_workers = None  # type: Optional[QueryWorkerPool]
 
         self.clientAuthNr = clientAuthNr or self.defaultAuthNr()
 
@@ -283,6 +290,9 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
         if config.GC_STATS_REPORT_INTERVAL > 0:
             self.startRepeating(self.report_gc_stats, config.GC_STATS_REPORT_INTERVAL)
 
+        if config.STATE_GC_ENABLED:
+            self.startRepeating(self.collect_state_garbage, config.STATE_GC_INTERVAL)
+
         self.white_list_init()
 
         # Map of request identifier, request id to client name. Used for
@@ -927,6 +937,9 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
         else:
             super().start(loop)
 
+            if self._waker is None:
+                self._waker = Waker()
+
             # Start the ledgers
             for ledger in self.ledgers:
                 ledger.start(loop)
@@ -937,6 +950,8 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
             self.nodestack.start()
             self.clientstack.start()
 
+            self.start_query_workers()
+
             self.schedule_node_status_dump()
             self.dump_additional_info()
 
@@ -951,6 +966,41 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
 
         self.logNodeInfo()
 
+    def start_query_workers(self):
+        if not self.config.QUERY_WORKERS or self.query_workers is not None:
+            return
+        bootstrap = self.create_query_worker_bootstrap()
+        if not bootstrap.can_serve:
+            logger.warning("{} can not serve read requests by workers since its "
+                           "storages can not be read by other processes".format(self))
+            return
+        self.query_workers = QueryWorkerPool(bootstrap,
+                                             workers=self.config.QUERY_WORKERS,
+                                             reply_timeout=self.config.QUERY_WORKER_REPLY_TIMEOUT,
+                                             send_result=self._send_query_result,
+                                             process_locally=self._process_query_locally,
+                                             on_done=self.wake_up)
+        self.publish_committed_snapshot()
+
+    def create_query_worker_bootstrap(self) -> QueryWorkerBootstrap:
+        return QueryWorkerBootstrap(self.name, self.dataLocation, self.config, self.ledger_ids)
+
+    def publish_committed_snapshot(self):
+        """
+        Make query workers serve read requests for the current committed
+        ledgers and states
+        """
+        if self.query_workers is None:
+            return
+        self.query_workers.publish(
+            {lid: bytes(state.committedHeadHash) for lid, state in self.db_manager.states.items()},
+            {lid: ledger.size for lid, ledger in self.db_manager.ledgers.items()})
+
+    def stop_query_workers(self):
+        if self.query_workers is not None:
+            self.query_workers.stop()
+            self.query_workers = None
+
     def schedule_node_status_dump(self):
         # one-shot dump right after start
         self._schedule(action=self._info_tool.dump_general_info,
@@ -1007,6 +1057,11 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
             except Exception as ex:
                 logger.exception('{} got exception while stopping ledger: {}'.format(self, ex))
 
+        self.stop_query_workers()
+        if self._waker is not None:
+            self._waker.close()
+            self._waker = None
+
         self.nodestack.stop()
         self.clientstack.stop()
 
@@ -1053,6 +1108,8 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
         )
 
         if self.status is not Status.stopped:
+            if self._waker is not None:
+                self._waker.reset()
             c += await self.serviceReplicas(limit)
             c += await self.serviceNodeMsgs(limit)
             c += await self.serviceClientMsgs(limit)
@@ -1062,6 +1119,9 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
                 self.timer.service()
             with self.metrics.measure_time(MetricsName.SERVICE_MONITOR_ACTIONS_TIME):
                 c += self.monitor._serviceActions()
+            if self.query_workers is not None:
+                with self.metrics.measure_time(MetricsName.SERVICE_QUERY_WORKERS_TIME):
+                    c += self.query_workers.service()
             c += await self.service_observable(limit)
             c += await self.service_observer(limit)
             with self.metrics.measure_time(MetricsName.FLUSH_OUTBOXES_TIME):
@@ -1075,6 +1135,36 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
 
         return c
 
+    def wake_up(self, *args):
+        """
+        Make an event driven looper prod the node, may be called from any thread
+        """
+        waker = self._waker
+        if waker is not None:
+            waker.wake()
+
+    def wakeup_fds(self) -> List[int]:
+        if self.status is Status.stopped:
+            return []
+        fds = self.nodestack.wakeup_fds() + self.clientstack.wakeup_fds()
+        if self._waker is not None:
+            fds.append(self._waker.fileno())
+        return fds
+
+    def wakeup_timeout(self) -> Optional[float]:
+        if self.status is Status.stopped:
+            return None
+        timeouts = [self.nodestack.wakeup_timeout(),
+                    self.clientstack.wakeup_timeout(),
+                    self.timer.next_event_delay(),
+                    self._next_action_delay(),
+                    self.monitor._next_action_delay(),
+                    self._observable._next_action_delay(),
+                    self._observer._next_action_delay()]
+        timeouts.extend(replica._next_action_delay() for replica in self.replicas.values())
+        timeouts = [t for t in timeouts if t is not None]
+        return min(timeouts) if timeouts else None
+
     @async_measure_time(MetricsName.SERVICE_REPLICAS_TIME)
     async def serviceReplicas(self, limit) -> int:
         """
@@ -1792,6 +1882,7 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
                     format(self, self.num_txns_caught_up_in_last_catchup()))
 
         self.write_manager.on_catchup_finished()
+        self.publish_committed_snapshot()
 
         last_txn = self.getLedger(AUDIT_LEDGER_ID).get_last_committed_txn()
         if last_txn:
@@ -2079,9 +2170,25 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
         except Exception as ex:
             self.send_nack_to_client((request.identifier, request.reqId),
                                      str(ex), frm)
+        else:
+            if self.query_workers is not None and \
+                    self.query_workers.submit(request, frm):
+                return
         result = self.read_manager.get_result(request)
         self.transmitToClient(Reply(result), frm)
 
+    def _send_query_result(self, result, frm: str):
+        self.transmitToClient(Reply(result), frm)
+
+    def _process_query_locally(self, request: Request, frm: str):
+        # Read request which query workers failed to serve, errors are
+        # handled as if it was processed when received
+        try:
+            result = self.read_manager.get_result(request)
+            self.transmitToClient(Reply(result), frm)
+        except Exception as ex:
+            self.handleInvalidClientMsg(ex, (request, frm))
+
     def process_action(self, request, frm):
         # Process an execute action request
         self.send_ack_to_client((request.identifier, request.reqId), frm)
@@ -2286,6 +2393,19 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
         obj_tree.report_top_collections()
         obj_tree.cleanup()
 
+    def collect_state_garbage(self):
+        collected = reclaimed = 0
+        for state in self.states.values():
+            if getattr(state, 'gc_enabled', False):
+                nodes, size = state.collect_garbage(self.config.STATE_GC_STEP)
+                collected += nodes
+                reclaimed += size
+        self.metrics.add_event(MetricsName.STATE_GC_COLLECTED_NODES, collected)
+        self.metrics.add_event(MetricsName.STATE_GC_RECLAIMED_BYTES, reclaimed)
+        if collected:
+            logger.debug("{} collected {} state trie nodes, {} bytes reclaimed"
+                         .format(self, collected, reclaimed))
+
     def flush_metrics(self):
         # Flush accumulated should always be done to avoid numeric overflow in accumulators
         self.metrics.flush_accumulated()
@@ -2320,6 +2440,14 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
         self.metrics.add_event(MetricsName.DOMAIN_LEDGER_SIZE, self.domainLedger.size)
         self.metrics.add_event(MetricsName.CONFIG_LEDGER_SIZE, self.configLedger.size)
 
+        node_caches = [state.node_cache for state in self.states.values()
+                       if getattr(state, 'node_cache', None) is not None]
+        if node_caches:
+            cache_stats = [cache.pop_stats() for cache in node_caches]
+            self.metrics.add_event(MetricsName.STATE_NODE_CACHE_HITS, sum(hits for hits, _ in cache_stats))
+            self.metrics.add_event(MetricsName.STATE_NODE_CACHE_MISSES, sum(misses for _, misses in cache_stats))
+            self.metrics.add_event(MetricsName.STATE_NODE_CACHE_SIZE, sum(cache.size for cache in node_caches))
+
         self.metrics.add_event(MetricsName.POOL_LEDGER_UNCOMMITTED_SIZE, len(self.poolLedger.uncommittedTxns))
         self.metrics.add_event(MetricsName.DOMAIN_LEDGER_UNCOMMITTED_SIZE, len(self.domainLedger.uncommittedTxns))
         self.metrics.add_event(MetricsName.CONFIG_LEDGER_UNCOMMITTED_SIZE, len(self.configLedger.uncommittedTxns))
@@ -2756,6 +2884,7 @@ class Node(HasActionQueue, Motor, Propagator, MessageProcessor, HasFileStorage,
         self.updateSeqNoMap(committed_txns, three_pc_batch.ledger_id)
         updated_committed_txns = list(map(self.update_txn_with_extra_data, committed_txns))
         self.sendRepliesToClients(updated_committed_txns, three_pc_batch.pp_time)
+        self.publish_committed_snapshot()
         return committed_txns
 
     def onBatchCreated(self, three_pc_batch: ThreePcBatch):
@@ -0,0 +1,472 @@
+import pickle
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from types import ModuleType, SimpleNamespace
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
+
+from ledger.compact_merkle_tree import CompactMerkleTree
+from plenum.common.constants import POOL_LEDGER_ID, DOMAIN_LEDGER_ID, CONFIG_LEDGER_ID, AUDIT_LEDGER_ID, \
+    BLS_LABEL, TS_LABEL, AUDITED_STATE_ROOTS_LABEL, KeyValueStorageType, HS_ROCKSDB, TXN_TYPE, GET_TXN, \
+    AUDIT_TXN_LEDGERS_SIZE
+from plenum.common.audited_state_roots import AuditedStateRoots
+from plenum.common.ledger import Ledger
+from plenum.common.messages.node_messages import Reply
+from plenum.common.request import Request
+from plenum.common.txn_util import get_payload_data
+from plenum.common.types import f
+from plenum.bls.bls_store import BlsStore
+from plenum.server.database_manager import DatabaseManager
+from plenum.server.request_handlers.get_txn_author_agreement_aml_handler import GetTxnAuthorAgreementAmlHandler
+from plenum.server.request_handlers.get_txn_author_agreement_handler import GetTxnAuthorAgreementHandler
+from plenum.server.request_handlers.get_txn_handler import GetTxnHandler
+from plenum.server.request_handlers.ledgers_freeze.get_frozen_ledgers_handler import GetFrozenLedgersHandler
+from plenum.server.request_managers.read_request_manager import ReadRequestManager
+from state.pruning_state import ReadOnlyPruningState
+from storage.helper import initHashStore, initKeyValueStorage, initKeyValueStorageIntKeys
+from storage.state_ts_store import StateTsDbStorage
+from stp_core.common.log import getlogger
+
+logger = getlogger()
+
+# Committed state of the node read requests are served for: roots of
+# committed states and sizes of ledgers, `version` grows with every commit
+CommittedSnapshot = NamedTuple("CommittedSnapshot", [("version", int),
+                                                     ("state_roots", Dict[int, bytes]),
+                                                     ("ledger_sizes", Dict[int, int])])
+
+
+class StaleSnapshot(Exception):
+    """
+    Stores opened by a worker do not have the snapshot a request is served
+    for even after reopening them
+    """
+
+
+class SnapshotLedger(Ledger):
+    """
+    Ledger opened read-only by a query worker, its size is the one of the
+    snapshot requests are served for, while opened storages can already
+    have more txns
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.snapshot_size = None  # type: Optional[int]
+        super().__init__(*args, **kwargs)
+
+    @property
+    def opened_size(self) -> int:
+        return self.tree.tree_size
+
+    @property
+    def size(self) -> int:
+        if self.snapshot_size is None:
+            return self.opened_size
+        return min(self.snapshot_size, self.opened_size)
+
+    @property
+    def root_hash(self) -> str:
+        if self.size == self.opened_size:
+            return super().root_hash
+        if self.size == 0:
+            return self.hashToStr(self.tree.hasher.hash_empty())
+        return self.hashToStr(self.tree.merkle_tree_hash(0, self.size))
+
+    def getBySeqNo(self, seqNo):
+        if int(seqNo) > self.size:
+            # The same as for a txn missing in the storage
+            raise KeyError(str(seqNo))
+        return super().getBySeqNo(seqNo)
+
+    def getAllTxn(self, frm: int = None, to: int = None):
+        to = self.size if to is None else min(to, self.size)
+        return super().getAllTxn(frm, to)
+
+
+def picklable_config(config) -> SimpleNamespace:
+    """
+    Copy of config values which can be passed to a worker process
+    """
+    values = {}
+    for name, value in vars(config).items():
+        if name.startswith('__') or isinstance(value, ModuleType) or callable(value):
+            continue
+        try:
+            pickle.dumps(value)
+        except Exception:
+            continue
+        values[name] = value
+    return SimpleNamespace(**values)
+
+
+class QueryWorkerBootstrap:
+    """
+    Opens ledgers, states and stores of a node read-only in a query worker
+    process and serves read requests for a committed snapshot of them.
+    Nodes with other read request handlers or stores extend it the same way
+    they extend `LedgersBootstrap`.
+    """
+
+    ledger_names = {POOL_LEDGER_ID: 'pool',
+                    DOMAIN_LEDGER_ID: 'domain',
+                    CONFIG_LEDGER_ID: 'config',
+                    AUDIT_LEDGER_ID: 'audit'}
+
+    def __init__(self, name: str, data_location: str, config, ledger_ids: List[int]):
+        self.name = name
+        self.data_location = data_location
+        self.config = picklable_config(config)
+        self.ledger_ids = ledger_ids
+        self.db_manager = None  # type: Optional[DatabaseManager]
+        self.read_manager = None  # type: Optional[ReadRequestManager]
+        self._snapshot = None  # type: Optional[CommittedSnapshot]
+        # Ids of ledgers whose states are pinned to the snapshot roots
+        self._pinned_states = set()  # type: Set[int]
+        # Ledger sizes in the last audit txn of the opened audit ledger
+        self._audited_sizes = {}  # type: Dict[int, int]
+
+    def __getstate__(self):
+        # Opened stores are never passed between processes
+        state = self.__dict__.copy()
+        state.update(db_manager=None, read_manager=None, _snapshot=None,
+                     _pinned_states=set(), _audited_sizes={})
+        return state
+
+    @property
+    def can_serve(self) -> bool:
+        """
+        Whether storages used by the node can be opened read-only while the
+        node writes them, only RocksDB allows that
+        """
+        config = self.config
+        storages = [config.transactionLogDefaultStorage,
+                    config.stateSignatureStorage,
+                    config.stateTsStorage]
+        storages += [getattr(config, "{}StateStorage".format(name))
+                     for name in ('pool', 'domain', 'config')]
+        return self.data_location is not None and \
+            config.primaryStorage is None and \
+            config.hashStore['type'].lower() == HS_ROCKSDB and \
+            all(storage == KeyValueStorageType.Rocksdb for storage in storages)
+
+    @property
+    def txn_types(self) -> List[str]:
+        """
+        Types of read requests served by workers, others are always
+        processed by the node
+        """
+        read_manager = ReadRequestManager()
+        self._register_req_handlers(read_manager, DatabaseManager())
+        return list(read_manager.request_handlers.keys())
+
+    def get_result(self, snapshot: CommittedSnapshot, request: Request):
+        if self.db_manager is None:
+            self._open()
+        ledger_ids = self._ledgers_read_by(request)
+        if not self._has_snapshot(snapshot, ledger_ids):
+            # Storages opened read-only do not see what was written after
+            # opening, so they are reopened only when ledgers the request
+            # reads are behind the snapshot
+            self.close()
+            self._open()
+            if not self._has_snapshot(snapshot, ledger_ids):
+                raise StaleSnapshot("{} ledgers have sizes {} instead of {}"
+                                    .format(self.name,
+                                            {lid: ledger.opened_size
+                                             for lid, ledger in self.db_manager.ledgers.items()},
+                                            snapshot.ledger_sizes))
+        self._pin(snapshot, ledger_ids)
+        return self.read_manager.get_result(request)
+
+    def close(self):
+        self._snapshot = None
+        self._pinned_states = set()
+        self._audited_sizes = {}
+        if self.db_manager is None:
+            return
+        for ledger in self.db_manager.ledgers.values():
+            ledger.stop()
+        self.db_manager.close()
+        self.db_manager = None
+        self.read_manager = None
+
+    # Used by GetTxnHandler in place of the node
+
+    def getReplyFromLedger(self, ledger, seq_no, write=True):
+        txn = ledger.getBySeqNo(int(seq_no))
+        if txn:
+            txn.update(ledger.merkleInfo(seq_no) if write else ledger.auditProof(seq_no))
+            txn = self.update_txn_with_extra_data(txn)
+            return Reply(txn)
+        else:
+            return None
+
+    def update_txn_with_extra_data(self, txn):
+        return txn
+
+    def _open(self):
+        db_manager = DatabaseManager()
+        self.db_manager = db_manager
+        self._init_storages(db_manager)
+        self.read_manager = ReadRequestManager()
+        self._register_req_handlers(self.read_manager, db_manager)
+        last_audit_txn = db_manager.get_ledger(AUDIT_LEDGER_ID).get_last_committed_txn()
+        if last_audit_txn is not None:
+            self._audited_sizes = {int(lid): size for lid, size in
+                                   get_payload_data(last_audit_txn).get(AUDIT_TXN_LEDGERS_SIZE, {}).items()}
+
+    def _ledgers_read_by(self, request: Request) -> Set[int]:
+        """
+        Ids of ledgers whose txns, states, multi-signatures and timestamps
+        are read to serve the request
+        """
+        operation = request.operation
+        if operation.get(TXN_TYPE) == GET_TXN:
+            return {operation.get(f.LEDGER_ID.nm, DOMAIN_LEDGER_ID)}
+        handler = self.read_manager.request_handlers.get(operation.get(TXN_TYPE))
+        if handler is None or handler.ledger_id is None:
+            return set()
+        return {handler.ledger_id}
+
+    def _has_snapshot(self, snapshot: CommittedSnapshot, ledger_ids: Set[int]) -> bool:
+        # The node writes the audit txn of a batch after all its other
+        # stores, and the stores are opened in the same order, so a ledger
+        # of the snapshot size audited at that size comes with its state,
+        # multi-signatures and timestamps. The audit ledger itself grows
+        # with every commit and may be behind the snapshot.
+        ledgers = [(lid, self.db_manager.get_ledger(lid)) for lid in ledger_ids]
+        ledgers = [(lid, ledger) for lid, ledger in ledgers if ledger is not None]
+        if any(ledger.opened_size < snapshot.ledger_sizes.get(lid, 0) for lid, ledger in ledgers):
+            return False
+        audit_ledger = self.db_manager.get_ledger(AUDIT_LEDGER_ID)
+        if audit_ledger.opened_size >= snapshot.ledger_sizes.get(AUDIT_LEDGER_ID, 0):
+            return True
+        # Ledgers missing in audit txns, e.g. frozen ones, are not written
+        return all(self._audited_sizes.get(lid, ledger.opened_size) >= snapshot.ledger_sizes.get(lid, 0)
+                   for lid, ledger in ledgers)
+
+    def _pin(self, snapshot: CommittedSnapshot, ledger_ids: Set[int]):
+        """
+        Serve reads for the snapshot: bound ledgers by its sizes and read
+        states of the given ledgers at its roots, states of other ledgers
+        may not have these roots yet
+        """
+        if self._snapshot is None or self._snapshot.version != snapshot.version:
+            for lid, ledger in self.db_manager.ledgers.items():
+                ledger.snapshot_size = snapshot.ledger_sizes.get(lid, 0)
+            audited_state_roots = self.db_manager.audited_state_roots
+            if audited_state_roots is not None:
+                audited_state_roots.reset()
+            self._snapshot = snapshot
+            self._pinned_states = set()
+        for lid in ledger_ids - self._pinned_states:
+            state = self.db_manager.get_state(lid)
+            if state is not None:
+                state.pin(snapshot.state_roots[lid])
+                self._pinned_states.add(lid)
+
+    def _init_storages(self, db_manager: DatabaseManager):
+        for lid in (CONFIG_LEDGER_ID, POOL_LEDGER_ID, DOMAIN_LEDGER_ID):
+            name = self.ledger_names[lid]
+            db_manager.register_new_database(lid,
+                                             self._create_ledger(name),
+                                             self._create_state(name))
+        db_manager.register_new_database(AUDIT_LEDGER_ID, self._create_ledger('audit'))
+        db_manager.register_new_store(AUDITED_STATE_ROOTS_LABEL,
+                                      AuditedStateRoots(db_manager.get_ledger(AUDIT_LEDGER_ID)))
+        db_manager.register_new_store(BLS_LABEL, self._create_bls_store())
+        db_manager.register_new_store(TS_LABEL, self._create_ts_store())
+
+    def _register_req_handlers(self, read_manager: ReadRequestManager, db_manager: DatabaseManager):
+        read_manager.register_req_handler(GetTxnAuthorAgreementAmlHandler(database_manager=db_manager))
+        read_manager.register_req_handler(GetTxnAuthorAgreementHandler(database_manager=db_manager))
+        read_manager.register_req_handler(GetFrozenLedgersHandler(database_manager=db_manager))
+        get_txn_handler = GetTxnHandler(self, db_manager)
+        for lid in self.ledger_ids:
+            read_manager.register_req_handler(get_txn_handler, ledger_id=lid)
+
+    def _create_ledger(self, name: str) -> SnapshotLedger:
+        hash_store = initHashStore(self.data_location, name, self.config, read_only=True)
+        return SnapshotLedger(CompactMerkleTree(hashStore=hash_store),
+                              dataDir=self.data_location,
+                              fileName=getattr(self.config, "{}TransactionsFile".format(name)),
+                              ensureDurability=self.config.EnsureLedgerDurability,
+                              config=self.config,
+                              read_only=True)
+
+    def _create_state(self, name: str) -> ReadOnlyPruningState:
+        return ReadOnlyPruningState(
+            initKeyValueStorage(getattr(self.config, "{}StateStorage".format(name)),
+                                self.data_location,
+                                getattr(self.config, "{}StateDbName".format(name)),
+                                read_only=True,
+                                db_config=self.config.db_state_config))
+
+    def _create_bls_store(self) -> BlsStore:
+        return BlsStore(key_value_type=self.config.stateSignatureStorage,
+                        data_location=self.data_location,
+                        key_value_storage_name=self.config.stateSignatureDbName,
+                        db_config=self.config.db_state_signature_config,
+                        read_only=True)
+
+    def _create_ts_store(self) -> StateTsDbStorage:
+        def ts_storage(db_name):
+            return initKeyValueStorageIntKeys(self.config.stateTsStorage,
+                                              self.data_location,
+                                              db_name,
+                                              read_only=True,
+                                              db_config=self.config.db_state_ts_db_config)
+
+        return StateTsDbStorage(self.name,
+                                {
+                                    DOMAIN_LEDGER_ID: ts_storage(self.config.stateTsDbName),
+                                    CONFIG_LEDGER_ID: ts_storage(self.config.configStateTsDbName)
+                                })
+
+
+# Bootstrap of the current worker process and its pickled form
+_worker = None  # type: Optional[QueryWorkerBootstrap]
+_worker_data = None  # type: Optional[bytes]
+
+
+def serve_query(bootstrap_data: bytes, snapshot: CommittedSnapshot, request: Request):
+    """
+    Executed in a worker process, stores are opened on the first request
+    and kept open, they are reopened only when a request reads ledgers
+    which are behind its snapshot
+    """
+    global _worker, _worker_data
+    if bootstrap_data != _worker_data:
+        if _worker is not None:
+            _worker.close()
+        _worker = pickle.loads(bootstrap_data)
+        _worker_data = bootstrap_data
+    try:
+        return _worker.get_result(snapshot, request)
+    except StaleSnapshot:
+        _worker.close()
+        raise
+
+
+class QueryWorkerPool:
+    """
+    Serves read requests in worker processes so that they do not compete
+    with ordering for the node's looper.
+
+    Every request is served for the committed snapshot published by the
+    node last, a request which a worker failed to serve (stores of a worker
+    do not have the snapshot, the worker died or did not answer in time)
+    is processed by the node itself.
+    """
+
+    def __init__(self,
+                 bootstrap: QueryWorkerBootstrap,
+                 workers: int,
+                 reply_timeout: float,
+                 send_result: Callable[[Any, str], None],
+                 process_locally: Callable[[Request, str], None],
+                 get_current_time: Callable[[], float] = None,
+                 on_done: Optional[Callable] = None):
+        """
+        :param send_result: sends a result of a read request to the client
+        :param process_locally: processes a read request by the node
+        :param on_done: called with the future of a request when a worker
+        served it, from a thread of the executor
+        """
+        self.txn_types = set(bootstrap.txn_types)
+        self._bootstrap_data = pickle.dumps(bootstrap)
+        self._workers = workers
+        self._reply_timeout = reply_timeout
+        self._send_result = send_result
+        self._process_locally = process_locally
+        self._get_current_time = get_current_time or time.perf_counter
+        self._notify_done = on_done
+        self._executor = None  # type: Optional[ProcessPoolExecutor]
+        self._snapshot = None  # type: Optional[CommittedSnapshot]
+        # future -> (request, frm, submission time)
+        self._pending = OrderedDict()  # type: Dict[Future, tuple]
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def publish(self, state_roots: Dict[int, bytes], ledger_sizes: Dict[int, int]):
+        """
+        Make the just committed state the one following requests are served for
+        """
+        version = self._snapshot.version + 1 if self._snapshot else 1
+        self._snapshot = CommittedSnapshot(version, state_roots, ledger_sizes)
+
+    def submit(self, request: Request, frm: str) -> bool:
+        """
+        :return: whether the request is passed to workers, requests which
+        are not have to be processed by the node
+        """
+        if self._snapshot is None or request.operation.get(TXN_TYPE) not in self.txn_types:
+            return False
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._workers)
+        try:
+            future = self._executor.submit(serve_query, self._bootstrap_data,
+                                           self._snapshot, request)
+        except BrokenProcessPool:
+            logger.warning("Query workers are broken, restarting them")
+            self._shutdown_executor()
+            return False
+        self._pending[future] = (request, frm, self._get_current_time())
+        if self._notify_done is not None:
+            future.add_done_callback(self._notify_done)
+        return True
+
+    def service(self) -> int:
+        """
+        Send results of served requests to clients
+
+        :return: number of sent results
+        """
+        count = 0
+        now = self._get_current_time()
+        for future in list(self._pending):
+            request, frm, submitted = self._pending[future]
+            if future.done():
+                del self._pending[future]
+                self._on_done(future, request, frm)
+                count += 1
+            elif now - submitted > self._reply_timeout:
+                del self._pending[future]
+                future.cancel()
+                logger.info("Query workers did not serve {} in {} sec, processing it locally"
+                            .format(request, self._reply_timeout))
+                self._process_locally(request, frm)
+                count += 1
+        return count
+
+    def stop(self):
+        for future, (request, frm, _) in self._pending.items():
+            future.cancel()
+        self._pending.clear()
+        self._shutdown_executor()
+
+    def _on_done(self, future: Future, request: Request, frm: str):
+        try:
+            result = future.result()
+        except StaleSnapshot as ex:
+            logger.debug("Query worker could not serve {}: {}".format(request, ex))
+            self._process_locally(request, frm)
+            return
+        except BrokenProcessPool:
+            logger.warning("Query workers are broken, restarting them")
+            self._shutdown_executor()
+            self._process_locally(request, frm)
+            return
+        except Exception as ex:
+            logger.info("Query worker failed to serve {}: {}".format(request, ex))
+            self._process_locally(request, frm)
+            return
+        self._send_result(result, frm)
+
+    def _shutdown_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
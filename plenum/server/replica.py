@@ -526,6 +526,7 @@ class Replica(HasActionQueue, MessageProcessor):
         # r += self.inBoxRouter.handleAllSync(self.inBox, limit)
         r += self._handle_external_messages(self.inBox, limit)
         r += self.send_3pc_batch()
+        r += self._ordering_service.process_validated_commits()
         r += self._serviceActions()
         return r
         # Messages that can be processed right now needs to be added back to the
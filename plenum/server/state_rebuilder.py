@@ -0,0 +1,149 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Optional
+
+from plenum.server.request_managers.write_request_manager import WriteRequestManager
+from stp_core.common.log import getlogger
+
+logger = getlogger()
+
+
+def deserialize_txn_chunk(entries, txn_serializer):
+    """
+    Deserialize a chunk of (seq_no, raw txn) transaction log entries.
+
+    This is run in worker processes, so everything it gets and returns must
+    be picklable.
+    """
+    return [(int(seq_no), txn_serializer.deserialize(entry))
+            for seq_no, entry in entries]
+
+
+class StateRebuilder:
+    """
+    Rebuilds the state of a ledger by applying all its txns with
+    `WriteRequestManager.restore_state`.
+
+    The state is updated in bulk: trie nodes are kept in memory and only the
+    ones reachable from the resulting root are written, in one batch, once
+    they take `flush_size` bytes. Every flush stores the seq_no of the last
+    applied txn as a checkpoint along with the state root, an interrupted
+    rebuild continues from there. Txns are read in chunks of `chunk_size` and
+    deserialized by `workers` processes while the previous chunks are
+    applied, or in the main process if `workers` is 0.
+    """
+
+    def __init__(self, write_manager: WriteRequestManager, ledger_id: int,
+                 chunk_size: int, flush_size: int, workers: int = 0,
+                 progress_interval=None,
+                 prepare_txn: Optional[Callable] = None):
+        self.write_manager = write_manager
+        self.db_manager = write_manager.database_manager
+        self.ledger_id = ledger_id
+        self.ledger = self.db_manager.get_ledger(ledger_id)
+        self.state = self.db_manager.get_state(ledger_id)
+        self.chunk_size = chunk_size
+        self.flush_size = flush_size
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self._prepare_txn = prepare_txn or (lambda txn: txn)
+        self._applied = 0
+        self._started_at = None
+        self._last_report_at = None
+
+    @property
+    def is_needed(self) -> bool:
+        """
+        Whether the state is empty or an earlier rebuild was interrupted
+        """
+        if self.state is None or self.state.closed:
+            return False
+        return self.state.isEmpty or \
+            self.state.bulk_update_checkpoint is not None
+
+    def rebuild(self) -> int:
+        """
+        Rebuild the state, the state is expected to be empty or left by an
+        interrupted rebuild.
+
+        :return: the number of applied txns
+        """
+        self._started_at = self._last_report_at = time.perf_counter()
+        checkpoint = self.state.bulk_update_checkpoint
+        applied_till = int(checkpoint) if checkpoint else 0
+        if applied_till:
+            logger.info("Resuming state rebuild of ledger {} after txn {}"
+                        .format(self.ledger_id, applied_till))
+
+        last_seq_no = applied_till
+        self.state.begin_bulk_update()
+        for chunk in self._txn_chunks():
+            for seq_no, txn in chunk:
+                if seq_no <= applied_till:
+                    # Already in the state, but txn versions are tracked
+                    # from all txns
+                    self.db_manager.update_state_version(txn)
+                    continue
+                self.write_manager.restore_state(self._prepare_txn(txn),
+                                                 self.ledger_id)
+                last_seq_no = seq_no
+                self._applied += 1
+            if self.state.bulk_update_size >= self.flush_size:
+                self.state.flush_bulk_update(str(last_seq_no).encode())
+            self._report_progress()
+        self.state.finish_bulk_update(str(last_seq_no).encode())
+
+        logger.info("Rebuilt state of ledger {} from {} txns in {:.2f} seconds"
+                    .format(self.ledger_id, self._applied,
+                            time.perf_counter() - self._started_at))
+        return self._applied
+
+    def _raw_chunks(self):
+        entries = self.ledger._transactionLog.iterator()
+        while True:
+            chunk = list(islice(entries, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < self.chunk_size:
+                return
+
+    def _txn_chunks(self):
+        serializer = self.ledger.txn_serializer
+        raw_chunks = self._raw_chunks()
+        first = next(raw_chunks, None)
+        if first is None:
+            return
+        if not self.workers or len(first) < self.chunk_size:
+            # Small ledger, not worth starting a process pool
+            yield deserialize_txn_chunk(first, serializer)
+            for chunk in raw_chunks:
+                yield deserialize_txn_chunk(chunk, serializer)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = [executor.submit(deserialize_txn_chunk, first,
+                                       serializer)]
+            for chunk in raw_chunks:
+                # Keep a bounded number of chunks in flight so that the
+                # transaction log is never fully loaded into memory
+                if len(pending) >= 2 * self.workers:
+                    yield pending.pop(0).result()
+                pending.append(executor.submit(deserialize_txn_chunk, chunk,
+                                               serializer))
+            for future in pending:
+                yield future.result()
+
+    def _report_progress(self):
+        if not self.progress_interval:
+            return
+        now = time.perf_counter()
+        if now - self._last_report_at < self.progress_interval:
+            return
+        self._last_report_at = now
+        elapsed = now - self._started_at
+        logger.info("State rebuild of ledger {}: {} txns applied in {:.0f} "
+                    "seconds ({:.0f} txns/sec)"
+                    .format(self.ledger_id, self._applied, elapsed,
+                            self._applied / elapsed if elapsed else 0))
@@ -0,0 +1,109 @@
+import pytest
+
+from plenum.bls.bls_bft_replica_plenum import BlsBftReplicaPlenum
+from plenum.common.audit_txn_cache import AuditTxnCache
+from plenum.common.constants import AUDIT_LEDGER_ID, AUDIT_TXN_CACHE_LABEL, TXN_PAYLOAD, TXN_PAYLOAD_DATA, \
+    AUDIT_TXN_PP_SEQ_NO
+from plenum.server.database_manager import DatabaseManager
+from plenum.test.testing_utils import FakeSomething
+
+
+def audit_txn(pp_seq_no):
+    return {TXN_PAYLOAD: {TXN_PAYLOAD_DATA: {AUDIT_TXN_PP_SEQ_NO: pp_seq_no}}}
+
+
+class FakeAuditLedger:
+    def __init__(self, pp_seq_nos):
+        self.txns = [audit_txn(pp_seq_no) for pp_seq_no in pp_seq_nos]
+        self.reads = 0
+
+    @property
+    def uncommitted_size(self):
+        return len(self.txns)
+
+    def get_by_seq_no_uncommitted(self, seq_no):
+        self.reads += 1
+        return self.txns[seq_no - 1]
+
+
+@pytest.fixture()
+def cache():
+    return AuditTxnCache(max_size=5)
+
+
+@pytest.fixture()
+def audit_ledger():
+    return FakeAuditLedger(range(1, 101))
+
+
+@pytest.fixture()
+def bls_bft_replica(audit_ledger, cache):
+    db_manager = DatabaseManager()
+    db_manager.register_new_database(AUDIT_LEDGER_ID, audit_ledger)
+    db_manager.register_new_store(AUDIT_TXN_CACHE_LABEL, cache)
+    return BlsBftReplicaPlenum('Alpha', None, True, db_manager)
+
+
+def test_get_and_discard(cache):
+    for pp_seq_no in range(1, 5):
+        cache.add(pp_seq_no + 10, audit_txn(pp_seq_no))
+    assert cache.get(2, ledger_size=14) == audit_txn(2)
+    assert cache.get(4, ledger_size=13) is None
+    assert cache.get(5, ledger_size=14) is None
+
+    cache.discard(ledger_size=12)
+    assert len(cache) == 2
+    assert cache.get(2, ledger_size=12) == audit_txn(2)
+    assert cache.get(3, ledger_size=14) is None
+
+
+def test_latest_txn_of_batch_wins(cache):
+    old_txn, new_txn = audit_txn(1), audit_txn(1)
+    new_txn['new'] = True
+    cache.add(1, old_txn)
+    cache.add(2, new_txn)
+    assert cache.get(1, ledger_size=2) is new_txn
+    cache.discard(ledger_size=1)
+    assert cache.get(1, ledger_size=1) is None
+
+
+def test_size_is_bounded(cache):
+    for pp_seq_no in range(1, 11):
+        cache.add(pp_seq_no, audit_txn(pp_seq_no))
+    assert len(cache) == 5
+    assert cache.get(5, ledger_size=10) is None
+    assert cache.get(6, ledger_size=10) == audit_txn(6)
+
+
+def test_gc(cache):
+    for pp_seq_no in range(1, 5):
+        cache.add(pp_seq_no, audit_txn(pp_seq_no))
+    cache.gc(2)
+    assert len(cache) == 2
+    assert cache.get(2, ledger_size=4) is None
+    assert cache.get(3, ledger_size=4) == audit_txn(3)
+
+
+def test_replica_reads_audit_ledger_on_cache_miss_only(bls_bft_replica, audit_ledger, cache):
+    pp = FakeSomething(ppSeqNo=90)
+    assert bls_bft_replica._get_correct_audit_transaction(pp) == audit_txn(90)
+    assert audit_ledger.reads == 11
+
+    assert bls_bft_replica._get_correct_audit_transaction(pp) == audit_txn(90)
+    assert audit_ledger.reads == 11
+
+    cache.add(101, audit_txn(101))
+    audit_ledger.txns.append(audit_txn(101))
+    assert bls_bft_replica._get_correct_audit_transaction(FakeSomething(ppSeqNo=101)) == audit_txn(101)
+    assert audit_ledger.reads == 11
+
+
+def test_replica_gc_clears_cache_on_master_only(bls_bft_replica, cache):
+    cache.add(1, audit_txn(1))
+    bls_bft_replica.gc((0, 1))
+    assert len(cache) == 0
+
+    cache.add(1, audit_txn(1))
+    bls_bft_replica._is_master = False
+    bls_bft_replica.gc((0, 1))
+    assert len(cache) == 1
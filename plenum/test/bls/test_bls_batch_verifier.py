@@ -0,0 +1,188 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from crypto.bls.bls_crypto import BlsCryptoVerifier
+from plenum.bls.bls_batch_verifier import BlsBatchVerifier, verify_sigs_batch
+from plenum.bls.bls_bft_replica_plenum import BlsBftReplicaPlenum
+from plenum.server.database_manager import DatabaseManager
+from plenum.test.testing_utils import FakeSomething
+
+
+class FakeBlsCryptoVerifier(BlsCryptoVerifier):
+    """
+    A signature is valid if it equals to the message signed by the key
+    """
+
+    def __init__(self):
+        self.single_checks = 0
+        self.aggregate_checks = 0
+
+    def verify_sig(self, signature, message, pk):
+        self.single_checks += 1
+        return signature == sign(message, pk)
+
+    def verify_sigs(self, signatures, message, pks):
+        self.aggregate_checks += 1
+        return all(sig == sign(message, pk) for sig, pk in zip(signatures, pks))
+
+    def verify_multi_sig(self, signature, message, pks):
+        raise NotImplementedError()
+
+    def create_multi_sig(self, signatures):
+        raise NotImplementedError()
+
+    def verify_key_proof_of_possession(self, key_proof, pk):
+        return True
+
+
+def sign(message, pk):
+    return '{}:{}'.format(message.decode(), pk)
+
+
+@pytest.fixture()
+def verifier():
+    return FakeBlsCryptoVerifier()
+
+
+@pytest.yield_fixture()
+def executor():
+    executor = ThreadPoolExecutor(max_workers=2)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture()
+def batch_verifier(verifier, executor):
+    return BlsBatchVerifier(verifier, executor)
+
+
+def test_verify_sigs_batch_checks_all_sigs_at_once(verifier):
+    pks = ['pk1', 'pk2', 'pk3']
+    sigs = [sign(b'msg', pk) for pk in pks]
+    assert verify_sigs_batch(verifier, sigs, b'msg', pks, [True] * 3) == [True] * 3
+    assert verifier.aggregate_checks == 1
+    assert verifier.single_checks == 0
+
+
+def test_verify_sigs_batch_finds_wrong_sigs(verifier):
+    pks = ['pk1', 'pk2', 'pk3']
+    sigs = [sign(b'msg', 'pk1'), 'wrong', sign(b'msg', 'pk3')]
+    assert verify_sigs_batch(verifier, sigs, b'msg', pks, [True] * 3) == [True, False, True]
+    assert verifier.aggregate_checks == 1
+    assert verifier.single_checks == 3
+
+
+def test_verify_sigs_batch_aggregates_only_sigs_by_proven_keys(verifier):
+    pks = ['pk1', 'pk2', 'pk3', 'pk4']
+    sigs = [sign(b'msg', 'pk1'), 'wrong', sign(b'msg', 'pk3'), sign(b'msg', 'pk4')]
+    assert verify_sigs_batch(verifier, sigs, b'msg', pks, [True, False, True, False]) == \
+        [True, False, True, True]
+    assert verifier.aggregate_checks == 1
+    assert verifier.single_checks == 2
+
+
+def test_verify_sigs_batch_checks_sigs_by_unproven_keys_one_by_one(verifier):
+    pks = ['pk1', 'pk2', 'pk3']
+    sigs = [sign(b'msg', pk) for pk in pks]
+    assert verify_sigs_batch(verifier, sigs, b'msg', pks, [False, True, False]) == [True] * 3
+    assert verifier.aggregate_checks == 0
+    assert verifier.single_checks == 3
+
+
+def test_batch_verifier_groups_sigs_by_message(batch_verifier, verifier):
+    batch_verifier.add(1, sign(b'a', 'pk1'), b'a', 'pk1', True)
+    batch_verifier.add(2, sign(b'b', 'pk1'), b'b', 'pk1', True)
+    batch_verifier.add(3, 'wrong', b'a', 'pk2', True)
+    batch_verifier.add(4, sign(b'a', 'pk3'), b'a', 'pk3', True)
+    assert batch_verifier.pending_count == 4
+
+    assert batch_verifier.flush() == 2
+    results = batch_verifier.get_results(wait=True)
+    assert sorted(results) == [(1, True), (2, True), (3, False), (4, True)]
+    assert verifier.aggregate_checks == 1
+    assert [id for id, _ in results] == [1, 3, 4, 2]
+    assert batch_verifier.pending_count == 0
+    assert batch_verifier.get_results(wait=True) == []
+
+
+def test_batch_verifier_returns_nothing_before_flush(batch_verifier):
+    batch_verifier.add(1, sign(b'a', 'pk1'), b'a', 'pk1')
+    assert batch_verifier.get_results(wait=True) == []
+    assert batch_verifier.pending_count == 1
+
+
+@pytest.fixture()
+def bls_bft_replica(batch_verifier):
+    replica = BlsBftReplicaPlenum('Alpha', None, True, DatabaseManager(),
+                                  batch_verifier=batch_verifier)
+    # Signatures to check are taken from the fake COMMITs as they are
+    replica._get_commit_sigs = lambda commit, sender, pre_prepare: \
+        (commit.why_not, commit.sigs)
+    return replica
+
+
+def fake_commit(pp_seq_no, sigs, why_not=None):
+    return FakeSomething(ppSeqNo=pp_seq_no, sigs=sigs, why_not=why_not)
+
+
+def test_validated_commits_are_returned_in_order(bls_bft_replica):
+    commits = [
+        fake_commit(1, [(sign(b'a', 'pk1'), b'a', 'pk1', True),
+                        (sign(b'b', 'pk1'), b'b', 'pk1', True)]),
+        fake_commit(2, [('wrong', b'a', 'pk2', True)]),
+        fake_commit(3, [], why_not=BlsBftReplicaPlenum.CM_BLS_SIG_WRONG),
+        fake_commit(4, []),
+        fake_commit(5, [(sign(b'b', 'pk3'), b'b', 'pk3', False)]),
+    ]
+    for i, commit in enumerate(commits):
+        bls_bft_replica.enqueue_commit_validation(commit, 'Node{}'.format(i), None)
+
+    # Nothing is verified before flush
+    assert bls_bft_replica.get_validated_commits(wait=True) == []
+
+    bls_bft_replica.flush_commit_validation()
+    assert bls_bft_replica.get_validated_commits(wait=True) == [
+        (commits[0], 'Node0', None),
+        (commits[1], 'Node1', BlsBftReplicaPlenum.CM_BLS_SIG_WRONG),
+        (commits[2], 'Node2', BlsBftReplicaPlenum.CM_BLS_SIG_WRONG),
+        (commits[3], 'Node3', None),
+        (commits[4], 'Node4', None),
+    ]
+    assert bls_bft_replica.get_validated_commits(wait=True) == []
+
+
+def test_commits_validated_synchronously_without_batch_verifier():
+    replica = BlsBftReplicaPlenum('Alpha', None, True, DatabaseManager())
+    replica.validate_commit = lambda commit, sender, pre_prepare: commit.why_not
+    commits = [fake_commit(1, [], why_not=BlsBftReplicaPlenum.CM_BLS_SIG_WRONG),
+               fake_commit(2, [])]
+    for commit in commits:
+        replica.enqueue_commit_validation(commit, 'Beta', None)
+    replica.flush_commit_validation()
+    assert replica.get_validated_commits() == [
+        (commits[0], 'Beta', BlsBftReplicaPlenum.CM_BLS_SIG_WRONG),
+        (commits[1], 'Beta', None),
+    ]
+
+
+def test_key_proofs_are_verified_once_per_pool_state(verifier):
+    proofs = {'Alpha': 'proof', 'Beta': None}
+    key_register = FakeSomething(get_key_proof_by_name=lambda name, root: proofs[name])
+    bls_bft = FakeSomething(bls_key_register=key_register, bls_crypto_verifier=verifier)
+    replica = BlsBftReplicaPlenum('Alpha', bls_bft, True, DatabaseManager())
+    proof_checks = []
+
+    def verify_key_proof_of_possession(key_proof, pk):
+        proof_checks.append(pk)
+        return True
+
+    verifier.verify_key_proof_of_possession = verify_key_proof_of_possession
+
+    assert replica._is_key_proof_verified('Alpha', 'root1', 'pk1')
+    assert replica._is_key_proof_verified('Alpha', 'root1', 'pk1')
+    assert not replica._is_key_proof_verified('Beta', 'root1', 'pk2')
+    assert proof_checks == ['pk1']
+
+    assert replica._is_key_proof_verified('Alpha', 'root2', 'pk1')
+    assert proof_checks == ['pk1', 'pk1']
@@ -73,6 +73,8 @@ def patch_audit_ledger(txnPoolNodeSet, pool_state_root, state_root, txn_root, po
 
 def _patch_audit_ledger(node, pool_state_root, state_root, txn_root, pool_txn_root, ledger_id):
     audit_ledger = node.db_manager.get_ledger(AUDIT_LEDGER_ID)
+    # Audit txns cached for previous params are not in the patched ledger
+    node.db_manager.audit_txn_cache.reset()
     old_last = audit_ledger.get_by_seq_no_uncommitted
     old_txn = audit_ledger.uncommittedTxns
     audit_ledger.uncommittedTxns = [1]
@@ -0,0 +1,85 @@
+import pytest
+
+from plenum.common.batched import Batched
+from plenum.test.testing_utils import FakeSomething
+from stp_core.validators.message_length_validator import MessageLenValidator
+
+FRAME_LIMIT = 1000
+
+
+class FakeStack(Batched):
+    messageTimeout = 3
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.remotes = {'Beta': FakeSomething(name='Beta'),
+                        'Gamma': FakeSomething(name='Gamma')}
+        self.bulkFrameLenVal = MessageLenValidator(FRAME_LIMIT)
+        self.socket_space = {'Beta': 10, 'Gamma': 10}
+        self.transmitted = []
+
+    def transmit(self, msg, uid, timeout=None, serialized=False, is_batch=False):
+        self.transmitted.append((msg, uid))
+        return True, None
+
+    def transmit_bulk(self, frame, uid):
+        if not self.socket_space[uid]:
+            return False
+        self.socket_space[uid] -= 1
+        self.transmitted.append((frame, uid))
+        return True
+
+
+@pytest.fixture()
+def stack():
+    return FakeStack(FakeSomething(MSG_LEN_LIMIT=100,
+                                   TRANSPORT_BATCH_ENABLED=False,
+                                   BULK_PEER_BANDWIDTH=0))
+
+
+def test_bulk_frames_are_sent_after_other_messages(stack):
+    stack.sign_and_serialize = lambda msg, signer=None: msg
+    assert stack.send_bulk(b'frame1', 'Beta')
+    stack.send('msg1', 'Beta')
+    stack.send('msg2', 'Beta')
+    stack.flushOutBoxes()
+
+    assert stack.transmitted == [('msg1', 'Beta'), ('msg2', 'Beta'),
+                                 (b'frame1', 'Beta')]
+    assert not stack.bulkOutBoxes
+
+
+def test_too_large_bulk_frames_are_not_accepted(stack):
+    assert not stack.send_bulk(b'x' * (FRAME_LIMIT + 1), 'Beta')
+    assert not stack.bulkOutBoxes
+
+
+def test_bulk_frames_wait_for_socket_space(stack):
+    stack.socket_space['Beta'] = 2
+    for i in range(5):
+        stack.send_bulk(str(i).encode(), 'Beta')
+    stack.send_bulk(b'g', 'Gamma')
+    stack.flushOutBoxes()
+    assert stack.transmitted == [(b'0', 'Beta'), (b'1', 'Beta'), (b'g', 'Gamma')]
+
+    stack.socket_space['Beta'] = 10
+    stack.flushOutBoxes()
+    assert [frame for frame, _ in stack.transmitted[3:]] == [b'2', b'3', b'4']
+
+
+def test_bulk_frames_are_sent_within_bandwidth(stack):
+    stack.stp_config.BULK_PEER_BANDWIDTH = 300
+    for _ in range(3):
+        stack.send_bulk(b'x' * 200, 'Beta')
+    stack.flushOutBoxes()
+    # Frames are sent while the bucket is not empty
+    assert len(stack.transmitted) == 2
+    assert len(stack.bulkOutBoxes['Beta']) == 1
+
+
+def test_bulk_frames_to_removed_remote_are_discarded(stack):
+    stack.send_bulk(b'frame', 'Beta')
+    del stack.remotes['Beta']
+    stack.flushOutBoxes()
+    assert not stack.transmitted
+    assert not stack.bulkOutBoxes
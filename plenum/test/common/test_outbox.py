@@ -0,0 +1,109 @@
+from plenum.common.constants import PROPAGATE, CATCHUP_REP, LEDGER_STATUS
+from plenum.common.messages.node_messages import Commit
+from plenum.common.metrics_collector import MetricsName
+from plenum.common.outbox import Outbox, MessageClass, message_class, \
+    MESSAGE_CLASS_WEIGHTS
+from plenum.test.common.test_bulk_outboxes import FakeStack
+from plenum.test.metrics.helper import MockMetricsCollector
+from plenum.test.testing_utils import FakeSomething
+
+BATCH_LEN = 100
+
+
+def test_message_class():
+    assert message_class(Commit(instId=0, viewNo=0, ppSeqNo=1)) == \
+        MessageClass.THREE_PC
+    assert message_class({'op': LEDGER_STATUS}) == MessageClass.CATCHUP
+    assert message_class({'op': PROPAGATE}) == MessageClass.PROPAGATE
+    assert message_class({'op': 'UNKNOWN'}) == MessageClass.OTHER
+    assert message_class('ping') == MessageClass.OTHER
+
+
+def test_higher_priority_messages_go_first():
+    outbox = Outbox()
+    outbox.append('catchup', MessageClass.CATCHUP)
+    outbox.append('reply', MessageClass.CLIENT_REPLY)
+    outbox.append('commit', MessageClass.THREE_PC)
+    assert len(outbox) == 3
+    assert outbox.pop(BATCH_LEN) == ['commit', 'reply', 'catchup']
+    assert not outbox
+
+
+def test_dependent_messages_keep_order():
+    outbox = Outbox()
+    outbox.append('commit1', MessageClass.THREE_PC)
+    outbox.append('propagate', MessageClass.PROPAGATE)
+    outbox.append('catchup', MessageClass.CATCHUP)
+    outbox.append('prepare', MessageClass.THREE_PC)
+    outbox.append('view_change', MessageClass.VIEW_CHANGE)
+    outbox.append('commit2', MessageClass.THREE_PC)
+    assert outbox.pop(BATCH_LEN) == \
+        ['commit1', 'propagate', 'prepare', 'view_change', 'commit2',
+         'catchup']
+
+
+def test_messages_out_of_class_budget_are_carried_over():
+    outbox = Outbox()
+    catchup_budget = MESSAGE_CLASS_WEIGHTS[MessageClass.CATCHUP] * BATCH_LEN
+    three_pc_budget = MESSAGE_CLASS_WEIGHTS[MessageClass.THREE_PC] * BATCH_LEN
+    for i in range(3):
+        outbox.append('c{}'.format(i) * catchup_budget, MessageClass.CATCHUP)
+    for i in range(three_pc_budget + 1):
+        outbox.append(str(i % 10), MessageClass.THREE_PC)
+
+    # Every class gives at least one message
+    msgs = outbox.pop(BATCH_LEN)
+    assert msgs == [str(i % 10) for i in range(three_pc_budget)] + \
+        ['c0' * catchup_budget]
+    assert len(outbox) == 3
+
+    assert outbox.pop(BATCH_LEN) == \
+        [str(three_pc_budget % 10), 'c1' * catchup_budget]
+    assert outbox.pop(BATCH_LEN) == ['c2' * catchup_budget]
+    assert not outbox
+
+
+def test_dependent_messages_wait_for_budget_of_earlier_ones():
+    outbox = Outbox()
+    propagate_budget = MESSAGE_CLASS_WEIGHTS[MessageClass.PROPAGATE] * BATCH_LEN
+    outbox.append('p' * propagate_budget, MessageClass.PROPAGATE)
+    outbox.append('propagate', MessageClass.PROPAGATE)
+    outbox.append('commit', MessageClass.THREE_PC)
+    outbox.append('reply', MessageClass.CLIENT_REPLY)
+
+    assert outbox.pop(BATCH_LEN) == ['p' * propagate_budget, 'reply']
+    assert outbox.pop(BATCH_LEN) == ['propagate', 'commit']
+
+
+def test_outbox_reports_depth_and_wait_time():
+    now = [0]
+    metrics = MockMetricsCollector()
+    outbox = Outbox(get_current_time=lambda: now[0])
+    outbox.append('commit1', MessageClass.THREE_PC)
+    now[0] = 2
+    outbox.append('commit2', MessageClass.THREE_PC)
+    outbox.append('catchup', MessageClass.CATCHUP)
+    assert outbox.depth(MessageClass.THREE_PC) == 2
+    now[0] = 5
+    outbox.pop(BATCH_LEN, metrics)
+    metrics.flush_accumulated()
+
+    events = {ev.name: ev.sum for ev in metrics.events}
+    assert events == {MetricsName.OUTBOX_THREE_PC_DEPTH: 2,
+                      MetricsName.OUTBOX_THREE_PC_WAIT_TIME: 5,
+                      MetricsName.OUTBOX_CATCHUP_DEPTH: 1,
+                      MetricsName.OUTBOX_CATCHUP_WAIT_TIME: 3}
+
+
+def test_stack_sends_3pc_messages_before_catchup():
+    stack = FakeStack(FakeSomething(MSG_LEN_LIMIT=100,
+                                    TRANSPORT_BATCH_ENABLED=False))
+    stack.sign_and_serialize = lambda msg, signer=None: \
+        msg['op'] if isinstance(msg, dict) else msg.typename
+    stack.send({'op': CATCHUP_REP}, 'Beta')
+    stack.send({'op': PROPAGATE}, 'Beta')
+    stack.send(Commit(instId=0, viewNo=0, ppSeqNo=1), 'Beta')
+    stack.flushOutBoxes()
+
+    assert [msg for msg, _ in stack.transmitted] == \
+        [PROPAGATE, 'COMMIT', CATCHUP_REP]
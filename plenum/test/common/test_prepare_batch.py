@@ -1,92 +1,128 @@
 import json
+import time
 
-from plenum.common.prepare_batch import split_messages_on_batches, SPLIT_STEPS_LIMIT
+import pytest
+
+from plenum.common.constants import BATCH
+from plenum.common.prepare_batch import pack_messages_into_batches, \
+    BATCH_PREFIX, BATCH_SUFFIX
 from plenum.common.util import randomString
+from plenum.test.common.test_bulk_outboxes import FakeStack
+from plenum.test.testing_utils import FakeSomething
+from stp_zmq.zstack import ZStack
 
 LEN_LIMIT_BYTES = 100
-SERIALIZATION_OTHER_HEAD_BYTES = 10
-MAX_ONE_MSG_LEN = LEN_LIMIT_BYTES - SERIALIZATION_OTHER_HEAD_BYTES
-
+# Envelope of a batch and quotes of its only message
+MAX_ONE_MSG_LEN = LEN_LIMIT_BYTES - len(BATCH_PREFIX) - len(BATCH_SUFFIX) - 2
 
-def make_batch_func(msgs):
-    overhead = b'1' * SERIALIZATION_OTHER_HEAD_BYTES
-    return b''.join(msgs + [overhead])
+# The perf test depends on the speed of the machine, it is run only when
+# `SkipTests` is set to False
+SkipTests = True
+skipper = pytest.mark.skipif(SkipTests, reason='Perf test')
 
 
 def check_batch_len_func(length):
     return length <= LEN_LIMIT_BYTES
 
 
-def split_ut(msgs):
-    return split_messages_on_batches(msgs, make_batch_func, check_batch_len_func)
+def pack_ut(msgs):
+    return pack_messages_into_batches(msgs, check_batch_len_func)
+
+
+def unpack(batches):
+    msgs = []
+    for batch, size in batches:
+        if size == 1:
+            msgs.append(batch)
+            continue
+        batch = json.loads(batch.decode())
+        assert batch['op'] == BATCH
+        assert batch['signature'] is None
+        assert len(batch['messages']) == size
+        msgs.extend(m.encode() for m in batch['messages'])
+    return msgs
 
 
-def test_empty_msgs_returns_one_batch():
-    assert len(split_ut([])) == 1
+def test_empty_msgs_returns_no_batches():
+    assert pack_ut([]) == []
+
+
+def test_one_msg_is_sent_as_is():
+    assert pack_ut([b'{"a":1}']) == [(b'{"a":1}', 1)]
 
 
 def test_less_than_limit_returns_one_batch():
     msgs = [b'1'] * 10
-    assert len(split_ut(msgs)) == 1
+    batches = pack_ut(msgs)
+    assert len(batches) == 1
+    assert unpack(batches) == msgs
 
 
 def test_total_len_excesses_limit_two_batches():
-    msgs = [b'1'] * (LEN_LIMIT_BYTES + 1)
-    assert len(split_ut(msgs)) == 2
-
+    msgs = [b'1'] * (LEN_LIMIT_BYTES // 4)
+    batches = pack_ut(msgs)
+    assert len(batches) == 2
+    assert unpack(batches) == msgs
 
 
 def test_small_msgs_with_one_huge_more_than_one_batch():
     msgs = [b'1', b'1', b'1', b'1' * MAX_ONE_MSG_LEN, b'1']
-    assert len(split_ut(msgs)) == 3
-
-
-def test_one_msg_excesses_limit_split_fails():
-    msgs = [b'1' * (LEN_LIMIT_BYTES + 1)]
-    assert split_ut(msgs) is None
-
-
-def test_one_msg_almost_excesses_limit_split_fails():
-    msgs = [b'1' * (MAX_ONE_MSG_LEN + 1)]
-    assert split_ut(msgs) is None
-
-
-def test_split_messages_on_batches():
-    str_len = 10
-    max_depth = 2 ** 9
-    msg_limit = len(json.dumps([{1: randomString(str_len)}]))
-    msgs = [{1: randomString(str_len)} for i in range(max_depth)]
-    res = split_messages_on_batches(msgs, json.dumps, lambda l: l <= msg_limit)
-    assert res is not None
-
-
-def test_split_messages_by_size():
-    str_len = 10
-    msg_count = 100
-    msg_limit = len(json.dumps([{1: randomString(str_len)}]))
-    msgs = [{1: randomString(str_len)} for i in range(msg_count)]
-    res = split_messages_on_batches(msgs, json.dumps, lambda l: l <= msg_limit)
-    assert len(res) == msg_count
+    batches = pack_ut(msgs)
+    assert len(batches) == 3
+    assert unpack(batches) == msgs
 
 
-def test_no_split_if_msg_size_less_then_limit():
-    msg_limit = 100
-    msgs = [{1: randomString(10)}]
-    res = split_messages_on_batches(msgs, json.dumps, lambda l: l <= msg_limit)
-    assert len(res) == 1
+def test_msg_not_fitting_into_batch_is_sent_as_is():
+    huge = b'1' * (MAX_ONE_MSG_LEN + 1)
+    msgs = [b'1', huge, b'1']
+    batches = pack_ut(msgs)
+    assert batches[1] == (huge, 1)
+    assert unpack(batches) == msgs
 
 
-def test_no_batch_if_msg_size_more_then_limit():
-    msg_limit = 100
-    msgs = [{1: randomString(101)}]
-    res = split_messages_on_batches(msgs, json.dumps, lambda l: l <= msg_limit)
-    assert res is None
+def test_msgs_with_special_chars_are_escaped():
+    msgs = [json.dumps({'a': '"\\/\né', 'b': [1, None]}).encode(),
+            'тест'.encode(), b'pi']
+    batches = pack_messages_into_batches(msgs, lambda l: True)
+    assert len(batches) == 1
+    assert unpack(batches) == msgs
+    assert ZStack.deserializeMsg(batches[0][0])['messages'][2] == 'pi'
 
 
 def test_batch_size_limitations():
-    msg_limit = 100
-    msgs = [{1: randomString(10)}] * 100
-    res = split_messages_on_batches(msgs, json.dumps, lambda l: l <= msg_limit)
-    for r in res:
-        batch, length = r
-        assert len(batch) <= msg_limit
+    msgs = [json.dumps({1: randomString(10)}).encode()] * 100
+    batches = pack_ut(msgs)
+    for batch, size in batches:
+        assert len(batch) <= LEN_LIMIT_BYTES
+    assert unpack(batches) == msgs
+    # Batches are filled greedily
+    assert all(size == batches[0][1] for _, size in batches[:-1])
+    assert len(batches) == -(-len(msgs) // batches[0][1])
+
+
+class SerializingStack(FakeStack):
+    allowDictOnly = False
+    serializeMsg = staticmethod(ZStack.serializeMsg)
+
+
+@skipper
+@pytest.mark.parametrize('count', [1000, 5000, 10000])
+def test_flush_outboxes_perf(count):
+    stack = SerializingStack(FakeSomething(MSG_LEN_LIMIT=128 * 1024,
+                                           TRANSPORT_BATCH_ENABLED=True))
+    msgs = [{'op': 'COMMIT', 'instId': 0, 'viewNo': 0, 'ppSeqNo': i,
+             'blsSig': randomString(128)} for i in range(count)]
+    for msg in msgs:
+        stack.send(msg, 'Beta')
+        stack.send(msg, 'Gamma')
+
+    started = time.perf_counter()
+    while any(stack.outBoxes.values()):
+        stack.flushOutBoxes()
+    elapsed = time.perf_counter() - started
+
+    sent = [json.loads(m) for batch, uid in stack.transmitted if uid == 'Beta'
+            for m in ZStack.deserializeMsg(batch)['messages']]
+    assert sent == msgs
+    print("Flush of {} msgs to 2 remotes in {} batches: {:.3f} sec"
+          .format(count, len(stack.transmitted), elapsed))
@@ -1389,7 +1389,7 @@ class MockTimer(QueueTimer):
         """
         Advance time to next scheduled callback and run that callback
         """
-        if not self._events:
+        if not self.queue_size():
             return
 
         event = self._pop_event()
@@ -1401,7 +1401,7 @@ class MockTimer(QueueTimer):
         """
         Advance time in steps until required value running scheduled callbacks in process
         """
-        while self._events and self._next_timestamp() <= value:
+        while self.queue_size() and self._next_timestamp() <= value:
             self.advance()
         self._ts.value = value
 
@@ -1418,14 +1418,14 @@ class MockTimer(QueueTimer):
         """
         counter = 0
         deadline = self._ts.value + timeout if timeout else None
-        while self._events and not condition() and counter < max_iterations:
+        while self.queue_size() and not condition() and counter < max_iterations:
             if deadline and self._next_timestamp() > deadline:
                 raise TimeoutError("Failed to reach condition in required time, {} iterations passed".format(counter))
             self.advance()
             counter += 1
 
         if not condition():
-            if not self._events:
+            if not self.queue_size():
                 raise TimeoutError("Condition will be never reached, {} iterations passed".format(counter))
             else:
                 raise TimeoutError("Failed to reach condition in {} iterations".format(max_iterations))
@@ -1435,11 +1435,11 @@ class MockTimer(QueueTimer):
         Advance time in steps until nothing is scheduled
         """
         counter = 0
-        while self._events and counter < max_iterations:
+        while self.queue_size() and counter < max_iterations:
             self.advance()
             counter += 1
 
-        if self._events:
+        if self.queue_size():
             raise TimeoutError("Failed to complete in {} iterations".format(max_iterations))
 
     def _log_time(self):
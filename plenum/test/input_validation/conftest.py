@@ -4,6 +4,7 @@ import hashlib
 from plenum.common.constants import TARGET_NYM
 from plenum.common.util import get_utc_epoch
 from plenum.common.messages.fields import TimestampField
+from plenum.common.messages.message_base import MessageValidator
 from plenum.common.types import f
 
 from plenum.test.txn_author_agreement.helper import calc_taa_digest
@@ -11,6 +12,28 @@ from plenum.test.txn_author_agreement.helper import calc_taa_digest
 from .helper import gen_nym_operation
 
 
+@pytest.fixture(autouse=True)
+def compare_compiled_schema_with_generic(monkeypatch):
+    """
+    Validate with the generic schema along with the compiled one and check
+    that both give the same result
+    """
+    validate_compiled = MessageValidator._validate_fields_with_compiled_schema
+
+    def validate(self, dct, compiled):
+        try:
+            self._validate_fields_with_generic_schema(dct, compiled.schema)
+        except Exception as ex:
+            with pytest.raises(type(ex)) as compiled_ex:
+                validate_compiled(self, dct, compiled)
+            assert str(compiled_ex.value) == str(ex)
+            raise
+        validate_compiled(self, dct, compiled)
+
+    monkeypatch.setattr(MessageValidator,
+                        '_validate_fields_with_compiled_schema', validate)
+
+
 @pytest.fixture
 def operation():
     return gen_nym_operation()
@@ -0,0 +1,142 @@
+import inspect
+import time
+
+import pytest
+
+from plenum.common.messages import node_messages
+from plenum.common.messages.client_request import ClientMessageValidator
+from plenum.common.messages.fields import NonNegativeNumberField, \
+    LimitedLengthStringField
+from plenum.common.messages.message_base import MessageBase, \
+    MessageValidator, compile_field_validator
+from plenum.common.messages.node_messages import Commit
+
+NODE_MESSAGES = [cls for _, cls in inspect.getmembers(node_messages, inspect.isclass)
+                 if issubclass(cls, MessageBase) and cls is not MessageBase]
+
+SAMPLE_VALUES = [None, True, False, 0, 1, -1, 1.5, 10 ** 20, '', 'a', 'a' * 1000,
+                 '7HqpgZfXhN1uYbMdL1Y2XJvWdnYzbTs3LEoVJh7hvwD6', 'NODE1',
+                 [], [1, 2], ['a'], [[0, 1, 2, 'a']], (1, 2), {}, {'a': 1},
+                 {'NODE1': 'sig'}, b'bytes', object()]
+
+# Timings of the perf test vary between machines, it is run only when
+# `SkipTests` is set to False
+SkipTests = True
+skipper = pytest.mark.skipif(SkipTests, reason='Perf test')
+
+
+def validation_error(validate, *args):
+    try:
+        return validate(*args)
+    except Exception as ex:
+        return type(ex), str(ex)
+
+
+def generic_error(msg_cls, dct):
+    validator = MessageValidator.__new__(msg_cls)
+    MessageValidator.__init__(validator)
+    return validation_error(validator._validate_fields_with_generic_schema,
+                            dct, msg_cls.schema)
+
+
+def compiled_error(msg_cls, dct):
+    validator = MessageValidator.__new__(msg_cls)
+    MessageValidator.__init__(validator)
+    compiled = validator._compiled_schema(msg_cls.schema)
+    assert compiled is not None
+    return validation_error(validator._validate_fields_with_compiled_schema,
+                            dct, compiled)
+
+
+def test_all_node_messages_are_checked():
+    assert Commit in NODE_MESSAGES
+    assert len(NODE_MESSAGES) > 20
+
+
+@pytest.mark.parametrize('msg_cls', NODE_MESSAGES, ids=lambda cls: cls.__name__)
+def test_compiled_field_validators_give_same_errors(msg_cls):
+    for name, validator in msg_cls.schema:
+        validate = compile_field_validator(validator)
+        for value in SAMPLE_VALUES:
+            assert validation_error(validate, value) == \
+                validation_error(validator.validate, value), \
+                "{}.{}={!r}".format(msg_cls.__name__, name, value)
+
+
+@pytest.mark.parametrize('msg_cls', NODE_MESSAGES, ids=lambda cls: cls.__name__)
+def test_compiled_schema_gives_same_errors(msg_cls):
+    names = [name for name, _ in msg_cls.schema]
+    inputs = [{}, [], None, {'unknown': 1}]
+    for value in SAMPLE_VALUES:
+        inputs.append({name: value for name in names})
+        inputs.append(dict({name: value for name in names}, unknown=value))
+        for name in names:
+            inputs.append({name: value})
+    for dct in inputs:
+        assert compiled_error(msg_cls, dct) == generic_error(msg_cls, dct), \
+            "{}: {!r}".format(msg_cls.__name__, dct)
+
+
+class StrictMessage(MessageBase):
+    typename = 'StrictMessage'
+    schema = (
+        ('a', NonNegativeNumberField()),
+        ('b', LimitedLengthStringField(max_length=3, optional=True)),
+    )
+    schema_is_strict = True
+
+
+class DerivedMessage(StrictMessage):
+    schema = StrictMessage.schema + (('c', NonNegativeNumberField()),)
+
+
+def test_compiled_schema_is_per_class():
+    msg = DerivedMessage(a=1, b='x', c=2)
+    assert msg.c == 2
+    assert DerivedMessage.__dict__['_compiled'].names == ('a', 'b', 'c')
+    assert StrictMessage(a=1).a == 1
+    assert StrictMessage.__dict__['_compiled'].names == ('a', 'b')
+    with pytest.raises(TypeError, match=r"missed fields - c"):
+        DerivedMessage(a=1)
+
+
+def test_instance_schema_is_not_compiled():
+    validator = ClientMessageValidator(operation_schema_is_strict=True)
+    assert validator.schema is not ClientMessageValidator.schema
+    assert validator._compiled_schema(validator.schema) is None
+
+
+def test_message_fields_access():
+    msg = Commit(instId=0, viewNo=1, ppSeqNo=2, blsSig='sig')
+    assert list(msg.keys()) == ['instId', 'viewNo', 'ppSeqNo', 'blsSig']
+    assert msg[0] == 0 and msg[2] == 2 and msg[-1] == 'sig'
+    assert msg[1:3] == [1, 2]
+    with pytest.raises(IndexError):
+        msg[4]
+    with pytest.raises(IndexError):
+        msg[-5]
+    with pytest.raises(TypeError):
+        msg['instId']
+
+
+@skipper
+def test_compiled_schema_validation_perf(monkeypatch):
+    # Measure the compiled schema without the generic one run along
+    monkeypatch.undo()
+    count = 20000
+    dct = dict(instId=0, viewNo=1, ppSeqNo=100, blsSig='x' * 100)
+    validator = Commit(**dct)
+    compiled = validator._compiled_schema(Commit.schema)
+
+    started = time.perf_counter()
+    for _ in range(count):
+        validator._validate_fields_with_generic_schema(dct, Commit.schema)
+    generic = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(count):
+        validator._validate_fields_with_compiled_schema(dct, compiled)
+    compiled = time.perf_counter() - started
+
+    print("Validation of {} COMMITs: generic {:.3f} sec, compiled {:.3f} sec"
+          .format(count, generic, compiled))
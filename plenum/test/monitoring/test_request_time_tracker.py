@@ -1,9 +1,16 @@
+import time
+
 import pytest
 
 from plenum.server.monitor import RequestTimeTracker
 
 INSTANCE_COUNT = 4
 
+# Timings of the perf test depend on the machine, so it is run only when
+# `SkipTests` is set to False
+SkipTests = True
+skipper = pytest.mark.skipif(SkipTests, reason='Perf test')
+
 
 @pytest.fixture(scope="function")
 def req_tracker():
@@ -261,3 +268,49 @@ def test_force_req_drop_before_handle(req_tracker):
 
     req_tracker.handle(digest)
     assert digest not in req_tracker.handled_unordered()
+
+
+def test_request_tracker_returns_unhandled_unordered_in_order_of_start(req_tracker):
+    for i in range(10):
+        req_tracker.start("digest{}".format(i), float(i))
+    req_tracker.order(0, "digest1", 20.0)
+    req_tracker.handle("digest2")
+    # Started again later
+    req_tracker.start("digest3", 10.0)
+
+    assert [digest for digest, _ in req_tracker.unhandled_unordered()] == \
+        ["digest0", "digest4", "digest5", "digest6", "digest7", "digest8", "digest9", "digest3"]
+    assert list(req_tracker.unhandled_unordered(started_before=6.0)) == \
+        [("digest0", 0.0), ("digest4", 4.0), ("digest5", 5.0)]
+    assert list(req_tracker.unhandled_unordered(started_before=0.0)) == []
+
+
+@skipper
+@pytest.mark.parametrize('count', [10 ** 5, 10 ** 6])
+def test_request_tracker_perf(req_tracker, count):
+    digests = ["digest{}".format(i) for i in range(count)]
+
+    started_at = time.perf_counter()
+    for i, digest in enumerate(digests):
+        req_tracker.start(digest, float(i))
+    start_time = time.perf_counter() - started_at
+
+    # Only the oldest requests are past the deadline, the check is done
+    # many times while the backlog is being ordered
+    started_at = time.perf_counter()
+    for _ in range(100):
+        expired = list(req_tracker.unhandled_unordered(started_before=100.0))
+    check_time = (time.perf_counter() - started_at) / 100
+    assert len(expired) == 100
+
+    started_at = time.perf_counter()
+    for inst_id in sorted(req_tracker.instances_ids):
+        for digest in digests:
+            req_tracker.order(inst_id, digest, float(count))
+    order_time = time.perf_counter() - started_at
+    assert len(req_tracker) == 0
+
+    print("{} requests: {:.0f} starts/sec, {:.0f} orders/sec, check of "
+          "unordered in {:.1f} us".format(count, count / start_time,
+                                          count * (INSTANCE_COUNT - 1) / order_time,
+                                          check_time * 10 ** 6))
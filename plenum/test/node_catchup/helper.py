@@ -3,10 +3,12 @@ from functools import partial
 
 import pytest
 
+from ledger.merkle_verifier import MerkleVerifier
 from plenum.common.constants import AUDIT_LEDGER_ID, DOMAIN_LEDGER_ID
 from plenum.common.messages.node_messages import PrePrepare, Prepare, Commit, \
     Checkpoint
 from plenum.common.util import check_if_all_equal_in_list, getMaxFailures
+from plenum.server.catchup.utils import CatchupDataProvider
 from plenum.test import waits
 from plenum.test.helper import checkLedgerEquality, checkStateEquality, \
     check_seqno_db_equality, assertEquality, check_last_ordered_3pc, check_primaries_equality, check_view_no, \
@@ -230,3 +232,73 @@ def repair_broken_node(node):
 
 def get_number_of_completed_catchups(node):
     return len(node.ledgerManager.spylog.getAll(node.ledgerManager._on_catchup_complete))
+
+
+class FakeCatchupDataProvider(CatchupDataProvider):
+    """
+    Provider for catchup services which are tested without a node, sent
+    messages, blacklisted nodes and added txns are recorded
+    """
+
+    def __init__(self, ledgers, node_names=('Alpha', 'Beta', 'Gamma', 'Delta')):
+        self._ledgers = ledgers
+        self._node_names = list(node_names)
+        self.sent = []
+        self.sent_bulk = []
+        self.blacklisted = []
+        self.added_txns = []
+        self.completed = []
+
+    def node_name(self):
+        return self._node_names[0]
+
+    def all_nodes_names(self):
+        return self._node_names
+
+    def ledgers(self):
+        return list(self._ledgers.keys())
+
+    def ledger(self, ledger_id):
+        return self._ledgers.get(ledger_id)
+
+    def config_state(self):
+        return None
+
+    def verifier(self, ledger_id):
+        return MerkleVerifier(self._ledgers[ledger_id].tree.hasher)
+
+    def eligible_nodes(self):
+        return self._node_names[1:]
+
+    def update_txn_with_extra_data(self, txn):
+        return txn
+
+    def transform_txn_for_ledger(self, txn):
+        return txn
+
+    def notify_catchup_start(self, ledger_id):
+        pass
+
+    def notify_catchup_complete(self, ledger_id):
+        self.completed.append(ledger_id)
+
+    def notify_transaction_added_to_ledger(self, ledger_id, txn):
+        self.added_txns.append(txn)
+
+    def send_to(self, msg, to, message_splitter=None):
+        self.sent.append((msg, to))
+
+    def send_bulk_to(self, frame, to):
+        if to not in self._node_names:
+            return False
+        self.sent_bulk.append((frame, to))
+        return True
+
+    def send_to_nodes(self, msg, nodes=None):
+        self.sent.append((msg, nodes))
+
+    def blacklist_node(self, node_name, reason):
+        self.blacklisted.append(node_name)
+
+    def discard(self, msg, reason, logMethod=logger.error, cliOutput=False):
+        pass
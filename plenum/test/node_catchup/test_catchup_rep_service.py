@@ -0,0 +1,174 @@
+import os
+import random
+import time
+
+import pytest
+
+from common.serializers.msgpack_serializer import MsgPackSerializer
+from ledger.test.helper import create_ledger_leveldb_storage
+from plenum.common.channel import create_direct_channel
+from plenum.common.ledger import Ledger
+from plenum.common.messages.node_messages import CatchupRep
+from plenum.common.metrics_collector import NullMetricsCollector
+from plenum.common.util import SortedDict
+from plenum.server.catchup.catchup_rep_service import CatchupRepService
+from plenum.server.catchup.seeder_service import NodeSeederService
+from plenum.server.catchup.utils import CatchupTill, LedgerCatchupStart, LedgerCatchupComplete
+from plenum.test.helper import MockTimer
+from plenum.test.node_catchup.helper import FakeCatchupDataProvider
+from plenum.test.testing_utils import FakeSomething
+
+LEDGER_ID = 1
+TXN_COUNT = 200
+
+# The throughput test compares timings, it is run only if `SkipTests` is
+# set to False
+SkipTests = True
+skipper = pytest.mark.skipif(SkipTests, reason='Perf test')
+
+
+def create_ledger(tdir, name):
+    serializer = MsgPackSerializer()
+    data_dir = os.path.join(tdir, name)
+    os.makedirs(data_dir)
+    return create_ledger_leveldb_storage(serializer, serializer, data_dir)
+
+
+def make_txn(i):
+    return {'identifier': 'cli{}'.format(i), 'reqId': i + 1, 'op': 'op{}'.format(i) * 10}
+
+
+def build_catchup_reps(ledger, start, end, catchup_till, rep_size):
+    """
+    CatchupReps as seeder sends them, with sequence numbers as strings the
+    way they are received after JSON deserialization
+    """
+    _, rx = create_direct_channel()
+    seeder = NodeSeederService(rx, FakeCatchupDataProvider({LEDGER_ID: ledger}),
+                               FakeSomething(CATCHUP_REP_MAX_SIZE=10 ** 9,
+                                             CATCHUP_REP_CACHE_SIZE=0,
+                                             CATCHUP_CONS_PROOF_CACHE_SIZE=1000))
+    reps = []
+    for rep_start in range(start, end + 1, rep_size):
+        rep_end = min(rep_start + rep_size - 1, end)
+        txns = [(seq_no, txn) for seq_no, txn in ledger.getAllTxn(rep_start, rep_end)]
+        rep = seeder._make_catchup_rep(LEDGER_ID, ledger, txns, catchup_till)
+        reps.append(CatchupRep(LEDGER_ID,
+                               SortedDict((str(s), t) for s, t in rep.txns.items()),
+                               rep.consProof))
+    return reps
+
+
+@pytest.fixture()
+def source_ledger(tdir_for_func):
+    ledger = create_ledger(tdir_for_func, 'source')
+    for i in range(TXN_COUNT):
+        ledger.add(make_txn(i))
+    yield ledger
+    ledger.stop()
+
+
+@pytest.fixture()
+def target_ledger(tdir_for_func, source_ledger):
+    ledger = create_ledger(tdir_for_func, 'target')
+    for _, txn in source_ledger.getAllTxn(1, 10):
+        ledger.add(txn)
+    yield ledger
+    ledger.stop()
+
+
+def start_catchup(ledger, final_ledger):
+    provider = FakeCatchupDataProvider({LEDGER_ID: ledger})
+    tx, _ = create_direct_channel()
+    output, output_rx = create_direct_channel()
+    completed = []
+    output_rx.subscribe(lambda msg: completed.append(msg))
+    input_tx, input_rx = create_direct_channel()
+    service = CatchupRepService(ledger_id=LEDGER_ID,
+                                config=FakeSomething(CATCHUP_BATCH_SIZE=5,
+                                                     CatchupTransactionsTimeout=6),
+                                input=input_rx,
+                                output=output,
+                                timer=MockTimer(),
+                                metrics=NullMetricsCollector(),
+                                provider=provider)
+    catchup_till = CatchupTill(start_size=ledger.size,
+                               final_size=final_ledger.size,
+                               final_hash=Ledger.hashToStr(final_ledger.tree.root_hash))
+    service.start(LedgerCatchupStart(ledger_id=LEDGER_ID,
+                                     catchup_till=catchup_till,
+                                     nodes_ledger_sizes={name: final_ledger.size
+                                                         for name in provider.eligible_nodes()}))
+    return service, provider, input_tx, completed
+
+
+def test_catchup_from_shuffled_overlapping_replies(source_ledger, target_ledger):
+    service, provider, input_tx, completed = start_catchup(target_ledger, source_ledger)
+    reps = [(rep, 'Beta') for rep in build_catchup_reps(source_ledger, 11, TXN_COUNT, TXN_COUNT, 7)]
+    # Another node answers with differently sized replies which overlap
+    reps += [(rep, 'Gamma') for rep in build_catchup_reps(source_ledger, 3, 150, TXN_COUNT, 11)]
+    random.Random(1).shuffle(reps)
+
+    for rep, frm in reps:
+        if completed:
+            break
+        input_tx.put_nowait((rep, frm))
+
+    assert completed == [LedgerCatchupComplete(ledger_id=LEDGER_ID, num_caught_up=TXN_COUNT - 10)]
+    assert target_ledger.size == TXN_COUNT
+    assert target_ledger.root_hash == source_ledger.root_hash
+    assert provider.blacklisted == []
+    assert len(provider.added_txns) == TXN_COUNT - 10
+    assert not service._received_catchup_replies
+    assert not service._received_catchup_txns
+
+
+def test_catchup_reply_with_wrong_txn_is_rejected(source_ledger, target_ledger):
+    service, provider, input_tx, completed = start_catchup(target_ledger, source_ledger)
+    reps = build_catchup_reps(source_ledger, 11, TXN_COUNT, TXN_COUNT, 10)
+    bad_rep = build_catchup_reps(source_ledger, 21, 30, TXN_COUNT, 10)[0]
+    bad_rep.txns['25'] = make_txn(1000)
+
+    input_tx.put_nowait((bad_rep, 'Gamma'))
+    input_tx.put_nowait((reps[0], 'Beta'))
+    assert provider.blacklisted == ['Gamma']
+    assert target_ledger.size == 20
+    # Txns of the rejected reply are dropped, so they are requested again
+    assert 25 not in service._received_catchup_txns
+
+    for rep in reps[1:]:
+        input_tx.put_nowait((rep, 'Beta'))
+    assert target_ledger.root_hash == source_ledger.root_hash
+    assert provider.blacklisted == ['Gamma']
+    assert len(completed) == 1
+
+
+def measure_catchup(source, target, shuffle):
+    service, provider, input_tx, completed = start_catchup(target, source)
+    reps = [(rep, 'Beta') for rep in build_catchup_reps(source, 1, source.size, source.size, 100)]
+    if shuffle:
+        random.Random(1).shuffle(reps)
+
+    start = time.perf_counter()
+    for rep, frm in reps:
+        input_tx.put_nowait((rep, frm))
+    elapsed = time.perf_counter() - start
+    print("Caught up {} txns from {} {} replies in {:.2f} seconds ({:.0f} txns/sec)"
+          .format(source.size, len(reps), 'shuffled' if shuffle else 'ordered',
+                  elapsed, source.size / elapsed))
+
+    assert len(completed) == 1
+    assert target.root_hash == source.root_hash
+    target.stop()
+
+
+@skipper
+def test_catchup_throughput_with_shuffled_replies(tdir_for_func):
+    txn_count = 20000
+    source = create_ledger(tdir_for_func, 'perf_source')
+    for i in range(txn_count):
+        source.add(make_txn(i))
+
+    measure_catchup(source, create_ledger(tdir_for_func, 'in_order'), shuffle=False)
+    measure_catchup(source, create_ledger(tdir_for_func, 'shuffled'), shuffle=True)
+    source.stop()
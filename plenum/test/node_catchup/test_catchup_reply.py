@@ -1,6 +1,12 @@
+from plenum.common.util import SortedDict
 from plenum.server.catchup.catchup_rep_service import CatchupRepService
 
 
+def merge(existing_txns, new_txns):
+    merged = CatchupRepService._merge_catchup_txns(SortedDict(existing_txns), new_txns)
+    return list(merged.items())
+
+
 def test_catchup_reply_merge():
     """
     Testing LedgerManager's `_get_merged_catchup_txns`
@@ -9,19 +15,19 @@ def test_catchup_reply_merge():
     # Without overlap
     existing_txns = [(i, {}) for i in range(1, 11)]
     new_txns = [(i, {}) for i in range(11, 16)]
-    merged = CatchupRepService._merge_catchup_txns(existing_txns, new_txns)
+    merged = merge(existing_txns, new_txns)
     assert [(i, {}) for i in range(1, 16)] == merged
 
     # With partial overlap
     existing_txns = [(i, {}) for i in range(1, 13)]
     new_txns = [(i, {}) for i in range(11, 16)]
-    merged = CatchupRepService._merge_catchup_txns(existing_txns, new_txns)
+    merged = merge(existing_txns, new_txns)
     assert [(i, {}) for i in range(1, 16)] == merged
 
     # With complete overlap
     existing_txns = [(i, {}) for i in range(1, 21)]
     new_txns = [(i, {}) for i in range(11, 16)]
-    merged = CatchupRepService._merge_catchup_txns(existing_txns, new_txns)
+    merged = merge(existing_txns, new_txns)
     assert [(i, {}) for i in range(1, 21)] == merged
 
     # existing_txns has a gap and new_txns overlap partially with an interval
@@ -29,7 +35,7 @@ def test_catchup_reply_merge():
     existing_txns = [(i, {}) for i in range(1, 11)] + [(i, {})
                                                        for i in range(20, 41)]
     new_txns = [(i, {}) for i in range(15, 29)]
-    merged = CatchupRepService._merge_catchup_txns(existing_txns, new_txns)
+    merged = merge(existing_txns, new_txns)
     assert ([(i, {}) for i in range(1, 11)] +
             [(i, {}) for i in range(15, 41)]) == merged
 
@@ -39,7 +45,7 @@ def test_catchup_reply_merge():
                     [(i, {}) for i in range(20, 31)] + \
                     [(i, {}) for i in range(41, 51)]
     new_txns = [(i, {}) for i in range(15, 33)]
-    merged = CatchupRepService._merge_catchup_txns(existing_txns, new_txns)
+    merged = merge(existing_txns, new_txns)
     assert ([(i, {}) for i in range(1, 11)] +
             [(i, {}) for i in range(15, 33)] +
             [(i, {}) for i in range(41, 51)]) == merged
@@ -51,7 +57,11 @@ def test_catchup_reply_merge():
                     [(i, {}) for i in range(41, 51)] + \
                     [(i, {}) for i in range(61, 95)]
     new_txns = [(i, {}) for i in range(15, 56)]
-    merged = CatchupRepService._merge_catchup_txns(existing_txns, new_txns)
+    merged = merge(existing_txns, new_txns)
     assert ([(i, {}) for i in range(1, 11)] +
             [(i, {}) for i in range(15, 56)] +
             [(i, {}) for i in range(61, 95)]) == merged
+
+    # Txns already in ledger are ignored
+    merged = CatchupRepService._merge_catchup_txns(SortedDict(), [(i, {}) for i in range(1, 11)], 5)
+    assert [(i, {}) for i in range(6, 11)] == list(merged.items())
@@ -161,7 +161,7 @@ def test_cancel_request_cp_and_ls_after_catchup(txnPoolNodeSet,
                          exclude_from_check=['check_last_ordered_3pc_backup'])
 
     # check cancel of schedule with requesting ledger statuses and consistency proofs
-    for event in node_to_disconnect.timer._events:
-        name = event.callback.__name__
+    for callback in node_to_disconnect.timer._by_callback:
+        name = callback.__name__
         assert name != '_reask_for_ledger_status'
         assert name != '_reask_for_last_consistency_proof'
@@ -0,0 +1,127 @@
+import pytest
+
+from common.serializers.msgpack_serializer import MsgPackSerializer
+from ledger.test.helper import create_ledger_leveldb_storage, random_txn
+from plenum.common.channel import create_direct_channel
+from plenum.common.ledger import Ledger
+from plenum.common.messages.node_messages import CatchupReq, CatchupRep
+from plenum.server.catchup.seeder_service import NodeSeederService
+from plenum.test.node_catchup.helper import FakeCatchupDataProvider
+from plenum.test.testing_utils import FakeSomething
+from stp_core.network.bulk_transfer import deserialize_bulk_frame
+from stp_zmq.zstack import ZStack
+
+LEDGER_ID = 1
+REP_MAX_SIZE = 2000
+FRAME_LIMIT = 5000
+TXN_COUNT = 100
+
+
+@pytest.fixture()
+def ledger(tdir_for_func):
+    serializer = MsgPackSerializer()
+    ledger = create_ledger_leveldb_storage(serializer, serializer, tdir_for_func)
+    for i in range(TXN_COUNT):
+        ledger.add(random_txn(i))
+    yield ledger
+    ledger.stop()
+
+
+@pytest.fixture()
+def provider(ledger):
+    return FakeCatchupDataProvider({LEDGER_ID: ledger})
+
+
+@pytest.fixture()
+def bulk_enabled():
+    return False
+
+
+@pytest.fixture()
+def seeder(provider, bulk_enabled):
+    config = FakeSomething(CATCHUP_REP_MAX_SIZE=REP_MAX_SIZE,
+                           CATCHUP_REP_CACHE_SIZE=1024 * 1024,
+                           CATCHUP_CONS_PROOF_CACHE_SIZE=100,
+                           CATCHUP_BULK_TRANSFER_ENABLED=bulk_enabled,
+                           BULK_FRAME_LIMIT=FRAME_LIMIT)
+    _, rx = create_direct_channel()
+    return NodeSeederService(rx, provider, config)
+
+
+def serialized_size(msg):
+    return len(ZStack.serializeMsg(dict(msg._asdict())))
+
+
+def test_catchup_reps_are_packed_up_to_size_limit(seeder, provider, ledger):
+    seeder.process_catchup_req(CatchupReq(LEDGER_ID, 11, 90, 95), 'Beta')
+
+    reps = [msg for msg, to in provider.sent]
+    assert len(reps) > 2
+    assert all(to == 'Beta' for _, to in provider.sent)
+    seq_nos = [seq_no for rep in reps for seq_no in rep.txns.keys()]
+    assert seq_nos == list(range(11, 91))
+    for rep in reps:
+        assert serialized_size(rep) <= REP_MAX_SIZE
+        last_seq_no = rep.txns.peekitem(-1)[0]
+        assert rep.consProof == [Ledger.hashToStr(h) for h in
+                                 ledger.tree.consistency_proof(last_seq_no, 95)]
+        for seq_no, txn in rep.txns.items():
+            assert txn == ledger.getBySeqNo(seq_no)
+    # Reps are filled up instead of being split in halves
+    for rep in reps[:-1]:
+        assert serialized_size(rep) > REP_MAX_SIZE * 3 // 4
+
+
+def test_catchup_reps_are_shared_between_requests(seeder, provider, ledger):
+    reads = []
+    get_all_txn = ledger.getAllTxn
+
+    def counting_get_all_txn(frm=None, to=None):
+        reads.append((frm, to))
+        return get_all_txn(frm, to)
+
+    ledger.getAllTxn = counting_get_all_txn
+
+    seeder.process_catchup_req(CatchupReq(LEDGER_ID, 1, 50, 100), 'Beta')
+    seeder.process_catchup_req(CatchupReq(LEDGER_ID, 1, 50, 100), 'Gamma')
+    assert reads == [(1, 50)]
+    beta_reps = [msg for msg, to in provider.sent if to == 'Beta']
+    gamma_reps = [msg for msg, to in provider.sent if to == 'Gamma']
+    assert beta_reps == gamma_reps
+
+    # Different catchup till means different consistency proofs
+    seeder.process_catchup_req(CatchupReq(LEDGER_ID, 1, 50, 99), 'Delta')
+    assert reads == [(1, 50), (1, 50)]
+
+
+@pytest.mark.parametrize('bulk_enabled', [True])
+def test_catchup_reps_are_sent_in_bulk_frames(seeder, provider, ledger):
+    seeder.process_catchup_req(CatchupReq(LEDGER_ID, 11, 90, 95), 'Beta')
+    seeder.process_catchup_req(CatchupReq(LEDGER_ID, 11, 90, 95), 'Gamma')
+
+    assert not provider.sent
+    beta_frames = [frame for frame, to in provider.sent_bulk if to == 'Beta']
+    gamma_frames = [frame for frame, to in provider.sent_bulk if to == 'Gamma']
+    # Frames are serialized once for all requests
+    assert len(beta_frames) > 1
+    assert all(b is g for b, g in zip(beta_frames, gamma_frames))
+
+    reps = [CatchupRep(**deserialize_bulk_frame(frame)) for frame in beta_frames]
+    seq_nos = [int(seq_no) for rep in reps for seq_no in rep.txns.keys()]
+    assert seq_nos == list(range(11, 91))
+    for frame, rep in zip(beta_frames, reps):
+        assert len(frame) <= FRAME_LIMIT
+        last_seq_no = max(int(seq_no) for seq_no in rep.txns.keys())
+        assert rep.consProof == [Ledger.hashToStr(h) for h in
+                                 ledger.tree.consistency_proof(last_seq_no, 95)]
+        for seq_no, txn in rep.txns.items():
+            assert txn == ledger.getBySeqNo(int(seq_no))
+
+
+@pytest.mark.parametrize('bulk_enabled', [True])
+def test_catchup_reps_to_clients_are_not_sent_in_bulk(seeder, provider):
+    seeder.process_catchup_req(CatchupReq(LEDGER_ID, 11, 90, 95), 'client')
+
+    assert not provider.sent_bulk
+    seq_nos = [seq_no for rep, _ in provider.sent for seq_no in rep.txns.keys()]
+    assert seq_nos == list(range(11, 91))
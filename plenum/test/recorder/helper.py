@@ -3,9 +3,8 @@ import json
 import os
 import sys
 
-from storage.kv_store_leveldb_int_keys import KeyValueStorageLeveldbIntKeys
-
 from plenum.recorder.recorder import Recorder
+from plenum.recorder.recorder_log import RecorderLog
 
 from plenum.recorder.replayable_node import prepare_directory_for_replay, \
     create_replayable_node_class
@@ -100,7 +99,6 @@ def create_replayable_node_and_check(looper, all_nodes, node_to_check,
     replay_and_compare(looper, node_to_check, replaying_node)
 
 
-def create_recorder_for_test(tmpdir_factory, name):
-    storage = KeyValueStorageLeveldbIntKeys(
-        tmpdir_factory.mktemp('').strpath, name)
-    return Recorder(storage)
+def create_recorder_for_test(tmpdir_factory, name, **kwargs):
+    log = RecorderLog(tmpdir_factory.mktemp('').strpath, name, **kwargs)
+    return Recorder(log)
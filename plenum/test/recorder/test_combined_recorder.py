@@ -1,11 +1,8 @@
 import time
 
-from plenum.common.constants import KeyValueStorageType
 from plenum.recorder.combined_recorder import CombinedRecorder
 from plenum.recorder.recorder import Recorder
 
-from storage.helper import initKeyValueStorageIntKeys
-
 from plenum.test.recorder.helper import create_recorder_for_test
 
 
@@ -29,17 +26,12 @@ def test_combined_recorder(tmpdir_factory):
     time.sleep(.1)
     r1.add_disconnecteds('x', 'y')
 
-    kv_store = initKeyValueStorageIntKeys(KeyValueStorageType.Leveldb,
-                                          tmpdir_factory.mktemp('').strpath,
-                                          'combined_recorder')
-    cr = CombinedRecorder(kv_store)
+    cr = CombinedRecorder()
 
     assert not cr.recorders
     cr.add_recorders(r1, r2)
     assert len(cr.recorders) == 2
 
-    cr.combine_recorders()
-
     cr.start_playing()
     start = time.perf_counter()
 
@@ -66,3 +58,4 @@ def test_combined_recorder(tmpdir_factory):
                 # Disconnected from r1
                 assert vals == [[[Recorder.DISCONN_FLAG, 'x', 'y']], []]
             i += 1
+    assert i == 6
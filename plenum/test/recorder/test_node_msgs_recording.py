@@ -4,8 +4,8 @@ import time
 def test_record_node_msgs(some_txns_done, txnPoolNodeSet):
     recorders = []
     for node in txnPoolNodeSet:
-        assert node.nodestack.recorder.store.size > 0
-        assert node.clientstack.recorder.store.size > 0
+        assert next(node.nodestack.recorder.iterator(), None) is not None
+        assert next(node.clientstack.recorder.iterator(), None) is not None
         node.nodestack.recorder.start_playing()
         node.clientstack.recorder.start_playing()
         recorders.append(node.nodestack.recorder)
@@ -1,20 +1,26 @@
+import json
+import os
 import random
 import time
 from collections import OrderedDict
 
+from plenum.common.constants import KeyValueStorageType
 from plenum.common.util import randomString
 
-try:
-    import ujson as json
-except ImportError:
-    import json
-
 import pytest
 
 from plenum.recorder.recorder import Recorder
+from plenum.recorder.recorder_log import KvRecorderLog, RecorderLog
+from plenum.test.recorder.helper import create_recorder_for_test
+from storage.helper import initKeyValueStorageIntKeys
 
 TestRunningTimeLimitSec = 350
 
+# Recording throughput depends on the disk, so the perf test runs only with
+# `SkipTests` set to False
+SkipTests = True
+skipper = pytest.mark.skipif(SkipTests, reason='Perf test')
+
 
 def test_add_to_recorder(recorder):
     last_check_time = recorder.get_now_key()
@@ -34,30 +40,31 @@ def test_add_to_recorder(recorder):
     recorder.add_disconnecteds('a', 'b', 'c')
 
     i = 0
-    for k, v in recorder.store.iterator(include_value=True):
-        assert int(k.decode()) > int(last_check_time)
+    for k, v in recorder.iterator():
+        assert k > last_check_time
 
         if i == 0:
-            assert v.decode() == json.dumps([[Recorder.INCOMING_FLAG, msg1, frm1]])
+            assert v == [[Recorder.INCOMING_FLAG, msg1, frm1]]
 
         if i == 1:
-            assert v.decode() == json.dumps([[Recorder.INCOMING_FLAG, msg2, frm2]])
-            assert int(k) - int(last_check_time) >= 3 * Recorder.TIME_FACTOR
+            assert v == [[Recorder.INCOMING_FLAG, msg2, frm2]]
+            assert k - last_check_time >= 3 * Recorder.TIME_FACTOR
 
         if i == 2:
-            assert v.decode() == json.dumps([[Recorder.OUTGOING_FLAG, msg3, to1, to11]])
-            assert int(k) - int(last_check_time) >= 2.1 * Recorder.TIME_FACTOR
+            assert v == [[Recorder.OUTGOING_FLAG, msg3, to1, to11]]
+            assert k - last_check_time >= 2.1 * Recorder.TIME_FACTOR
 
         if i == 3:
-            assert v.decode() == json.dumps([[Recorder.OUTGOING_FLAG, msg4, to2]])
-            assert int(k) - int(last_check_time) >= .4 * Recorder.TIME_FACTOR
+            assert v == [[Recorder.OUTGOING_FLAG, msg4, to2]]
+            assert k - last_check_time >= .4 * Recorder.TIME_FACTOR
 
         if i == 4:
-            assert v.decode() == json.dumps([[Recorder.DISCONN_FLAG, 'a', 'b', 'c']])
-            assert int(k) - int(last_check_time) >= .5 * Recorder.TIME_FACTOR
+            assert v == [[Recorder.DISCONN_FLAG, 'a', 'b', 'c']]
+            assert k - last_check_time >= .5 * Recorder.TIME_FACTOR
 
-        last_check_time = k.decode()
+        last_check_time = k
         i += 1
+    assert i == 5
 
 
 def test_get_list_from_recorder(recorder):
@@ -71,13 +78,13 @@ def test_get_list_from_recorder(recorder):
     recorder.add_incoming(msg1, frm1)
     recorder.add_incoming(msg2, frm2)
     recorder.add_disconnecteds('a', 'b', 'c')
-    for k, v in recorder.store.iterator(include_value=True):
-        assert v.decode() == json.dumps([
+    for k, v in recorder.iterator():
+        assert v == [
             [Recorder.OUTGOING_FLAG, 'm3', 't1', 't11'],
             [Recorder.INCOMING_FLAG, 'm1', 'f1'],
             [Recorder.INCOMING_FLAG, 'm2', 'f2'],
             [Recorder.DISCONN_FLAG, 'a', 'b', 'c']
-            ])
+            ]
 
 
 def test_register_play_targets(recorder):
@@ -109,9 +116,6 @@ def test_recorded_parsings(recorder):
         recorder.add_outgoing(m, f)
         time.sleep(0.01)
 
-    with pytest.raises(AssertionError):
-        recorder.get_parsed(incoming[0], only_incoming=True, only_outgoing=True)
-
     combined = incoming + outgoing
 
     def sublist(lst1, lst2):
@@ -119,15 +123,14 @@ def test_recorded_parsings(recorder):
         ls2 = [element for element in lst2 if element in lst1]
         return ls1 == ls2
 
-    for k, v in recorder.store.iterator(include_value=True):
-        p = Recorder.get_parsed(v)
-        assert sublist([i[1:] for i in p] , combined)
-        p = Recorder.get_parsed(v, only_incoming=True)
+    for k, v in recorder.iterator():
+        assert sublist([i[1:] for i in v], combined)
+        p = Recorder.filter_incoming(v)
         if p:
             assert sublist(p, incoming)
             for i in p:
                 incoming.remove(i)
-        p = Recorder.get_parsed(v, only_outgoing=True)
+        p = Recorder.filter_outgoing(v)
         if p:
             assert sublist(p, outgoing)
             for i in p:
@@ -148,10 +151,9 @@ def test_recorder_get_next_incoming_only(recorder):
 
     recorded_incomings = OrderedDict()
     keys = []
-    for k, v in recorder.store.iterator(include_value=True):
-        v = Recorder.get_parsed(v)
-        keys.append(int(k))
-        recorded_incomings[int(k)] = v
+    for k, v in recorder.iterator():
+        keys.append(k)
+        recorded_incomings[k] = v
 
     assert len(recorded_incomings) == incoming_count
     assert sorted(keys) == keys
@@ -190,10 +192,10 @@ def test_recorder_get_next(recorder):
             continue
 
     recorded_incomings = OrderedDict()
-    for k, v in recorder.store.iterator(include_value=True):
-        v = Recorder.get_parsed(v, only_incoming=True)
+    for k, v in recorder.iterator():
+        v = Recorder.filter_incoming(v)
         if v:
-            recorded_incomings[int(k)] = v
+            recorded_incomings[k] = v
 
     assert len(recorded_incomings) == incoming_count
 
@@ -213,3 +215,112 @@ def test_recorder_get_next(recorder):
 
     assert len(recorded_incomings) == 0
     assert not recorder.is_playing
+
+
+def test_recorder_log_segments_and_time_index(tmpdir_factory):
+    recorder = create_recorder_for_test(tmpdir_factory, 'segmented',
+                                        segment_size=10000, buffer_size=1000,
+                                        index_interval=500)
+    # Same time for pairs of messages
+    for i in range(1000):
+        recorder.log.append(i // 2, [Recorder.INCOMING_FLAG, randomString(20), b'frm'])
+    assert len(recorder.log.segments()) > 3
+
+    recorded = list(recorder.iterator())
+    assert [k for k, _ in recorded] == list(range(500))
+    assert all(len(v) == 2 for _, v in recorded)
+    for start in (0, 1, 123, 250, 499, 500):
+        assert list(recorder.iterator(start)) == recorded[start:]
+
+    # Reopened log starts a new segment and keeps the recorded messages
+    db_path = recorder.log.db_path
+    segments = recorder.log.segments()
+    recorder.stop()
+    log = RecorderLog(*os.path.split(db_path))
+    log.append(500, [Recorder.DISCONN_FLAG, 'a'])
+    assert log.segments() == segments + [segments[-1] + 1]
+    assert list(Recorder(log).iterator(499)) == \
+        recorded[499:] + [(500, [[Recorder.DISCONN_FLAG, 'a']])]
+    log.close()
+
+
+def test_recorder_log_ignores_torn_frame(tmpdir_factory):
+    recorder = create_recorder_for_test(tmpdir_factory, 'torn')
+    recorder.add_incoming(b'msg1', b'frm')
+    recorder.add_incoming(b'msg2', b'frm')
+    recorder.stop()
+
+    segment = os.path.join(recorder.log.db_path, '00000000.log')
+    with open(segment, 'r+b') as f:
+        f.truncate(os.path.getsize(segment) - 3)
+    log = RecorderLog(*os.path.split(recorder.log.db_path))
+    assert [v for _, v in Recorder(log).iterator()] == \
+        [[[Recorder.INCOMING_FLAG, b'msg1', b'frm']]]
+
+
+def test_recorder_reads_kv_store_recording(tmpdir_factory):
+    db_dir = tmpdir_factory.mktemp('').strpath
+    kv_store = initKeyValueStorageIntKeys(KeyValueStorageType.Leveldb,
+                                          db_dir, 'old_recording')
+    kv_store.put('100', json.dumps([[Recorder.INCOMING_FLAG, 'msg1', 'frm']]))
+    kv_store.put('25', json.dumps([[Recorder.OUTGOING_FLAG, 'msg2', 'to'],
+                                   [Recorder.DISCONN_FLAG, 'a']]))
+    recorder = Recorder(KvRecorderLog(kv_store))
+    assert list(recorder.iterator()) == \
+        [(25, [[Recorder.OUTGOING_FLAG, 'msg2', 'to'], [Recorder.DISCONN_FLAG, 'a']]),
+         (100, [[Recorder.INCOMING_FLAG, 'msg1', 'frm']])]
+    assert list(recorder.iterator(26)) == \
+        [(100, [[Recorder.INCOMING_FLAG, 'msg1', 'frm']])]
+    with pytest.raises(RuntimeError):
+        recorder.add_incoming('msg3', 'frm')
+
+    # Files of the key-value store are not taken for log segments
+    assert RecorderLog(db_dir, 'old_recording').segments() == []
+    recorder.stop()
+    assert kv_store.closed
+
+
+def test_recorder_plays_as_fast_as_possible(recorder):
+    recorder.add_incoming(b'msg1', b'frm')
+    time.sleep(1)
+    recorder.add_outgoing(b'msg2', b'to')
+    time.sleep(1)
+    recorder.add_disconnecteds('a')
+
+    recorder.start_playing(as_fast_as_possible=True)
+    start = time.perf_counter()
+    played = [recorder.get_next() for _ in range(3)]
+    assert time.perf_counter() - start < 0.5
+    assert played == [[[Recorder.INCOMING_FLAG, b'msg1', b'frm']],
+                      [[Recorder.OUTGOING_FLAG, b'msg2', b'to']],
+                      [[Recorder.DISCONN_FLAG, 'a']]]
+    assert recorder.played_time() > 2
+    assert recorder.get_next() is None
+    assert not recorder.is_playing
+
+
+@skipper
+def test_recorder_perf(recorder, tmpdir_factory):
+    count = 100000
+    msg = json.dumps({'op': 'PREPARE', 'digest': randomString(64)}).encode()
+    start = time.perf_counter()
+    for _ in range(count):
+        recorder.add_incoming(msg, b'Alpha')
+    recorder.log.flush()
+    recorded = time.perf_counter()
+    played = sum(len(v) for _, v in recorder.iterator())
+    print("Recorded {} messages in {:.3f} sec, read them in {:.3f} sec"
+          .format(count, recorded - start, time.perf_counter() - recorded))
+    assert played == count
+
+    # Recordings in a key-value store took a put of a json list per message
+    kv_store = initKeyValueStorageIntKeys(KeyValueStorageType.Leveldb,
+                                          tmpdir_factory.mktemp('').strpath,
+                                          'kv_recording')
+    entry = json.dumps([[Recorder.INCOMING_FLAG, msg.decode(), 'Alpha']])
+    start = time.perf_counter()
+    for i in range(count):
+        kv_store.put(str(i), entry)
+    print("Recorded {} messages in a key-value store in {:.3f} sec"
+          .format(count, time.perf_counter() - start))
+    kv_store.close()
@@ -0,0 +1,137 @@
+import time
+
+import pytest
+
+from plenum.common.audited_state_roots import AuditedStateRoots
+from plenum.common.constants import AUDIT_LEDGER_ID, POOL_LEDGER_ID, DOMAIN_LEDGER_ID, CONFIG_LEDGER_ID, \
+    TXN_PAYLOAD, TXN_PAYLOAD_DATA, AUDIT_TXN_STATE_ROOT, AUDITED_STATE_ROOTS_LABEL, BLS_LABEL, GET_TXN, \
+    TXN_TYPE, DATA, STATE_PROOF, MULTI_SIGNATURE, TXN_METADATA, TXN_METADATA_SEQ_NO
+from plenum.common.messages.node_messages import Reply
+from plenum.common.request import Request
+from plenum.common.types import f
+from plenum.server.database_manager import DatabaseManager
+from plenum.server.request_handlers.get_txn_handler import GetTxnHandler
+from plenum.test.testing_utils import FakeSomething
+
+# Setting `SkipTests` to False runs the perf test, which compares timings
+SkipTests = True
+skipper = pytest.mark.skipif(SkipTests, reason='Perf test')
+
+
+def audit_txn(state_roots):
+    return {TXN_PAYLOAD: {TXN_PAYLOAD_DATA: {AUDIT_TXN_STATE_ROOT: state_roots}}}
+
+
+class FakeAuditLedger:
+    def __init__(self, txns):
+        self.txns = list(txns)
+        self.reads = 0
+
+    @property
+    def size(self):
+        return len(self.txns)
+
+    def getBySeqNo(self, seq_no):
+        self.reads += 1
+        return self.txns[seq_no - 1]
+
+
+class FakeBlsStore:
+    def get(self, state_root):
+        return FakeSomething(as_dict=lambda: {'root': state_root})
+
+
+def rarely_written_audit_ledger(size):
+    # Pool ledger is written only in the first batch, domain in every one
+    return FakeAuditLedger(
+        [audit_txn({POOL_LEDGER_ID: 'pool', DOMAIN_LEDGER_ID: 'domain1'})] +
+        [audit_txn({DOMAIN_LEDGER_ID: 'domain{}'.format(i)}) for i in range(2, size + 1)])
+
+
+@pytest.fixture()
+def audit_ledger():
+    return rarely_written_audit_ledger(100)
+
+
+@pytest.fixture()
+def roots(audit_ledger):
+    return AuditedStateRoots(audit_ledger)
+
+
+def make_handler(audit_ledger, with_index=True):
+    db_manager = DatabaseManager()
+    for lid in (POOL_LEDGER_ID, DOMAIN_LEDGER_ID, CONFIG_LEDGER_ID):
+        db_manager.register_new_database(lid, FakeSomething())
+    db_manager.register_new_database(AUDIT_LEDGER_ID, audit_ledger)
+    db_manager.register_new_store(BLS_LABEL, FakeBlsStore())
+    if with_index:
+        db_manager.register_new_store(AUDITED_STATE_ROOTS_LABEL,
+                                      AuditedStateRoots(audit_ledger))
+    node = FakeSomething(getReplyFromLedger=lambda ledger, seq_no, write:
+                         Reply({TXN_METADATA: {TXN_METADATA_SEQ_NO: seq_no}}))
+    return GetTxnHandler(node, db_manager)
+
+
+def get_txn_request(ledger_id, seq_no=1):
+    return Request(identifier='identifier', reqId=1,
+                   operation={TXN_TYPE: GET_TXN, f.LEDGER_ID.nm: ledger_id, DATA: seq_no})
+
+
+def test_roots_are_found_in_audit_ledger_once(roots, audit_ledger):
+    assert roots.get(DOMAIN_LEDGER_ID) == 'domain100'
+    assert audit_ledger.reads == 1
+
+    assert roots.get(POOL_LEDGER_ID) == 'pool'
+    assert audit_ledger.reads == 100
+
+    assert roots.get(CONFIG_LEDGER_ID) is None
+    assert roots.get(POOL_LEDGER_ID) == 'pool'
+    assert audit_ledger.reads == 100
+
+
+def test_committed_roots_override_older_ones(roots, audit_ledger):
+    audit_ledger.txns.append(audit_txn({POOL_LEDGER_ID: 'pool2'}))
+    roots.add(audit_ledger.txns[-1])
+    assert roots.get(POOL_LEDGER_ID) == 'pool2'
+    assert audit_ledger.reads == 0
+
+    assert roots.get(DOMAIN_LEDGER_ID) == 'domain100'
+    assert roots.get(POOL_LEDGER_ID) == 'pool2'
+
+
+def test_roots_are_found_again_after_reset(roots, audit_ledger):
+    assert roots.get(DOMAIN_LEDGER_ID) == 'domain100'
+    # E.g. catchup appended audit txns without committing batches
+    audit_ledger.txns.append(audit_txn({DOMAIN_LEDGER_ID: 'domain101'}))
+    assert roots.get(DOMAIN_LEDGER_ID) == 'domain100'
+
+    roots.reset()
+    assert roots.get(DOMAIN_LEDGER_ID) == 'domain101'
+
+
+@pytest.mark.parametrize('with_index', [True, False])
+def test_get_txn_result(audit_ledger, with_index):
+    handler = make_handler(audit_ledger, with_index)
+    result = handler.get_result(get_txn_request(POOL_LEDGER_ID, 5))
+    assert result[f.SEQ_NO.nm] == 5
+    assert result[STATE_PROOF] == {MULTI_SIGNATURE: {'root': 'pool'}}
+
+    result = handler.get_result(get_txn_request(CONFIG_LEDGER_ID))
+    assert STATE_PROOF not in result
+
+
+@skipper
+def test_get_txn_read_load_perf():
+    count = 1000
+    audit_ledger = rarely_written_audit_ledger(1000)
+    for with_index in (False, True):
+        handler = make_handler(audit_ledger, with_index)
+        audit_ledger.reads = 0
+        started = time.perf_counter()
+        for _ in range(count):
+            handler.get_result(get_txn_request(POOL_LEDGER_ID))
+        print("{} GET_TXNs of pool ledger {} index: {:.3f} sec, {} audit txn reads"
+              .format(count, 'with' if with_index else 'without',
+                      time.perf_counter() - started, audit_ledger.reads))
+    # Audit txns are read once to fill the index
+    assert audit_ledger.reads == 1000
@@ -0,0 +1,340 @@
+import shutil
+import time
+
+import pytest
+
+from common.serializers.serialization import state_roots_serializer
+from crypto.bls.bls_multi_signature import MultiSignature, MultiSignatureValue
+from ledger.compact_merkle_tree import CompactMerkleTree
+from plenum.common.audited_state_roots import AuditedStateRoots
+from plenum.common.constants import POOL_LEDGER_ID, DOMAIN_LEDGER_ID, CONFIG_LEDGER_ID, AUDIT_LEDGER_ID, \
+    KeyValueStorageType, HS_LEVELDB, HS_ROCKSDB, GET_TXN, GET_TXN_AUTHOR_AGREEMENT, \
+    GET_TXN_AUTHOR_AGREEMENT_AML, TXN_TYPE, DATA, NYM, \
+    TARGET_NYM, AUDIT_TXN_STATE_ROOT, AUDIT_TXN_LEDGERS_SIZE, BLS_LABEL, TS_LABEL, AUDITED_STATE_ROOTS_LABEL, GET_FROZEN_LEDGERS, \
+    STATE_PROOF
+from plenum.common.ledger import Ledger
+from plenum.common.request import Request
+from plenum.common.txn_util import init_empty_txn, set_payload_data, append_txn_metadata
+from plenum.common.types import f
+from plenum.server.database_manager import DatabaseManager
+from plenum.server.node import Node
+from plenum.server.query_workers import QueryWorkerBootstrap, QueryWorkerPool, CommittedSnapshot, \
+    StaleSnapshot, picklable_config
+from plenum.server.request_managers.read_request_manager import ReadRequestManager
+from plenum.bls.bls_store import BlsStore
+from plenum.test.testing_utils import FakeSomething
+from state.pruning_state import PruningState
+from storage.helper import initHashStore, initKeyValueStorage, initKeyValueStorageIntKeys
+from storage.state_ts_store import StateTsDbStorage
+
+STATE_LEDGER_IDS = (POOL_LEDGER_ID, DOMAIN_LEDGER_ID, CONFIG_LEDGER_ID)
+LEDGER_IDS = STATE_LEDGER_IDS + (AUDIT_LEDGER_ID,)
+
+
+class NodeStores:
+    """
+    Stores written the way a node writes them
+    """
+
+    def __init__(self, config, data_location):
+        self.config = config
+        self.db_manager = DatabaseManager()
+        for lid in LEDGER_IDS:
+            name = QueryWorkerBootstrap.ledger_names[lid]
+            state = None
+            if lid in STATE_LEDGER_IDS:
+                state = PruningState(initKeyValueStorage(getattr(config, "{}StateStorage".format(name)),
+                                                         data_location,
+                                                         getattr(config, "{}StateDbName".format(name))))
+            ledger = Ledger(CompactMerkleTree(hashStore=initHashStore(data_location, name, config)),
+                            dataDir=data_location,
+                            fileName=getattr(config, "{}TransactionsFile".format(name)),
+                            config=config)
+            self.db_manager.register_new_database(lid, ledger, state)
+        self.db_manager.register_new_store(BLS_LABEL, BlsStore(config.stateSignatureStorage, data_location,
+                                                               config.stateSignatureDbName))
+        self.db_manager.register_new_store(TS_LABEL, StateTsDbStorage('node', {
+            lid: initKeyValueStorageIntKeys(config.stateTsStorage, data_location, db_name)
+            for lid, db_name in ((DOMAIN_LEDGER_ID, config.stateTsDbName),
+                                 (CONFIG_LEDGER_ID, config.configStateTsDbName))}))
+        self.db_manager.register_new_store(AUDITED_STATE_ROOTS_LABEL,
+                                           AuditedStateRoots(self.db_manager.get_ledger(AUDIT_LEDGER_ID)))
+
+        self.read_manager = ReadRequestManager()
+        node = FakeSomething(ledger_ids=list(LEDGER_IDS),
+                             update_txn_with_extra_data=lambda txn: txn)
+        node.getReplyFromLedger = lambda *args, **kwargs: Node.getReplyFromLedger(node, *args, **kwargs)
+        bootstrap = QueryWorkerBootstrap('node', data_location, config, list(LEDGER_IDS))
+        bootstrap.getReplyFromLedger = node.getReplyFromLedger
+        bootstrap._register_req_handlers(self.read_manager, self.db_manager)
+
+    def commit_batch(self, count, ledger_id=DOMAIN_LEDGER_ID):
+        ledger = self.db_manager.get_ledger(ledger_id)
+        state = self.db_manager.get_state(ledger_id)
+        for _ in range(count):
+            txn = init_empty_txn(NYM)
+            set_payload_data(txn, {TARGET_NYM: 'nym{}'.format(ledger.size)})
+            append_txn_metadata(txn, seq_no=ledger.size + 1, txn_time=1000)
+            ledger.add(txn)
+            state.set('nym{}'.format(ledger.size).encode(), b'value')
+        state.commit()
+
+        root = state_roots_serializer.serialize(bytes(state.committedHeadHash))
+        self.db_manager.bls_store.put(MultiSignature(
+            'signature', ['Alpha', 'Beta'],
+            MultiSignatureValue(ledger_id, root, 'pool_root', 'txn_root', 1000)))
+        audit_ledger = self.db_manager.get_ledger(AUDIT_LEDGER_ID)
+        audit_txn = init_empty_txn('2')
+        set_payload_data(audit_txn, {AUDIT_TXN_LEDGERS_SIZE: {lid: self.db_manager.get_ledger(lid).size
+                                                              for lid in STATE_LEDGER_IDS},
+                                     AUDIT_TXN_STATE_ROOT: {ledger_id: root}})
+        append_txn_metadata(audit_txn, seq_no=audit_ledger.size + 1)
+        audit_ledger.add(audit_txn)
+        self.db_manager.audited_state_roots.add(audit_txn)
+
+    def snapshot(self, version):
+        return CommittedSnapshot(version,
+                                 {lid: bytes(state.committedHeadHash)
+                                  for lid, state in self.db_manager.states.items()},
+                                 {lid: ledger.size
+                                  for lid, ledger in self.db_manager.ledgers.items()})
+
+    def close(self):
+        for ledger in self.db_manager.ledgers.values():
+            ledger.stop()
+        self.db_manager.close()
+
+
+@pytest.fixture()
+def config(tconf):
+    # LevelDB can not be read while written by another process,
+    # so node stores are closed before workers read them
+    config = picklable_config(tconf)
+    config.hashStore = {'type': HS_LEVELDB}
+    for name in ('transactionLogDefaultStorage', 'stateSignatureStorage', 'stateTsStorage',
+                 'poolStateStorage', 'domainStateStorage', 'configStateStorage'):
+        setattr(config, name, KeyValueStorageType.Leveldb)
+    return config
+
+
+@pytest.fixture()
+def node_stores(config, tdir_for_func):
+    stores = NodeStores(config, tdir_for_func)
+    stores.commit_batch(3)
+    stores.commit_batch(1, POOL_LEDGER_ID)
+    stores.commit_batch(2)
+    stores.commit_batch(1, CONFIG_LEDGER_ID)
+    yield stores
+    stores.close()
+
+
+@pytest.fixture()
+def bootstrap(config, tdir_for_func):
+    bootstrap = QueryWorkerBootstrap('node', tdir_for_func, config, list(LEDGER_IDS))
+    yield bootstrap
+    bootstrap.close()
+
+
+def read_requests():
+    requests = [Request(identifier='identifier', reqId=seq_no, protocolVersion=2,
+                        operation={TXN_TYPE: GET_TXN, f.LEDGER_ID.nm: DOMAIN_LEDGER_ID, DATA: seq_no})
+                for seq_no in range(1, 8)]
+    requests.append(Request(identifier='identifier', reqId=10, protocolVersion=2,
+                            operation={TXN_TYPE: GET_TXN, f.LEDGER_ID.nm: POOL_LEDGER_ID, DATA: 1}))
+    requests.append(Request(identifier='identifier', reqId=11, protocolVersion=2,
+                            operation={TXN_TYPE: GET_TXN_AUTHOR_AGREEMENT}))
+    requests.append(Request(identifier='identifier', reqId=12, protocolVersion=2,
+                            operation={TXN_TYPE: GET_FROZEN_LEDGERS}))
+    return requests
+
+
+def test_can_serve_only_rocksdb_stores(config, tdir):
+    assert not QueryWorkerBootstrap('node', tdir, config, list(LEDGER_IDS)).can_serve
+
+    config.hashStore = {'type': HS_ROCKSDB}
+    for name in ('transactionLogDefaultStorage', 'stateSignatureStorage', 'stateTsStorage',
+                 'poolStateStorage', 'domainStateStorage', 'configStateStorage'):
+        setattr(config, name, KeyValueStorageType.Rocksdb)
+    assert QueryWorkerBootstrap('node', tdir, config, list(LEDGER_IDS)).can_serve
+    assert not QueryWorkerBootstrap('node', None, config, list(LEDGER_IDS)).can_serve
+
+
+def test_served_txn_types(bootstrap):
+    assert set(bootstrap.txn_types) == {GET_TXN, GET_TXN_AUTHOR_AGREEMENT, GET_TXN_AUTHOR_AGREEMENT_AML,
+                                        GET_FROZEN_LEDGERS}
+
+
+def test_worker_results_are_same_as_node_ones(node_stores, bootstrap):
+    snapshot = node_stores.snapshot(1)
+    expected = [node_stores.read_manager.get_result(request) for request in read_requests()]
+    node_stores.close()
+
+    results = [bootstrap.get_result(snapshot, request) for request in read_requests()]
+    assert results == expected
+    assert results[0][f.SEQ_NO.nm] == 1
+    assert STATE_PROOF in results[0]
+    assert results[6][DATA] is None
+
+
+def test_worker_serves_older_snapshot_without_reopening(node_stores, bootstrap):
+    old_snapshot = node_stores.snapshot(1)
+    expected = [node_stores.read_manager.get_result(request) for request in read_requests()]
+    node_stores.commit_batch(1)
+    new_snapshot = node_stores.snapshot(2)
+    new_expected = [node_stores.read_manager.get_result(request) for request in read_requests()]
+    node_stores.close()
+
+    opened = []
+    open_stores = bootstrap._open
+    bootstrap._open = lambda: opened.append(1) or open_stores()
+
+    # Stores already have txns and state roots written after the old snapshot
+    assert [bootstrap.get_result(old_snapshot, request) for request in read_requests()] == expected
+    assert [bootstrap.get_result(new_snapshot, request) for request in read_requests()] == new_expected
+    assert [bootstrap.get_result(old_snapshot, request) for request in read_requests()] == expected
+    assert new_expected != expected
+    assert expected[5][DATA] is None
+    assert new_expected[5][f.SEQ_NO.nm] == 6
+    assert len(opened) == 1
+
+
+def test_worker_reopens_stores_behind_snapshot(node_stores, bootstrap):
+    snapshot = node_stores.snapshot(1)
+    node_stores.close()
+    request = read_requests()[0]
+    expected = bootstrap.get_result(snapshot, request)
+
+    opened = []
+    open_stores = bootstrap._open
+    bootstrap._open = lambda: opened.append(1) or open_stores()
+
+    ledger_sizes = dict(snapshot.ledger_sizes)
+    ledger_sizes[DOMAIN_LEDGER_ID] += 1
+    ledger_sizes[AUDIT_LEDGER_ID] += 1
+    ahead = CommittedSnapshot(2, snapshot.state_roots, ledger_sizes)
+    with pytest.raises(StaleSnapshot):
+        bootstrap.get_result(ahead, request)
+    assert len(opened) == 1
+
+    assert bootstrap.get_result(snapshot, request) == expected
+    assert len(opened) == 1
+
+
+def test_worker_serves_reads_across_commits_without_reopening(config, node_stores, bootstrap,
+                                                              tdir_for_func, tmpdir):
+    # The worker reads a copy of stores the node keeps writing, as stores
+    # opened read-only do not see writes made after opening
+    snapshots = [node_stores.snapshot(1)]
+    node_stores.close()
+    node_dir = str(tmpdir.join('node'))
+    shutil.copytree(tdir_for_func, node_dir)
+    node_stores = NodeStores(config, node_dir)
+    # Requests which read the pool and config ledgers only
+    requests = read_requests()[-3:]
+    expected = [[node_stores.read_manager.get_result(request) for request in requests]]
+    for version in range(2, 5):
+        node_stores.commit_batch(1)
+        snapshots.append(node_stores.snapshot(version))
+        expected.append([node_stores.read_manager.get_result(request) for request in requests])
+    domain_request = read_requests()[6]
+    expected_domain = node_stores.read_manager.get_result(domain_request)
+    node_stores.close()
+
+    opened = []
+    open_stores = bootstrap._open
+    bootstrap._open = lambda: opened.append(1) or open_stores()
+
+    for snapshot, snapshot_expected in zip(snapshots, expected):
+        assert [bootstrap.get_result(snapshot, request) for request in requests] == snapshot_expected
+    assert expected[0][0][f.SEQ_NO.nm] == 1
+    assert STATE_PROOF in expected[0][0]
+    assert len(opened) == 1
+
+    # Stores are reopened for a request reading a ledger which is behind
+    with pytest.raises(StaleSnapshot):
+        bootstrap.get_result(snapshots[-1], domain_request)
+    assert len(opened) == 2
+    assert expected_domain[f.SEQ_NO.nm] == 7
+
+
+class FakeBootstrap(QueryWorkerBootstrap):
+    def __init__(self, delay=0):
+        super().__init__('node', None, FakeSomething(), [DOMAIN_LEDGER_ID])
+        self.delay = delay
+
+    @property
+    def txn_types(self):
+        return [GET_TXN]
+
+    def get_result(self, snapshot, request):
+        time.sleep(self.delay)
+        if request.operation[DATA] < 0:
+            raise StaleSnapshot()
+        return {'version': snapshot.version, DATA: request.operation[DATA]}
+
+
+class PoolClient:
+    def __init__(self, bootstrap, reply_timeout=10):
+        self.sent = []
+        self.processed_locally = []
+        self.pool = QueryWorkerPool(bootstrap, workers=2, reply_timeout=reply_timeout,
+                                    send_result=lambda result, frm: self.sent.append((result, frm)),
+                                    process_locally=lambda request, frm:
+                                    self.processed_locally.append((request.operation[DATA], frm)))
+
+    def wait_served(self, timeout=10):
+        started = time.perf_counter()
+        while self.pool.pending_count and time.perf_counter() - started < timeout:
+            self.pool.service()
+            time.sleep(0.01)
+        assert self.pool.pending_count == 0
+
+
+def get_txn(seq_no, txn_type=GET_TXN):
+    return Request(identifier='identifier', reqId=1,
+                   operation={TXN_TYPE: txn_type, DATA: seq_no})
+
+
+def test_pool_serves_requests_for_published_snapshot():
+    client = PoolClient(FakeBootstrap())
+    try:
+        # Nothing is published yet
+        assert not client.pool.submit(get_txn(1), 'client1')
+
+        client.pool.publish({}, {})
+        assert client.pool.submit(get_txn(1), 'client1')
+        client.pool.publish({}, {})
+        assert client.pool.submit(get_txn(2), 'client2')
+        # Not served by workers
+        assert not client.pool.submit(get_txn(3, GET_TXN_AUTHOR_AGREEMENT), 'client1')
+
+        client.wait_served()
+        assert sorted(client.sent, key=lambda r: r[0][DATA]) == \
+            [({'version': 1, DATA: 1}, 'client1'), ({'version': 2, DATA: 2}, 'client2')]
+        assert client.processed_locally == []
+    finally:
+        client.pool.stop()
+
+
+def test_pool_processes_locally_requests_not_served_by_workers():
+    client = PoolClient(FakeBootstrap())
+    try:
+        client.pool.publish({}, {})
+        assert client.pool.submit(get_txn(-1), 'client1')
+        client.wait_served()
+        assert client.sent == []
+        assert client.processed_locally == [(-1, 'client1')]
+    finally:
+        client.pool.stop()
+
+
+def test_pool_processes_locally_requests_served_too_long():
+    client = PoolClient(FakeBootstrap(delay=1), reply_timeout=0.1)
+    try:
+        client.pool.publish({}, {})
+        assert client.pool.submit(get_txn(1), 'client1')
+        client.wait_served()
+        assert client.sent == []
+        assert client.processed_locally == [(1, 'client1')]
+    finally:
+        client.pool.stop()
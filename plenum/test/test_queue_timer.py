@@ -1,6 +1,16 @@
+import random
+import time
+from functools import partial
+
+import pytest
+
 from plenum.common.timer import QueueTimer
 from plenum.test.helper import MockTimestamp
 
+# The perf test measures time, so it is skipped unless `SkipTests` is False
+SkipTests = True
+skipper = pytest.mark.skipif(SkipTests, reason='Perf test')
+
 
 class Callback:
     def __init__(self):
@@ -226,3 +236,120 @@ def test_timer_cancels_all_instances_of_callback():
     ts.value += 6
     timer.service()
     assert cb.call_count == 0
+
+
+def test_timer_without_events_has_no_next_event():
+    ts = MockTimestamp(0)
+    timer = QueueTimer(ts)
+    assert timer.next_event_delay() is None
+    timer.service()
+    assert timer.queue_size() == 0
+
+    timer.schedule(5, Callback())
+    assert timer.next_event_delay() == 5
+    ts.value += 5
+    timer.service()
+    assert timer.next_event_delay() is None
+
+
+def test_timer_can_cancel_event_without_touching_same_callback():
+    ts = MockTimestamp(0)
+    timer = QueueTimer(ts)
+    cb = Callback()
+
+    event = timer.schedule(3, cb)
+    timer.schedule(5, cb)
+    event.cancel()
+    assert not event.active
+    assert timer.queue_size() == 1
+
+    ts.value += 6
+    timer.service()
+    assert cb.call_count == 1
+
+    # Cancelling fired or cancelled event does nothing
+    event.cancel()
+    assert timer.queue_size() == 0
+
+
+@pytest.mark.parametrize('initial_time', [0, 1576800000.0])
+def test_timer_calls_callbacks_in_order_of_their_time(initial_time):
+    rnd = random.Random(42)
+    ts = MockTimestamp(initial_time)
+    timer = QueueTimer(ts, resolution=0.01)
+    called = []
+    expected = []
+    # Delays are covering all levels of the wheel and the overflow
+    for delay in [rnd.choice([0.001, 0.1, 1, 30, 600, 3600, 86400]) * rnd.random()
+                  for _ in range(1000)]:
+        expected.append((ts.value + delay, len(expected)))
+        timer.schedule(delay, partial(called.append, (ts.value + delay, len(expected) - 1)))
+    expected.sort()
+
+    assert timer.next_event_delay() == pytest.approx(expected[0][0] - ts.value)
+    while timer.queue_size():
+        ts.value += rnd.choice([0.001, 0.1, 10, 1000])
+        timer.service()
+        assert all(t <= ts.value for t, _ in called)
+        assert timer.queue_size() == 0 or timer._next_timestamp() > ts.value
+    assert called == expected
+
+
+def test_timer_coalesces_events_with_same_deadline():
+    ts = MockTimestamp(0)
+    timer = QueueTimer(ts, resolution=0.25, coalesce=True)
+    cb1 = Callback()
+    cb2 = Callback()
+
+    event = timer.schedule(1.1, cb1)
+    assert event.timestamp == 1.25
+    assert timer.schedule(1.2, cb1) is event
+    timer.schedule(1.2, cb2)
+    later_event = timer.schedule(1.3, cb1)
+    assert timer.queue_size() == 3
+
+    ts.value = 1.2
+    timer.service()
+    assert cb1.call_count == 0
+
+    ts.value = 1.25
+    timer.service()
+    assert cb1.call_count == 1
+    assert cb2.call_count == 1
+
+    assert timer.schedule(0.125, cb1) is later_event
+    assert timer.schedule(0.25, cb2) is not later_event
+    assert timer.queue_size() == 2
+
+    ts.value = 1.5
+    timer.service()
+    assert cb1.call_count == 2
+    assert cb2.call_count == 2
+    assert timer.queue_size() == 0
+
+
+@skipper
+@pytest.mark.parametrize('count', [50000, 200000])
+def test_timer_perf(count):
+    rnd = random.Random(42)
+    delays = [rnd.uniform(0.5, 30) for _ in range(count)]
+    callbacks = [Callback() for _ in range(count)]
+    ts = MockTimestamp(0)
+    timer = QueueTimer(ts)
+
+    started = time.perf_counter()
+    events = [timer.schedule(delay, cb) for delay, cb in zip(delays, callbacks)]
+    scheduled = time.perf_counter()
+    for event in events[::2]:
+        event.cancel()
+    for cb in callbacks[1::4]:
+        timer.cancel(cb)
+    cancelled = time.perf_counter()
+    while timer.queue_size():
+        ts.value += 0.1
+        timer.service()
+    serviced = time.perf_counter()
+
+    print("{} timers: schedule {:.3f} sec, cancel {:.3f} sec, service {:.3f} sec"
+          .format(count, scheduled - started, cancelled - scheduled, serviced - cancelled))
+    assert sum(cb.call_count for cb in callbacks) == count // 4
@@ -262,3 +262,23 @@ def test_stashing_router_can_process_stashed_until_first_restash():
     router.process_stashed_until_first_restash()
     assert router.stash_size() == 0
     assert calls == [msg_a, msg_b, msg_c, msg_d, msg_e, msg_a, msg_c, msg_e, msg_c, msg_c]
+
+
+def test_process_with_other_handler_stashes_for_subscribed_one():
+    handler = Mock(return_value=(PROCESS, ""))
+    other_handler = Mock(return_value=(STASH, "reason"))
+
+    bus = InternalBus()
+    router = StashingRouter(10, buses=[bus])
+    router.subscribe(SomeMessage, handler)
+
+    message = create_some_message()
+    assert not router.process_with(other_handler, message, 'hello')
+    other_handler.assert_called_once_with(message, 'hello')
+    handler.assert_not_called()
+    assert router.stash_size(STASH) == 1
+
+    router.process_all_stashed()
+    handler.assert_called_once_with(message, 'hello')
+    other_handler.assert_called_once_with(message, 'hello')
+    assert router.stash_size() == 0
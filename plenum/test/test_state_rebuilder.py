@@ -0,0 +1,135 @@
+import time
+
+import pytest
+
+from ledger.compact_merkle_tree import CompactMerkleTree
+from plenum.common.constants import DOMAIN_LEDGER_ID
+from plenum.common.ledger import Ledger
+from plenum.common.member.member import Member
+from plenum.common.util import randomString
+from plenum.server.database_manager import DatabaseManager
+from plenum.server.request_handlers.nym_handler import NymHandler
+from plenum.server.request_managers.write_request_manager import WriteRequestManager
+from plenum.server.state_rebuilder import StateRebuilder
+from state.pruning_state import PruningState
+from storage.kv_in_memory import KeyValueStorageInMemory
+from storage.kv_store_leveldb import KeyValueStorageLeveldb
+from storage.kv_store_leveldb_int_keys import KeyValueStorageLeveldbIntKeys
+
+TXN_COUNT = 300
+
+# The perf test compares rebuild times, which makes it slow and dependent on
+# the machine, setting `SkipTests` to False runs it
+SkipTests = True
+skipper = pytest.mark.skipif(SkipTests, reason='Perf test')
+
+
+def create_ledger(tdir, txn_count):
+    ledger = Ledger(CompactMerkleTree(), dataDir=tdir,
+                    transactionLogStore=KeyValueStorageLeveldbIntKeys(tdir, 'domain_transactions'))
+    creators = [randomString(22) for _ in range(5)]
+    for i in range(txn_count):
+        # Some txns update NYMs added earlier
+        nym = randomString(22) if i % 3 else creators[i % 5]
+        ledger.add(Member.nym_txn(nym=nym, verkey=randomString(44),
+                                  creator=creators[i % 5]))
+    return ledger
+
+
+def create_write_manager(tconf, ledger, state):
+    db_manager = DatabaseManager()
+    db_manager.register_new_database(DOMAIN_LEDGER_ID, ledger, state)
+    write_manager = WriteRequestManager(db_manager)
+    write_manager.register_req_handler(NymHandler(tconf, db_manager))
+    return write_manager
+
+
+def restore_sequentially(write_manager):
+    for _, txn in write_manager.database_manager.get_ledger(DOMAIN_LEDGER_ID).getAllTxn():
+        write_manager.restore_state(txn, DOMAIN_LEDGER_ID)
+
+
+def create_rebuilder(write_manager, chunk_size=50, flush_size=10000, workers=0):
+    return StateRebuilder(write_manager, DOMAIN_LEDGER_ID,
+                          chunk_size=chunk_size, flush_size=flush_size,
+                          workers=workers)
+
+
+@pytest.fixture(scope='function')
+def ledger(tdir_for_func):
+    ledger = create_ledger(tdir_for_func, TXN_COUNT)
+    yield ledger
+    ledger.stop()
+
+
+@pytest.fixture(scope='function')
+def expected_state(tconf, ledger):
+    state = PruningState(KeyValueStorageInMemory())
+    restore_sequentially(create_write_manager(tconf, ledger, state))
+    return state
+
+
+@pytest.mark.parametrize('workers', [0, 1])
+def test_rebuilt_state_equals_sequentially_restored(tconf, ledger, expected_state, workers):
+    state = PruningState(KeyValueStorageInMemory())
+    rebuilder = create_rebuilder(create_write_manager(tconf, ledger, state),
+                                 workers=workers)
+    assert rebuilder.is_needed
+
+    assert rebuilder.rebuild() == TXN_COUNT
+    assert not rebuilder.is_needed
+    assert bytes(state.committedHeadHash) == bytes(expected_state.committedHeadHash)
+    assert state.as_dict == expected_state.as_dict
+
+
+def test_interrupted_rebuild_is_resumed(tconf, ledger, expected_state):
+    state = PruningState(KeyValueStorageInMemory())
+    write_manager = create_write_manager(tconf, ledger, state)
+    restore_state = write_manager.restore_state
+    restored = []
+
+    def failing_restore_state(txn, ledger_id):
+        if len(restored) == 220:
+            raise RuntimeError("Node is stopped")
+        restore_state(txn, ledger_id)
+        restored.append(txn)
+
+    write_manager.restore_state = failing_restore_state
+    with pytest.raises(RuntimeError):
+        create_rebuilder(write_manager, flush_size=1).rebuild()
+    # The state is left as of the last flush
+    state = PruningState(state._kv)
+    assert state.bulk_update_checkpoint == b'200'
+
+    write_manager = create_write_manager(tconf, ledger, state)
+    rebuilder = create_rebuilder(write_manager)
+    assert rebuilder.is_needed
+    assert rebuilder.rebuild() == TXN_COUNT - 200
+    assert state.bulk_update_checkpoint is None
+    assert state.as_dict == expected_state.as_dict
+
+
+@skipper
+def test_state_rebuild_perf(tconf, tdir_for_func):
+    txn_count = 5000
+    ledger = create_ledger(tdir_for_func, txn_count)
+    timings = {}
+    roots = {}
+    for name in ('sequential', 'bulk'):
+        state = PruningState(KeyValueStorageLeveldb(tdir_for_func, name + '_state'))
+        write_manager = create_write_manager(tconf, ledger, state)
+        started = time.perf_counter()
+        if name == 'sequential':
+            restore_sequentially(write_manager)
+        else:
+            create_rebuilder(write_manager, chunk_size=1000,
+                             flush_size=tconf.STATE_REBUILD_FLUSH_SIZE,
+                             workers=tconf.STATE_REBUILD_WORKERS).rebuild()
+        timings[name] = time.perf_counter() - started
+        roots[name] = bytes(state.committedHeadHash)
+        state.close()
+    ledger.stop()
+
+    assert roots['sequential'] == roots['bulk']
+    print("State rebuild of {} txns: sequential {:.2f} sec, bulk {:.2f} sec"
+          .format(txn_count, timings['sequential'], timings['bulk']))
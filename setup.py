@@ -136,6 +136,10 @@ setup(
              'scripts/udp_sender', 'scripts/udp_receiver', 'scripts/filter_log',
              'scripts/log_stats',
              'scripts/init_bls_keys',
+             'scripts/migrate_state_to_gc',
+             'scripts/rebuild_txn_index',
+             'scripts/migrate_int_keys_ledgers',
+             'scripts/rebuild_state',
              'scripts/process_logs/process_logs',
              'scripts/process_logs/process_logs.yml']
 )
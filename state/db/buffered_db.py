@@ -0,0 +1,76 @@
+from typing import Iterable, Tuple
+
+from state.db.db import BaseDB
+from state.db.persistent_db import PersistentDB
+from state.db.pruning_db import node_references
+from storage.kv_store import KeyValueStorage
+
+
+class BufferedDB(BaseDB):
+    """
+    Keeps trie nodes written by a trie in memory on top of a persistent
+    node storage.
+
+    `flush` writes only the buffered nodes reachable from the given roots to
+    the storage, in one batch, so nodes replaced by later updates before the
+    flush never hit the storage. Nodes which are not buffered are read from
+    the underlying db, their subtrees are expected to be in the storage
+    already.
+    """
+
+    counts_references = False
+
+    def __init__(self, db: PersistentDB, keyValueStorage: KeyValueStorage):
+        self._db = db
+        self._keyValueStorage = keyValueStorage
+        self._nodes = {}
+        self._size = 0
+
+    @property
+    def buffered_size(self) -> int:
+        """
+        Total size of buffered nodes in bytes
+        """
+        return self._size
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def get(self, key: bytes) -> bytes:
+        value = self._nodes.get(bytes(key))
+        if value is not None:
+            return value
+        return self._db.get(key)
+
+    def inc_refcount(self, key, value):
+        key = bytes(key)
+        if key not in self._nodes:
+            value = bytes(value)
+            self._nodes[key] = value
+            self._size += len(key) + len(value)
+
+    def dec_refcount(self, key):
+        pass
+
+    def flush(self, root_hashes: Iterable[bytes],
+              extra_items: Iterable[Tuple[bytes, bytes]] = ()) -> int:
+        """
+        Write buffered nodes reachable from `root_hashes` together with
+        `extra_items` in one batch and drop all buffered nodes
+
+        :return: number of written nodes
+        """
+        items = []
+        stack = [bytes(root_hash) for root_hash in root_hashes]
+        while stack:
+            node_hash = stack.pop()
+            encoded = self._nodes.pop(node_hash, None)
+            if encoded is None:
+                # Already written or stored before buffering started
+                continue
+            items.append((node_hash, encoded))
+            stack.extend(node_references(encoded))
+        self._keyValueStorage.setBatch(items + list(extra_items))
+        self._nodes.clear()
+        self._size = 0
+        return len(items)
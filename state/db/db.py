@@ -2,6 +2,8 @@ from abc import abstractmethod
 
 
 class BaseDB:
+    # Whether `dec_refcount` needs to be called for nodes replaced by a trie
+    counts_references = True
 
     @abstractmethod
     def inc_refcount(self, key, value):
@@ -1,13 +1,29 @@
 from state.db.db import BaseDB
+from state.db.trie_node_cache import TrieNodeCache
 from storage.kv_store import KeyValueStorage
 
 
 class PersistentDB(BaseDB):
-    def __init__(self, keyValueStorage: KeyValueStorage):
+    counts_references = False
+
+    def __init__(self, keyValueStorage: KeyValueStorage,
+                 node_cache: TrieNodeCache = None):
         self._keyValueStorage = keyValueStorage
+        self._node_cache = node_cache
+
+    @property
+    def node_cache(self):
+        return self._node_cache
 
     def get(self, key: bytes) -> bytes:
-        return self._keyValueStorage.get(key)
+        if self._node_cache is None:
+            return self._keyValueStorage.get(key)
+        key = bytes(key)
+        value = self._node_cache.get(key)
+        if value is None:
+            value = bytes(self._keyValueStorage.get(key))
+            self._node_cache.put(key, value)
+        return value
 
     def _has_key(self, key: bytes):
         try:
@@ -25,6 +41,9 @@ class PersistentDB(BaseDB):
 
     def inc_refcount(self, key, value):
         self._keyValueStorage.put(key, value)
+        if self._node_cache is not None:
+            # Freshly written nodes are the most likely to be read next
+            self._node_cache.put(bytes(key), bytes(value))
 
     def dec_refcount(self, key):
         pass
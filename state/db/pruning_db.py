@@ -0,0 +1,366 @@
+from collections import Counter
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from state.db.persistent_db import PersistentDB
+from state.db.refcount_db import DEATH_ROW_OFFSET
+from state.db.trie_node_cache import TrieNodeCache
+from state.trie.pruning_trie import BLANK_NODE, BLANK_ROOT, Trie, \
+    NODE_TYPE_BRANCH, NODE_TYPE_EXTENSION
+from state.util.fast_rlp import decode_optimized as rlp_decode
+from storage.kv_store import KeyValueStorage
+from stp_core.common.log import getlogger
+
+logger = getlogger()
+
+HASH_SIZE = 32
+COUNTER_SIZE = 8
+
+# Garbage collection metadata lives in the same storage as trie nodes, all
+# keys share a prefix which cannot be confused with a 32 byte node hash
+GC_PREFIX = b'\x88\xc8gc:'
+EPOCH_KEY = GC_PREFIX + b'epoch'
+ROOTS_KEY = GC_PREFIX + b'roots'
+NEXT_COLLECT_KEY = GC_PREFIX + b'next_collect'
+REFCOUNT_PREFIX = GC_PREFIX + b'rc:'
+DEATH_ROW_PREFIX = GC_PREFIX + b'deathrow:'
+
+
+def _encode_counter(value: int) -> bytes:
+    return value.to_bytes(COUNTER_SIZE, 'big')
+
+
+def _decode_counter(value) -> int:
+    return int.from_bytes(bytes(value), 'big')
+
+
+def _split_hashes(value) -> List[bytes]:
+    value = bytes(value)
+    return [value[i:i + HASH_SIZE] for i in range(0, len(value), HASH_SIZE)]
+
+
+def node_references(encoded) -> List[bytes]:
+    """
+    Hashes of the stored nodes referenced by an encoded trie node, nodes
+    shorter than 32 bytes are embedded into their parents so references are
+    looked for inside them too. A hash is returned as many times as it is
+    referenced.
+    """
+    refs = []
+    stack = [rlp_decode(bytes(encoded))]
+    while stack:
+        node = stack.pop()
+        node_type = Trie._get_node_type(node)
+        if node_type == NODE_TYPE_BRANCH:
+            children = node[:16]
+        elif node_type == NODE_TYPE_EXTENSION:
+            children = [node[1]]
+        else:
+            continue
+        for child in children:
+            if child == BLANK_NODE:
+                continue
+            if isinstance(child, list):
+                stack.append(child)
+            elif len(child) == HASH_SIZE:
+                refs.append(bytes(child))
+    return refs
+
+
+class PruningDB(PersistentDB):
+    """
+    Trie node storage which deletes nodes that are no longer reachable from
+    the last `keep_roots` committed roots.
+
+    This follows the death row design of `RefcountDB`, but keeps trie nodes
+    under their hashes (so databases stay readable by `PersistentDB`) and
+    counts references structurally: a stored node holds one reference to
+    every stored node it points to, and each of the kept committed roots
+    holds one reference to its root node. A reference count is changed only
+    when a node is stored for the first time, deleted, or when a root enters
+    or leaves the kept roots, so identical subtrees shared between several
+    parents are accounted correctly.
+
+    A node whose reference count drops to zero (this includes every new
+    node until something references it) is put on the death row of the
+    current epoch, which is the number of commits made so far, and its
+    counter is set to `DEATH_ROW_OFFSET + epoch`. The node is deleted by
+    `collect_garbage` once `death_row_delay` more commits have been made,
+    unless it got referenced or stored again in the meantime. The delay
+    protects nodes of batches which are applied but not committed yet.
+    """
+
+    def __init__(self, keyValueStorage: KeyValueStorage, keep_roots: int,
+                 death_row_delay: int, node_cache: TrieNodeCache = None):
+        if keep_roots < 1:
+            raise ValueError("At least one committed root should be kept, "
+                             "got {}".format(keep_roots))
+        super().__init__(keyValueStorage, node_cache)
+        self.keep_roots = keep_roots
+        self.death_row_delay = death_row_delay
+        self._epoch = self._get_counter(EPOCH_KEY)
+        self._next_collect = self._get_counter(NEXT_COLLECT_KEY)
+        self._roots = _split_hashes(self._keyValueStorage.get(ROOTS_KEY)) \
+            if self.is_initialized else []
+        self._death_row = []
+
+    @property
+    def is_initialized(self) -> bool:
+        """
+        Whether reference counts are maintained in the storage, databases
+        created without garbage collection need to be migrated first
+        """
+        return EPOCH_KEY in self._keyValueStorage
+
+    @property
+    def epoch(self) -> int:
+        return self._epoch
+
+    @property
+    def roots(self) -> Tuple[bytes, ...]:
+        return tuple(self._roots)
+
+    @staticmethod
+    def forget(keyValueStorage: KeyValueStorage):
+        """
+        Mark storage as not maintained by PruningDB anymore, it needs to be
+        migrated again before garbage collection can be turned back on
+        """
+        if EPOCH_KEY in keyValueStorage:
+            keyValueStorage.remove(EPOCH_KEY)
+
+    def inc_refcount(self, key, value):
+        key = bytes(key)
+        refcount = self._get_refcount(key)
+        if refcount is None:
+            self._keyValueStorage.put(key, value)
+            self._add_references(node_references(value))
+            self._schedule(key)
+        elif refcount >= DEATH_ROW_OFFSET:
+            # Node is written again while awaiting collection, give it a
+            # full delay once more
+            self._schedule(key)
+        if self._node_cache is not None:
+            self._node_cache.put(key, bytes(value))
+
+    def dec_refcount(self, key):
+        # Reference counts are maintained structurally, nodes replaced by the
+        # trie may still be referenced from elsewhere
+        pass
+
+    def on_commit(self, root_hash: bytes):
+        """
+        Make `root_hash` the most recent committed root and release the
+        oldest one if more than `keep_roots` roots are kept
+        """
+        root_hash = bytes(root_hash)
+        if self._roots and self._roots[-1] == root_hash:
+            return
+        self._add_references([root_hash])
+        self._flush_death_row()
+        self._epoch += 1
+        self._roots.append(root_hash)
+        released = self._roots[:-self.keep_roots]
+        del self._roots[:-self.keep_roots]
+        self._keyValueStorage.setBatch([
+            (ROOTS_KEY, b''.join(self._roots)),
+            (EPOCH_KEY, _encode_counter(self._epoch))])
+        self._remove_references(released)
+        self._flush_death_row()
+
+    def collect_garbage(self, max_nodes: int) -> Tuple[int, int]:
+        """
+        Delete nodes whose death row delay has passed, looking at no more
+        than `max_nodes` death row entries
+
+        :return: number of deleted nodes and number of reclaimed bytes
+        """
+        checked = deleted = reclaimed = 0
+        while checked < max_nodes and \
+                self._next_collect + self.death_row_delay <= self._epoch:
+            epoch = self._next_collect
+            death_row_key = self._death_row_key(epoch)
+            hashes = _split_hashes(self._keyValueStorage.get(death_row_key)) \
+                if death_row_key in self._keyValueStorage else []
+            step = hashes[:max_nodes - checked]
+            checked += len(step)
+            for node_hash in step:
+                size = self._delete_if_dead(node_hash, epoch)
+                if size is not None:
+                    deleted += 1
+                    reclaimed += size
+            if len(step) < len(hashes):
+                self._keyValueStorage.put(death_row_key,
+                                          b''.join(hashes[len(step):]))
+                break
+            if hashes:
+                self._keyValueStorage.remove(death_row_key)
+            self._next_collect += 1
+            self._keyValueStorage.put(NEXT_COLLECT_KEY,
+                                      _encode_counter(self._next_collect))
+        self._flush_death_row()
+        return deleted, reclaimed
+
+    def migrate(self, root_hashes: Sequence[bytes], batch_size=10000) -> Tuple[int, int]:
+        """
+        Start maintaining reference counts in a database created without
+        garbage collection. Reference counts are computed for the nodes
+        reachable from the last `keep_roots` of `root_hashes` (ordered from
+        the oldest to the most recent one), which become the kept roots, all
+        other nodes are deleted.
+
+        Reference counts are written to the storage as nodes are traversed
+        and deletes are written in batches of `batch_size` while the storage
+        is iterated, so memory used does not depend on the size of the state.
+
+        :return: number of kept nodes and number of deleted nodes
+        """
+        roots = [bytes(root_hash) for root_hash in root_hashes][-self.keep_roots:]
+
+        # Metadata left from an earlier period with garbage collection enabled
+        self._remove_keys_in_batches((key for key in self._iterate_keys()
+                                      if key.startswith(GC_PREFIX)),
+                                     batch_size)
+
+        refcounts = {}
+        kept = 0
+
+        def add_reference(node_hash: bytes) -> bool:
+            # Returns whether the node is referenced for the first time
+            count = refcounts.get(node_hash)
+            if count is None:
+                count = self._get_refcount(node_hash) or 0
+            refcounts[node_hash] = count + 1
+            if len(refcounts) >= batch_size:
+                self._keyValueStorage.setBatch(
+                    (REFCOUNT_PREFIX + key, _encode_counter(value))
+                    for key, value in refcounts.items())
+                refcounts.clear()
+            return count == 0
+
+        stack = []
+        for root_hash in roots:
+            if root_hash != BLANK_ROOT and add_reference(root_hash):
+                stack.append(root_hash)
+        while stack:
+            kept += 1
+            for ref in node_references(self._keyValueStorage.get(stack.pop())):
+                if add_reference(ref):
+                    stack.append(ref)
+        self._keyValueStorage.setBatch(
+            (REFCOUNT_PREFIX + key, _encode_counter(value))
+            for key, value in refcounts.items())
+        logger.info("{} reachable trie nodes found".format(kept))
+
+        deleted = self._remove_keys_in_batches(
+            (key for key in self._iterate_keys()
+             if len(key) == HASH_SIZE and self._get_refcount(key) is None),
+            batch_size)
+        if self._node_cache is not None:
+            self._node_cache.clear()
+        logger.info("{} unreachable trie nodes deleted".format(deleted))
+
+        self._epoch = self._next_collect = 0
+        self._roots = roots
+        self._death_row = []
+        self._keyValueStorage.setBatch([
+            (ROOTS_KEY, b''.join(roots)),
+            (NEXT_COLLECT_KEY, _encode_counter(0)),
+            (EPOCH_KEY, _encode_counter(0))])
+        return kept, deleted
+
+    def _iterate_keys(self) -> Iterable[bytes]:
+        for key in self._keyValueStorage.iterator(include_value=False):
+            yield bytes(key)
+
+    def _remove_keys_in_batches(self, keys: Iterable[bytes], batch_size: int) -> int:
+        removed = 0
+        batch = []
+        for key in keys:
+            batch.append((KeyValueStorage.REMOVE_OP, key, None))
+            if len(batch) >= batch_size:
+                self._keyValueStorage.do_ops_in_batch(batch)
+                removed += len(batch)
+                batch = []
+        if batch:
+            self._keyValueStorage.do_ops_in_batch(batch)
+            removed += len(batch)
+        return removed
+
+    def _delete_if_dead(self, node_hash: bytes, epoch: int) -> Optional[int]:
+        # A node could have been referenced again or rescheduled for a
+        # later epoch after it was put on this death row
+        if self._get_refcount(node_hash) != DEATH_ROW_OFFSET + epoch:
+            return None
+        encoded = bytes(self._keyValueStorage.get(node_hash))
+        self._keyValueStorage.remove(node_hash)
+        self._keyValueStorage.remove(REFCOUNT_PREFIX + node_hash)
+        if self._node_cache is not None:
+            self._node_cache.remove(node_hash)
+        self._remove_references(node_references(encoded))
+        return len(node_hash) + len(encoded) + \
+            len(REFCOUNT_PREFIX) + len(node_hash) + COUNTER_SIZE
+
+    def _add_references(self, refs: Iterable[bytes]):
+        updates = []
+        for ref, count in Counter(refs).items():
+            if ref == BLANK_ROOT:
+                continue
+            refcount = self._get_refcount(ref) or 0
+            if refcount >= DEATH_ROW_OFFSET:
+                refcount = 0
+            updates.append((REFCOUNT_PREFIX + ref,
+                            _encode_counter(refcount + count)))
+        self._keyValueStorage.setBatch(updates)
+
+    def _remove_references(self, refs: Iterable[bytes]):
+        updates = []
+        for ref, count in Counter(refs).items():
+            if ref == BLANK_ROOT:
+                continue
+            refcount = self._get_refcount(ref)
+            if refcount is None or refcount >= DEATH_ROW_OFFSET:
+                logger.warning("Trie node {} is released but has no "
+                               "references".format(ref.hex()))
+                continue
+            if refcount > count:
+                updates.append((REFCOUNT_PREFIX + ref,
+                                _encode_counter(refcount - count)))
+            else:
+                updates.append((REFCOUNT_PREFIX + ref,
+                                _encode_counter(DEATH_ROW_OFFSET + self._epoch)))
+                self._death_row.append(ref)
+        self._keyValueStorage.setBatch(updates)
+
+    def _schedule(self, key: bytes):
+        self._keyValueStorage.put(REFCOUNT_PREFIX + key,
+                                  _encode_counter(DEATH_ROW_OFFSET + self._epoch))
+        self._death_row.append(key)
+
+    def _flush_death_row(self):
+        if not self._death_row:
+            return
+        key = self._death_row_key(self._epoch)
+        scheduled = bytes(self._keyValueStorage.get(key)) \
+            if key in self._keyValueStorage else b''
+        self._keyValueStorage.put(key, scheduled + b''.join(self._death_row))
+        self._death_row = []
+
+    def flush(self):
+        self._flush_death_row()
+
+    def _get_refcount(self, key: bytes) -> Optional[int]:
+        try:
+            return _decode_counter(
+                self._keyValueStorage.get(REFCOUNT_PREFIX + key))
+        except KeyError:
+            return None
+
+    def _get_counter(self, key: bytes) -> int:
+        try:
+            return _decode_counter(self._keyValueStorage.get(key))
+        except KeyError:
+            return 0
+
+    @staticmethod
+    def _death_row_key(epoch: int) -> bytes:
+        return DEATH_ROW_PREFIX + _encode_counter(epoch)
@@ -0,0 +1,35 @@
+from common.lru_cache import LruCache
+
+
+class TrieNodeCache(LruCache):
+    """
+    LRU cache of encoded trie nodes keyed by node hash and bounded by the
+    total size of cached keys and values in bytes.
+
+    Trie nodes are content-addressed, so a cached node never becomes stale
+    and the cache does not need invalidation on state updates or reverts.
+    """
+
+    def __init__(self, max_size: int):
+        super().__init__(max_size)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: bytes):
+        value = super().get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key: bytes, value: bytes):
+        super().put(key, value, len(key) + len(value))
+
+    def pop_stats(self):
+        """
+        Return number of hits and misses since the previous call
+        """
+        stats = self.hits, self.misses
+        self.hits = self.misses = 0
+        return stats
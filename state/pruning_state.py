@@ -1,7 +1,10 @@
 from binascii import unhexlify
 from typing import Optional
 
+from state.db.buffered_db import BufferedDB
 from state.db.persistent_db import PersistentDB
+from state.db.pruning_db import PruningDB
+from state.db.trie_node_cache import TrieNodeCache
 from state.state import State
 from state.trie.pruning_trie import BLANK_ROOT, Trie, BLANK_NODE, \
     bin_to_nibbles
@@ -9,6 +12,9 @@ from state.util.fast_rlp import encode_optimized as rlp_encode, \
     decode_optimized as rlp_decode
 from state.util.utils import to_string, isHex
 from storage.kv_store import KeyValueStorage
+from stp_core.common.log import getlogger
+
+logger = getlogger()
 
 
 class PruningState(State):
@@ -24,17 +30,134 @@ class PruningState(State):
 
     # SOME KEY THAT DOES NOT COLLIDE WITH ANY STATE VARIABLE'S NAME
     rootHashKey = b'\x88\xc8\x88 \x9a\xa7\x89\x1b'
+    bulkUpdateCheckpointKey = b'\x88\xc8bulk:checkpoint'
 
-    def __init__(self, keyValueStorage: KeyValueStorage):
+    def __init__(self, keyValueStorage: KeyValueStorage, node_cache_size=0,
+                 gc_keep_roots=0, gc_death_row_delay=100):
+        """
+        :param node_cache_size: maximum size in bytes of encoded trie nodes
+        cached in memory, 0 disables the cache
+        :param gc_keep_roots: number of last committed roots whose nodes are
+        kept when garbage collection is enabled, 0 disables garbage
+        collection and all nodes are kept forever. Garbage collection stays
+        disabled for a storage which was not migrated for it with
+        `PruningDB.migrate`
+        :param gc_death_row_delay: number of commits after which a node which
+        is not referenced anymore can be deleted
+        """
         self._kv = keyValueStorage
-        if self.rootHashKey in self._kv:
+        is_new = self.rootHashKey not in self._kv
+        if not is_new:
             rootHash = bytes(self._kv.get(self.rootHashKey))
         else:
             rootHash = BLANK_ROOT
             self._kv.put(self.rootHashKey, BLANK_ROOT)
-        self._trie = Trie(
-            PersistentDB(self._kv),
-            rootHash)
+        self._node_cache = TrieNodeCache(node_cache_size) \
+            if node_cache_size else None
+        db = None
+        if gc_keep_roots:
+            db = PruningDB(self._kv, gc_keep_roots, gc_death_row_delay,
+                           self._node_cache)
+            if not db.is_initialized and is_new:
+                db.migrate([rootHash])
+            elif not db.is_initialized:
+                logger.warning("State storage is not migrated for garbage "
+                               "collection, it stays disabled, see "
+                               "scripts/migrate_state_to_gc")
+                db = None
+        if db is None:
+            if not getattr(self._kv, 'read_only', False):
+                PruningDB.forget(self._kv)
+            db = PersistentDB(self._kv, self._node_cache)
+        self._db = db
+        self._trie = Trie(db, rootHash)
+        # Set while a bulk update is in progress
+        self._bulk_db = None  # type: Optional[BufferedDB]
+        self._bulk_committed_root = None
+
+    @property
+    def node_cache(self) -> Optional[TrieNodeCache]:
+        return self._node_cache
+
+    @property
+    def gc_enabled(self) -> bool:
+        return isinstance(self._db, PruningDB)
+
+    def collect_garbage(self, max_nodes: int):
+        """
+        Delete no more than `max_nodes` trie nodes which are not reachable
+        from the kept committed roots anymore
+
+        :return: number of deleted nodes and number of reclaimed bytes
+        """
+        if not self.gc_enabled:
+            return 0, 0
+        return self._db.collect_garbage(max_nodes)
+
+    @property
+    def in_bulk_update(self) -> bool:
+        return self._bulk_db is not None
+
+    @property
+    def bulk_update_size(self) -> int:
+        """
+        Size in bytes of trie nodes buffered by the bulk update in progress
+        """
+        return self._bulk_db.buffered_size if self.in_bulk_update else 0
+
+    @property
+    def bulk_update_checkpoint(self) -> Optional[bytes]:
+        """
+        Checkpoint of the last flush of a bulk update which was not finished,
+        None if there is no such bulk update
+        """
+        if self.bulkUpdateCheckpointKey not in self._kv:
+            return None
+        return bytes(self._kv.get(self.bulkUpdateCheckpointKey))
+
+    def begin_bulk_update(self):
+        """
+        Start buffering trie nodes in memory instead of writing every node
+        of every update. Commits only move the committed head in memory until
+        `flush_bulk_update`, so a crash in the middle of a bulk update leaves
+        the state as of the last flush.
+        """
+        if self.in_bulk_update:
+            return
+        self._bulk_committed_root = self.committedHeadHash
+        self._bulk_db = BufferedDB(self._db, self._kv)
+        self._trie._db = self._bulk_db
+
+    def flush_bulk_update(self, checkpoint: bytes) -> int:
+        """
+        Write the committed head, trie nodes reachable from it and from the
+        current head and the `checkpoint` in one batch
+
+        :return: number of written nodes
+        """
+        committed_root = bytes(self._bulk_committed_root)
+        return self._bulk_db.flush(
+            [committed_root, bytes(self.headHash)],
+            [(self.rootHashKey, committed_root),
+             (self.bulkUpdateCheckpointKey, checkpoint)])
+
+    def finish_bulk_update(self, checkpoint: bytes):
+        """
+        Flush the bulk update in progress with the final `checkpoint` and go
+        back to writing every update. Nodes written by the bulk update do not
+        have reference counts, so with garbage collection enabled the storage
+        is migrated to the new committed root.
+        """
+        if not self.in_bulk_update:
+            return
+        self.flush_bulk_update(checkpoint)
+        committed_root = self._bulk_committed_root
+        self._trie._db = self._db
+        self._bulk_db = None
+        self._bulk_committed_root = None
+        if self.gc_enabled:
+            self._db.migrate([committed_root])
+        self._kv.remove(self.bulkUpdateCheckpointKey)
 
     @property
     def head(self):
@@ -95,7 +218,12 @@ class PruningState(State):
             rootHash = rootHash
         else:
             rootHash = self.headHash
+        if self.in_bulk_update:
+            self._bulk_committed_root = rootHash
+            return
         self._kv.put(self.rootHashKey, rootHash)
+        if self.gc_enabled:
+            self._db.on_commit(rootHash)
 
     def revertToHead(self, headHash=None):
         head = self._hash_to_node(headHash)
@@ -143,6 +271,8 @@ class PruningState(State):
 
     @property
     def committedHeadHash(self):
+        if self.in_bulk_update:
+            return self._bulk_committed_root
         return self._kv.get(self.rootHashKey)
 
     @property
@@ -154,6 +284,11 @@ class PruningState(State):
         return self._kv and self.committedHeadHash == BLANK_ROOT
 
     def close(self):
+        # A bulk update which is not finished is resumed from its last
+        # checkpoint, nothing is flushed here
+        self._bulk_db = None
+        if self.gc_enabled and self._kv and not self._kv.closed:
+            self._db.flush()
         if self._kv:
             self._kv.close()
             self._kv = None
@@ -161,3 +296,44 @@ class PruningState(State):
     @staticmethod
     def get_decoded(encoded):
         return rlp_decode(encoded)[0]
+
+
+class ReadOnlyPruningState(PruningState):
+    """
+    State opened by a process which does not write it, e.g. over a storage
+    opened read-only while the node keeps writing it. Nothing is written
+    to the storage, the committed head is the root it was opened with.
+    """
+
+    def __init__(self, keyValueStorage: KeyValueStorage,
+                 committed_root: bytes = None):
+        """
+        :param committed_root: root to read the state for, the committed
+        root found in the storage if not given
+        """
+        self._kv = keyValueStorage
+        if committed_root is None:
+            committed_root = bytes(self._kv.get(self.rootHashKey)) \
+                if self.rootHashKey in self._kv else BLANK_ROOT
+        committed_root = bytes(committed_root)
+        self._committed_root = committed_root
+        self._node_cache = None
+        self._db = PersistentDB(self._kv)
+        self._trie = Trie(self._db, committed_root)
+        self._bulk_db = None  # type: Optional[BufferedDB]
+        self._bulk_committed_root = None
+
+    @property
+    def committedHeadHash(self):
+        return self._committed_root
+
+    def pin(self, committed_root: bytes):
+        """
+        Read the state for another committed root, which has to be written
+        to the storage by the time it was opened
+        """
+        self._committed_root = bytes(committed_root)
+        self._trie = Trie(self._db, self._committed_root)
+
+    def commit(self, rootHash=None, rootNode=None):
+        raise ValueError("Read-only state can not be committed")
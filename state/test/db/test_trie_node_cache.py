@@ -0,0 +1,98 @@
+import pytest
+
+from state.db.trie_node_cache import TrieNodeCache
+from state.pruning_state import PruningState
+from storage.kv_in_memory import KeyValueStorageInMemory
+from storage.kv_store_leveldb import KeyValueStorageLeveldb
+
+
+class CountingKeyValueStorage(KeyValueStorageInMemory):
+    def __init__(self):
+        super().__init__()
+        self.gets = 0
+
+    def get(self, key):
+        self.gets += 1
+        return super().get(key)
+
+
+def test_cache_is_bounded_by_size_in_bytes():
+    cache = TrieNodeCache(100)
+    cache.put(b'k1', b'v' * 38)
+    cache.put(b'k2', b'v' * 38)
+    assert cache.size == 80
+    assert len(cache) == 2
+
+    # Touch k1, so k2 becomes least recently used
+    assert cache.get(b'k1') == b'v' * 38
+    cache.put(b'k3', b'v' * 38)
+    assert b'k1' in cache
+    assert b'k2' not in cache
+    assert b'k3' in cache
+    assert cache.size == 80
+
+    # Items bigger than the whole cache are not cached
+    cache.put(b'k4', b'v' * 100)
+    assert b'k4' not in cache
+    assert len(cache) == 2
+
+    cache.remove(b'k1')
+    assert cache.size == 40
+    cache.clear()
+    assert cache.size == 0
+    assert len(cache) == 0
+
+
+def test_cache_counts_hits_and_misses():
+    cache = TrieNodeCache(100)
+    cache.put(b'k1', b'v1')
+    cache.get(b'k1')
+    cache.get(b'k1')
+    cache.get(b'k2')
+    assert cache.pop_stats() == (2, 1)
+    assert cache.pop_stats() == (0, 0)
+
+
+def test_state_reads_are_served_from_cache():
+    kv = CountingKeyValueStorage()
+    state = PruningState(kv, node_cache_size=1024 * 1024)
+    for i in range(100):
+        state.set(str(i).encode(), str(i).encode())
+    state.commit(state.headHash)
+
+    kv.gets = 0
+    for i in range(100):
+        assert state.get(str(i).encode()) == str(i).encode()
+        assert state.get(str(i).encode(), isCommitted=False) == str(i).encode()
+    proof = state.generate_state_proof(b'42', serialize=True)
+    # Only the committed root hash is read from storage, all the nodes were
+    # cached when they were written
+    assert kv.gets == 100
+    hits, misses = state.node_cache.pop_stats()
+    assert hits > 0
+    assert misses == 0
+
+    uncached = PruningState(kv)
+    assert uncached.headHash == state.headHash
+    assert uncached.generate_state_proof(b'42', serialize=True) == proof
+
+
+def test_state_with_cache_is_same_after_reopen(tempdir):
+    kv = KeyValueStorageLeveldb(tempdir, 'kv')
+    state = PruningState(kv, node_cache_size=1000)
+    for i in range(100):
+        state.set(str(i).encode(), str(i).encode())
+    state.commit(state.headHash)
+    head_hash = state.headHash
+    assert 0 < state.node_cache.size <= 1000
+    state.close()
+
+    state = PruningState(KeyValueStorageLeveldb(tempdir, 'kv'),
+                         node_cache_size=1000)
+    assert state.headHash == head_hash
+    for i in range(100):
+        assert state.get(str(i).encode()) == str(i).encode()
+    hits, misses = state.node_cache.pop_stats()
+    assert hits > 0
+    assert misses > 0
+    state.close()
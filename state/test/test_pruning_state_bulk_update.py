@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+from state.db.pruning_db import REFCOUNT_PREFIX
+from state.pruning_state import PruningState
+from state.test.test_pruning_state_gc import stored_nodes, reachable_nodes
+from storage.kv_in_memory import KeyValueStorageInMemory
+from storage.kv_store_leveldb import KeyValueStorageLeveldb
+
+
+@pytest.fixture(scope="function", params=['leveldb', 'in_memory'])
+def kv(request, tempdir):
+    if request.param == 'leveldb':
+        kv = KeyValueStorageLeveldb(tempdir, 'kv')
+    else:
+        kv = KeyValueStorageInMemory()
+    yield kv
+    kv.close()
+
+
+def random_items(count, seed=0):
+    rnd = random.Random(seed)
+    return [(rnd.choice([b'a', b'b', b'c']) + str(rnd.randint(0, count // 2)).encode(),
+             str(rnd.random()).encode() * rnd.randint(1, 5))
+            for _ in range(count)]
+
+
+def apply_items(state, items):
+    for key, value in items:
+        state.set(key, value)
+        state.commit(rootHash=state.headHash)
+
+
+def test_bulk_update_gives_same_state(kv):
+    items = random_items(500)
+    expected = PruningState(KeyValueStorageInMemory())
+    apply_items(expected, items)
+
+    state = PruningState(kv)
+    state.begin_bulk_update()
+    apply_items(state, items[:250])
+    flushed_root = bytes(state.committedHeadHash)
+    state.flush_bulk_update(b'250')
+    apply_items(state, items[250:])
+    state.finish_bulk_update(b'500')
+
+    assert not state.in_bulk_update
+    assert state.bulk_update_checkpoint is None
+    assert bytes(state.committedHeadHash) == bytes(expected.committedHeadHash)
+    assert state.as_dict == expected.as_dict
+    # Only nodes of the flushed roots are written
+    assert stored_nodes(kv) == \
+        reachable_nodes(kv, [flushed_root, bytes(state.committedHeadHash)])
+    assert len(stored_nodes(kv)) < len(stored_nodes(expected._kv))
+
+
+def test_bulk_update_reads_committed_and_uncommitted(kv):
+    state = PruningState(kv)
+    state.set(b'k1', b'v1')
+    state.commit()
+    state.begin_bulk_update()
+
+    state.set(b'k1', b'v2')
+    assert state.get(b'k1', isCommitted=False) == b'v2'
+    assert state.get(b'k1', isCommitted=True) == b'v1'
+    state.commit()
+    assert state.get(b'k1', isCommitted=True) == b'v2'
+
+    # Nothing is written until flush
+    reopened = PruningState(kv)
+    assert reopened.get(b'k1') == b'v1'
+
+
+def test_interrupted_bulk_update_keeps_last_flush(kv):
+    items = random_items(200)
+    state = PruningState(kv)
+    state.begin_bulk_update()
+    apply_items(state, items[:100])
+    flushed_root = bytes(state.committedHeadHash)
+    state.flush_bulk_update(b'100')
+    apply_items(state, items[100:])
+    # The node stops without finishing the bulk update
+    state.close = lambda: None
+
+    resumed = PruningState(kv)
+    assert resumed.bulk_update_checkpoint == b'100'
+    assert bytes(resumed.committedHeadHash) == flushed_root
+    expected = PruningState(KeyValueStorageInMemory())
+    apply_items(expected, items[:100])
+    assert resumed.as_dict == expected.as_dict
+
+    resumed.begin_bulk_update()
+    apply_items(resumed, items[100:])
+    resumed.finish_bulk_update(b'200')
+    apply_items(expected, items[100:])
+    assert resumed.bulk_update_checkpoint is None
+    assert resumed.as_dict == expected.as_dict
+
+
+def test_bulk_update_migrates_gc_refcounts(kv):
+    state = PruningState(kv, gc_keep_roots=3, gc_death_row_delay=2)
+    state.begin_bulk_update()
+    apply_items(state, random_items(100))
+    state.finish_bulk_update(b'100')
+
+    root = bytes(state.committedHeadHash)
+    assert state._db.roots == (root,)
+    for node_hash in reachable_nodes(kv, [root]):
+        assert REFCOUNT_PREFIX + node_hash in kv
+
+    # Garbage collection works as usual after the bulk update
+    apply_items(state, random_items(50, seed=1))
+    for _ in range(5):
+        state.collect_garbage(1000)
+        state.commit(rootHash=state.headHash)
+    assert bytes(state.committedHeadHash) != root
@@ -0,0 +1,268 @@
+import random
+
+import pytest
+
+from state.db.pruning_db import PruningDB, REFCOUNT_PREFIX, GC_PREFIX, \
+    node_references
+from state.db.refcount_db import DEATH_ROW_OFFSET
+from state.pruning_state import PruningState
+from state.trie.pruning_trie import BLANK_ROOT
+from storage.kv_in_memory import KeyValueStorageInMemory
+from storage.kv_store_leveldb import KeyValueStorageLeveldb
+
+KEEP_ROOTS = 3
+DEATH_ROW_DELAY = 2
+
+
+@pytest.fixture(scope="function", params=['leveldb', 'in_memory'])
+def kv(request, tempdir):
+    if request.param == 'leveldb':
+        kv = KeyValueStorageLeveldb(tempdir, 'kv')
+    else:
+        kv = KeyValueStorageInMemory()
+    yield kv
+    kv.close()
+
+
+def create_state(kv, keep_roots=KEEP_ROOTS):
+    return PruningState(kv, gc_keep_roots=keep_roots,
+                        gc_death_row_delay=DEATH_ROW_DELAY)
+
+
+def stored_nodes(kv):
+    return {bytes(k) for k, _ in kv.iterator()
+            if len(k) == 32 and not bytes(k).startswith(GC_PREFIX)}
+
+
+def reachable_nodes(kv, root_hashes):
+    reachable = set()
+    stack = [h for h in root_hashes if h != BLANK_ROOT]
+    while stack:
+        node_hash = stack.pop()
+        if node_hash not in reachable:
+            reachable.add(node_hash)
+            stack.extend(node_references(kv.get(node_hash)))
+    return reachable
+
+
+def check_garbage_collected(kv, state):
+    """
+    Only nodes of the kept roots and of the nodes which have been put on
+    death row less than the delay ago are stored
+    """
+    db = state._db
+    pending = set()
+    for node_hash in stored_nodes(kv):
+        refcount = int.from_bytes(kv.get(REFCOUNT_PREFIX + node_hash), 'big')
+        assert refcount > 0
+        if refcount >= DEATH_ROW_OFFSET:
+            assert refcount - DEATH_ROW_OFFSET + DEATH_ROW_DELAY > db.epoch
+            pending.add(node_hash)
+    assert stored_nodes(kv) == reachable_nodes(kv, db.roots + tuple(pending))
+
+
+def check_refcounts(kv, root_hashes):
+    refs = [h for h in root_hashes if h != BLANK_ROOT]
+    for node_hash in stored_nodes(kv):
+        refs.extend(node_references(kv.get(node_hash)))
+    for node_hash in stored_nodes(kv):
+        assert int.from_bytes(kv.get(REFCOUNT_PREFIX + node_hash), 'big') == \
+            refs.count(node_hash)
+
+
+def apply_batch(state, rnd, keys, size=5):
+    for _ in range(size):
+        key = rnd.choice(keys)
+        if rnd.random() < 0.2:
+            state.remove(key)
+        else:
+            state.set(key, str(rnd.random()).encode())
+    return state.headHash
+
+
+def collect_all(state):
+    return state.collect_garbage(10 ** 9)
+
+
+def test_only_nodes_of_kept_roots_remain(kv):
+    rnd = random.Random(1)
+    keys = [str(i).encode() for i in range(40)]
+    state = create_state(kv)
+    committed = []
+    for _ in range(30):
+        root = apply_batch(state, rnd, keys)
+        state.commit(root)
+        committed.append((root, state.as_dict))
+        state.collect_garbage(5)
+    for _ in range(DEATH_ROW_DELAY):
+        # Garbage is collected only after the delay, commits of the same
+        # root do not count
+        state.commit(apply_batch(state, rnd, keys, size=1))
+    collect_all(state)
+
+    kept = state._db.roots
+    assert len(kept) == KEEP_ROOTS
+    check_garbage_collected(kv, state)
+    # Everything needed for the kept roots is still there
+    for root, expected in committed[-KEEP_ROOTS + DEATH_ROW_DELAY:]:
+        assert root in kept
+        for key, value in expected.items():
+            assert state.get_for_root_hash(root, key) == value
+
+
+def test_shared_subtrees_are_not_collected(kv):
+    state = create_state(kv, keep_roots=1)
+    # Same suffixes and values produce identical subtrees under
+    # different branches
+    for prefix in (b'a', b'b', b'c'):
+        state.set(prefix + b'shared_key', b'shared_value' * 3)
+    state.commit(state.headHash)
+    state.set(b'ashared_key', b'other_value' * 3)
+    state.commit(state.headHash)
+    for _ in range(DEATH_ROW_DELAY + 1):
+        state.set(b'counter', str(state._db.epoch).encode())
+        state.commit(state.headHash)
+    collect_all(state)
+
+    check_garbage_collected(kv, state)
+    assert state.get(b'bshared_key') == b'shared_value' * 3
+    assert state.get(b'cshared_key') == b'shared_value' * 3
+    assert state.get(b'ashared_key') == b'other_value' * 3
+
+
+def test_uncommitted_nodes_survive_delay(kv):
+    state = create_state(kv, keep_roots=1)
+    state.set(b'k1', b'v1' * 20)
+    state.commit(state.headHash)
+    state.set(b'k2', b'v2' * 20)
+    uncommitted = state.headHash
+    collect_all(state)
+    assert state.get(b'k2', isCommitted=False) == b'v2' * 20
+
+    # Reverted batch is collected after the delay
+    state.revertToHead(state.committedHeadHash)
+    for i in range(DEATH_ROW_DELAY + 1):
+        state.set(b'k3', str(i).encode() * 20)
+        state.commit(state.headHash)
+    collect_all(state)
+    assert uncommitted not in stored_nodes(kv)
+    check_garbage_collected(kv, state)
+
+
+def test_collection_is_bounded_and_reports_reclaimed_bytes(kv):
+    rnd = random.Random(2)
+    keys = [str(i).encode() for i in range(100)]
+    state = create_state(kv, keep_roots=1)
+    for _ in range(10):
+        state.commit(apply_batch(state, rnd, keys, size=20))
+    size_before = sum(len(k) + len(v) for k, v in kv.iterator())
+
+    deleted, reclaimed = state.collect_garbage(3)
+    assert 0 < deleted <= 3
+    rest_deleted, rest_reclaimed = collect_all(state)
+    assert rest_deleted > 0
+    total_reclaimed = reclaimed + rest_reclaimed
+    size_after = sum(len(k) + len(v) for k, v in kv.iterator())
+    assert total_reclaimed > 0
+    # Death row bookkeeping is trimmed too, so at least the reported
+    # amount of data is gone
+    assert size_before - size_after >= total_reclaimed
+
+
+def test_gc_state_survives_restart(tempdir):
+    rnd = random.Random(3)
+    keys = [str(i).encode() for i in range(20)]
+    kv = KeyValueStorageLeveldb(tempdir, 'kv')
+    state = create_state(kv)
+    for _ in range(5):
+        state.commit(apply_batch(state, rnd, keys))
+    roots, epoch = state._db.roots, state._db.epoch
+    state.close()
+
+    kv = KeyValueStorageLeveldb(tempdir, 'kv')
+    state = create_state(kv)
+    assert state._db.roots == roots
+    assert state._db.epoch == epoch
+    for _ in range(KEEP_ROOTS + DEATH_ROW_DELAY):
+        state.commit(apply_batch(state, rnd, keys))
+    collect_all(state)
+    check_garbage_collected(kv, state)
+    state.close()
+
+
+def test_migration_of_existing_db(kv):
+    rnd = random.Random(4)
+    keys = [str(i).encode() for i in range(30)]
+    state = PruningState(kv)
+    for _ in range(10):
+        state.commit(apply_batch(state, rnd, keys))
+    expected = state.as_dict
+    committed = bytes(state.committedHeadHash)
+    nodes_before = stored_nodes(kv)
+    assert not PruningDB(kv, KEEP_ROOTS, DEATH_ROW_DELAY).is_initialized
+
+    # Garbage collection is not enabled before migration
+    state = create_state(kv)
+    assert not state.gc_enabled
+    assert stored_nodes(kv) == nodes_before
+
+    PruningDB(kv, KEEP_ROOTS, DEATH_ROW_DELAY).migrate([committed], batch_size=7)
+    state = create_state(kv)
+    assert state._db.is_initialized
+    assert state._db.roots == (committed,)
+    assert stored_nodes(kv) == reachable_nodes(kv, [committed])
+    assert stored_nodes(kv) < nodes_before
+    assert state.as_dict == expected
+    check_refcounts(kv, [committed])
+
+    # Turning garbage collection off and on again requires a new migration
+    PruningState(kv)
+    assert not PruningDB(kv, KEEP_ROOTS, DEATH_ROW_DELAY).is_initialized
+    PruningDB(kv, KEEP_ROOTS, DEATH_ROW_DELAY).migrate([committed], batch_size=7)
+    state = create_state(kv)
+    assert state.as_dict == expected
+    check_refcounts(kv, [committed])
+
+
+def test_migration_keeps_last_given_roots(kv):
+    rnd = random.Random(5)
+    keys = [str(i).encode() for i in range(30)]
+    state = PruningState(kv)
+    roots = []
+    for _ in range(10):
+        state.commit(apply_batch(state, rnd, keys))
+        roots.append(bytes(state.committedHeadHash))
+
+    kept, deleted = PruningDB(kv, KEEP_ROOTS, DEATH_ROW_DELAY).migrate(roots, batch_size=5)
+    assert deleted > 0
+    state = create_state(kv)
+    assert state._db.roots == tuple(roots[-KEEP_ROOTS:])
+    assert stored_nodes(kv) == reachable_nodes(kv, roots[-KEEP_ROOTS:])
+    assert kept == len(stored_nodes(kv))
+    check_refcounts(kv, roots[-KEEP_ROOTS:])
+
+    # Garbage collection works as usual after the migration
+    for _ in range(KEEP_ROOTS + DEATH_ROW_DELAY + 2):
+        state.commit(apply_batch(state, rnd, keys))
+        state.collect_garbage(1000)
+    check_garbage_collected(kv, state)
+
+
+def test_read_only_storage_is_not_changed_without_gc(tempdir):
+    kv = KeyValueStorageLeveldb(tempdir, 'kv')
+    state = create_state(kv)
+    PruningDB(kv, KEEP_ROOTS, DEATH_ROW_DELAY).migrate([state.committedHeadHash])
+    state.close()
+
+    kv = KeyValueStorageLeveldb(tempdir, 'kv', read_only=True)
+    PruningState(kv)
+    assert PruningDB(kv, KEEP_ROOTS, DEATH_ROW_DELAY).is_initialized
+    kv.close()
+
+
+def test_gc_disabled_by_default(kv):
+    state = PruningState(kv)
+    assert not state.gc_enabled
+    state.set(b'k', b'v')
+    state.commit(state.headHash)
+    assert state.collect_garbage(100) == (0, 0)
@@ -0,0 +1,72 @@
+import pytest
+
+from state.pruning_state import PruningState, ReadOnlyPruningState
+from state.trie.pruning_trie import BLANK_ROOT
+from storage.kv_store_leveldb import KeyValueStorageLeveldb
+
+
+@pytest.fixture(params=[0, 2], ids=['no_gc', 'gc'])
+def written_state(request, tempdir):
+    state = PruningState(KeyValueStorageLeveldb(tempdir, 'state'),
+                         gc_keep_roots=request.param)
+    state.set(b'k1', b'v1')
+    state.commit()
+    old_root = state.committedHeadHash
+    state.set(b'k1', b'v2')
+    state.set(b'k2', b'v3')
+    state.commit()
+    # Uncommitted update is not seen
+    state.set(b'k3', b'v4')
+    state.close()
+    return tempdir, old_root
+
+
+def open_read_only(tempdir, committed_root=None):
+    return ReadOnlyPruningState(KeyValueStorageLeveldb(tempdir, 'state', read_only=True),
+                                committed_root)
+
+
+def test_read_only_state_reads_committed_root(written_state):
+    tempdir, _ = written_state
+    state = open_read_only(tempdir)
+    assert state.get(b'k1') == b'v2'
+    assert state.get(b'k2') == b'v3'
+    assert state.get(b'k3') is None
+    proof = state.generate_state_proof(b'k2', serialize=True)
+    assert PruningState.verify_state_proof(state.committedHeadHash, b'k2', b'v3',
+                                           proof, serialized=True)
+    state.close()
+
+
+def test_read_only_state_pinned_to_given_root(written_state):
+    tempdir, old_root = written_state
+    state = open_read_only(tempdir, old_root)
+    assert state.committedHeadHash == old_root
+    assert state.get(b'k1') == b'v1'
+    assert state.get(b'k2') is None
+    with pytest.raises(ValueError):
+        state.commit()
+    state.close()
+
+
+def test_read_only_state_of_empty_storage(tempdir):
+    KeyValueStorageLeveldb(tempdir, 'empty').close()
+    state = ReadOnlyPruningState(KeyValueStorageLeveldb(tempdir, 'empty', read_only=True))
+    assert state.isEmpty
+    assert state.committedHeadHash == BLANK_ROOT
+    assert state.get(b'k1') is None
+    state.close()
+
+
+def test_read_only_state_pinned_to_other_root(written_state):
+    tempdir, old_root = written_state
+    state = open_read_only(tempdir)
+    new_root = state.committedHeadHash
+    state.pin(old_root)
+    assert state.committedHeadHash == old_root
+    assert state.get(b'k1') == b'v1'
+    assert state.get(b'k2') is None
+    state.pin(new_root)
+    assert state.get(b'k1') == b'v2'
+    assert state.get(b'k2') == b'v3'
+    state.close()
@@ -667,7 +667,7 @@ class Trie:
         '''delete storage
         :param node: node in form of list, or BLANK_NODE
         '''
-        if node == BLANK_NODE:
+        if node == BLANK_NODE or not self._db.counts_references:
             return
         # assert isinstance(node, list)
         encoded = rlp_encode(node)
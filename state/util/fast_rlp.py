@@ -71,12 +71,34 @@ def consume_length_prefix(rlp, start):
         return (list, l_idx, start + 1 + ll)
 
 
+def _encode_raw_py3(item):
+    """
+    RLP encode (a nested sequence of) bytes, same as `rlp.codec.encode_raw`
+    but without its generic type checks for the types trie nodes are made of
+    """
+    if type(item) is bytes:
+        if len(item) == 1 and item[0] < 128:
+            return item
+        return _length_prefix_py3(len(item), 128) + item
+    if type(item) is list or type(item) is tuple:
+        item = b''.join([_encode_raw_py3(x) for x in item])
+        return _length_prefix_py3(len(item), 192) + item
+    return rlp.codec.encode_raw(item)
+
+
+def _length_prefix_py3(length, offset):
+    if length < 56:
+        return bytes((offset + length,))
+    length_string = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes((offset + 56 - 1 + len(length_string),)) + length_string
+
+
 #
 if sys.version_info.major == 2:
     encode_optimized = _encode_optimized
     decode_optimized = _decode_optimized
 else:
-    encode_optimized = rlp.codec.encode_raw
+    encode_optimized = _encode_raw_py3
     # rlp does not implement a decode_raw function.
     # decode_optimized = rlp.codec.decode_raw
     decode_optimized = _decode_optimized
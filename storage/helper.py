@@ -3,9 +3,10 @@ import os
 from ledger.hash_stores.file_hash_store import FileHashStore
 from ledger.hash_stores.hash_store import HashStore
 from ledger.hash_stores.memory_hash_store import MemoryHashStore
+from ledger.hash_stores.mmap_hash_store import MmapHashStore
 
 from plenum.common.config_util import getConfig
-from plenum.common.constants import KeyValueStorageType, HS_FILE, HS_LEVELDB, HS_ROCKSDB
+from plenum.common.constants import KeyValueStorageType, HS_FILE, HS_LEVELDB, HS_ROCKSDB, HS_MMAP
 from plenum.common.exceptions import KeyValueStorageConfigNotFound
 
 from plenum.persistence.db_hash_store import DbHashStore
@@ -59,9 +60,18 @@ def initKeyValueStorage(keyValueType, dataLocation, keyValueStorageName,
 
 
 def initKeyValueStorageIntKeys(keyValueType, dataLocation, keyValueStorageName,
-                               open=True, read_only=False, db_config=None, txn_serializer=None) -> KeyValueStorage:
+                               open=True, read_only=False, db_config=None, txn_serializer=None,
+                               fixed_width_keys=False) -> KeyValueStorage:
     from storage.kv_store_leveldb_int_keys import KeyValueStorageLeveldbIntKeys
     from storage.kv_store_rocksdb_int_keys import KeyValueStorageRocksdbIntKeys
+    if fixed_width_keys:
+        from storage.kv_store_leveldb_fixed_int_keys import KeyValueStorageLeveldbFixedIntKeys
+        from storage.kv_store_rocksdb_fixed_int_keys import KeyValueStorageRocksdbFixedIntKeys
+        if keyValueType == KeyValueStorageType.Leveldb:
+            return KeyValueStorageLeveldbFixedIntKeys(dataLocation, keyValueStorageName, open, read_only)
+        if keyValueType == KeyValueStorageType.Rocksdb:
+            return KeyValueStorageRocksdbFixedIntKeys(dataLocation, keyValueStorageName, open, read_only,
+                                                      db_config)
     if keyValueType == KeyValueStorageType.Leveldb:
         return KeyValueStorageLeveldbIntKeys(dataLocation, keyValueStorageName, open, read_only)
     if keyValueType == KeyValueStorageType.Rocksdb:
@@ -78,6 +88,12 @@ def initHashStore(data_dir, name, config=None, read_only=False, hs_type=None) ->
     if hsConfig == HS_FILE:
         return FileHashStore(dataDir=data_dir,
                              fileNamePrefix=name)
+    elif hsConfig == HS_MMAP:
+        return MmapHashStore(dataDir=data_dir,
+                             fileNamePrefix=name,
+                             extent=config.MMAP_HASH_STORE_EXTENT,
+                             flushThreshold=config.MMAP_HASH_STORE_FLUSH_THRESHOLD,
+                             read_only=read_only)
     elif hsConfig == HS_LEVELDB or hsConfig == HS_ROCKSDB:
         return DbHashStore(dataDir=data_dir,
                            fileNamePrefix=name,
@@ -94,3 +110,51 @@ def integer_comparator(a, b):
     a = int(a)
     b = int(b)
     return 1 if a > b else -1
+
+
+# Size of keys of int-key storages with fixed width keys. Keys are stored
+# as unsigned big-endian ints, so that bytewise order of keys is their
+# numerical order and the native comparator of a DB can be used
+INT_KEY_SIZE = 8
+
+
+def int_key_to_bytes(key) -> bytes:
+    """
+    Encode an int key given as int, or a decimal str or bytes (as used by
+    storages with `IntegerComparator`) to fixed width bytes
+    """
+    key = int(key)
+    try:
+        return key.to_bytes(INT_KEY_SIZE, 'big')
+    except OverflowError:
+        raise ValueError("Int key {} is out of range of {}-byte unsigned "
+                         "keys".format(key, INT_KEY_SIZE))
+
+
+def int_key_from_bytes(key: bytes) -> bytes:
+    """
+    Decode a fixed width int key to the decimal bytes representation
+    returned by storages with `IntegerComparator`
+    """
+    return str(int.from_bytes(key, 'big')).encode()
+
+
+def migrate_int_keys_storage(src: KeyValueStorage, dst: KeyValueStorage,
+                             batch_size=1000) -> int:
+    """
+    Copy all items from an int-key storage to another one, e.g. from a
+    storage with `IntegerComparator` to one with fixed width keys. Items
+    are written in batches, returns the number of copied items.
+    """
+    count = 0
+    batch = []
+    for key, value in src.iterator():
+        batch.append((bytes(key), bytes(value)))
+        if len(batch) >= batch_size:
+            dst.setBatch(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        dst.setBatch(batch)
+        count += len(batch)
+    return count
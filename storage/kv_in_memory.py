@@ -80,15 +80,17 @@ class KeyValueStorageInMemory(KeyValueStorage):
                     if filter(k, start, end):
                         filtered_dct[k] = v
                 return filtered_dct.items()
-            return self._dict.items()
+            # Copies let the storage be changed while iterating, as the
+            # persistent ones do
+            return list(self._dict.items())
         if include_key:
             if start or end:
-                return (k for k in self._dict.keys() if filter(k, start, end))
-            return self._dict.keys()
+                return [k for k in self._dict.keys() if filter(k, start, end)]
+            return list(self._dict.keys())
         if include_value:
             if start or end:
-                return (v for k, v in self._dict.items() if filter(k, start, end))
-            return self._dict.values()
+                return [v for k, v in self._dict.items() if filter(k, start, end)]
+            return list(self._dict.values())
 
     @property
     def closed(self):
@@ -0,0 +1,77 @@
+from typing import Iterable, Tuple
+
+from storage.helper import int_key_to_bytes, int_key_from_bytes
+from storage.kv_store_leveldb import KeyValueStorageLeveldb
+
+try:
+    import leveldb
+except ImportError:
+    print('Cannot import leveldb, please install')
+
+
+class KeyValueStorageLeveldbFixedIntKeys(KeyValueStorageLeveldb):
+    """
+    Int-key storage with the same interface as
+    `KeyValueStorageLeveldbIntKeys`, but keys are stored as fixed width
+    big-endian ints and ordered by the native bytewise comparator instead of
+    the Python `IntegerComparator`. Keys are returned as decimal bytes.
+
+    Storages of the two formats are not compatible, LevelDB refuses to open
+    a DB created with another comparator, use `migrate_int_keys_storage` to
+    convert an existing DB.
+    """
+
+    def iterator(self, start=None, end=None, include_key=True, include_value=True, prefix=None):
+        start = int_key_to_bytes(start) if start is not None else None
+        end = int_key_to_bytes(end) if end is not None else None
+        itr = self._db.RangeIter(key_from=start, key_to=end, include_value=include_value)
+        if include_value:
+            return ((int_key_from_bytes(key), value) for key, value in itr)
+        return (int_key_from_bytes(key) for key in itr)
+
+    def put(self, key, value):
+        if self._read_only:
+            raise RuntimeError("Not supported operation in read only mode.")
+        self._db.Put(int_key_to_bytes(key), self.to_byte_repr(value))
+
+    def get(self, key):
+        return self._db.Get(int_key_to_bytes(key))
+
+    def remove(self, key):
+        if self._read_only:
+            raise RuntimeError("Not supported operation in read only mode.")
+        self._db.Delete(int_key_to_bytes(key))
+
+    def setBatch(self, batch: Iterable[Tuple]):
+        b = leveldb.WriteBatch()
+        for key, value in batch:
+            b.Put(int_key_to_bytes(key), self.to_byte_repr(value))
+        self._db.Write(b, sync=False)
+
+    def do_ops_in_batch(self, batch: Iterable[Tuple]):
+        b = leveldb.WriteBatch()
+        for op, key, value in batch:
+            key = int_key_to_bytes(key)
+            if op == self.WRITE_OP:
+                b.Put(key, self.to_byte_repr(value))
+            elif op == self.REMOVE_OP:
+                b.Delete(key)
+            else:
+                raise ValueError('Unknown operation')
+        self._db.Write(b, sync=False)
+
+    def get_equal_or_prev(self, key):
+        # return value can be:
+        #    None, if required key less then minimal key from DB
+        #    Equal by key if key exist in DB
+        #    Previous if key does not exist in Db, but there is key less than required
+        itr = self._db.RangeIter(key_to=int_key_to_bytes(key), reverse=True)
+        for _, value in itr:
+            return value
+        return None
+
+    def get_last_key(self):
+        itr = self._db.RangeIter(include_value=False, reverse=True)
+        for key in itr:
+            return int_key_from_bytes(key)
+        return None
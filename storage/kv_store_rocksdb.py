@@ -170,7 +170,17 @@ class KeyValueStorageRocksdb(KeyValueStorage):
         return itr
 
     def do_ops_in_batch(self, batch: Iterable[Tuple], is_committed=False):
-        pass
+        b = rocksdb.WriteBatch()
+        for op, key, value in batch:
+            key = self.to_byte_repr(key)
+            value = self.to_byte_repr(value)
+            if op == self.WRITE_OP:
+                b.put(key, value)
+            elif op == self.REMOVE_OP:
+                b.delete(key)
+            else:
+                raise ValueError('Unknown operation')
+        self._db.write(b, sync=False)
 
     def has_key(self, key):
         key = self.to_byte_repr(key)
@@ -0,0 +1,99 @@
+from typing import Iterable, Tuple
+
+from storage.helper import int_key_to_bytes, int_key_from_bytes
+from storage.kv_store_rocksdb import KeyValueStorageRocksdb
+
+try:
+    import rocksdb
+except ImportError:
+    print('Cannot import rocksdb, please install')
+
+
+class KeyValueStorageRocksdbFixedIntKeys(KeyValueStorageRocksdb):
+    """
+    Int-key storage with the same interface as
+    `KeyValueStorageRocksdbIntKeys`, but keys are stored as fixed width
+    big-endian ints and ordered by the native bytewise comparator, so
+    RocksDB does not call back into Python on every key comparison during
+    writes, seeks, compaction and iteration. Keys are returned as decimal
+    bytes.
+
+    Storages of the two formats are not compatible, RocksDB refuses to open
+    a DB created with another comparator, use `migrate_int_keys_storage` to
+    convert an existing DB.
+    """
+
+    def put(self, key, value):
+        self._db.put(int_key_to_bytes(key), self.to_byte_repr(value))
+
+    def get(self, key):
+        vv = self._db.get(int_key_to_bytes(key))
+        if vv is None:
+            raise KeyError
+        return vv
+
+    def remove(self, key):
+        self._db.delete(int_key_to_bytes(key))
+
+    def has_key(self, key):
+        return self._db.key_may_exist(int_key_to_bytes(key))[0]
+
+    def setBatch(self, batch: Iterable[Tuple]):
+        b = rocksdb.WriteBatch()
+        for key, value in batch:
+            b.put(int_key_to_bytes(key), self.to_byte_repr(value))
+        self._db.write(b, sync=False)
+
+    def do_ops_in_batch(self, batch: Iterable[Tuple], is_committed=False):
+        b = rocksdb.WriteBatch()
+        for op, key, value in batch:
+            key = int_key_to_bytes(key)
+            if op == self.WRITE_OP:
+                b.put(key, self.to_byte_repr(value))
+            elif op == self.REMOVE_OP:
+                b.delete(key)
+            else:
+                raise ValueError('Unknown operation')
+        self._db.write(b, sync=False)
+
+    def iterator(self, start=None, end=None, include_key=True, include_value=True, prefix=None):
+        itr = self._db.iteritems() if include_value else self._db.iterkeys()
+        if start is not None:
+            itr.seek(int_key_to_bytes(start))
+        else:
+            itr.seek_to_first()
+        end = int_key_to_bytes(end) if end is not None else None
+        return self._decoded_keys(itr, end, include_value)
+
+    @staticmethod
+    def _decoded_keys(itr, end, include_value):
+        # Keys are ordered numerically, so the iteration stops at the first
+        # key greater than the (inclusive) upper bound even if it is absent
+        for item in itr:
+            key = item[0] if include_value else item
+            if end is not None and key > end:
+                return
+            key = int_key_from_bytes(key)
+            yield (key, item[1]) if include_value else key
+
+    def get_equal_or_prev(self, key):
+        # return value can be:
+        #    None, if required key less then minimal key from DB
+        #    Equal by key if key exist in DB
+        #    Previous if key does not exist in Db, but there is key less than required
+        itr = self._db.itervalues()
+        itr.seek_for_prev(int_key_to_bytes(key))
+        try:
+            value = next(itr)
+        except StopIteration:
+            value = None
+        return value
+
+    def get_last_key(self):
+        itr = self._db.iterkeys()
+        itr.seek_to_last()
+        try:
+            key = next(itr)
+        except StopIteration:
+            return None
+        return int_key_from_bytes(key)
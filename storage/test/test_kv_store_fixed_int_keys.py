@@ -0,0 +1,140 @@
+import random
+import time
+
+import pytest
+
+from storage.helper import migrate_int_keys_storage
+from storage.kv_store_leveldb_fixed_int_keys import KeyValueStorageLeveldbFixedIntKeys
+from storage.kv_store_leveldb_int_keys import KeyValueStorageLeveldbIntKeys
+from storage.kv_store_rocksdb_fixed_int_keys import KeyValueStorageRocksdbFixedIntKeys
+from storage.kv_store_rocksdb_int_keys import KeyValueStorageRocksdbIntKeys
+
+STORAGES = {
+    'leveldb': (KeyValueStorageLeveldbIntKeys, KeyValueStorageLeveldbFixedIntKeys),
+    'rocksdb': (KeyValueStorageRocksdbIntKeys, KeyValueStorageRocksdbFixedIntKeys),
+}
+
+
+# Timings of the perf test depend on the disk, `SkipTests` set to False runs it
+SkipTests = True
+skipper = pytest.mark.skipif(SkipTests, reason='Perf test')
+
+
+@pytest.fixture(params=['rocksdb', 'leveldb'])
+def storage_classes(request):
+    return STORAGES[request.param]
+
+
+@pytest.yield_fixture()
+def db(storage_classes, tempdir):
+    db = storage_classes[1](tempdir, 'kv')
+    yield db
+    db.close()
+
+
+def test_keys_in_numerical_order(db):
+    keys = [50, 1, 100, 2, 200, 801, 9, 301, 2 ** 40]
+    for k in keys:
+        db.put(str(k), str(k * 10))
+    assert list(db.iterator()) == [(str(k).encode(), str(k * 10).encode())
+                                   for k in sorted(keys)]
+    assert list(db.iterator(include_value=False)) == \
+        [str(k).encode() for k in sorted(keys)]
+
+
+def test_keys_of_any_representation(db):
+    db.put(5, 'a')
+    db.setBatch([('6', 'b'), (b'7', 'c')])
+    assert db.get(b'5') == db.get('5') == db.get(5)
+    assert db.get(7) == b'c'
+    db.remove('6')
+    with pytest.raises(KeyError):
+        db.get(6)
+    assert db.size == 2
+
+
+def test_ops_in_batch(db):
+    db.setBatch([(k, str(k)) for k in range(1, 6)])
+    db.do_ops_in_batch([(db.WRITE_OP, 10, 'a'),
+                        (db.REMOVE_OP, '2', None),
+                        (db.WRITE_OP, b'3', 'b')])
+    assert list(db.iterator()) == [(b'1', b'1'), (b'3', b'b'), (b'4', b'4'),
+                                   (b'5', b'5'), (b'10', b'a')]
+    assert db.get(10) == b'a'
+    with pytest.raises(ValueError):
+        db.do_ops_in_batch([('unknown', 1, 'a')])
+
+
+def test_keys_out_of_range(db):
+    with pytest.raises(ValueError):
+        db.put(-1, 'a')
+    with pytest.raises(ValueError):
+        db.put(2 ** 64, 'a')
+
+
+def test_iterate_range(db):
+    db.setBatch([(k, str(k)) for k in range(1, 1001, 3)])
+    # Bounds are inclusive and may be absent
+    assert [int(k) for k, _ in db.iterator(start=100, end=130)] == \
+        list(range(100, 131, 3))
+    assert [int(k) for k, _ in db.iterator(start=101, end=129)] == \
+        list(range(103, 128, 3))
+    assert [int(k) for k, _ in db.iterator(start='995')] == [997, 1000]
+
+
+def test_equal_or_prev_and_last_key(db):
+    assert db.get_last_key() is None
+    assert db.get_equal_or_prev(10) is None
+    for k in (2, 4, 5, 100):
+        db.put(k, str(k))
+    assert db.get_equal_or_prev(1) is None
+    assert db.get_equal_or_prev(3) == b'2'
+    assert db.get_equal_or_prev(5) == b'5'
+    assert db.get_equal_or_prev('101') == b'100'
+    assert db.get_last_key() == b'100'
+
+
+def test_migrate_int_keys_storage(storage_classes, tempdir):
+    old_cls, new_cls = storage_classes
+    src = old_cls(tempdir, 'old')
+    items = [(str(k).encode(), str(random.random()).encode())
+             for k in range(1, 2500)]
+    src.setBatch(items)
+
+    dst = new_cls(tempdir, 'new')
+    assert migrate_int_keys_storage(src, dst, batch_size=1000) == len(items)
+    assert list(dst.iterator()) == list(src.iterator()) == items
+    assert dst.get_last_key() == src.get_last_key()
+    src.close()
+    dst.close()
+
+
+@skipper
+def test_int_keys_storage_perf(storage_classes, tempdir):
+    count = 20000
+    keys = list(range(1, count + 1))
+    shuffled_keys = random.sample(keys, len(keys))
+    value = b'v' * 200
+    for cls in storage_classes:
+        db = cls(tempdir, cls.__name__)
+
+        start = time.perf_counter()
+        for i in range(0, count, 1000):
+            db.setBatch((k, value) for k in shuffled_keys[i:i + 1000])
+        put_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for k in shuffled_keys[:2000]:
+            for _ in db.iterator(start=k, end=k + 10):
+                pass
+        seek_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        iterated = [int(k) for k, _ in db.iterator()]
+        iterate_time = time.perf_counter() - start
+        assert iterated == keys
+
+        print("{}: {:.0f} puts/sec, {:.0f} seeks/sec, {:.0f} items iterated/sec"
+              .format(cls.__name__, count / put_time, 2000 / seek_time,
+                      count / iterate_time))
+        db.close()
@@ -22,9 +22,20 @@ MAX_RECONNECT_RETRY_ON_SAME_SOCKET = 3
 
 # Enables/disables debug mode for Looper class
 LOOPER_DEBUG = False
+# Looper which processed nothing waits for readiness of sockets and for the
+# next timeout of its prodables instead of sleeping for 10 ms, but not
+# longer than LOOPER_MAX_IDLE_WAIT
+LOOPER_EVENT_DRIVEN = False
+LOOPER_MAX_IDLE_WAIT = 0.1  # seconds
 
 # All messages exceeding the limit will be rejected without processing
 MSG_LEN_LIMIT = 128 * 1024
+# Nodes may exchange bulk frames (large msgpack encoded messages, e.g.
+# catchup replies) of up to this size. Bulk frames are sent after all other
+# messages, at no more than BULK_PEER_BANDWIDTH bytes per second to each
+# remote (0 - no limit)
+BULK_FRAME_LIMIT = 4 * 1024 * 1024
+BULK_PEER_BANDWIDTH = 16 * 1024 * 1024
 
 # Quotas configuration
 ENABLE_DYNAMIC_QUOTAS = False
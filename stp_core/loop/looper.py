@@ -5,7 +5,7 @@ import signal
 import sys
 import time
 from asyncio.coroutines import CoroWrapper
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
 # import uvloop
 from stp_core.common.log import getlogger
@@ -15,6 +15,10 @@ from stp_core.loop.startable import Status
 
 logger = getlogger()
 
+# Seconds the looper sleeps after a run which processed nothing, unless it
+# is event driven
+IDLE_SLEEP = 0.01
+
 # TODO: move it to plenum-util repo
 
 
@@ -60,6 +64,23 @@ class Prodable:
         raise NotImplementedError("subclass {} should implement this method"
                                   .format(self))
 
+    def wakeup_fds(self) -> Iterable[int]:
+        """
+        File descriptors which become readable when the Prodable has
+        something to do, used by an event driven looper
+        """
+        return ()
+
+    def wakeup_timeout(self) -> Optional[float]:
+        """
+        Seconds an event driven looper may wait for `wakeup_fds` before
+        prodding the Prodable again, 0 if it has to be prodded right away and
+        None if it has nothing to do until its file descriptors are ready.
+        Prodables which do not know it are prodded as often as by a looper
+        which is not event driven.
+        """
+        return IDLE_SLEEP
+
 
 class Looper:
     """
@@ -70,7 +91,9 @@ class Looper:
                  prodables: List[Prodable]=None,
                  loop=None,
                  debug=False,
-                 autoStart=True):
+                 autoStart=True,
+                 event_driven=False,
+                 max_idle_wait=0.1):
         """
         Initialize looper with an event loop.
 
@@ -78,9 +101,15 @@ class Looper:
         :param loop: the event loop to use
         :param debug: set_debug on event loop will be set to this value
         :param autoStart: start immediately?
+        :param event_driven: when nothing was processed, wait for readiness
+        of file descriptors of prodables or for their next timeout instead of
+        sleeping for `IDLE_SLEEP`
+        :param max_idle_wait: the longest wait of an event driven looper
         """
         self.prodables = list(prodables) if prodables is not None \
             else []  # type: List[Prodable]
+        self.event_driven = event_driven
+        self.max_idle_wait = max_idle_wait
 
         # if sys.platform == 'linux':
         #     asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
@@ -210,12 +239,48 @@ class Looper:
         msgsProcessed = await self.prodAllOnce()
         if msgsProcessed == 0:
             # if no let other stuff run
-            await asyncio.sleep(0.01, loop=self.loop)
+            if self.event_driven:
+                await self.waitForWakeup()
+            else:
+                await asyncio.sleep(IDLE_SLEEP, loop=self.loop)
         dur = time.perf_counter() - start
         if dur >= 15:
             logger.info("it took {:.3f} seconds to run once nicely".
                         format(dur), extra={"cli": False})
 
+    async def waitForWakeup(self):
+        """
+        Wait until a file descriptor of a Prodable becomes readable or until
+        the earliest timeout of Prodables, but not longer than `max_idle_wait`
+        """
+        timeout = self.max_idle_wait
+        for p in self.prodables:
+            p_timeout = p.wakeup_timeout()
+            if p_timeout is not None and p_timeout < timeout:
+                timeout = p_timeout
+        if timeout <= 0:
+            await asyncio.sleep(0, loop=self.loop)
+            return
+
+        fds = set()
+        for p in self.prodables:
+            fds.update(p.wakeup_fds())
+        waiter = self.loop.create_future()
+
+        def wakeup():
+            if not waiter.done():
+                waiter.set_result(None)
+
+        for fd in fds:
+            self.loop.add_reader(fd, wakeup)
+        handle = self.loop.call_later(timeout, wakeup)
+        try:
+            await waiter
+        finally:
+            handle.cancel()
+            for fd in fds:
+                self.loop.remove_reader(fd)
+
     def runFor(self, timeout):
         self.run(asyncio.sleep(timeout))
 
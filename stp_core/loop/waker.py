@@ -0,0 +1,40 @@
+import os
+
+
+class Waker:
+    """
+    Self-pipe which makes an event driven looper prod a Prodable when work
+    for it is done outside of the looper, e.g. in an executor. `wake` may be
+    called from any thread, the Prodable returns `fileno` from `wakeup_fds`
+    and calls `reset` before it checks for the done work.
+    """
+
+    def __init__(self):
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        os.set_blocking(self._write_fd, False)
+
+    def fileno(self) -> int:
+        return self._read_fd
+
+    def wake(self, *args):
+        try:
+            os.write(self._write_fd, b'\0')
+        except (BlockingIOError, OSError):
+            # The pipe is full, so the looper is going to wake up anyway,
+            # or the waker is closed
+            pass
+
+    def reset(self):
+        try:
+            while os.read(self._read_fd, 4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def close(self):
+        for fd in (self._read_fd, self._write_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
@@ -0,0 +1,66 @@
+import time
+from typing import Mapping
+
+import msgpack
+
+# 0xC1 is never used by msgpack and cannot start a UTF-8 string, so bulk
+# frames cannot be confused with JSON messages or pings
+BULK_FRAME_PREFIX = b'\xc1'
+
+
+def serialize_bulk_frame(msg: Mapping) -> bytes:
+    """
+    Serialize a message into a bulk frame. Bulk frames are msgpack encoded
+    and may be larger than usual messages (see BULK_FRAME_LIMIT).
+    """
+    return BULK_FRAME_PREFIX + msgpack.packb(msg, use_bin_type=True)
+
+
+def is_bulk_frame(msg: bytes) -> bool:
+    return msg[:1] == BULK_FRAME_PREFIX
+
+
+def deserialize_bulk_frame(frame: bytes) -> dict:
+    return msgpack.unpackb(memoryview(frame)[1:], encoding='utf-8')
+
+
+class BandwidthLimiter:
+    """
+    Token bucket limiting the number of bytes sent per second. A send is
+    allowed while the bucket is not empty and may take it below zero, so
+    that frames larger than the bucket still go out at the average rate.
+    """
+
+    def __init__(self, rate: int, burst: int = None,
+                 get_current_time=time.perf_counter):
+        """
+        :param rate: bytes per second, 0 for no limit
+        :param burst: maximum number of bytes sent at once after idling,
+            `rate` by default
+        """
+        self.rate = rate
+        self.burst = burst or rate
+        self.get_current_time = get_current_time
+        self._tokens = self.burst
+        self._updated_at = get_current_time()
+
+    def can_send(self) -> bool:
+        if not self.rate:
+            return True
+        now = self.get_current_time()
+        self._tokens = min(self.burst,
+                           self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        return self._tokens > 0
+
+    def time_to_send(self) -> float:
+        """
+        Seconds until a send is allowed
+        """
+        if self.can_send():
+            return 0
+        return -self._tokens / self.rate
+
+    def sent(self, size: int):
+        if self.rate:
+            self._tokens -= size
@@ -82,6 +82,12 @@ class SMotor(Motor):
     def stop(self):
         self.stack.stop()
 
+    def wakeup_fds(self):
+        return self.stack.wakeup_fds()
+
+    def wakeup_timeout(self):
+        return self.stack.wakeup_timeout()
+
 
 def prepStacks(looper, *stacks, connect=True, useKeys=True):
     motors = []
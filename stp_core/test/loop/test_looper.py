@@ -1,7 +1,13 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 import asyncio
 
 from stp_core.loop.looper import Looper, Prodable
+from stp_core.loop.startable import Status
+from stp_core.loop.waker import Waker
 
 
 def test_hasProdable():
@@ -9,3 +15,140 @@ def test_hasProdable():
     with pytest.raises(ValueError):
         Looper().hasProdable(Prodable(), 'prodable')
     looper.shutdownSync()
+
+
+class PipeReader(Prodable):
+    """
+    Reads from a pipe and wakes up an event driven looper when there is
+    something in it
+    """
+
+    def __init__(self, timeout=None):
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        self.timeout = timeout
+        self.prods = 0
+        self.received_at = []
+
+    def name(self):
+        return 'PipeReader'
+
+    async def prod(self, limit=None) -> int:
+        self.prods += 1
+        try:
+            data = os.read(self._read_fd, 4096)
+        except BlockingIOError:
+            return 0
+        self.received_at.extend(time.perf_counter() for _ in data)
+        return len(data)
+
+    def write(self):
+        os.write(self._write_fd, b'x')
+
+    def start(self, loop):
+        pass
+
+    def stop(self):
+        os.close(self._read_fd)
+        os.close(self._write_fd)
+
+    def get_status(self):
+        return Status.started
+
+    def wakeup_fds(self):
+        return [self._read_fd]
+
+    def wakeup_timeout(self):
+        return self.timeout
+
+
+class PollingProdable(PipeReader):
+    # Does not tell the looper when it has something to do
+
+    def wakeup_fds(self):
+        return Prodable.wakeup_fds(self)
+
+    def wakeup_timeout(self):
+        return Prodable.wakeup_timeout(self)
+
+
+def write_later(looper, reader, delay):
+    written_at = []
+
+    def write():
+        written_at.append(time.perf_counter())
+        reader.write()
+
+    looper.loop.call_later(delay, write)
+    return written_at
+
+
+@pytest.fixture()
+def event_driven_looper():
+    looper = Looper(event_driven=True, max_idle_wait=1)
+    yield looper
+    looper.shutdownSync()
+
+
+def test_event_driven_looper_waits_for_fds(event_driven_looper):
+    looper = event_driven_looper
+    reader = PipeReader()
+    looper.add(reader)
+    looper.runFor(0.1)
+    idle_prods = reader.prods
+    # Nothing to do and no timeout, so it is not prodded every IDLE_SLEEP
+    assert idle_prods <= 3
+
+    written_at = write_later(looper, reader, 0.2)
+    looper.runFor(0.5)
+    assert len(reader.received_at) == 1
+    assert reader.received_at[0] - written_at[0] < 0.1
+    assert reader.prods - idle_prods <= 3
+
+
+def test_event_driven_looper_wakes_up_on_timeout(event_driven_looper):
+    looper = event_driven_looper
+    reader = PipeReader(timeout=0.05)
+    looper.add(reader)
+    looper.runFor(0.5)
+    assert 5 <= reader.prods <= 12
+
+
+def test_event_driven_looper_polls_prodables_without_wakeup_hooks(event_driven_looper):
+    looper = event_driven_looper
+    polling = PollingProdable()
+    looper.add(polling)
+    looper.runFor(0.3)
+    assert polling.prods >= 10
+
+    write_later(looper, polling, 0.05)
+    looper.runFor(0.2)
+    assert len(polling.received_at) == 1
+
+
+def test_waker_wakes_up_event_driven_looper(event_driven_looper):
+    looper = event_driven_looper
+    waker = Waker()
+
+    class WakerReader(PipeReader):
+        def wakeup_fds(self):
+            return [waker.fileno()]
+
+        async def prod(self, limit=None):
+            self.prods += 1
+            waker.reset()
+            return 0
+
+    reader = WakerReader()
+    looper.add(reader)
+    looper.runFor(0.1)
+    prods = reader.prods
+
+    executor = ThreadPoolExecutor(1)
+    future = executor.submit(time.sleep, 0.1)
+    future.add_done_callback(waker.wake)
+    looper.runFor(0.4)
+    executor.shutdown()
+    # Woken up once and then waits for the next wake up again
+    assert 1 <= reader.prods - prods <= 3
+    waker.close()
@@ -51,6 +51,11 @@ class KITZStack(simple_zstack_class, KITNetworkInterface):
 
         self._retry_connect = {}
 
+    def wakeup_timeout(self) -> Optional[float]:
+        timeout = super().wakeup_timeout()
+        next_check = max(0, self.nextCheck - time.perf_counter())
+        return next_check if timeout is None else min(timeout, next_check)
+
     def maintainConnections(self, force=False):
         """
         Ensure appropriate connections.
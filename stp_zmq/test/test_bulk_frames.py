@@ -0,0 +1,93 @@
+import pytest
+
+from stp_core.loop.eventually import eventually
+from stp_core.network.bulk_transfer import serialize_bulk_frame, is_bulk_frame, \
+    deserialize_bulk_frame, BandwidthLimiter
+from stp_core.test.helper import chkPrinted
+from stp_zmq.test.helper import create_and_prep_stacks
+from stp_zmq.zstack import ZStack
+
+
+BULK_OP = 'CATCHUP_REP'
+
+
+@pytest.fixture()
+def stacks(tdir, looper, tconf, monkeypatch):
+    monkeypatch.setattr(tconf, 'BULK_FRAME_LIMIT', 4 * tconf.MSG_LEN_LIMIT)
+    (alpha, beta), printers = create_and_prep_stacks(['Alpha', 'Beta'], tdir, looper, tconf)
+    beta.bulk_frame_ops = frozenset([BULK_OP])
+    return (alpha, beta), printers
+
+
+def test_bulk_frame_serialization():
+    msg = {'op': 'CATCHUP_REP', 'ledgerId': 1,
+           'txns': {'1': {'a': [1, 'b']}}, 'consProof': ['x']}
+    frame = serialize_bulk_frame(msg)
+    assert is_bulk_frame(frame)
+    assert not is_bulk_frame(ZStack.serializeMsg(msg))
+    assert deserialize_bulk_frame(frame) == msg
+
+
+def test_bulk_frames_larger_than_message_limit_are_received(looper, tconf, stacks):
+    (alpha, beta), (_, beta_printer) = stacks
+    msg = {'op': BULK_OP, 'data': 'x' * (2 * tconf.MSG_LEN_LIMIT)}
+
+    assert alpha.transmit_bulk(serialize_bulk_frame(msg), beta.name)
+    looper.run(eventually(chkPrinted, beta_printer, msg))
+
+
+def test_bulk_frames_exceeding_limit_are_rejected(looper, tconf, stacks):
+    (alpha, beta), (_, beta_printer) = stacks
+    big = {'op': BULK_OP, 'data': 'x' * (4 * tconf.MSG_LEN_LIMIT)}
+    small = {'op': BULK_OP, 'data': 'y'}
+
+    assert alpha.transmit_bulk(serialize_bulk_frame(big), beta.name)
+    assert alpha.transmit_bulk(serialize_bulk_frame(small), beta.name)
+    looper.run(eventually(chkPrinted, beta_printer, small))
+    assert all(m != big for m, _ in beta_printer.printeds)
+
+
+def test_bulk_frames_of_not_accepted_ops_are_rejected(looper, tconf, stacks):
+    (alpha, beta), (_, beta_printer) = stacks
+    other = {'op': 'PROPAGATE', 'data': 'x'}
+    small = {'op': BULK_OP, 'data': 'y'}
+
+    assert alpha.transmit_bulk(serialize_bulk_frame(other), beta.name)
+    assert alpha.transmit_bulk(serialize_bulk_frame(small), beta.name)
+    looper.run(eventually(chkPrinted, beta_printer, small))
+    assert all(m != other for m, _ in beta_printer.printeds)
+
+
+def test_bulk_frames_are_rejected_by_default(looper, tconf, stacks):
+    (alpha, beta), (alpha_printer, _) = stacks
+    frame = {'op': BULK_OP, 'data': 'x'}
+    msg = {'op': BULK_OP, 'data': 'y'}
+
+    assert beta.transmit_bulk(serialize_bulk_frame(frame), alpha.name)
+    beta.send(msg, alpha.name)
+    looper.run(eventually(chkPrinted, alpha_printer, msg))
+    assert all(m != frame for m, _ in alpha_printer.printeds)
+
+
+def test_bandwidth_limiter():
+    now = [0.0]
+    limiter = BandwidthLimiter(1000, get_current_time=lambda: now[0])
+
+    # A frame larger than the bucket can be sent, but the next one waits
+    # until the debt is paid
+    assert limiter.can_send()
+    limiter.sent(3000)
+    now[0] = 1.5
+    assert not limiter.can_send()
+    now[0] = 2.1
+    assert limiter.can_send()
+
+    # Idle time is not accumulated beyond the burst
+    now[0] = 100
+    assert limiter.can_send()
+    limiter.sent(1000)
+    assert not limiter.can_send()
+
+    unlimited = BandwidthLimiter(0)
+    unlimited.sent(10 ** 9)
+    assert unlimited.can_send()
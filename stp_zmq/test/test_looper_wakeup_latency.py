@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from stp_core.loop.eventually import eventually
+from stp_core.loop.looper import Looper
+from stp_core.network.port_dispenser import genHa
+from stp_core.test.helper import prepStacks, checkStacksConnected
+from stp_zmq.test.helper import genKeys
+from stp_zmq.zstack import ZStack
+
+HOPS = 20
+ROUNDS = 10
+
+# Latencies depend on the load of the machine, the perf test is run only if
+# `SkipTests` is set to False
+SkipTests = True
+skipper = pytest.mark.skipif(SkipTests, reason='Perf test')
+
+
+class Relay:
+    """
+    Full mesh of stacks passing a message around the ring of them, so every
+    hop is a send by one looper prod and a receive by another one
+    """
+
+    def __init__(self, tdir, tconf, count):
+        self.names = ['Node{}'.format(i) for i in range(count)]
+        genKeys(tdir, self.names)
+        self.finished_at = []
+        self.stacks = [ZStack(name, ha=genHa(), basedirpath=tdir,
+                              msgHandler=self._handler(i), restricted=True,
+                              config=tconf)
+                       for i, name in enumerate(self.names)]
+
+    def _handler(self, i):
+        def handle(wrapped):
+            msg, _ = wrapped
+            if msg['hop'] == HOPS:
+                self.finished_at.append(time.perf_counter())
+            else:
+                self.send(i, msg['hop'] + 1)
+        return handle
+
+    def send(self, i, hop):
+        self.stacks[i].send({'op': 'RELAY', 'hop': hop},
+                            self.names[(i + 1) % len(self.names)])
+
+    def run(self, looper):
+        finished = len(self.finished_at)
+        started = time.perf_counter()
+        self.send(0, 1)
+
+        def check_finished():
+            assert len(self.finished_at) > finished
+
+        looper.run(eventually(check_finished, retryWait=0.05, timeout=10))
+        return self.finished_at[-1] - started
+
+
+@skipper
+@pytest.mark.parametrize('count', [4, 7])
+def test_looper_wakeup_latency(tdir, tconf, count):
+    for event_driven in (False, True):
+        relay = Relay(tdir, tconf, count)
+        with Looper(event_driven=event_driven) as looper:
+            prepStacks(looper, *relay.stacks)
+            looper.run(eventually(checkStacksConnected, relay.stacks,
+                                  retryWait=0.1, timeout=10))
+
+            hop_times = sorted(relay.run(looper) / HOPS for _ in range(ROUNDS))
+            cpu_started = time.process_time()
+            looper.runFor(1)
+            idle_cpu = time.process_time() - cpu_started
+        print("{} stacks, {} looper: {:.2f} ms median hop latency, "
+              "{:.2f} ms max, {:.3f} sec CPU per idle second"
+              .format(count, 'event driven' if event_driven else 'polling',
+                      hop_times[ROUNDS // 2] * 1000, hop_times[-1] * 1000,
+                      idle_cpu))
@@ -0,0 +1,91 @@
+import json
+import time
+import tracemalloc
+
+import pytest
+
+from stp_core.network.port_dispenser import genHa
+from stp_zmq.test.helper import genKeys
+from stp_zmq.zstack import ZStack
+
+MSG_COUNT = 2000
+
+# Memory tracing makes the perf test slow, `SkipTests` set to False runs it
+SkipTests = True
+skipper = pytest.mark.skipif(SkipTests, reason='Perf test')
+
+
+def make_msg(size):
+    return json.dumps({'op': 'TEST', 'data': 'x' * size}).encode()
+
+
+@pytest.fixture()
+def listener(tdir, tconf):
+    genKeys(tdir, ['Alpha'])
+    received = []
+    stack = ZStack('Alpha', ha=genHa(), basedirpath=tdir,
+                   msgHandler=received.append, restricted=False,
+                   onlyListener=True, config=tconf)
+    stack.msgLenVal.max_allowed = 10 ** 9
+    return stack, received
+
+
+def receive(stack, msgs, ident):
+    for msg in msgs:
+        stack._verifyAndAppend(msg, ident)
+    return stack.processReceived(len(msgs))
+
+
+def test_received_messages_are_queued_as_bytes(listener):
+    stack, received = listener
+    msg = make_msg(100)
+    stack._verifyAndAppend(msg, b'client')
+    assert stack.rxMsgs[0] == (msg, b'client')
+    stack.processReceived(1)
+    assert received == [({'op': 'TEST', 'data': 'x' * 100}, b'client')]
+
+
+def test_health_messages_on_raw_bytes(listener):
+    stack, received = listener
+    handled = []
+    stack.handlePingPong = lambda msg, frm, ident: handled.append(msg)
+    receive(stack, [b'pi', b'po', b'"p"'], b'client')
+    assert handled == ['pi', 'po']
+    assert received == [('p', b'client')]
+
+
+def test_invalid_utf8_message_is_rejected(listener):
+    stack, received = listener
+    rejected = []
+    stack.msgRejectHandler = lambda reason, frm: rejected.append(frm)
+    receive(stack, [b'{"a": "\xff"}', b'{"a": "\x9c"}', b'{"a": '], b'client')
+    assert rejected == [b'client', b'client']
+    assert received == []
+
+
+@skipper
+@pytest.mark.parametrize('size', [100, 10000, 100000])
+def test_receive_perf(listener, size, capsys):
+    stack, received = listener
+    msg = make_msg(size)
+    msgs = [msg] * MSG_COUNT
+
+    start = time.perf_counter()
+    receive(stack, msgs, b'client')
+    elapsed = time.perf_counter() - start
+    assert len(received) == MSG_COUNT
+
+    # Memory allocated while a message is received and processed on top of
+    # the received buffer and the deserialized message, i.e. the copies
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    stack.msgHandler = lambda m: None
+    receive(stack, [msg], b'client')
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    parsed_size = len(msg) - len(b'{"op":"TEST","data":""}')
+
+    with capsys.disabled():
+        print("{} messages of {} bytes: {:.0f} messages/sec, {} bytes copied per message"
+              .format(MSG_COUNT, len(msg), MSG_COUNT / elapsed,
+                      max(peak - baseline - parsed_size, 0)))
@@ -19,7 +19,7 @@ import sys
 import time
 from binascii import hexlify, unhexlify
 from collections import deque
-from typing import Mapping, Tuple, Any, Union, Optional, NamedTuple
+from typing import Mapping, Tuple, Any, Union, Optional, NamedTuple, List
 
 from common.exceptions import PlenumTypeError, PlenumValueError
 
@@ -34,11 +34,13 @@ from zmq.utils.monitor import recv_monitor_message
 
 import zmq
 from stp_core.common.log import getlogger
+from stp_core.network.bulk_transfer import is_bulk_frame, deserialize_bulk_frame
 from stp_core.network.network_interface import NetworkInterface
 from stp_zmq.util import createEncAndSigKeys, \
     moveKeyFilesToCorrectLocations, createCertsFromKeys
 from stp_zmq.remote import Remote, set_keepalive, set_zmq_internal_queue_size
-from plenum.common.exceptions import InvalidMessageExceedingSizeException, BaseExc
+from plenum.common.exceptions import InvalidMessageExceedingSizeException, BaseExc, \
+    InvalidBulkFrameException
 from stp_core.validators.message_length_validator import MessageLenValidator
 
 logger = getlogger()
@@ -91,6 +93,10 @@ class ZStack(NetworkInterface):
         self.listenerSize = self.config.DEFAULT_LISTENER_SIZE
         self.senderQuota = self.config.DEFAULT_SENDER_QUOTA
         self.msgLenVal = MessageLenValidator(self.config.MSG_LEN_LIMIT)
+        self.bulkFrameLenVal = MessageLenValidator(self.config.BULK_FRAME_LIMIT)
+        # Operations of messages accepted in bulk frames, none by default so
+        # that only stacks of nodes receive them
+        self.bulk_frame_ops = frozenset()
 
         self.homeDir = None
         # As of now there would be only one file in secretKeysDir and sigKeyDir
@@ -496,6 +502,40 @@ class ZStack(NetworkInterface):
             return self.processReceived(pracLimit)
         return 0
 
+    def wakeup_fds(self) -> List[int]:
+        """
+        File descriptors signalling events of ZMQ sockets of the stack (see
+        ZMQ_FD), an event driven looper waits for them to become readable
+        """
+        fds = [self.listener.FD] if self.listener else []
+        fds.extend(remote.socket.FD for remote in self.remotes.values()
+                   if remote.socket)
+        return fds
+
+    def has_pending_input(self) -> bool:
+        """
+        Whether ZMQ sockets of the stack have messages to receive. ZMQ_FD is
+        edge triggered, so messages left unread (e.g. due to quotas) are not
+        signalled again, the check also rearms it.
+        """
+        socks = [self.listener] if self.listener else []
+        socks.extend(remote.socket for remote in self.remotes.values()
+                     if remote.socket)
+        return any(sock.getsockopt(zmq.EVENTS) & zmq.POLLIN for sock in socks)
+
+    def wakeup_timeout(self) -> Optional[float]:
+        """
+        Seconds the stack can wait for `wakeup_fds` before it is serviced
+        again, None if it has nothing to do until then
+        """
+        if self.rxMsgs or self.has_pending_input():
+            return 0
+        if self.config.ENABLE_HEARTBEATS:
+            if self.last_heartbeat_at is None:
+                return 0
+            return max(0, self.last_heartbeat_at + self.config.HEARTBEAT_FREQ - time.perf_counter())
+        return None
+
     def _verifyAndAppend(self, msg, ident):
         try:
             ident.decode()
@@ -505,17 +545,24 @@ class ZStack(NetworkInterface):
             return False
         try:
             self.metrics.add_event(self.mt_incoming_size, len(msg))
-            self.msgLenVal.validate(msg)
-            decoded = msg.decode()
-        except (UnicodeDecodeError, InvalidMessageExceedingSizeException) as ex:
-            errstr = 'Message will be discarded due to {}'.format(ex)
-            frm = self.remotesByKeys[ident].name if ident in self.remotesByKeys else ident
-            logger.error("Got from {} {}".format(z85_to_friendly(frm), errstr))
-            self.msgRejectHandler(errstr, frm)
+            if self.bulk_frame_ops and is_bulk_frame(msg):
+                self.bulkFrameLenVal.validate(msg)
+            else:
+                self.msgLenVal.validate(msg)
+        except InvalidMessageExceedingSizeException as ex:
+            self._rejectMsg(ex, ident)
             return False
-        self.rxMsgs.append((decoded, ident))
+        # Messages are queued as received bytes and decoded only once, when
+        # they are deserialized
+        self.rxMsgs.append((msg, ident))
         return True
 
+    def _rejectMsg(self, reason, ident):
+        errstr = 'Message will be discarded due to {}'.format(reason)
+        frm = self.remotesByKeys[ident].name if ident in self.remotesByKeys else ident
+        logger.error("Got from {} {}".format(z85_to_friendly(frm), errstr))
+        self.msgRejectHandler(errstr, frm)
+
     def _receiveFromListener(self, quota: Quota) -> int:
         """
         Receives messages from listener
@@ -617,7 +664,10 @@ class ZStack(NetworkInterface):
             if not self.config.RETRY_CONNECT and ident in self.remotesByKeys:
                 self.remotesByKeys[ident].setConnected()
 
-            if self.handlePingPong(msg, frm, ident):
+            # Health messages are recognised on raw bytes, the length check
+            # avoids hashing every big message
+            if len(msg) == 2 and msg in self.healthMessages:
+                self.handlePingPong(msg.decode(), frm, ident)
                 continue
 
             if not self.onlyListener and ident not in self.remotesByKeys:
@@ -631,7 +681,13 @@ class ZStack(NetworkInterface):
                 continue
 
             try:
-                msg = self.deserializeMsg(msg)
+                if self.bulk_frame_ops and is_bulk_frame(msg):
+                    msg = self._deserialize_bulk_frame(msg)
+                else:
+                    msg = self.deserializeMsg(msg)
+            except (UnicodeDecodeError, InvalidBulkFrameException) as ex:
+                self._rejectMsg(ex, ident)
+                continue
             except Exception as e:
                 logger.error('Error {} while converting message {} '
                              'to JSON from {}'.format(e, msg, z85_to_friendly(ident)))
@@ -867,6 +923,26 @@ class ZStack(NetworkInterface):
             logger.warning(err_str)
         return False, err_str
 
+    def transmit_bulk(self, frame: bytes, uid) -> bool:
+        """
+        Send a serialized bulk frame to the remote unless its socket queue
+        is full.
+
+        :return: False if the frame should be sent later, True if it was
+            sent or cannot be sent at all
+        """
+        remote = self.remotes.get(uid)
+        if not remote or not remote.socket:
+            logger.debug("{} cannot send bulk frame to {}: no socket"
+                         .format(self, z85_to_friendly(uid)))
+            return True
+        try:
+            remote.socket.send(frame, flags=zmq.NOBLOCK, copy=False)
+        except zmq.Again:
+            return False
+        self.metrics.add_event(self.mt_outgoing_size, len(frame))
+        return True
+
     @staticmethod
     def serializeMsg(msg):
         if isinstance(msg, Mapping):
@@ -878,11 +954,19 @@ class ZStack(NetworkInterface):
 
     @staticmethod
     def deserializeMsg(msg):
-        if isinstance(msg, bytes):
-            msg = msg.decode()
+        if isinstance(msg, (bytes, bytearray, memoryview)):
+            msg = bytes(msg).decode()
         msg = json.loads(msg)
         return msg
 
+    def _deserialize_bulk_frame(self, frame: bytes) -> dict:
+        msg = deserialize_bulk_frame(frame)
+        op = msg.get(OP_FIELD_NAME) if isinstance(msg, Mapping) else None
+        if op not in self.bulk_frame_ops:
+            raise InvalidBulkFrameException(
+                'operation {} not accepted in bulk frames'.format(op))
+        return msg
+
     def signedMsg(self, msg: bytes, signer: Signer = None):
         sig = self.signer.signature(msg)
         return msg + sig